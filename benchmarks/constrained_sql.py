@@ -0,0 +1,90 @@
+"""
+SQL generation with and without a grammar: retry rate and end-to-end latency.
+
+Asks a GGUF model the questions below against a small plant schema, once
+free-running and once constrained to ``sql_grammar`` of that schema. An
+answer that fails ``check_sql`` is regenerated, as a caller without
+constraints has to, up to --attempts times. Latency is per question,
+retries included.
+
+    python benchmarks/constrained_sql.py --model models/llm/qwen2.5-0.5b-instruct-q4_k_m.gguf
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from sheaia.agents.query import QueryAgent
+from sheaia.core.grammar import check_sql
+from sheaia.core.llm import GenerationConfig, LlamaCppLLM
+from sheaia.i18n import Language
+
+TABLES = {
+    "production": ["day", "line", "shift", "units", "defects"],
+    "machines": ["machine_id", "line", "status", "downtime_minutes"],
+    "orders": ["order_id", "customer", "region", "amount", "day"],
+}
+SCHEMA = "\n".join(f"{table}({', '.join(columns)})" for table, columns in TABLES.items())
+
+QUESTIONS = [
+    "How many units did line 3 produce yesterday?",
+    "What is the defect rate per line this month?",
+    "Which machines have more than 60 minutes of downtime?",
+    "Total order amount by region for 2025",
+    "Which shift had the most defects last week?",
+    "List the ten largest orders with their customers",
+    "Average downtime per line for machines that are stopped",
+    "How many orders did each customer place this year?",
+    "Daily units and defects for line 1 in the last 30 days",
+    "Which regions have an order total above 100000?",
+]
+
+
+async def run(llm: LlamaCppLLM, constrained: bool, attempts: int, max_tokens: int) -> dict:
+    agent = QueryAgent(
+        llm=llm,
+        schema=SCHEMA,
+        config=GenerationConfig(max_tokens=max_tokens, temperature=0.1),
+        tables=TABLES if constrained else None,
+    )
+    latencies, retries, failures = [], 0, 0
+    for question in QUESTIONS:
+        started = time.perf_counter()
+        for attempt in range(attempts):
+            result = await agent.run(question, Language.EN)
+            if not check_sql(result.sql or "", TABLES):
+                break
+            if attempt + 1 < attempts:
+                retries += 1
+        else:
+            failures += 1
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    return {
+        "retries per question": retries / len(QUESTIONS),
+        "failed": failures / len(QUESTIONS),
+        "median s": statistics.median(latencies),
+        "p95 s": latencies[max(0, int(len(latencies) * 0.95) - 1)],
+        "total s": sum(latencies),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", required=True, help="GGUF model file")
+    parser.add_argument("--attempts", type=int, default=3, help="Generations allowed per question")
+    parser.add_argument("--max-tokens", type=int, default=256)
+    parser.add_argument("--gpu-layers", type=int, default=-1)
+    options = parser.parse_args()
+    
+    llm = LlamaCppLLM(options.model, n_ctx=4096, n_gpu_layers=options.gpu_layers, prompt_cache_bytes=0)
+    llm.load_model()
+    
+    for label, constrained in (("unconstrained", False), ("grammar", True)):
+        stats = asyncio.run(run(llm, constrained, options.attempts, options.max_tokens))
+        print(f"{label:>13}: " + ", ".join(f"{name} {value:.2f}" for name, value in stats.items()))
+
+
+if __name__ == "__main__":
+    main()
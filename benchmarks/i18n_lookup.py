@@ -0,0 +1,97 @@
+"""
+Translation lookup cost: compiled catalog vs. the original dict-of-dicts.
+
+Times ``t()`` with and without interpolation, ``Language.from_string`` on
+typical header values, and the frontend export, against reference copies
+of the original implementations.
+
+    python benchmarks/i18n_lookup.py --calls 200000
+"""
+
+import argparse
+import timeit
+
+from sheaia.i18n import (
+    TRANSLATIONS,
+    Language,
+    export_translations,
+    get_translations_for_language,
+    t,
+)
+
+
+def legacy_t(key: str, lang: Language = Language.EN, **kwargs: str) -> str:
+    translations = TRANSLATIONS.get(key, {})
+    template = translations.get(lang)
+    if not template:
+        template = translations.get(Language.EN, key)
+    if kwargs:
+        try:
+            return template.format(**kwargs)
+        except KeyError:
+            return template
+    return template
+
+
+def legacy_from_string(value: str) -> Language:
+    value = value.lower().strip()
+    if value.startswith("zh-tw") or value.startswith("zh-hant"):
+        return Language.ZH_TW
+    elif value.startswith("zh"):
+        return Language.ZH_CN
+    elif value.startswith("th"):
+        return Language.TH
+    elif value.startswith("en"):
+        return Language.EN
+    for lang in Language:
+        if lang.value.lower() == value:
+            return lang
+    return Language.EN
+
+
+def legacy_export(lang: Language) -> dict:
+    result = {}
+    for key, translations in TRANSLATIONS.items():
+        result[key] = translations.get(lang, translations.get(Language.EN, key))
+    return result
+
+
+# Enum member access is itself slow; resolve once so only the lookups are timed.
+ZH_CN, ZH_TW, TH = Language.ZH_CN, Language.ZH_TW, Language.TH
+from_string = Language.from_string
+
+CASES = {
+    "t() plain": (
+        lambda: t("common.save", ZH_TW),
+        lambda: legacy_t("common.save", ZH_TW),
+    ),
+    "t() interpolated": (
+        lambda: t("connector.last_sync", TH, time="10:42"),
+        lambda: legacy_t("connector.last_sync", TH, time="10:42"),
+    ),
+    "from_string": (
+        lambda: from_string("zh-Hant-TW"),
+        lambda: legacy_from_string("zh-Hant-TW"),
+    ),
+    "export": (
+        lambda: export_translations(ZH_CN),
+        lambda: legacy_export(ZH_CN),
+    ),
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200_000)
+    options = parser.parse_args()
+    
+    assert get_translations_for_language(Language.ZH_CN) == legacy_export(Language.ZH_CN)
+    for label, (compiled, legacy) in CASES.items():
+        calls = options.calls if label != "export" else options.calls // 100
+        new = min(timeit.repeat(compiled, number=calls, repeat=5)) / calls
+        old = min(timeit.repeat(legacy, number=calls, repeat=5)) / calls
+        print(f"{label:<18} compiled {new * 1e9:8.0f} ns   original {old * 1e9:8.0f} ns   {old / new:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
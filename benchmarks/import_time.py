@@ -0,0 +1,92 @@
+"""
+Cold-start import audit.
+
+Measures how long fresh interpreters take to run each startup target and
+lists the imports that dominate it, using ``python -X importtime``.
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --top 30 --runs 10
+    python benchmarks/import_time.py "from sheaia.agents import Coordinator"
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+TARGETS = {
+    "cli": ["-m", "sheaia.cli"],
+    "api": ["-c", "from sheaia.api import app"],
+}
+
+# Dependencies that must never load as a side effect of starting up.
+HEAVY = (
+    "numpy", "pandas", "torch", "sentence_transformers", "llama_cpp",
+    "langchain", "langchain_core", "langgraph", "pymilvus",
+    "clickhouse_connect", "sqlalchemy", "networkx",
+)
+
+
+def run(args: list[str], *flags: str) -> subprocess.CompletedProcess:
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    return subprocess.run(
+        [sys.executable, *flags, *args], capture_output=True, text=True, env=env, check=True
+    )
+
+
+def cold_start(args: list[str], runs: int) -> list[float]:
+    """Wall time of ``runs`` fresh interpreters, in seconds."""
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        run(args)
+        times.append(time.perf_counter() - started)
+    return times
+
+
+def import_profile(args: list[str]) -> list[tuple[int, int, str]]:
+    """``(self_us, cumulative_us, module)`` for every import, slowest first."""
+    stderr = run(args, "-X", "importtime").stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(own), int(cumulative), name.rstrip()))
+    return sorted(rows, key=lambda row: row[1], reverse=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("statements", nargs="*", help="Python statements to audit instead of the defaults")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    options = parser.parse_args()
+    
+    targets = {s: ["-c", s] for s in options.statements} or TARGETS
+    baseline = statistics.median(cold_start(["-c", "pass"], options.runs))
+    print(f"interpreter baseline: {baseline * 1000:.0f} ms\n")
+    
+    for label, args in targets.items():
+        times = cold_start(args, options.runs)
+        profile = import_profile(args)
+        loaded = {name.strip().split(".")[0] for _, _, name in profile}
+        heavy = sorted(loaded.intersection(HEAVY))
+        
+        print(f"== {label}: {' '.join(args)}")
+        print(
+            f"   median {statistics.median(times) * 1000:.0f} ms, "
+            f"min {min(times) * 1000:.0f} ms "
+            f"(+{(min(times) - baseline) * 1000:.0f} ms over baseline)"
+        )
+        print(f"   heavy dependencies loaded: {', '.join(heavy) or 'none'}")
+        print(f"   {'cumulative':>10}  {'self':>8}  module")
+        for own, cumulative, name in profile[:options.top]:
+            print(f"   {cumulative / 1000:>8.1f}ms  {own / 1000:>6.1f}ms  {name}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
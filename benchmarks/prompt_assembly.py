@@ -0,0 +1,77 @@
+"""
+Prompt assembly overhead per request.
+
+Assembles a typical chat prompt - cached system prompt and schema, eight
+retrieved chunks, an uncached question - with a word-level tokenizer
+standing in for the model's, and reports the time per request with cold
+and warm token caches.
+
+    python benchmarks/prompt_assembly.py --requests 2000
+"""
+
+import argparse
+import re
+import statistics
+import time
+
+from sheaia.core.prompt import PromptAssembler, Section
+from sheaia.i18n import Language
+from sheaia.i18n.prompts import get_system_prompt
+
+
+class WordTokenizer:
+    """Word-level tokenizer with the ``BaseLLM`` tokenize interface."""
+    
+    context_length = 16384
+    
+    def __init__(self):
+        self.vocab: dict[str, int] = {}
+    
+    def tokenize(self, text: str, add_bos: bool = False) -> list[int]:
+        tokens = [1] if add_bos else []
+        for piece in re.findall(r"\S+|\s+", text):
+            tokens.append(self.vocab.setdefault(piece, len(self.vocab) + 2))
+        return tokens
+
+
+SCHEMA = "\n".join(f"table_{i}(id, name, amount, created_at, plant_{i % 7})" for i in range(40))
+CHUNKS = [f"Excerpt {i}: " + " ".join(f"word{j}" for j in range(i * 40, i * 40 + 300)) for i in range(8)]
+
+
+def sections(question: str) -> list[Section]:
+    return [
+        Section(get_system_prompt(Language.EN), required=True, cache=True, name="system"),
+        Section(SCHEMA, priority=5, cache=True, truncate="end", name="schema"),
+        *(Section(chunk, priority=1, cache=True, name=f"chunk {i}") for i, chunk in enumerate(CHUNKS)),
+        Section(question, required=True, name="question"),
+    ]
+
+
+def run(requests: int, warm: bool) -> list[float]:
+    assembler = PromptAssembler(WordTokenizer())
+    timings = []
+    for i in range(requests):
+        if not warm:
+            assembler._cache.clear()
+        started = time.perf_counter()
+        assembler.assemble(sections(f"What was plant {i % 7} output in week {i}?"), max_tokens=1024)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=1000)
+    options = parser.parse_args()
+    
+    for label, warm in (("cold cache", False), ("warm cache", True)):
+        timings = sorted(run(options.requests, warm))
+        p99 = timings[int(len(timings) * 0.99) - 1]
+        print(
+            f"{label}: median {statistics.median(timings) * 1e6:.0f} us, "
+            f"p99 {p99 * 1e6:.0f} us per request"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Sustained tag ingestion rate on one core.
+
+Feeds simulated plant tags (pre-generated, so generation is not timed)
+through ``TagStore.ingest`` with 1 s / 1 min / 1 h rollups, draining closed
+buckets every batch, and optionally writing them as compressed batches.
+The process is pinned to one CPU and NumPy to one thread.
+
+    python benchmarks/tag_ingest.py --tags 5000 --rate 10 --seconds 60
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+for _variable in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+    os.environ.setdefault(_variable, "1")
+
+# Thread counts must be set before NumPy is first imported.
+from sheaia.connectors.industrial import CompressedBatchWriter, TagSimulator, TagStore  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tags", type=int, default=5000)
+    parser.add_argument("--rate", type=float, default=10.0, help="Samples per second per tag")
+    parser.add_argument("--seconds", type=float, default=60.0, help="Simulated time to ingest")
+    parser.add_argument("--batch", type=float, default=0.1, help="Simulated seconds per batch")
+    parser.add_argument("--capacity", type=int, default=4096)
+    parser.add_argument("--by-id", action="store_true", help="Send tag ids instead of names")
+    parser.add_argument("--write", action="store_true", help="Write compressed rollup batches to a temp dir")
+    options = parser.parse_args()
+    
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, {min(os.sched_getaffinity(0))})
+    
+    simulator = TagSimulator(tags=options.tags, rate_hz=options.rate)
+    store = TagStore(capacity=options.capacity, tags=options.tags)
+    batches = []
+    for i in range(int(options.seconds / options.batch)):
+        samples = simulator.batch(1_700_000_000.0 + i * options.batch, options.batch)
+        if options.by_id:
+            samples = samples._replace(tags=store.tag_ids(samples.tags))
+        batches.append(samples)
+    total = sum(len(b.values) for b in batches)
+    
+    with tempfile.TemporaryDirectory() as directory:
+        writer = CompressedBatchWriter(directory)
+        rows = 0
+        started = time.perf_counter()
+        for samples in batches:
+            store.ingest(*samples)
+            store.close_before(store.latest - 2.0)
+            for rollup in store.drain():
+                rows += len(rollup.frame)
+                if options.write:
+                    asyncio.run(writer(rollup))
+        elapsed = time.perf_counter() - started
+    
+    print(f"{total:,} samples from {options.tags:,} tags in {elapsed:.2f} s")
+    print(f"{total / elapsed:,.0f} samples/s sustained, {elapsed / total * 1e9:.0f} ns/sample")
+    print(f"{rows:,} rollup rows flushed ({rows / total:.3%} of samples)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Prompt tokens saved and selection latency with many connector tools.
+
+Registers synthetic connectors (three tools each) and, for a set of
+questions, compares the prompt tokens of listing every tool against the
+top-k selection, and times ``ToolRegistry.select``. A hashed bag-of-words
+embedding stands in for the model unless ``--model`` is given.
+
+    python benchmarks/tool_selection.py --tools 500 --k 8
+    python benchmarks/tool_selection.py --tools 500 --model
+"""
+
+import argparse
+import asyncio
+import random
+import re
+import statistics
+import time
+import zlib
+
+import numpy as np
+
+from sheaia.agents.tools import Tool, ToolRegistry
+from sheaia.core.llm import estimate_tokens
+
+SYSTEMS = ["kingdee", "sap", "yonyou", "mes", "scada", "wms", "crm", "csv", "excel", "postgres"]
+SUBJECTS = [
+    "purchase orders", "suppliers", "inventory", "work orders", "scrap", "downtime", "energy use",
+    "furnace temperatures", "shipments", "invoices", "employees", "shifts", "quality inspections",
+    "maintenance tickets", "sales orders", "customers", "spare parts", "batch genealogy", "utility meters",
+    "warehouse bins",
+]
+
+
+class HashedEmbedding:
+    """Hashed bag-of-words vectors: deterministic and fast, no model needed."""
+    
+    dimension = 512
+    
+    def _vector(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        for word in re.findall(r"[a-z0-9]+", text.lower()):
+            vector[zlib.crc32(word.encode()) % self.dimension] += 1.0
+        return vector
+    
+    def embed_documents(self, texts: list[str]) -> np.ndarray:
+        return np.stack([self._vector(text) for text in texts])
+    
+    def embed_query(self, text: str) -> np.ndarray:
+        return self._vector(text)
+
+
+def tools(count: int, rng: random.Random) -> list[Tool]:
+    made = []
+    for i in range((count + 2) // 3):
+        system = SYSTEMS[i % len(SYSTEMS)]
+        subjects = ", ".join(rng.sample(SUBJECTS, 3))
+        key = f"{system}_{i}"
+        for verb, action in (("fetch_data", "Fetch rows about"), ("discover_schema", "List tables for"), ("sync", "Load new data on")):
+            made.append(Tool(
+                name=f"{key}.{verb}",
+                description=f"{action} {subjects} from the plant {i} {system} system.",
+                parameters={"query": "string"} if verb == "fetch_data" else {},
+                connector=key,
+            ))
+    return made[:count]
+
+
+async def run(options) -> None:
+    rng = random.Random(0)
+    embedding = None
+    if not options.model:
+        embedding = HashedEmbedding()
+    registry = ToolRegistry(embedding=embedding, top_k=options.k)
+    registry.add(*tools(options.tools, rng))
+    questions = [
+        f"How many {rng.choice(SUBJECTS)} did plant {rng.randrange(options.tools // 3)} have last week?"
+        for _ in range(options.questions)
+    ]
+    
+    started = time.perf_counter()
+    await registry._build()
+    indexed = time.perf_counter() - started
+    
+    all_tokens = estimate_tokens(registry.render_all())
+    cold, warm, selected = [], [], []
+    for question in questions:
+        selection = await registry.select(question)
+        cold.append(selection.elapsed)
+        selected.append(estimate_tokens(selection.render()))
+    for question in questions:
+        warm.append((await registry.select(question)).elapsed)
+    
+    print(f"{len(registry.tools)} tools indexed in {indexed * 1e3:.0f} ms")
+    print(
+        f"prompt tokens: all tools {all_tokens:,}, top-{options.k} {statistics.mean(selected):.0f} "
+        f"({1 - statistics.mean(selected) / all_tokens:.1%} saved per step)"
+    )
+    for label, timings in (("new question", cold), ("repeated question", warm)):
+        timings = sorted(timings)
+        p99 = timings[int(len(timings) * 0.99) - 1]
+        print(f"select, {label}: median {statistics.median(timings) * 1e6:.0f} us, p99 {p99 * 1e6:.0f} us")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tools", type=int, default=500)
+    parser.add_argument("--k", type=int, default=8, help="Tools selected per step")
+    parser.add_argument("--questions", type=int, default=500)
+    parser.add_argument("--model", action="store_true", help="Use the configured embedding model")
+    options = parser.parse_args()
+    asyncio.run(run(options))
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,14 @@ SHEAIA - AI-Powered Enterprise Insights Platform
 __version__ = "0.1.0"
 __author__ = "SHEAIA Team"
 
-from sheaia.config.settings import Settings, get_settings
-
 __all__ = ["Settings", "get_settings", "__version__"]
+
+
+def __getattr__(name: str):
+    # Settings pull in pydantic-settings and YAML; load them on first use so
+    # `import sheaia` (and every subpackage import) stays cheap.
+    if name in ("Settings", "get_settings"):
+        from sheaia.config import settings
+        
+        return getattr(settings, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1 +1,26 @@
 """LangGraph agents module."""
+
+from importlib import import_module
+
+# Exports resolve on first access so importing one agent does not load LangGraph.
+_EXPORTS = {
+    "AgentResult": "sheaia.agents.base",
+    "SubAgent": "sheaia.agents.base",
+    "Coordinator": "sheaia.agents.coordinator",
+    "CoordinatorResult": "sheaia.agents.coordinator",
+    "DocumentAgent": "sheaia.agents.document",
+    "QueryAgent": "sheaia.agents.query",
+    "Report": "sheaia.agents.reports",
+    "ReportEngine": "sheaia.agents.reports",
+    "ReportScheduler": "sheaia.agents.reports",
+    "Tool": "sheaia.agents.tools",
+    "ToolRegistry": "sheaia.agents.tools",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    if name in _EXPORTS:
+        return getattr(import_module(_EXPORTS[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,51 @@
+"""Base classes shared by the specialist agents."""
+
+from abc import ABC, abstractmethod
+from typing import Literal, Optional
+
+from pydantic import BaseModel
+
+from sheaia.core.llm import BaseLLM, get_llm
+from sheaia.i18n import Language
+from sheaia.i18n.prompts import get_system_prompt
+
+
+class AgentResult(BaseModel):
+    """Result of one specialist agent branch."""
+    
+    agent: str
+    status: Literal["ok", "timeout", "error"] = "ok"
+    content: str = ""
+    sources: list[dict] = []
+    sql: Optional[str] = None
+    elapsed: float = 0.0
+    error: Optional[str] = None
+
+
+class SubAgent(ABC):
+    """Abstract base class for agents the coordinator delegates to."""
+    
+    name: str = ""
+    
+    def __init__(self, llm: Optional[BaseLLM] = None):
+        self._llm = llm
+    
+    @property
+    def llm(self) -> BaseLLM:
+        """Return the agent's LLM, falling back to the global instance."""
+        if self._llm is None:
+            self._llm = get_llm()
+        return self._llm
+    
+    @abstractmethod
+    async def run(self, question: str, language: Language) -> AgentResult:
+        """Handle the question and return the branch result."""
+        ...
+
+
+def build_prompt(language: Language, task_prompt: str) -> str:
+    """Prefix a task prompt with the system prompt for the language."""
+    return f"{get_system_prompt(language)}\n\n{task_prompt}"
+
+
+__all__ = ["AgentResult", "SubAgent", "build_prompt"]
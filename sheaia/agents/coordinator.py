@@ -0,0 +1,219 @@
+"""Coordinator agent - fans a request out to specialist agents in parallel."""
+
+import asyncio
+import logging
+import time
+from typing import Annotated, Awaitable, Callable, Optional, TypedDict
+
+from langgraph.graph import END, START, StateGraph
+from langgraph.types import Send
+from pydantic import BaseModel
+
+from sheaia.agents.base import AgentResult, SubAgent, build_prompt
+from sheaia.core.llm import BaseLLM, GenerationConfig, get_llm
+from sheaia.core.metrics import span
+from sheaia.i18n import Language, get_language, t
+from sheaia.i18n.prompts import get_synthesis_prompt
+
+logger = logging.getLogger(__name__)
+
+# A router picks which agents handle a question; the default sends it to all of them.
+Router = Callable[[str, list[str]], Awaitable[list[str]]]
+
+
+def _merge_results(
+    left: dict[str, AgentResult],
+    right: dict[str, AgentResult],
+) -> dict[str, AgentResult]:
+    """Reducer so parallel branches can each add their own result."""
+    return {**left, **right}
+
+
+class CoordinatorState(TypedDict, total=False):
+    """Graph state for one coordinated request."""
+    
+    question: str
+    language: Language
+    deadline: float
+    tasks: list[str]
+    results: Annotated[dict[str, AgentResult], _merge_results]
+    answer: str
+
+
+class CoordinatorResult(BaseModel):
+    """Outcome of a coordinated request."""
+    
+    answer: str
+    results: dict[str, AgentResult] = {}
+    elapsed: float = 0.0
+    
+    @property
+    def sources(self) -> list[dict]:
+        """Sources cited by all successful branches."""
+        return [s for r in self.results.values() if r.status == "ok" for s in r.sources]
+    
+    @property
+    def sql(self) -> Optional[str]:
+        """SQL produced by a successful branch, if any."""
+        return next((r.sql for r in self.results.values() if r.status == "ok" and r.sql), None)
+    
+    @property
+    def abandoned(self) -> list[str]:
+        """Agents that ran past the latency budget."""
+        return [name for name, r in self.results.items() if r.status == "timeout"]
+
+
+class Coordinator:
+    """
+    Supervisor that runs independent sub-tasks concurrently.
+
+    Every selected agent becomes its own branch of a LangGraph fan-out, so
+    document retrieval and SQL generation for the same question overlap
+    instead of running in a chain. Branches still running when the latency
+    budget expires are abandoned and the answer is synthesized from the rest.
+    """
+    
+    def __init__(
+        self,
+        agents: list[SubAgent],
+        llm: Optional[BaseLLM] = None,
+        router: Optional[Router] = None,
+        latency_budget_s: Optional[float] = None,
+        synthesis_config: Optional[GenerationConfig] = None,
+    ):
+        names = [agent.name for agent in agents]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Agent names must be unique: {names}")
+        
+        self.agents = {agent.name: agent for agent in agents}
+        self._llm = llm
+        self.router = router
+        if latency_budget_s is None:
+            from sheaia.config import get_settings
+            
+            latency_budget_s = get_settings().agents.latency_budget_s
+        self.latency_budget_s = latency_budget_s
+        self.synthesis_config = synthesis_config or GenerationConfig(max_tokens=1024, temperature=0.3)
+        self._graph = self._build_graph()
+    
+    @property
+    def llm(self) -> BaseLLM:
+        """Return the synthesis LLM, falling back to the global instance."""
+        if self._llm is None:
+            self._llm = get_llm()
+        return self._llm
+    
+    def _build_graph(self):
+        graph = StateGraph(CoordinatorState)
+        graph.add_node("plan", self._plan)
+        graph.add_node("synthesize", self._synthesize)
+        for name, agent in self.agents.items():
+            graph.add_node(name, self._make_branch(agent))
+            graph.add_edge(name, "synthesize")
+        
+        graph.add_edge(START, "plan")
+        graph.add_conditional_edges("plan", self._fan_out, [*self.agents, "synthesize"])
+        graph.add_edge("synthesize", END)
+        return graph.compile()
+    
+    async def _plan(self, state: CoordinatorState) -> dict:
+        tasks = state.get("tasks")
+        if tasks is None:
+            available = list(self.agents)
+            tasks = await self.router(state["question"], available) if self.router else available
+        unknown = [name for name in tasks if name not in self.agents]
+        if unknown:
+            raise ValueError(f"Unknown agents: {unknown}")
+        return {"tasks": tasks}
+    
+    def _fan_out(self, state: CoordinatorState) -> list[Send] | str:
+        if not state["tasks"]:
+            return "synthesize"
+        return [Send(name, state) for name in state["tasks"]]
+    
+    def _make_branch(self, agent: SubAgent):
+        stage = f"agent.{agent.name}"
+        
+        async def branch(state: CoordinatorState) -> dict:
+            started = time.monotonic()
+            remaining = state["deadline"] - started
+            try:
+                if remaining <= 0:
+                    raise TimeoutError
+                with span(stage):
+                    result = await asyncio.wait_for(
+                        agent.run(state["question"], state["language"]),
+                        timeout=remaining,
+                    )
+            except TimeoutError:
+                logger.warning(f"Agent '{agent.name}' exceeded the latency budget, abandoning")
+                result = AgentResult(agent=agent.name, status="timeout", error="latency budget exceeded")
+            except Exception as e:
+                logger.exception(f"Agent '{agent.name}' failed")
+                result = AgentResult(agent=agent.name, status="error", error=str(e))
+            result.elapsed = time.monotonic() - started
+            return {"results": {agent.name: result}}
+        
+        return branch
+    
+    async def _synthesize(self, state: CoordinatorState) -> dict:
+        language = state["language"]
+        results = state.get("results", {})
+        succeeded = [r for r in results.values() if r.status == "ok" and r.content]
+        
+        if not succeeded:
+            reasons = ", ".join(f"{r.agent}: {r.error}" for r in results.values() if r.error)
+            return {"answer": t("error.query_failed", language, reason=reasons or "no results")}
+        
+        # A single finding needs no merging - skip the extra LLM round trip.
+        if len(succeeded) == 1:
+            return {"answer": succeeded[0].content}
+        
+        findings = "\n\n".join(
+            f"[{r.agent}]\n{r.content}" + (f"\nSQL: {r.sql}" if r.sql and r.sql != r.content else "")
+            for r in succeeded
+        )
+        prompt = build_prompt(language, get_synthesis_prompt(language, findings, state["question"]))
+        with span("agent.synthesize"):
+            response = await self.llm.generate(prompt, self.synthesis_config)
+        return {"answer": response.text.strip()}
+    
+    async def run(
+        self,
+        question: str,
+        language: Optional[Language] = None,
+        tasks: Optional[list[str]] = None,
+        latency_budget_s: Optional[float] = None,
+    ) -> CoordinatorResult:
+        """
+        Answer a question by delegating to the specialist agents.
+
+        Args:
+            question: User question
+            language: Response language; defaults to the current request's
+            tasks: Agents to run; defaults to the router's choice
+            latency_budget_s: Overrides the configured per-request budget
+
+        Returns:
+            The synthesized answer with every branch's result
+        """
+        started = time.monotonic()
+        budget = self.latency_budget_s if latency_budget_s is None else latency_budget_s
+        state: CoordinatorState = {
+            "question": question,
+            "language": language or get_language(),
+            "deadline": started + budget,
+            "results": {},
+        }
+        if tasks is not None:
+            state["tasks"] = tasks
+        
+        final = await self._graph.ainvoke(state)
+        return CoordinatorResult(
+            answer=final["answer"],
+            results=final.get("results", {}),
+            elapsed=time.monotonic() - started,
+        )
+
+
+__all__ = ["Coordinator", "CoordinatorResult", "CoordinatorState", "Router"]
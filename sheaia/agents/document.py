@@ -0,0 +1,54 @@
+"""Document agent - retrieval-augmented answers over documents."""
+
+from typing import Awaitable, Callable, Optional
+
+from sheaia.agents.base import AgentResult, SubAgent, build_prompt
+from sheaia.core.llm import BaseLLM, GenerationConfig
+from sheaia.i18n import Language
+from sheaia.i18n.prompts import get_document_qa_prompt
+from sheaia.knowledge.summarize import Summarizer
+
+# A retriever returns chunks as {"content": ..., "source": ...} dicts.
+Retriever = Callable[[str], Awaitable[list[dict]]]
+
+
+class DocumentAgent(SubAgent):
+    """Answers questions from retrieved document chunks."""
+    
+    name = "document"
+    
+    def __init__(
+        self,
+        llm: Optional[BaseLLM] = None,
+        retriever: Optional[Retriever] = None,
+        config: Optional[GenerationConfig] = None,
+        summarizer: Optional[Summarizer] = None,
+    ):
+        super().__init__(llm)
+        self.retriever = retriever
+        self.config = config or GenerationConfig(max_tokens=1024, temperature=0.3)
+        self.summarizer = summarizer
+    
+    async def run(self, question: str, language: Language) -> AgentResult:
+        """Retrieve relevant chunks and answer from them."""
+        chunks = await self.retriever(question) if self.retriever else []
+        if not chunks:
+            return AgentResult(agent=self.name)
+        
+        context = "\n\n".join(
+            f"[{chunk.get('source', 'unknown')}]\n{chunk['content']}" for chunk in chunks
+        )
+        prompt = build_prompt(language, get_document_qa_prompt(language, context, question))
+        response = await self.llm.generate(prompt, self.config)
+        sources = [{"type": "document", "source": chunk.get("source", "unknown")} for chunk in chunks]
+        return AgentResult(agent=self.name, content=response.text.strip(), sources=sources)
+    
+    async def summarize(self, document: str, language: Language, focus: str = "") -> AgentResult:
+        """Summarize a whole document, however long, with map-reduce passes."""
+        if self.summarizer is None:
+            self.summarizer = Summarizer(self.llm)
+        result = await self.summarizer.summarize(document, language, focus)
+        return AgentResult(agent=self.name, content=result.summary, elapsed=result.elapsed)
+
+
+__all__ = ["DocumentAgent", "Retriever"]
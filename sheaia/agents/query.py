@@ -0,0 +1,63 @@
+"""Query agent - turns questions into SQL."""
+
+import re
+from typing import Awaitable, Callable, Iterable, Mapping, Optional, Union
+
+from sheaia.agents.base import AgentResult, SubAgent, build_prompt
+from sheaia.core.grammar import sql_grammar
+from sheaia.core.llm import BaseLLM, GenerationConfig
+from sheaia.i18n import Language
+from sheaia.i18n.prompts import get_sql_generation_prompt
+
+SchemaProvider = Callable[[str], Awaitable[str]]
+
+_CODE_FENCE = re.compile(r"```(?:sql)?\s*(.*?)```", re.DOTALL | re.IGNORECASE)
+
+
+def extract_sql(text: str) -> str:
+    """Strip code fences and surrounding prose from generated SQL."""
+    match = _CODE_FENCE.search(text)
+    if match:
+        text = match.group(1)
+    return text.strip().rstrip(";").strip()
+
+
+class QueryAgent(SubAgent):
+    """
+    Generates SQL for a question against the known schema.
+
+    With ``tables`` (table name to columns) decoding is constrained to a
+    SELECT over exactly those tables and columns, so the model cannot wrap
+    the query in prose or invent names.
+    """
+    
+    name = "query"
+    
+    def __init__(
+        self,
+        llm: Optional[BaseLLM] = None,
+        schema: Union[str, SchemaProvider] = "",
+        config: Optional[GenerationConfig] = None,
+        tables: Optional[Mapping[str, Iterable[str]]] = None,
+    ):
+        super().__init__(llm)
+        self.schema = schema
+        self.config = config or GenerationConfig(max_tokens=512, temperature=0.1)
+        if tables and self.config.grammar is None:
+            self.config = self.config.model_copy(update={"grammar": sql_grammar(tables)})
+    
+    async def _get_schema(self, question: str) -> str:
+        if callable(self.schema):
+            return await self.schema(question)
+        return self.schema
+    
+    async def run(self, question: str, language: Language) -> AgentResult:
+        """Generate SQL for the question."""
+        schema = await self._get_schema(question)
+        prompt = build_prompt(language, get_sql_generation_prompt(language, schema, question))
+        response = await self.llm.generate(prompt, self.config)
+        sql = extract_sql(response.text)
+        return AgentResult(agent=self.name, content=sql, sql=sql)
+
+
+__all__ = ["QueryAgent", "SchemaProvider", "extract_sql"]
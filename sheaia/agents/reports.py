@@ -0,0 +1,500 @@
+"""Report agent - scheduled, multi-language reports built from a DAG of steps."""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Optional
+
+from pydantic import BaseModel
+
+from sheaia.agents.base import build_prompt
+from sheaia.core.llm import BaseLLM, GenerationConfig, get_llm
+from sheaia.core.metrics import span
+from sheaia.core.sqlite import SQLiteExecutor
+from sheaia.i18n import Language, t
+from sheaia.i18n.prompts import get_report_section_prompt
+
+logger = logging.getLogger(__name__)
+
+# Runs SQL and returns rows as dicts.
+QueryRunner = Callable[[str], Awaitable[list[dict]]]
+
+# Maps source tables to an opaque data version: a max(updated_at), a row
+# count plus checksum, a CDC offset - anything that changes with the data.
+VersionProvider = Callable[[list[str]], Awaitable[dict[str, str]]]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS report_steps (
+    key TEXT PRIMARY KEY,
+    step TEXT NOT NULL,
+    value TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+_MAX_ROWS_IN_PROMPT = 50
+
+
+class Step:
+    """
+    One node of a report DAG.
+
+    Steps whose output does not depend on the report language (queries)
+    run once per report; ``per_language`` steps (summaries) run once per
+    language, on the same upstream results. Steps that ``reads_data`` are
+    memoized only while every table in ``sources`` has a known version.
+    """
+    
+    per_language: bool = False
+    reads_data: bool = False
+    
+    def __init__(self, name: str, depends_on: Optional[list[str]] = None, sources: Optional[list[str]] = None):
+        self.name = name
+        self.depends_on = list(depends_on or [])
+        self.sources = list(sources or [])
+    
+    def fingerprint(self) -> dict:
+        """Definition of the step; any change to it invalidates memoized results."""
+        return {"type": type(self).__name__, "name": self.name, "depends_on": self.depends_on}
+    
+    async def compute(self, engine: "ReportEngine", inputs: dict[str, Any], language: Optional[Language]) -> Any:
+        """Produce the step's JSON-serializable result from its inputs."""
+        raise NotImplementedError
+
+
+class QueryStep(Step):
+    """Runs a SQL query; ``sources`` lists the tables it reads."""
+    
+    reads_data = True
+    
+    def __init__(self, name: str, sql: str, sources: list[str], depends_on: Optional[list[str]] = None):
+        super().__init__(name, depends_on, sources)
+        self.sql = sql
+    
+    def fingerprint(self) -> dict:
+        return {**super().fingerprint(), "sql": self.sql}
+    
+    async def compute(self, engine: "ReportEngine", inputs: dict[str, Any], language: Optional[Language]) -> Any:
+        if engine.query_runner is None:
+            raise RuntimeError(f"Step '{self.name}' needs a query runner")
+        with span("report.query"):
+            rows = await engine.query_runner(self.sql)
+        # Round-trip through JSON so cached and fresh results look the same.
+        return json.loads(json.dumps(rows, default=str))
+
+
+class SummarizeStep(Step):
+    """Has the LLM write a section from the results of its dependencies."""
+    
+    per_language = True
+    
+    def __init__(
+        self,
+        name: str,
+        depends_on: list[str],
+        instruction: str,
+        title: str = "",
+        config: Optional[GenerationConfig] = None,
+    ):
+        super().__init__(name, depends_on)
+        self.instruction = instruction
+        self.title = title or name
+        self.config = config or GenerationConfig(max_tokens=512, temperature=0.3)
+    
+    def fingerprint(self) -> dict:
+        return {**super().fingerprint(), "instruction": self.instruction, "title": self.title}
+    
+    async def compute(self, engine: "ReportEngine", inputs: dict[str, Any], language: Optional[Language]) -> Any:
+        data = "\n\n".join(f"[{name}]\n{format_rows(value)}" for name, value in inputs.items())
+        title = t(self.title, language)
+        prompt = build_prompt(language, get_report_section_prompt(language, title, data, self.instruction))
+        with span("report.summarize"):
+            response = await engine.llm.generate(prompt, self.config)
+        return response.text.strip()
+
+
+def format_rows(value: Any, max_rows: int = _MAX_ROWS_IN_PROMPT) -> str:
+    """Render a step result as compact text for a prompt."""
+    if isinstance(value, str):
+        return value
+    if not value:
+        return "(no rows)"
+    if not isinstance(value, list) or not isinstance(value[0], dict):
+        return json.dumps(value, ensure_ascii=False, default=str)
+    if len(value) > max_rows:
+        # Long time series are described, not truncated to their first rows.
+        from sheaia.core.visualization import describe_rows
+        
+        described = describe_rows(value)
+        if described:
+            return f"{len(value)} rows, summarized as series:\n{described}"
+    columns = list(value[0])
+    lines = [" | ".join(columns)]
+    lines.extend(" | ".join(str(row.get(c, "")) for c in columns) for row in value[:max_rows])
+    if len(value) > max_rows:
+        lines.append(f"... {len(value) - max_rows} more rows")
+    return "\n".join(lines)
+
+
+class ReportSection(BaseModel):
+    """A rendered section: a title (i18n key or literal) and the step that fills it."""
+    
+    title: str
+    step: str
+
+
+class Report:
+    """
+    A report definition: named steps forming a DAG, and the sections to render.
+
+    Raises:
+        ValueError: Duplicate or unknown step names, or a dependency cycle
+    """
+    
+    def __init__(self, name: str, steps: list[Step], sections: list[ReportSection], title: str = ""):
+        self.name = name
+        self.title = title or name
+        self.steps = {step.name: step for step in steps}
+        self.sections = sections
+        if len(self.steps) != len(steps):
+            raise ValueError(f"Step names must be unique in report '{name}'")
+        for step in steps:
+            unknown = [d for d in step.depends_on if d not in self.steps]
+            if unknown:
+                raise ValueError(f"Step '{step.name}' depends on unknown steps: {unknown}")
+            shared = [d for d in step.depends_on if self.steps[d].per_language and not step.per_language]
+            if shared:
+                raise ValueError(f"Step '{step.name}' runs once for all languages but depends on {shared}")
+        unknown = [s.step for s in sections if s.step not in self.steps]
+        if unknown:
+            raise ValueError(f"Sections refer to unknown steps: {unknown}")
+        self._check_acyclic()
+    
+    def _check_acyclic(self) -> None:
+        state: dict[str, int] = {}  # 1 = visiting, 2 = done
+        
+        def visit(name: str, path: list[str]) -> None:
+            if state.get(name) == 2:
+                return
+            if state.get(name) == 1:
+                raise ValueError(f"Dependency cycle in report '{self.name}': {' -> '.join(path + [name])}")
+            state[name] = 1
+            for dep in self.steps[name].depends_on:
+                visit(dep, path + [name])
+            state[name] = 2
+        
+        for name in self.steps:
+            visit(name, [])
+    
+    @property
+    def sources(self) -> list[str]:
+        """Every table the report reads."""
+        return sorted({s for step in self.steps.values() for s in step.sources})
+
+
+class RenderedReport(BaseModel):
+    """One language of a generated report."""
+    
+    report: str
+    language: Language
+    content: str
+    sections: dict[str, str] = {}
+    generated_at: float
+
+
+class ReportRun(BaseModel):
+    """Outcome of generating a report in one or more languages."""
+    
+    report: str
+    rendered: dict[Language, RenderedReport] = {}
+    computed: list[str] = []
+    reused: list[str] = []
+    elapsed: float = 0.0
+
+
+class StepCache(SQLiteExecutor):
+    """
+    SQLite memo of step results keyed by step definition and input data
+    versions, so results survive restarts between scheduled runs.
+    """
+    
+    schema = _SCHEMA
+    
+    def __init__(self, path: str | Path = ":memory:"):
+        super().__init__(path, "sheaia-reports")
+    
+    def _get(self, key: str) -> Optional[str]:
+        row = self._connect().execute("SELECT value FROM report_steps WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+    
+    def _put(self, key: str, step: str, value: str) -> None:
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO report_steps VALUES (?, ?, ?, ?)",
+                (key, step, value, time.time()),
+            )
+    
+    def _prune(self, older_than: float) -> int:
+        conn = self._connect()
+        with conn:
+            return conn.execute("DELETE FROM report_steps WHERE created_at < ?", (older_than,)).rowcount
+    
+    async def get(self, key: str) -> tuple[bool, Any]:
+        """Look up a memoized result; returns ``(found, value)``."""
+        value = await self._run(self._get, key)
+        return (False, None) if value is None else (True, json.loads(value))
+    
+    async def put(self, key: str, step: str, value: Any) -> None:
+        """Memoize a step result."""
+        await self._run(self._put, key, step, json.dumps(value, ensure_ascii=False))
+    
+    async def prune(self, max_age_s: float) -> int:
+        """Drop results older than ``max_age_s``; returns how many were removed."""
+        return await self._run(self._prune, time.time() - max_age_s)
+    
+    def close(self) -> None:
+        """Close the connection and stop the store thread."""
+        self._shutdown()
+
+
+class ReportEngine:
+    """
+    Generates reports with memoized, incremental step execution.
+
+    A step's result is memoized under a key derived from its definition,
+    the versions of the tables it reads and the keys of its inputs, so a
+    rerun recomputes only the steps downstream of changed data. Steps whose
+    data version is unknown - no version provider, no declared sources, or
+    a table the provider does not know - are recomputed on every run, as
+    is everything downstream of them. Steps run
+    as soon as their dependencies finish, so independent queries and
+    summaries overlap; query results are shared by every language.
+    """
+    
+    def __init__(
+        self,
+        query_runner: Optional[QueryRunner] = None,
+        versions: Optional[VersionProvider] = None,
+        llm: Optional[BaseLLM] = None,
+        cache: Optional[StepCache] = None,
+        max_concurrency: int = 4,
+    ):
+        self.query_runner = query_runner
+        self.versions = versions
+        self._llm = llm
+        self.cache = cache or StepCache()
+        self.max_concurrency = max_concurrency
+    
+    @classmethod
+    def from_settings(cls, settings, query_runner=None, versions=None, llm=None) -> "ReportEngine":
+        """Build an engine using ``Settings.reports``; identical queries in flight run once."""
+        if query_runner is not None:
+            from sheaia.core.singleflight import coalesce_queries
+            
+            query_runner = coalesce_queries(query_runner)
+        return cls(
+            query_runner=query_runner,
+            versions=versions,
+            llm=llm,
+            cache=StepCache(settings.reports.cache_path),
+            max_concurrency=settings.reports.max_concurrency,
+        )
+    
+    @property
+    def llm(self) -> BaseLLM:
+        """Return the engine's LLM, falling back to the global instance."""
+        if self._llm is None:
+            self._llm = get_llm()
+        return self._llm
+    
+    async def run(self, report: Report, languages: Optional[list[Language]] = None) -> ReportRun:
+        """
+        Generate a report in each language.
+
+        Args:
+            report: Report definition
+            languages: Languages to render; defaults to English
+
+        Returns:
+            The rendered reports, with the steps that were computed or reused
+        """
+        started = time.monotonic()
+        languages = languages or [Language.EN]
+        versions = await self.versions(report.sources) if self.versions and report.sources else {}
+        limit = asyncio.Semaphore(self.max_concurrency)
+        pending: dict[tuple[str, Optional[Language]], asyncio.Future] = {}
+        run = ReportRun(report=report.name)
+        
+        def slot(name: str, language: Language) -> tuple[str, Optional[Language]]:
+            return name, language if report.steps[name].per_language else None
+        
+        def resolve(name: str, language: Language) -> asyncio.Future:
+            key = slot(name, language)
+            if key not in pending:
+                pending[key] = asyncio.ensure_future(execute(report.steps[name], key[1], language))
+            return pending[key]
+        
+        async def execute(step: Step, language: Optional[Language], render: Language) -> tuple[str, Any, bool]:
+            deps = await asyncio.gather(*(resolve(d, render) for d in step.depends_on))
+            versioned = not step.reads_data or (
+                bool(step.sources) and all(versions.get(s) is not None for s in step.sources)
+            )
+            memoize = versioned and all(stable for _, _, stable in deps)
+            key = hashlib.sha256(json.dumps({
+                "step": step.fingerprint(),
+                "language": language.value if language else None,
+                "versions": {s: versions.get(s) for s in step.sources},
+                "inputs": [k for k, _, _ in deps],
+            }, sort_keys=True).encode()).hexdigest()
+            label = f"{step.name}[{language.value}]" if language else step.name
+            
+            if memoize:
+                found, value = await self.cache.get(key)
+                if found:
+                    run.reused.append(label)
+                    return key, value, True
+            async with limit:
+                value = await step.compute(self, dict(zip(step.depends_on, (v for _, v, _ in deps))), language)
+            if memoize:
+                await self.cache.put(key, step.name, value)
+            run.computed.append(label)
+            return key, value, memoize
+        
+        try:
+            with span("report.run"):
+                for language in languages:
+                    for section in report.sections:
+                        resolve(section.step, language)
+                await asyncio.gather(*pending.values())
+        finally:
+            for future in pending.values():
+                future.cancel()
+        
+        for language in languages:
+            sections = {}
+            for section in report.sections:
+                _, value, _ = pending[slot(section.step, language)].result()
+                sections[t(section.title, language)] = format_rows(value)
+            run.rendered[language] = RenderedReport(
+                report=report.name,
+                language=language,
+                content=render_markdown(t(report.title, language), sections),
+                sections=sections,
+                generated_at=time.time(),
+            )
+        run.elapsed = time.monotonic() - started
+        logger.info(
+            f"Report '{report.name}' in {len(languages)} languages: {len(run.computed)} steps computed, "
+            f"{len(run.reused)} reused in {run.elapsed:.1f}s"
+        )
+        return run
+
+
+def render_markdown(title: str, sections: dict[str, str]) -> str:
+    """Render a report as Markdown."""
+    parts = [f"# {title}"]
+    parts.extend(f"## {heading}\n\n{body}" for heading, body in sections.items())
+    return "\n\n".join(parts) + "\n"
+
+
+class ReportScheduler:
+    """
+    Runs reports on fixed intervals and keeps the latest result of each.
+
+    Runs of the same report never overlap; a run that fails is logged and
+    retried at the next interval. While running, memoized step results
+    older than ``cache_retention_s`` are pruned every ``prune_interval_s``.
+    """
+    
+    def __init__(self, engine: ReportEngine, cache_retention_s: float = 7 * 86400, prune_interval_s: float = 3600):
+        self.engine = engine
+        self.cache_retention_s = cache_retention_s
+        self.prune_interval_s = prune_interval_s
+        self.latest: dict[str, ReportRun] = {}
+        self._schedules: dict[str, tuple[Report, float, list[Language]]] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._pruner: Optional[asyncio.Task] = None
+    
+    @classmethod
+    def from_settings(cls, engine: ReportEngine, settings) -> "ReportScheduler":
+        """Build a scheduler using ``Settings.reports``."""
+        return cls(
+            engine,
+            cache_retention_s=settings.reports.cache_retention_s,
+            prune_interval_s=settings.reports.prune_interval_s,
+        )
+    
+    def add(self, report: Report, interval_s: float, languages: Optional[list[Language]] = None) -> None:
+        """Schedule a report; it first runs when the scheduler starts."""
+        self._schedules[report.name] = (report, interval_s, languages or [Language.EN])
+    
+    async def run_now(self, name: str) -> ReportRun:
+        """Generate a scheduled report immediately."""
+        report, _, languages = self._schedules[name]
+        run = await self.engine.run(report, languages)
+        self.latest[name] = run
+        return run
+    
+    async def _loop(self, name: str) -> None:
+        _, interval_s, _ = self._schedules[name]
+        while True:
+            try:
+                await self.run_now(name)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception(f"Scheduled report '{name}' failed")
+            await asyncio.sleep(interval_s)
+    
+    async def _prune_loop(self) -> None:
+        while True:
+            try:
+                removed = await self.engine.cache.prune(self.cache_retention_s)
+                if removed:
+                    logger.info(f"Pruned {removed} memoized report steps")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Pruning memoized report steps failed")
+            await asyncio.sleep(self.prune_interval_s)
+    
+    def start(self) -> None:
+        """Start the schedule loops and cache pruning."""
+        for name in self._schedules:
+            if name not in self._tasks:
+                self._tasks[name] = asyncio.create_task(self._loop(name))
+        if self._pruner is None:
+            self._pruner = asyncio.create_task(self._prune_loop())
+    
+    async def stop(self) -> None:
+        """Stop the schedule loops and cache pruning."""
+        tasks = list(self._tasks.values())
+        if self._pruner is not None:
+            tasks.append(self._pruner)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+        self._pruner = None
+
+
+__all__ = [
+    "Step",
+    "QueryStep",
+    "SummarizeStep",
+    "Report",
+    "ReportSection",
+    "RenderedReport",
+    "ReportRun",
+    "StepCache",
+    "ReportEngine",
+    "ReportScheduler",
+    "QueryRunner",
+    "VersionProvider",
+    "format_rows",
+    "render_markdown",
+]
@@ -0,0 +1,283 @@
+"""
+Tool registry - embedding-indexed selection of connector tools.
+
+Every connector contributes fetch, schema and sync tools; with dozens of
+connectors, listing all of them in each prompt costs thousands of prefill
+tokens. Tool descriptions are embedded once, kept in a small in-memory
+index, and each step is shown only the top-k tools for its prompt.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional, Sequence
+
+import numpy as np
+from pydantic import BaseModel
+
+from sheaia.connectors.base import Connector
+from sheaia.core.embedding import BaseEmbedding, get_embedding
+
+logger = logging.getLogger(__name__)
+
+# Query embeddings kept for prompts that repeat (retries, multi-step plans).
+_QUERY_CACHE_SIZE = 256
+
+
+class Tool(BaseModel):
+    """A callable tool an agent can be offered."""
+    
+    model_config = {"arbitrary_types_allowed": True}
+    
+    name: str
+    description: str
+    parameters: dict = {}
+    connector: Optional[str] = None
+    handler: Optional[Callable[..., Awaitable[Any]]] = None
+    
+    @property
+    def text(self) -> str:
+        """What is embedded: the name and description."""
+        return f"{self.name}: {self.description}"
+    
+    def render(self) -> str:
+        """One prompt line describing the tool."""
+        if not self.parameters:
+            return f"- {self.name}: {self.description}"
+        return f"- {self.name}({json.dumps(self.parameters, ensure_ascii=False)}): {self.description}"
+
+
+class ToolSelection(BaseModel):
+    """Tools picked for one prompt."""
+    
+    tools: list[Tool]
+    scores: list[float]
+    candidates: int
+    elapsed: float = 0.0
+    
+    def render(self) -> str:
+        return "\n".join(tool.render() for tool in self.tools)
+
+
+def connector_tools(key: str, connector: Connector, description: str = "") -> list[Tool]:
+    """The fetch, schema and sync tools of a connector instance."""
+    about = f" {description.strip()}" if description else ""
+    return [
+        Tool(
+            name=f"{key}.fetch_data",
+            description=f"Fetch rows from the {key} {connector.name} source.{about}",
+            parameters={"query": "string"},
+            connector=key,
+            handler=connector.fetch_data,
+        ),
+        Tool(
+            name=f"{key}.discover_schema",
+            description=f"List the tables and columns of the {key} {connector.name} source.{about}",
+            connector=key,
+            handler=connector.discover_schema,
+        ),
+        Tool(
+            name=f"{key}.sync",
+            description=f"Load new and changed data from the {key} {connector.name} source.{about}",
+            parameters={"since": "ISO datetime, optional"},
+            connector=key,
+            handler=connector.sync_incremental,
+        ),
+    ]
+
+
+class ToolRegistry:
+    """
+    Tools indexed by description embedding.
+
+    Descriptions are embedded in one batch when the index is next used
+    after tools change, and vectors are cached by description text, so
+    re-registering a connector with unchanged tools embeds nothing.
+    ``always`` names tools offered on every step regardless of score.
+
+    Example:
+        registry = ToolRegistry()
+        registry.add_connector("erp", erp_connector, "Kingdee K/3 orders and inventory")
+        selection = await registry.select("open purchase orders for supplier 1042", k=6)
+        prompt += selection.render()
+    """
+    
+    def __init__(
+        self,
+        embedding: Optional[BaseEmbedding] = None,
+        always: Sequence[str] = (),
+        top_k: int = 8,
+    ):
+        self._embedding = embedding
+        self.always = list(always)
+        self.top_k = top_k
+        self.tools: dict[str, Tool] = {}
+        self.version = 0
+        self._vectors: dict[str, np.ndarray] = {}
+        self._queries: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._index: Optional[np.ndarray] = None
+        self._indexed: dict[str, Tool] = {}
+        self._lock = asyncio.Lock()
+    
+    @classmethod
+    def from_settings(cls, settings, embedding: Optional[BaseEmbedding] = None) -> "ToolRegistry":
+        """Create a registry using ``Settings.agents``."""
+        return cls(embedding=embedding, always=settings.agents.tools_always, top_k=settings.agents.tool_top_k)
+    
+    @property
+    def embedding(self) -> BaseEmbedding:
+        if self._embedding is None:
+            self._embedding = get_embedding()
+        return self._embedding
+    
+    def add(self, *tools: Tool) -> None:
+        """Register tools, replacing any with the same name."""
+        for tool in tools:
+            self.tools[tool.name] = tool
+        self._changed()
+    
+    def remove(self, *names: str) -> None:
+        """Unregister tools by name."""
+        for name in names:
+            self.tools.pop(name, None)
+        self._changed()
+    
+    def add_connector(self, key: str, connector: Connector, description: str = "") -> list[Tool]:
+        """Register (or re-register) a connector's tools."""
+        tools = connector_tools(key, connector, description)
+        self.remove_connector(key)
+        self.add(*tools)
+        return tools
+    
+    def remove_connector(self, key: str) -> None:
+        """Unregister every tool of a connector."""
+        self.remove(*[name for name, tool in self.tools.items() if tool.connector == key])
+    
+    def _changed(self) -> None:
+        self.version += 1
+        self._index = None
+    
+    @staticmethod
+    def _key(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+    
+    async def _build(self) -> tuple[np.ndarray, dict[str, Tool]]:
+        """
+        The normalized embedding matrix and the tools its rows belong to,
+        embedding only descriptions not seen before.
+        """
+        async with self._lock:
+            while self._index is None:
+                version = self.version
+                tools = dict(self.tools)
+                keys = {name: self._key(tool.text) for name, tool in tools.items()}
+                missing = {key: tools[name].text for name, key in keys.items() if key not in self._vectors}
+                if missing:
+                    started = time.perf_counter()
+                    vectors = await asyncio.to_thread(self.embedding.embed_documents, list(missing.values()))
+                    for key, vector in zip(missing, np.asarray(vectors, dtype=np.float32)):
+                        self._vectors[key] = vector / (np.linalg.norm(vector) or 1.0)
+                    logger.info(f"Embedded {len(missing)} tool descriptions in {time.perf_counter() - started:.2f}s")
+                if self.version != version:
+                    # Tools changed while embedding; rebuild, keeping the vectors.
+                    continue
+                live = set(keys.values())
+                self._vectors = {key: vector for key, vector in self._vectors.items() if key in live}
+                self._indexed = tools
+                self._index = (
+                    np.stack([self._vectors[keys[name]] for name in tools])
+                    if tools else np.zeros((0, self.embedding.dimension), dtype=np.float32)
+                )
+            return self._index, self._indexed
+    
+    async def _query(self, text: str) -> np.ndarray:
+        vector = self._queries.get(text)
+        if vector is None:
+            vector = np.asarray(await asyncio.to_thread(self.embedding.embed_query, text), dtype=np.float32)
+            vector = vector / (np.linalg.norm(vector) or 1.0)
+            self._queries[text] = vector
+            if len(self._queries) > _QUERY_CACHE_SIZE:
+                self._queries.popitem(last=False)
+        else:
+            self._queries.move_to_end(text)
+        return vector
+    
+    async def select(
+        self,
+        prompt: str,
+        k: Optional[int] = None,
+        min_score: float = 0.0,
+        connectors: Optional[Sequence[str]] = None,
+    ) -> ToolSelection:
+        """
+        The tools most relevant to ``prompt``.
+
+        Args:
+            prompt: Text of the current step (question, plan step or both)
+            k: Tools to return besides the ``always`` ones; defaults to ``top_k``
+            min_score: Cosine similarity a tool needs to be offered
+            connectors: Only consider tools of these connectors
+
+        Returns:
+            The tools, best first, with their scores
+        """
+        started = time.perf_counter()
+        k = self.top_k if k is None else k
+        # Resolve tools from the snapshot the index was built from: the
+        # registry may change while the query is embedded.
+        index, indexed = await self._build()
+        names = list(indexed)
+        query = await self._query(prompt)
+        
+        scores = index @ query if len(names) else np.zeros(0, dtype=np.float32)
+        if connectors is not None:
+            allowed = set(connectors)
+            scores = np.where([indexed[n].connector in allowed for n in names], scores, -np.inf)
+        pinned = [name for name in self.always if name in indexed]
+        for name in pinned:
+            scores[names.index(name)] = -np.inf
+        if 0 < k < len(names):
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(names))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        top = [i for i in top if scores[i] >= min_score]
+        
+        tools = [indexed[name] for name in pinned] + [indexed[names[i]] for i in top]
+        return ToolSelection(
+            tools=tools,
+            scores=[1.0] * len(pinned) + [float(scores[i]) for i in top],
+            candidates=len(names),
+            elapsed=time.perf_counter() - started,
+        )
+    
+    def render_all(self) -> str:
+        """Every tool, as a prompt without selection would list them."""
+        return "\n".join(tool.render() for tool in self.tools.values())
+
+
+# Global tool registry (lazy loaded)
+_registry: Optional[ToolRegistry] = None
+
+
+def get_tool_registry() -> ToolRegistry:
+    """Get the global tool registry."""
+    global _registry
+    
+    if _registry is None:
+        from sheaia.config import get_settings
+        
+        _registry = ToolRegistry.from_settings(get_settings())
+    return _registry
+
+
+__all__ = [
+    "Tool",
+    "ToolSelection",
+    "connector_tools",
+    "ToolRegistry",
+    "get_tool_registry",
+]
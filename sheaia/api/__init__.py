@@ -1,5 +1,13 @@
 """FastAPI application and routes."""
 
-from sheaia.api.main import app, create_app
-
 __all__ = ["app", "create_app"]
+
+
+def __getattr__(name: str):
+    # Building the app reads settings and imports every route; only do that
+    # when the app is actually asked for (e.g. by uvicorn's "sheaia.api:app").
+    if name in __all__:
+        from sheaia.api import main
+        
+        return getattr(main, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,407 @@
+"""Admission control - per-class priority queues in front of the shared GPU."""
+
+import asyncio
+import bisect
+import ipaddress
+import json
+import logging
+import math
+import time
+from collections import deque
+from enum import Enum
+from typing import Optional
+
+from pydantic import BaseModel
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from sheaia.core.metrics import ADMISSION_QUEUE_SECONDS, ADMISSION_SHED
+
+logger = logging.getLogger(__name__)
+
+
+class RequestClass(str, Enum):
+    """Request classes in priority order (highest first)."""
+    
+    INTERACTIVE = "interactive"
+    SQL = "sql"
+    REPORT = "report"
+    BACKGROUND = "background"
+    
+    @property
+    def priority(self) -> int:
+        """Lower value is served first."""
+        return _PRIORITY[self]
+
+
+_PRIORITY = {cls: i for i, cls in enumerate(RequestClass)}
+
+# Longest matching path prefix decides the class; unmatched paths bypass admission.
+# A "METHOD /prefix" key only matches that method and beats the bare prefix.
+DEFAULT_ROUTES: dict[str, RequestClass] = {
+    "/api/v1/chat": RequestClass.INTERACTIVE,
+    "/api/v1/chat/batch": RequestClass.BACKGROUND,
+    # Polling and cancelling a batch must not queue behind its own items.
+    "GET /api/v1/chat/batch": RequestClass.INTERACTIVE,
+    "DELETE /api/v1/chat/batch": RequestClass.INTERACTIVE,
+    "/api/v1/query": RequestClass.SQL,
+    "/api/v1/sql": RequestClass.SQL,
+    "/api/v1/reports": RequestClass.REPORT,
+    "/api/v1/index": RequestClass.BACKGROUND,
+    "/api/v1/tasks": RequestClass.BACKGROUND,
+}
+
+PRIORITY_HEADER = b"x-sheaia-priority"
+DEADLINE_HEADER = b"x-request-deadline-ms"
+
+QUEUE_TIME_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class ClassLimits(BaseModel):
+    """Admission limits for one request class."""
+    
+    max_concurrency: int
+    max_queue: int
+    max_wait_s: float
+
+
+class AdmissionRejectedError(Exception):
+    """Raised when a request is shed instead of queued."""
+    
+    def __init__(self, status_code: int, retry_after: float, reason: str):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class ClassStats:
+    """Counters and queue-time histogram for one request class."""
+    
+    __slots__ = (
+        "admitted", "rejected", "shed", "active", "queue_time_sum",
+        "queue_time_max", "queue_time_buckets", "service_ewma",
+        "_queue_metric", "_rejected_metric", "_shed_metric",
+    )
+    
+    def __init__(self, cls: "RequestClass"):
+        self.admitted = 0
+        self.rejected = 0
+        self.shed = 0
+        self.active = 0
+        self.queue_time_sum = 0.0
+        self.queue_time_max = 0.0
+        self.queue_time_buckets = [0] * (len(QUEUE_TIME_BUCKETS) + 1)
+        self.service_ewma = 0.0
+        self._queue_metric = ADMISSION_QUEUE_SECONDS.labels(cls.value)
+        self._rejected_metric = ADMISSION_SHED.labels(cls.value, "429")
+        self._shed_metric = ADMISSION_SHED.labels(cls.value, "503")
+    
+    def observe_queue_time(self, seconds: float) -> None:
+        self.admitted += 1
+        self.queue_time_sum += seconds
+        self.queue_time_max = max(self.queue_time_max, seconds)
+        self.queue_time_buckets[bisect.bisect_left(QUEUE_TIME_BUCKETS, seconds)] += 1
+        self._queue_metric.observe(seconds)
+    
+    def observe_rejected(self) -> None:
+        self.rejected += 1
+        self._rejected_metric.inc()
+    
+    def observe_shed(self) -> None:
+        self.shed += 1
+        self._shed_metric.inc()
+    
+    def observe_service_time(self, seconds: float) -> None:
+        self.service_ewma = seconds if not self.service_ewma else 0.8 * self.service_ewma + 0.2 * seconds
+
+
+class AdmissionController:
+    """
+    Priority admission in front of a shared, fixed number of execution slots.
+
+    A request starts immediately if a slot is free, its class is under its
+    concurrency limit and no higher-priority request is waiting. Otherwise
+    it queues in its class's FIFO; freed slots always go to the
+    highest-priority class that can run. Requests are shed with 429 when
+    their class queue is full, and with 503 when their deadline would pass
+    before they could start.
+    """
+    
+    def __init__(self, limits: dict[RequestClass, ClassLimits], max_concurrency: int):
+        self.limits = limits
+        self.max_concurrency = max_concurrency
+        self.active = 0
+        self.stats = {cls: ClassStats(cls) for cls in RequestClass}
+        self._queues: dict[RequestClass, deque[asyncio.Future]] = {cls: deque() for cls in RequestClass}
+    
+    @classmethod
+    def from_settings(cls, settings) -> "AdmissionController":
+        """Build a controller from ``AdmissionSettings``."""
+        limits = {
+            rc: ClassLimits(**getattr(settings, rc.value).model_dump())
+            for rc in RequestClass
+        }
+        return cls(limits, settings.max_concurrency)
+    
+    def _can_start(self, cls: RequestClass) -> bool:
+        return (
+            self.active < self.max_concurrency
+            and self.stats[cls].active < self.limits[cls].max_concurrency
+        )
+    
+    def _higher_waiting(self, cls: RequestClass) -> bool:
+        return any(
+            self._queues[other] and self._can_start(other)
+            for other in RequestClass
+            if other.priority <= cls.priority
+        )
+    
+    def _start(self, cls: RequestClass) -> None:
+        self.active += 1
+        self.stats[cls].active += 1
+    
+    def _estimated_wait(self, cls: RequestClass) -> float:
+        """Rough time until a new request of this class could start."""
+        ahead = sum(len(self._queues[c]) for c in RequestClass if c.priority <= cls.priority)
+        service = self.stats[cls].service_ewma or 1.0
+        slots = max(1, min(self.max_concurrency, self.limits[cls].max_concurrency))
+        return (ahead + 1) * service / slots
+    
+    async def acquire(self, cls: RequestClass, deadline: Optional[float] = None) -> float:
+        """
+        Wait for an execution slot.
+
+        Args:
+            cls: Request class
+            deadline: ``time.monotonic()`` time after which the caller no
+                longer wants the result; defaults to the class's max wait
+
+        Returns:
+            Seconds spent queued
+
+        Raises:
+            AdmissionRejectedError: The request was shed
+        """
+        now = time.monotonic()
+        limits = self.limits[cls]
+        stats = self.stats[cls]
+        
+        if self._can_start(cls) and not self._higher_waiting(cls):
+            self._start(cls)
+            stats.observe_queue_time(0.0)
+            return 0.0
+        
+        queue = self._queues[cls]
+        if len(queue) >= limits.max_queue:
+            stats.observe_rejected()
+            raise AdmissionRejectedError(429, self._estimated_wait(cls), f"{cls.value} queue is full")
+        
+        deadline = min(deadline or math.inf, now + limits.max_wait_s)
+        estimate = self._estimated_wait(cls)
+        if stats.service_ewma and now + estimate > deadline:
+            stats.observe_shed()
+            raise AdmissionRejectedError(503, estimate, f"{cls.value} request would miss its deadline")
+        
+        waiter = asyncio.get_running_loop().create_future()
+        queue.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=max(0.0, deadline - now))
+        except TimeoutError:
+            if not waiter.done():
+                queue.remove(waiter)
+                waiter.cancel()
+                stats.observe_shed()
+                raise AdmissionRejectedError(503, self._estimated_wait(cls), f"{cls.value} request timed out in queue")
+        except asyncio.CancelledError:
+            # The client went away; give back a slot we may have been granted.
+            if waiter.done() and not waiter.cancelled():
+                self.release(cls)
+            elif waiter in queue:
+                queue.remove(waiter)
+            raise
+        
+        waited = time.monotonic() - now
+        stats.observe_queue_time(waited)
+        return waited
+    
+    def release(self, cls: RequestClass, service_time: Optional[float] = None) -> None:
+        """Return a slot and hand it to the highest-priority waiter."""
+        self.active -= 1
+        self.stats[cls].active -= 1
+        if service_time is not None:
+            self.stats[cls].observe_service_time(service_time)
+        self._dispatch()
+    
+    def _dispatch(self) -> None:
+        for cls in RequestClass:
+            queue = self._queues[cls]
+            while queue and self._can_start(cls):
+                waiter = queue.popleft()
+                if waiter.done():
+                    continue
+                self._start(cls)
+                waiter.set_result(None)
+    
+    def snapshot(self) -> dict:
+        """Current queue depths, limits and queue-time statistics per class."""
+        result = {"active": self.active, "max_concurrency": self.max_concurrency, "classes": {}}
+        for cls in RequestClass:
+            stats = self.stats[cls]
+            result["classes"][cls.value] = {
+                "active": stats.active,
+                "queued": len(self._queues[cls]),
+                "admitted": stats.admitted,
+                "rejected": stats.rejected,
+                "shed": stats.shed,
+                "queue_time_avg_s": stats.queue_time_sum / stats.admitted if stats.admitted else 0.0,
+                "queue_time_max_s": stats.queue_time_max,
+                "queue_time_buckets": dict(
+                    zip([*map(str, QUEUE_TIME_BUCKETS), "+Inf"], stats.queue_time_buckets)
+                ),
+                **self.limits[cls].model_dump(),
+            }
+        return result
+
+
+def classify(scope: Scope, routes: dict[str, RequestClass], trust_header: bool = False) -> Optional[RequestClass]:
+    """
+    Pick the request class from the path.
+
+    The priority header overrides the path only when ``trust_header`` is
+    set; otherwise any client could jump the interactive queue.
+    """
+    for name, value in scope.get("headers", ()) if trust_header else ():
+        if name == PRIORITY_HEADER:
+            try:
+                return RequestClass(value.decode("latin-1").strip().lower())
+            except ValueError:
+                break
+    
+    path = scope["path"]
+    method = scope.get("method")
+    for key in sorted(routes, key=lambda k: (len(k.rpartition(" ")[2]), " " in k), reverse=True):
+        route_method, _, prefix = key.rpartition(" ")
+        if (not route_method or route_method == method) and path.startswith(prefix):
+            return routes[key]
+    return None
+
+
+def _deadline(scope: Scope) -> Optional[float]:
+    for name, value in scope.get("headers", ()):
+        if name == DEADLINE_HEADER:
+            try:
+                return time.monotonic() + float(value) / 1000
+            except ValueError:
+                return None
+    return None
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware that holds each classified request until it is admitted.
+
+    WebSocket connections are admitted per message: a slot is taken when
+    the app receives a message and returned when it asks for the next one,
+    so an idle connection holds nothing. Only clients in ``trusted_clients``
+    (addresses or networks) may choose their class with the priority header.
+    """
+    
+    def __init__(
+        self,
+        app: ASGIApp,
+        controller: AdmissionController,
+        routes: Optional[dict[str, RequestClass]] = None,
+        trusted_clients: Optional[list[str]] = None,
+    ):
+        self.app = app
+        self.controller = controller
+        self.routes = routes or DEFAULT_ROUTES
+        self.trusted_clients = [ipaddress.ip_network(c, strict=False) for c in trusted_clients or ()]
+    
+    def _trusted(self, scope: Scope) -> bool:
+        client = scope.get("client")
+        if not client or not self.trusted_clients:
+            return False
+        try:
+            address = ipaddress.ip_address(client[0])
+        except ValueError:
+            return False
+        return any(address in network for network in self.trusted_clients)
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+        
+        cls = classify(scope, self.routes, self._trusted(scope))
+        if cls is None:
+            await self.app(scope, receive, send)
+            return
+        if scope["type"] == "websocket":
+            await self._websocket(cls, scope, receive, send)
+            return
+        
+        try:
+            await self.controller.acquire(cls, _deadline(scope))
+        except AdmissionRejectedError as e:
+            logger.warning(f"Shedding {scope['path']}: {e.reason}")
+            response = JSONResponse(
+                {"detail": e.reason},
+                status_code=e.status_code,
+                headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))},
+            )
+            await response(scope, receive, send)
+            return
+        
+        started = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(cls, time.monotonic() - started)
+    
+    async def _websocket(self, cls: RequestClass, scope: Scope, receive: Receive, send: Send) -> None:
+        started: Optional[float] = None
+        
+        async def admitted() -> dict:
+            nonlocal started
+            if started is not None:
+                self.controller.release(cls, time.monotonic() - started)
+                started = None
+            while True:
+                message = await receive()
+                if message["type"] != "websocket.receive":
+                    return message
+                try:
+                    await self.controller.acquire(cls, _deadline(scope))
+                except AdmissionRejectedError as e:
+                    # Drop the message and tell the client; the connection stays open.
+                    logger.warning(f"Shedding message on {scope['path']}: {e.reason}")
+                    await send({
+                        "type": "websocket.send",
+                        "text": json.dumps({
+                            "type": "error",
+                            "content": e.reason,
+                            "retry_after": max(1, math.ceil(e.retry_after)),
+                        }),
+                    })
+                    continue
+                started = time.monotonic()
+                return message
+        
+        try:
+            await self.app(scope, admitted, send)
+        finally:
+            if started is not None:
+                self.controller.release(cls, time.monotonic() - started)
+
+
+__all__ = [
+    "RequestClass",
+    "ClassLimits",
+    "AdmissionRejectedError",
+    "AdmissionController",
+    "AdmissionMiddleware",
+    "DEFAULT_ROUTES",
+    "classify",
+]
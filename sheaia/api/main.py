@@ -1,7 +1,8 @@
 """FastAPI application setup."""
 
+import asyncio
 import logging
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -19,10 +20,42 @@ async def lifespan(app: FastAPI):
     settings = get_settings()
     logger.info(f"Environment: {settings.environment}")
     
+    app.state.health.start()
+    
+    warmup = None
+    if settings.warmup.enabled:
+        from sheaia.core.embedding import get_embedding
+        from sheaia.core.llm import get_llm
+        from sheaia.core.warmup import warm_up
+        from sheaia.i18n import Language
+        
+        # Runs in the background; readiness reports progress until it is done.
+        warmup = asyncio.create_task(warm_up(
+            get_llm(),
+            get_embedding(),
+            monitor=app.state.health,
+            languages=[Language.from_string(lang) for lang in settings.warmup.languages],
+            prime_prompts=settings.warmup.prime_prompts,
+        ))
+    
     yield
     
     # Shutdown
     logger.info("Shutting down SHEAIA API server...")
+    
+    if warmup is not None and not warmup.done():
+        warmup.cancel()
+        with suppress(asyncio.CancelledError):
+            await warmup
+    await app.state.health.stop()
+    
+    from sheaia.core.batch import close_batch_runner
+    from sheaia.core.warmup import shut_down
+    from sheaia.knowledge.conversations import close_conversation_store
+    
+    await close_batch_runner()
+    await close_conversation_store()
+    await shut_down()
 
 
 def create_app() -> FastAPI:
@@ -38,6 +71,45 @@ def create_app() -> FastAPI:
         redoc_url="/redoc" if settings.debug else None,
     )
     
+    from sheaia.core.health import build_health_monitor
+    
+    app.state.health = build_health_monitor(settings)
+    
+    if settings.i18n.catalog_dir:
+        from sheaia.i18n import load_catalogs
+        
+        load_catalogs(settings.i18n.catalog_dir)
+    
+    # Language negotiation (innermost - only the handlers use it)
+    from sheaia.api.middleware import LanguageMiddleware
+    from sheaia.i18n import Language
+    
+    app.add_middleware(
+        LanguageMiddleware,
+        default=Language.from_string(settings.i18n.default_language),
+        supported=[Language.from_string(lang) for lang in settings.i18n.supported_languages],
+    )
+    
+    # Admission control (added before CORS so shed responses still get CORS headers)
+    if settings.admission.enabled:
+        from sheaia.api.admission import AdmissionController, AdmissionMiddleware
+        
+        controller = AdmissionController.from_settings(settings.admission)
+        app.state.admission = controller
+        app.add_middleware(
+            AdmissionMiddleware,
+            controller=controller,
+            trusted_clients=settings.admission.trusted_clients,
+        )
+    
+    # Metrics (wraps admission, so latency includes queueing)
+    if settings.metrics.enabled:
+        from sheaia.api.middleware import MetricsMiddleware
+        from sheaia.core.metrics import configure_tracing
+        
+        configure_tracing(settings.metrics.tracing)
+        app.add_middleware(MetricsMiddleware)
+    
     # CORS middleware
     app.add_middleware(
         CORSMiddleware,
@@ -48,10 +120,15 @@ def create_app() -> FastAPI:
     )
     
     # Include routers
-    from sheaia.api.routes import health, chat
+    from sheaia.api.routes import health, chat, batch, i18n, metrics, results
     
     app.include_router(health.router, tags=["Health"])
     app.include_router(chat.router, prefix="/api/v1", tags=["Chat"])
+    app.include_router(batch.router, prefix="/api/v1", tags=["Batch"])
+    app.include_router(i18n.router, prefix="/api/v1", tags=["I18n"])
+    app.include_router(results.router, prefix="/api/v1", tags=["Results"])
+    if settings.metrics.enabled:
+        app.include_router(metrics.router, tags=["Metrics"])
     
     return app
 
@@ -0,0 +1,147 @@
+"""HTTP middleware."""
+
+import time
+from typing import Optional
+from urllib.parse import parse_qsl
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from sheaia.core.metrics import HTTP_REQUEST_SECONDS
+from sheaia.i18n import Language, get_language, match_language, reset_language, set_language
+from sheaia.i18n.negotiation import parse_accept_language
+
+
+class MetricsMiddleware:
+    """Records request latency per route template (not per raw path, to bound label cardinality)."""
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._children: dict[tuple[str, str, str], object] = {}
+        self._prefixes: dict[int, str] = {}
+    
+    def _route_template(self, scope: Scope) -> str:
+        # The router fills in scope["route"] once the request has been matched.
+        route = scope.get("route")
+        template = getattr(route, "path", None)
+        if template is None:
+            return "unmatched"
+        
+        prefix = self._prefixes.get(id(route))
+        if prefix is None:
+            # Routes inside an included router may report their path without
+            # the include prefix; recover it once per route.
+            prefix = ""
+            path = scope["path"]
+            regex = getattr(route, "path_regex", None)
+            if regex is not None and not regex.match(path):
+                for i in range(1, len(path)):
+                    if path[i] == "/" and regex.match(path[i:]):
+                        prefix = path[:i]
+                        break
+            self._prefixes[id(route)] = prefix
+        return prefix + template
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        started = time.perf_counter()
+        status = 500
+        
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            key = (scope["method"], self._route_template(scope), str(status))
+            child = self._children.get(key)
+            if child is None:
+                child = self._children[key] = HTTP_REQUEST_SECONDS.labels(*key)
+            child.observe(time.perf_counter() - started)
+
+
+
+class LanguageMiddleware:
+    """
+    Resolves the request language once and makes it current for the request.
+
+    Explicit choices win over negotiation: ``?lang=`` (or ``?language=``),
+    then the ``lang`` cookie, then ``Accept-Language`` with q-values, then
+    the default. The result goes into the i18n context variable - so
+    ``t()``, prompts and anything else that asks ``get_language()`` agree -
+    and into ``request.state.language`` / ``language_source``. HTTP
+    responses carry it back in ``Content-Language``.
+    """
+    
+    def __init__(
+        self,
+        app: ASGIApp,
+        default: Language = Language.EN,
+        supported: Optional[list[Language]] = None,
+    ):
+        self.app = app
+        self.default = default
+        self.supported = frozenset(supported or Language)
+    
+    def _supported(self, value: Optional[str]) -> Optional[Language]:
+        lang = match_language(value) if value else None
+        return lang if lang in self.supported else None
+    
+    def resolve(self, scope: Scope) -> tuple[Language, str]:
+        """The request's language and where it came from."""
+        query = scope.get("query_string", b"")
+        if b"lang" in query:
+            params = dict(parse_qsl(query.decode("latin-1")))
+            lang = self._supported(params.get("lang") or params.get("language"))
+            if lang is not None:
+                return lang, "query"
+        
+        accept = None
+        for name, value in scope.get("headers", ()):
+            if name == b"cookie" and b"lang=" in value:
+                for item in value.decode("latin-1").split(";"):
+                    key, _, cookie = item.strip().partition("=")
+                    if key == "lang":
+                        lang = self._supported(cookie)
+                        if lang is not None:
+                            return lang, "cookie"
+            elif name == b"accept-language":
+                accept = value
+        
+        if accept:
+            lang = parse_accept_language(accept.decode("latin-1"))
+            if lang in self.supported:
+                return lang, "header"
+        return self.default, "default"
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+        
+        lang, source = self.resolve(scope)
+        state = scope.setdefault("state", {})
+        state["language"] = lang
+        state["language_source"] = source
+        
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                # The handler may have settled on another language (a body field).
+                headers = list(message.get("headers", []))
+                headers.append((b"content-language", get_language().value.encode()))
+                message["headers"] = headers
+            await send(message)
+        
+        token = set_language(lang)
+        try:
+            await self.app(scope, receive, send_wrapper if scope["type"] == "http" else send)
+        finally:
+            reset_language(token)
+
+
+__all__ = ["MetricsMiddleware", "LanguageMiddleware"]
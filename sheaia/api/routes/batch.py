@@ -0,0 +1,112 @@
+"""Batch chat API endpoints."""
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import FileResponse
+from pydantic import BaseModel, Field
+
+from sheaia.api.routes.chat import ChatRequest, negotiated
+from sheaia.core.batch import BatchItem, BatchItemResult, BatchJob, BatchRunner, get_batch_runner
+from sheaia.i18n.negotiation import choose_language
+
+router = APIRouter()
+
+
+class BatchChatRequest(BaseModel):
+    """Batch chat request model."""
+    
+    items: list[ChatRequest] = Field(..., description="Questions to answer", min_length=1)
+    max_tokens: Optional[int] = Field(None, description="Completion limit per item", ge=1, le=8192)
+    
+    model_config = {"extra": "forbid"}
+
+
+class BatchResultsPage(BaseModel):
+    """One page of batch results."""
+    
+    job: BatchJob
+    offset: int
+    results: list[BatchItemResult]
+    next_offset: Optional[int] = Field(None, description="Offset of the next page, if any")
+
+
+def batch_runner(request: Request) -> BatchRunner:
+    """Global batch runner, sharing the app's admission controller."""
+    return get_batch_runner(getattr(request.app.state, "admission", None))
+
+
+def _job(runner: BatchRunner, job_id: str) -> BatchJob:
+    job = runner.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown batch job: {job_id}")
+    return job
+
+
+@router.post("/chat/batch", response_model=BatchJob, status_code=202)
+async def submit_batch(
+    request: BatchChatRequest,
+    http_request: Request,
+    runner: BatchRunner = Depends(batch_runner),
+) -> BatchJob:
+    """
+    Queue a batch of chat questions and return the job.
+    
+    Results are appended to a JSONL file as items finish; poll the job for
+    progress and throughput, and page through results as they arrive.
+    """
+    from sheaia.config import get_settings
+    
+    max_items = get_settings().batch.max_items
+    if len(request.items) > max_items:
+        raise HTTPException(status_code=413, detail=f"A batch may have at most {max_items} items")
+    
+    has_preference = negotiated(http_request)
+    items = [
+        BatchItem(
+            message=item.message,
+            language=choose_language(item.language, item.message, has_preference),
+            conversation_id=item.conversation_id,
+        )
+        for item in request.items
+    ]
+    return runner.submit(items, request.max_tokens)
+
+
+@router.get("/chat/batch/{job_id}", response_model=BatchJob)
+async def batch_status(job_id: str, runner: BatchRunner = Depends(batch_runner)) -> BatchJob:
+    """Job progress, and throughput once it has finished."""
+    return _job(runner, job_id)
+
+
+@router.get("/chat/batch/{job_id}/results", response_model=BatchResultsPage)
+async def batch_results(
+    job_id: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    runner: BatchRunner = Depends(batch_runner),
+) -> BatchResultsPage:
+    """A page of results in completion order; each carries its item index."""
+    job = _job(runner, job_id)
+    results = runner.results(job_id, offset, limit)
+    end = offset + len(results)
+    return BatchResultsPage(
+        job=job,
+        offset=offset,
+        results=results,
+        next_offset=end if end < job.total else None,
+    )
+
+
+@router.get("/chat/batch/{job_id}/results.jsonl")
+async def batch_results_file(job_id: str, runner: BatchRunner = Depends(batch_runner)) -> FileResponse:
+    """The results file as written so far."""
+    job = _job(runner, job_id)
+    return FileResponse(job.path, media_type="application/x-ndjson", filename=f"{job_id}.jsonl")
+
+
+@router.delete("/chat/batch/{job_id}", response_model=BatchJob)
+async def cancel_batch(job_id: str, runner: BatchRunner = Depends(batch_runner)) -> BatchJob:
+    """Cancel a job; results already written are kept."""
+    _job(runner, job_id)
+    return await runner.cancel(job_id)
@@ -1,24 +1,37 @@
 """Chat API endpoints."""
 
 import logging
-from typing import Optional
+import time
+import uuid
+from contextlib import aclosing
+from typing import AsyncIterator, Optional
 
-from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, Depends, HTTPException, Request, WebSocket, WebSocketDisconnect
 from pydantic import BaseModel, Field
 
+from sheaia.core.metrics import WEBSOCKET_FRAME_RATE, WEBSOCKET_FRAMES, span
+from sheaia.core.singleflight import chat_key, get_single_flight
 from sheaia.i18n import Language
+from sheaia.i18n.negotiation import resolve_language
+from sheaia.knowledge.conversations import ConversationStore, get_conversation_store
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+_FRAMES_IN = WEBSOCKET_FRAMES.labels("in")
+_FRAMES_OUT = WEBSOCKET_FRAMES.labels("out")
+
 
 class ChatRequest(BaseModel):
     """Chat request model."""
     
     message: str = Field(..., description="User message", min_length=1, max_length=10000)
     conversation_id: Optional[str] = Field(None, description="Conversation ID for context")
-    language: str = Field(default="en", description="Response language")
+    language: Optional[str] = Field(
+        None,
+        description="Response language; defaults to the negotiated language, then to the message's",
+    )
     
     model_config = {"extra": "forbid"}
 
@@ -30,6 +43,7 @@ class ChatResponse(BaseModel):
     conversation_id: str = Field(..., description="Conversation ID")
     sources: list[dict] = Field(default=[], description="Data sources used")
     sql: Optional[str] = Field(None, description="Generated SQL if applicable")
+    result_id: Optional[str] = Field(None, description="Tabular result, paged at /api/v1/results/{result_id}")
 
 
 class StreamingToken(BaseModel):
@@ -39,8 +53,53 @@ class StreamingToken(BaseModel):
     content: str = Field(default="", description="Token content")
 
 
+def negotiated(connection: Request | WebSocket) -> bool:
+    """Whether the client stated a language preference (query, cookie or header)."""
+    return getattr(connection.state, "language_source", "default") != "default"
+
+
+async def _reply(message: str, lang: Language) -> str:
+    """
+    Answer a question.
+
+    Identical concurrent questions share one call, so only the message and
+    language may shape the answer; the caller records it in its own
+    conversation.
+    """
+    # TODO: Implement actual agent-based chat
+    # For now, return a placeholder response
+    return {
+        Language.EN: f"I received your message: '{message}'. "
+                    "The full agent system is being implemented.",
+        Language.ZH_CN: f"我收到了您的消息：'{message}'。"
+                       "完整的代理系统正在实现中。",
+        Language.ZH_TW: f"我收到了您的訊息：'{message}'。"
+                       "完整的代理系統正在實現中。",
+        Language.TH: f"ฉันได้รับข้อความของคุณ: '{message}' "
+                    "ระบบตัวแทนกำลังถูกพัฒนา",
+    }.get(lang, f"I received your message: '{message}'")
+
+
+async def _stream_reply(message: str, lang: Language) -> AsyncIterator[str]:
+    """Stream an answer; shared between identical concurrent questions like ``_reply``."""
+    # TODO: Implement actual streaming with LLM
+    # For now, send placeholder tokens
+    thinking_msg = {
+        Language.EN: "Processing your request",
+        Language.ZH_CN: "正在处理您的请求",
+        Language.ZH_TW: "正在處理您的請求",
+        Language.TH: "กำลังประมวลผลคำขอของคุณ",
+    }.get(lang, "Processing your request")
+    for word in thinking_msg.split():
+        yield word + " "
+
+
 @router.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest) -> ChatResponse:
+async def chat(
+    request: ChatRequest,
+    http_request: Request,
+    store: ConversationStore = Depends(get_conversation_store),
+) -> ChatResponse:
     """
     Send a chat message and receive a complete response.
     
@@ -48,25 +107,21 @@ async def chat(request: ChatRequest) -> ChatResponse:
     for streaming responses.
     """
     try:
-        lang = Language.from_string(request.language)
+        lang = resolve_language(request.language, request.message, negotiated(http_request))
+        conversation_id = request.conversation_id or uuid.uuid4().hex
         
-        # TODO: Implement actual agent-based chat
-        # For now, return a placeholder response
+        response_text = await get_single_flight("chat").do(
+            chat_key(request.message, lang.value),
+            lambda: _reply(request.message, lang),
+        )
         
-        response_text = {
-            Language.EN: f"I received your message: '{request.message}'. "
-                        "The full agent system is being implemented.",
-            Language.ZH_CN: f"我收到了您的消息：'{request.message}'。"
-                           "完整的代理系统正在实现中。",
-            Language.ZH_TW: f"我收到了您的訊息：'{request.message}'。"
-                           "完整的代理系統正在實現中。",
-            Language.TH: f"ฉันได้รับข้อความของคุณ: '{request.message}' "
-                        "ระบบตัวแทนกำลังถูกพัฒนา",
-        }.get(lang, f"I received your message: '{request.message}'")
+        with span("chat.conversation"):
+            await store.append(conversation_id, "user", request.message, lang)
+            await store.append(conversation_id, "assistant", response_text, lang)
         
         return ChatResponse(
             response=response_text,
-            conversation_id=request.conversation_id or "new-conversation",
+            conversation_id=conversation_id,
             sources=[],
             sql=None,
         )
@@ -77,13 +132,16 @@ async def chat(request: ChatRequest) -> ChatResponse:
 
 
 @router.websocket("/chat/stream")
-async def chat_stream(websocket: WebSocket):
+async def chat_stream(
+    websocket: WebSocket,
+    store: ConversationStore = Depends(get_conversation_store),
+):
     """
     WebSocket endpoint for streaming chat responses.
     
-    Client sends: {"message": "...", "conversation_id": "...", "language": "en"}
+    Client sends: {"message": "...", "conversation_id": "...", "language": "en"} (language optional)
     Server sends: {"type": "token", "content": "..."} for each token
-                  {"type": "done", "content": ""} when complete
+                  {"type": "done", "content": "<conversation_id>"} when complete
                   {"type": "error", "content": "..."} on error
     """
     await websocket.accept()
@@ -92,8 +150,10 @@ async def chat_stream(websocket: WebSocket):
         while True:
             # Receive message
             data = await websocket.receive_json()
+            _FRAMES_IN.inc()
             message = data.get("message", "")
-            language = data.get("language", "en")
+            language = data.get("language")
+            conversation_id = data.get("conversation_id") or uuid.uuid4().hex
             
             if not message:
                 await websocket.send_json({
@@ -102,28 +162,35 @@ async def chat_stream(websocket: WebSocket):
                 })
                 continue
             
-            lang = Language.from_string(language)
+            lang = resolve_language(language, message, negotiated(websocket))
             
-            # TODO: Implement actual streaming with LLM
-            # For now, send placeholder tokens
+            await store.append(conversation_id, "user", message, lang)
             
-            thinking_msg = {
-                Language.EN: "Processing your request",
-                Language.ZH_CN: "正在处理您的请求",
-                Language.ZH_TW: "正在處理您的請求",
-                Language.TH: "กำลังประมวลผลคำขอของคุณ",
-            }.get(lang, "Processing your request")
+            # Identical questions streaming at once share one generation.
+            reply = []
+            started = time.perf_counter()
+            tokens = get_single_flight("chat.stream").stream(
+                chat_key(message, lang.value),
+                lambda: _stream_reply(message, lang),
+            )
+            async with aclosing(tokens):
+                async for token in tokens:
+                    reply.append(token)
+                    await websocket.send_json({
+                        "type": "token",
+                        "content": token
+                    })
             
-            # Simulate streaming
-            for word in thinking_msg.split():
-                await websocket.send_json({
-                    "type": "token",
-                    "content": word + " "
-                })
+            frames = len(reply)
+            elapsed = time.perf_counter() - started
+            _FRAMES_OUT.inc(frames + 1)
+            if elapsed > 0:
+                WEBSOCKET_FRAME_RATE.observe(frames / elapsed)
             
+            await store.append(conversation_id, "assistant", "".join(reply).strip(), lang)
             await websocket.send_json({
                 "type": "done",
-                "content": ""
+                "content": conversation_id
             })
             
     except WebSocketDisconnect:
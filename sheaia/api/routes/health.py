@@ -1,6 +1,6 @@
 """Health check endpoints."""
 
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Request, Response
 
 router = APIRouter()
 
@@ -12,14 +12,26 @@ async def health_check():
 
 
 @router.get("/health/ready")
-async def readiness_check():
-    """Readiness check - verifies all dependencies are available."""
-    # TODO: Check database connections, model availability, etc.
-    return {
-        "status": "ready",
-        "checks": {
-            "database": "ok",
-            "llm": "ok",
-            "embedding": "ok",
-        }
-    }
+async def readiness_check(request: Request):
+    """Readiness check - serves the cached result of the background probes."""
+    monitor = request.app.state.health
+    return Response(
+        content=monitor.ready_body,
+        status_code=monitor.ready_status_code,
+        media_type="application/json",
+    )
+
+
+@router.get("/health/deep")
+async def deep_health_check(request: Request):
+    """Per-component probe status, detail, latency and check time."""
+    return request.app.state.health.snapshot()
+
+
+@router.get("/health/admission")
+async def admission_stats(request: Request):
+    """Admission control queue depths and per-class queue-time statistics."""
+    controller = getattr(request.app.state, "admission", None)
+    if controller is None:
+        raise HTTPException(status_code=404, detail="Admission control is disabled")
+    return controller.snapshot()
@@ -0,0 +1,22 @@
+"""Translation catalog export for the frontend."""
+
+from fastapi import APIRouter, Request, Response
+
+from sheaia.i18n import Language, export_translations
+
+router = APIRouter()
+
+
+@router.get("/i18n/{language}")
+async def translations(language: str, request: Request) -> Response:
+    """
+    Flat key -> text catalog for a language.
+
+    The body is serialized once per catalog version; clients revalidate
+    with ``If-None-Match`` and get a 304 while it is unchanged.
+    """
+    body, etag = export_translations(Language.from_string(language))
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
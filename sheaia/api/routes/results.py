@@ -0,0 +1,162 @@
+"""Query result API endpoints."""
+
+import asyncio
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+
+from sheaia.core.results import (
+    ARROW_MEDIA_TYPE,
+    NDJSON_MEDIA_TYPE,
+    ResultInfo,
+    ResultStore,
+    UnknownResultError,
+    get_result_store,
+)
+
+router = APIRouter()
+
+
+class SeriesData(BaseModel):
+    """A downsampled chart series."""
+    
+    x: list[float] = Field(..., description="Numbers, or epoch milliseconds when x_type is datetime")
+    y: list[float]
+    x_type: Literal["number", "datetime"]
+    method: Literal["lttb", "minmax"]
+    source_points: int = Field(..., description="Points in the requested window before downsampling")
+    summary: str = Field(..., description="The series as described to the LLM")
+
+
+def result_store() -> ResultStore:
+    """Global result store."""
+    return get_result_store()
+
+
+def _format(request: Request, format: Optional[str]) -> str:
+    """Explicit ``format``, else the Accept header; NDJSON unless Arrow is asked for."""
+    if format:
+        return format
+    return "arrow" if ARROW_MEDIA_TYPE in request.headers.get("accept", "") else "ndjson"
+
+
+@router.get("/results/{result_id}")
+async def read_result(
+    result_id: str,
+    request: Request,
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page's X-Next-Cursor header"),
+    limit: Optional[int] = Query(None, ge=1, description="Rows in this page"),
+    columns: Optional[str] = Query(None, description="Comma-separated columns to return"),
+    format: Optional[Literal["arrow", "ndjson"]] = Query(None, description="Defaults from the Accept header"),
+    compression: Optional[Literal["none", "gzip", "zstd", "lz4"]] = Query(
+        None,
+        description="gzip encodes the body; zstd and lz4 compress Arrow buffers. Defaults to gzip when accepted",
+    ),
+    store: ResultStore = Depends(result_store),
+) -> StreamingResponse:
+    """
+    Stream one page of a stored query result.
+    
+    Pages are read zero-copy from the result's memory-mapped Arrow file and
+    streamed batch by batch. The next page's cursor is in ``X-Next-Cursor``
+    (absent on the last page) and the result's row count in ``X-Total-Rows``.
+    """
+    from sheaia.config import get_settings
+    
+    settings = get_settings().results
+    limit = limit or settings.page_rows
+    if limit > settings.max_page_rows:
+        raise HTTPException(status_code=400, detail=f"limit may be at most {settings.max_page_rows}")
+    chosen = _format(request, format)
+    if compression is None:
+        compression = "gzip" if "gzip" in request.headers.get("accept-encoding", "") else "none"
+    if chosen == "ndjson" and compression in ("zstd", "lz4"):
+        raise HTTPException(status_code=400, detail=f"{compression} compression is only available for Arrow")
+    
+    projection = [name.strip() for name in columns.split(",") if name.strip()] if columns else None
+    try:
+        page = await asyncio.to_thread(store.page, result_id, cursor, limit, projection)
+    except UnknownResultError:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired result: {result_id}")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    headers = {"X-Total-Rows": str(page.info.rows), "X-Page-Rows": str(page.rows), "Vary": "Accept, Accept-Encoding"}
+    if page.next_cursor:
+        headers["X-Next-Cursor"] = page.next_cursor
+    if compression == "gzip":
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(
+        page.stream(chosen, compression),
+        media_type=ARROW_MEDIA_TYPE if chosen == "arrow" else NDJSON_MEDIA_TYPE,
+        headers=headers,
+    )
+
+
+@router.get("/results/{result_id}/series", response_model=SeriesData)
+async def result_series(
+    result_id: str,
+    x: str = Query(..., description="X-axis column, usually a timestamp"),
+    y: str = Query(..., description="Numeric column to chart"),
+    points: Optional[int] = Query(None, ge=3, description="Target point count"),
+    start: Optional[str] = Query(None, description="Window start, in x units (ISO time or number)"),
+    end: Optional[str] = Query(None, description="Window end, inclusive"),
+    method: Literal["lttb", "minmax"] = Query("lttb", description="lttb keeps shape; minmax keeps every spike"),
+    store: ResultStore = Depends(result_store),
+) -> SeriesData:
+    """
+    One column of a result downsampled for a chart.
+    
+    Zoom by narrowing ``start``/``end``: windows are cut from cached min-max
+    levels, so the raw series is only scanned on the first request.
+    """
+    import numpy as np
+    
+    from sheaia.config import get_settings
+    from sheaia.core.visualization import load_series
+    
+    settings = get_settings().visualization
+    points = points or settings.points
+    if points > settings.max_points:
+        raise HTTPException(status_code=400, detail=f"points may be at most {settings.max_points}")
+    
+    def compute() -> SeriesData:
+        series = load_series(store, result_id, x, y)
+        lo, hi = series.bounds(start, end)
+        xs, ys = series.window(points, start, end, method)
+        is_time = np.issubdtype(xs.dtype, np.datetime64)
+        return SeriesData(
+            x=(xs.astype("datetime64[ms]").astype(np.int64) if is_time else xs).tolist(),
+            y=ys.tolist(),
+            x_type="datetime" if is_time else "number",
+            method=method,
+            source_points=hi - lo,
+            summary=series.summarize(y, settings.summary_points, start, end).render(),
+        )
+    
+    try:
+        return await asyncio.to_thread(compute)
+    except UnknownResultError:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired result: {result_id}")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/results/{result_id}/info", response_model=ResultInfo)
+async def result_info(result_id: str, store: ResultStore = Depends(result_store)) -> ResultInfo:
+    """Columns, row count and expiry of a stored result."""
+    try:
+        return await asyncio.to_thread(store.info, result_id)
+    except UnknownResultError:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired result: {result_id}")
+
+
+@router.delete("/results/{result_id}", status_code=204)
+async def delete_result(result_id: str, store: ResultStore = Depends(result_store)) -> None:
+    """Remove a stored result before it expires."""
+    try:
+        await asyncio.to_thread(store.delete, result_id)
+    except UnknownResultError:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired result: {result_id}")
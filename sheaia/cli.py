@@ -1,11 +1,14 @@
 """SHEAIA CLI commands."""
 
 import logging
+import subprocess
 import sys
+import time
+from pathlib import Path
 
-import uvicorn
-
-from sheaia.config import get_settings
+# Keep module-level imports to the standard library: every subcommand (and
+# `--help`) pays for them. Heavy dependencies are imported by the command
+# that needs them.
 
 logging.basicConfig(
     level=logging.INFO,
@@ -16,17 +19,89 @@ logger = logging.getLogger(__name__)
 
 def serve():
     """Start the API server."""
+    import uvicorn
+    
+    from sheaia.config import get_settings
+    
     settings = get_settings()
     
     logger.info(f"Starting SHEAIA server on {settings.api.host}:{settings.api.port}")
     
-    uvicorn.run(
-        "sheaia.api:app",
-        host=settings.api.host,
-        port=settings.api.port,
-        reload=settings.api.reload,
-        workers=settings.api.workers if not settings.api.reload else 1,
-    )
+    model_server = None
+    if settings.model_server.enabled and settings.model_server.spawn:
+        model_server = _spawn_model_server(settings.model_server.socket_path)
+    
+    try:
+        uvicorn.run(
+            "sheaia.api:app",
+            host=settings.api.host,
+            port=settings.api.port,
+            reload=settings.api.reload,
+            workers=settings.api.workers if not settings.api.reload else 1,
+        )
+    finally:
+        if model_server is not None:
+            model_server.terminate()
+            model_server.wait(timeout=30)
+
+
+def _spawn_model_server(socket_path: str, timeout_s: float = 30.0) -> subprocess.Popen:
+    """Start the model server and wait for its socket (models keep loading after)."""
+    socket = Path(socket_path)
+    socket.unlink(missing_ok=True)
+    process = subprocess.Popen([sys.executable, "-m", "sheaia.cli", "model-server"])
+    deadline = time.monotonic() + timeout_s
+    while not socket.exists():
+        if process.poll() is not None:
+            raise RuntimeError(f"Model server exited with code {process.returncode}")
+        if time.monotonic() > deadline:
+            process.terminate()
+            raise RuntimeError(f"Model server did not create {socket} within {timeout_s}s")
+        time.sleep(0.05)
+    return process
+
+
+def model_server():
+    """Run the shared model server."""
+    import asyncio
+    
+    from sheaia.config import get_settings
+    from sheaia.core.model_server import serve_models
+    
+    settings = get_settings()
+    logger.info(f"Starting model server on {settings.model_server.socket_path}")
+    try:
+        asyncio.run(serve_models(settings))
+    except KeyboardInterrupt:
+        pass
+
+
+def worker():
+    """Run a background task worker."""
+    import asyncio
+    import importlib
+    import signal
+    
+    from sheaia.config import get_settings
+    from sheaia.core.tasks import TaskQueue, TaskWorker
+    
+    settings = get_settings()
+    for module in settings.tasks.modules:
+        importlib.import_module(module)
+    
+    async def run() -> None:
+        queue = TaskQueue.from_settings(settings)
+        task_worker = TaskWorker.from_settings(settings, queue)
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, task_worker.stop)
+        try:
+            await task_worker.run()
+        finally:
+            await queue.close()
+    
+    logger.info(f"Starting task worker on the {settings.tasks.backend} backend")
+    asyncio.run(run())
 
 
 def download_models():
@@ -37,6 +112,133 @@ def download_models():
     logger.info("  - Embedding: BAAI/bge-m3")
 
 
+def _size(num_bytes: float) -> str:
+    for unit in ("B", "KB", "MB"):
+        if num_bytes < 1024:
+            return f"{num_bytes:.1f}{unit}"
+        num_bytes /= 1024
+    return f"{num_bytes:.1f}GB"
+
+
+def models(args: list[str]):
+    """List or verify the models in the local registry."""
+    from sheaia.config import get_settings
+    from sheaia.core.models import ModelRegistry
+    
+    settings = get_settings()
+    registry = ModelRegistry.from_settings(settings)
+    action = args[0] if args else "list"
+    
+    if action == "list":
+        found = registry.scan(compute_hashes="--hash" in args)
+        if not found:
+            print(f"No models found in {registry.models_dir}")
+            return
+        print(f"{'NAME':<40} {'KIND':<10} {'QUANT':<8} {'CTX':>7} {'SIZE':>9} {'EST. MEM':>9}  SHA256")
+        for info in found:
+            n_ctx = settings.llm.n_ctx if info.kind == "llm" else None
+            print(
+                f"{info.name:<40} {info.kind:<10} {info.quantization or '-':<8} "
+                f"{info.context_length or '-':>7} {_size(info.size_bytes):>9} "
+                f"{_size(info.estimated_memory_bytes(n_ctx)):>9}  {(info.sha256 or '-')[:12]}"
+            )
+    elif action == "verify":
+        results = registry.verify(args[1:] or None)
+        for result in results:
+            status = "OK" if result.ok else "FAILED"
+            print(f"{status:<7} {result.name:<40} {(result.sha256 or '')[:12]}  {result.detail}")
+        if not all(result.ok for result in results):
+            sys.exit(1)
+    else:
+        print(f"Unknown models command: {action} (expected list or verify)")
+        sys.exit(1)
+
+
+def autotune(args: list[str]):
+    """Measure llama.cpp and embedding settings on this machine and save the best as a hardware profile."""
+    import argparse
+    from functools import partial
+    
+    from sheaia.config import get_settings
+    from sheaia.core.autotune import (
+        Autotuner,
+        detect_hardware,
+        embedding_candidates,
+        llm_candidates,
+        measure_embedding,
+        measure_llm,
+        profile_name,
+        write_profile,
+    )
+    
+    parser = argparse.ArgumentParser(prog="python -m sheaia.cli autotune")
+    parser.add_argument(
+        "--model",
+        help="GGUF file to measure (default: llm.model_path); a small one is enough on CPU-only hosts",
+    )
+    parser.add_argument("--embedding-model", help="Embedding model (default: embedding.model_name)")
+    parser.add_argument("--profile", help="Profile name (default: the host name)")
+    parser.add_argument("--output", help="Profiles file (default: hardware.profile_path)")
+    parser.add_argument("--quick", action="store_true", help="Try fewer values per parameter")
+    parser.add_argument("--skip-llm", action="store_true", help="Do not tune llama.cpp")
+    parser.add_argument("--skip-embedding", action="store_true", help="Do not tune embedding")
+    parser.add_argument("--prompt-tokens", type=int, default=1024, help="Reference prompt length")
+    parser.add_argument("--gen-tokens", type=int, default=128, help="Reference generation length")
+    parser.add_argument("--no-activate", action="store_true", help="Do not make the profile active")
+    opts = parser.parse_args(args)
+    
+    settings = get_settings()
+    hardware = detect_hardware()
+    logger.info(
+        f"Tuning {hardware.hostname}: {hardware.cpu or 'unknown CPU'}, {hardware.physical_cores} cores / "
+        f"{hardware.logical_cores} threads, {hardware.memory_gb} GB RAM, "
+        f"GPU: {hardware.gpu or 'none'}{'' if hardware.gpu_offload else ' (no offload support)'}"
+    )
+    
+    tuner = Autotuner(prompt_tokens=opts.prompt_tokens, gen_tokens=opts.gen_tokens)
+    groups = batch_sizes = None
+    if not opts.skip_llm:
+        from sheaia.core.models import read_gguf_metadata
+        
+        model_path = opts.model or settings.llm.model_path
+        if not Path(model_path).exists():
+            print(f"Model not found: {model_path} (pass --model, or --skip-llm)")
+            sys.exit(1)
+        meta = read_gguf_metadata(model_path)
+        arch = meta.get("general.architecture", "")
+        trained_ctx = meta.get(f"{arch}.context_length") or settings.llm.n_ctx
+        n_ctx = max(opts.prompt_tokens + opts.gen_tokens, min(settings.llm.n_ctx, trained_ctx))
+        groups = llm_candidates(hardware, meta.get(f"{arch}.block_count"), quick=opts.quick)
+        tuner.llm_bench = partial(
+            measure_llm, model_path, n_ctx=n_ctx, prompt_tokens=opts.prompt_tokens, gen_tokens=opts.gen_tokens
+        )
+    if not opts.skip_embedding:
+        from sheaia.core.embedding import SentenceTransformerEmbedding
+        
+        embedder = SentenceTransformerEmbedding(
+            model_name=opts.embedding_model or settings.embedding.model_name,
+            device=settings.embedding.device,
+        )
+        batch_sizes = embedding_candidates(quick=opts.quick)
+        tuner.embedding_bench = partial(measure_embedding, embedder, count=256 if opts.quick else 512)
+    
+    result = tuner.run(hardware, groups, batch_sizes)
+    if groups and not result.llm:
+        print("Every llama.cpp configuration failed; see the log above")
+        sys.exit(1)
+    
+    name = opts.profile or profile_name(hardware)
+    output = opts.output or settings.hardware.profile_path
+    write_profile(output, name, result, activate=not opts.no_activate)
+    
+    print(f"Profile {name!r} written to {output}")
+    for section in ("llm", "embedding"):
+        for key, value in getattr(result, section).items():
+            print(f"  {section}.{key}: {value}")
+    for key, value in result.measured.items():
+        print(f"  measured {key}: {value}")
+
+
 def main():
     """CLI entry point."""
     if len(sys.argv) < 2:
@@ -45,15 +247,28 @@ def main():
         print("")
         print("Commands:")
         print("  serve           Start the API server")
+        print("  model-server    Run the shared model server")
+        print("  worker          Run a background task worker")
         print("  download-models Download required models")
+        print("  models list     List local models (--hash to hash new files)")
+        print("  models verify   Re-hash and check local models")
+        print("  autotune        Measure and save the fastest settings for this machine")
         return
     
     command = sys.argv[1]
     
     if command == "serve":
         serve()
+    elif command == "model-server":
+        model_server()
+    elif command == "worker":
+        worker()
     elif command == "download-models":
         download_models()
+    elif command == "models":
+        models(sys.argv[2:])
+    elif command == "autotune":
+        autotune(sys.argv[2:])
     else:
         print(f"Unknown command: {command}")
         sys.exit(1)
@@ -2,7 +2,7 @@
 
 from functools import lru_cache
 from pathlib import Path
-from typing import Literal
+from typing import Literal, Optional
 
 import yaml
 from pydantic import Field
@@ -23,6 +23,24 @@ class LLMSettings(BaseSettings):
     n_ctx: int = Field(default=16384, description="Context window size")
     n_gpu_layers: int = Field(default=-1, description="Number of layers to offload to GPU (-1 for all)")
     n_batch: int = Field(default=512, description="Batch size for prompt processing")
+    n_ubatch: int = Field(default=512, description="Physical micro-batch size (at most n_batch)")
+    n_threads: Optional[int] = Field(
+        default=None,
+        description="CPU threads for generation (None: llama.cpp default)"
+    )
+    n_threads_batch: Optional[int] = Field(
+        default=None,
+        description="CPU threads for prompt processing (None: llama.cpp default)"
+    )
+    use_mmap: bool = Field(
+        default=True,
+        description="Memory-map model weights so processes share them in the page cache"
+    )
+    use_mlock: bool = Field(default=False, description="Lock model weights in RAM (no swapping)")
+    prompt_cache_mb: int = Field(
+        default=256,
+        description="RAM for cached prompt-prefix KV state (0 disables)"
+    )
     device: str = Field(default="auto", description="Device to use: auto, cuda:0, rocm:0, cpu")
 
 
@@ -71,6 +89,124 @@ class APISettings(BaseSettings):
     )
 
 
+class ModelServerSettings(BaseSettings):
+    """Shared model server settings."""
+    
+    enabled: bool = Field(
+        default=False,
+        description="Serve models from one process; API workers connect over a Unix socket"
+    )
+    socket_path: str = Field(default="./data/models.sock", description="Model server Unix socket")
+    spawn: bool = Field(default=True, description="Start the model server from `sheaia serve`")
+    timeout_s: float = Field(default=5.0, description="Connect and status timeout")
+    request_timeout_s: float = Field(
+        default=300.0, description="Longest a blocking tokenize or embedding request may wait"
+    )
+
+
+class BatchSettings(BaseSettings):
+    """Batch chat job settings."""
+    
+    output_dir: str = Field(default="./data/batch", description="Directory for batch result files")
+    concurrency: int = Field(default=4, description="Items in flight per job")
+    max_items: int = Field(default=10000, description="Largest accepted batch")
+    max_tokens: int = Field(default=512, description="Default completion limit per item")
+    retain_s: float = Field(
+        default=3600.0, description="How long a finished job stays in memory for fast paging"
+    )
+
+
+class SingleFlightSettings(BaseSettings):
+    """Coalescing of concurrent identical requests."""
+    
+    enabled: bool = Field(default=True, description="Share one computation between identical concurrent requests")
+    timeout_s: float = Field(default=120.0, description="Longest a shared chat answer or SQL query may run")
+
+
+class TaskSettings(BaseSettings):
+    """Background task queue settings."""
+    
+    backend: Literal["sqlite", "redis"] = Field(default="sqlite", description="Task storage backend")
+    sqlite_path: str = Field(default="./data/tasks.db", description="SQLite task database")
+    redis_url: str = Field(default="redis://localhost:6379/0", description="Redis URL for the redis backend")
+    modules: list[str] = Field(
+        default_factory=list,
+        description="Modules imported by `sheaia worker` to register task handlers"
+    )
+    concurrency: int = Field(default=4, description="Tasks running at once per worker process")
+    limits: dict[str, int] = Field(
+        default_factory=dict,
+        description="Per-task-type concurrency across all workers, overriding the handler's default"
+    )
+    lease_s: float = Field(default=60.0, description="Claim lease; tasks of workers that stop renewing it are retried")
+    poll_interval_s: float = Field(default=1.0, description="Idle poll interval")
+    retention_s: float = Field(default=7 * 86400, description="How long finished tasks are kept")
+
+
+class AdmissionClassSettings(BaseSettings):
+    """Admission limits for one request class."""
+    
+    max_concurrency: int = Field(default=1, description="Requests of this class running at once")
+    max_queue: int = Field(default=32, description="Requests of this class allowed to wait")
+    max_wait_s: float = Field(default=30.0, description="Longest a request may wait before being shed")
+
+
+class AdmissionSettings(BaseSettings):
+    """Request admission control settings."""
+    
+    enabled: bool = Field(default=True, description="Enable admission control middleware")
+    max_concurrency: int = Field(default=4, description="Requests running at once across all classes")
+    trusted_clients: list[str] = Field(
+        default_factory=list,
+        description="Client addresses or networks allowed to set X-SHEAIA-Priority"
+    )
+    interactive: AdmissionClassSettings = Field(
+        default_factory=lambda: AdmissionClassSettings(max_concurrency=4, max_queue=64, max_wait_s=10.0)
+    )
+    sql: AdmissionClassSettings = Field(
+        default_factory=lambda: AdmissionClassSettings(max_concurrency=2, max_queue=32, max_wait_s=30.0)
+    )
+    report: AdmissionClassSettings = Field(
+        default_factory=lambda: AdmissionClassSettings(max_concurrency=1, max_queue=16, max_wait_s=120.0)
+    )
+    background: AdmissionClassSettings = Field(
+        default_factory=lambda: AdmissionClassSettings(max_concurrency=1, max_queue=128, max_wait_s=600.0)
+    )
+
+
+class MetricsSettings(BaseSettings):
+    """Metrics and tracing settings."""
+    
+    enabled: bool = Field(default=True, description="Expose /metrics and record request latency")
+    tracing: bool = Field(default=False, description="Record spans around each chat request stage")
+
+
+class WarmupSettings(BaseSettings):
+    """Startup warm-up settings."""
+    
+    enabled: bool = Field(default=True, description="Preload and warm models when the API starts")
+    prime_prompts: bool = Field(
+        default=True,
+        description="Evaluate each language's system prompt so its prefix is cached"
+    )
+    languages: list[str] = Field(
+        default=["en", "zh-CN", "zh-TW", "th"],
+        description="Languages whose system prompts are primed"
+    )
+
+
+class HealthSettings(BaseSettings):
+    """Health probe settings."""
+    
+    probe_interval_s: float = Field(default=5.0, description="Seconds between background probe cycles")
+    probe_timeout_s: float = Field(default=2.0, description="Per-probe timeout")
+    required: list[str] = Field(
+        default=["llm", "embedding", "metadata", "warmup"],
+        description="Components that must be ok for /health/ready to return 200; "
+        "llm and embedding only count when warm-up is enabled"
+    )
+
+
 class SecuritySettings(BaseSettings):
     """Security settings."""
     
@@ -97,6 +233,132 @@ class I18nSettings(BaseSettings):
         default=["en", "zh-CN", "zh-TW", "th"],
         description="Supported languages"
     )
+    catalog_dir: str = Field(
+        default="",
+        description="Directory of <language>.json catalogs merged into the built-in translations"
+    )
+
+
+class AgentSettings(BaseSettings):
+    """Agent orchestration settings."""
+    
+    latency_budget_s: float = Field(
+        default=30.0,
+        description="Per-request latency budget; sub-agent branches still running after it are abandoned"
+    )
+    tool_top_k: int = Field(default=8, description="Tools offered per agent step, picked by relevance")
+    tools_always: list[str] = Field(default=[], description="Tools offered on every step")
+
+
+class ReportSettings(BaseSettings):
+    """Report generation settings."""
+    
+    cache_path: str = Field(default="./data/reports.db", description="SQLite store for memoized step results")
+    max_concurrency: int = Field(default=4, description="Report steps running at once")
+    languages: list[str] = Field(
+        default=["en", "zh-CN", "zh-TW", "th"],
+        description="Languages scheduled reports are rendered in"
+    )
+    cache_retention_s: float = Field(default=7 * 86400, description="Memoized step results older than this are pruned")
+    prune_interval_s: float = Field(default=3600, description="Seconds between prunes of the step memo")
+
+
+class MemorySettings(BaseSettings):
+    """Conversation memory settings."""
+    
+    max_recent_turns: int = Field(default=8, description="Turns kept verbatim; older turns are summarized")
+    summary_max_tokens: int = Field(default=512, description="Token cap for the rolling summary")
+    context_budget_tokens: int = Field(default=4096, description="Token budget for conversation prompts")
+    hot_capacity: int = Field(default=1024, description="Conversations kept in the in-memory hot tier")
+
+
+class FileConnectorSettings(BaseSettings):
+    """CSV/Excel watch-folder settings."""
+    
+    watch_dir: str = Field(default="./data/inbox", description="Folder watched for exports")
+    patterns: list[str] = Field(
+        default=["*.csv", "*.tsv", "*.txt", "*.xlsx", "*.xlsm"],
+        description="File names that are loaded"
+    )
+    debounce_s: float = Field(default=2.0, description="Quiet time before a changed file is loaded")
+    poll_interval_s: float = Field(default=5.0, description="Scan interval when inotify is unavailable")
+    chunk_mb: int = Field(default=64, description="CSV byte range parsed per worker task")
+    workers: int = Field(default=0, description="Parser processes (0 = one per CPU)")
+    batch_rows: int = Field(default=50000, description="Rows per batch for Excel and multi-line CSV")
+    state_path: str = Field(default="./data/connectors/files.json", description="Loaded offsets per file")
+
+
+class IndustrialSettings(BaseSettings):
+    """MQTT/OPC-UA tag ingestion settings."""
+    
+    capacity: int = Field(default=4096, description="Recent samples kept per tag")
+    resolutions: list[float] = Field(default=[1.0, 60.0, 3600.0], description="Rollup bucket sizes in seconds")
+    flush_interval_s: float = Field(default=5.0, description="How often closed rollup buckets are flushed")
+    max_pending: int = Field(default=100000, description="Closed bucket rows that force an early flush")
+    output_dir: str = Field(default="./data/timeseries", description="Directory for compressed rollup batches")
+    mqtt_host: str = Field(default="", description="MQTT broker host (empty disables MQTT)")
+    mqtt_port: int = Field(default=1883, description="MQTT broker port")
+    mqtt_topics: list[str] = Field(default=["plant/#"], description="Topics subscribed to; the topic is the tag")
+    opcua_url: str = Field(default="", description="OPC-UA server URL (empty disables OPC-UA)")
+    opcua_nodes: list[str] = Field(default=[], description="Node ids subscribed to")
+
+
+class ConnectorSettings(BaseSettings):
+    """Data connector settings."""
+    
+    files: FileConnectorSettings = Field(default_factory=FileConnectorSettings)
+    industrial: IndustrialSettings = Field(default_factory=IndustrialSettings)
+
+
+class ResultSettings(BaseSettings):
+    """Server-side query result store."""
+    
+    directory: str = Field(default="./data/results", description="Directory for Arrow result files")
+    quota_mb: int = Field(default=10240, description="Disk quota; least recently read results are evicted beyond it")
+    ttl_s: float = Field(default=86400.0, description="Seconds a result stays readable")
+    batch_rows: int = Field(default=65536, description="Rows per stored record batch")
+    page_rows: int = Field(default=10000, description="Default rows per page")
+    max_page_rows: int = Field(default=1000000, description="Largest page a client may request")
+
+
+class VisualizationSettings(BaseSettings):
+    """Chart series downsampling."""
+    
+    points: int = Field(default=1000, description="Default points per chart series")
+    max_points: int = Field(default=20000, description="Most points a chart may request")
+    summary_points: int = Field(default=12, description="Outline points in a series summary for the LLM")
+    cache_mb: int = Field(default=256, description="Memory for cached series and their zoom levels")
+
+
+class EntitySettings(BaseSettings):
+    """Cross-system entity resolution."""
+    
+    threshold: float = Field(default=0.7, description="Match score at which two records are linked")
+    num_perm: int = Field(default=64, description="MinHash permutations per name")
+    band_rows: int = Field(default=4, description="Signature rows per LSH band (fewer rows, more candidates)")
+    max_bucket: int = Field(default=20, description="LSH and code buckets larger than this are not compared")
+    neighbors: int = Field(default=3, description="Embedding neighbours taken per probed IVF list")
+    use_embeddings: bool = Field(default=True, description="Block and score on name embeddings as well as MinHash")
+
+
+class SummarizeSettings(BaseSettings):
+    """Long-document summarization settings."""
+    
+    cache_path: str = Field(default="./data/summaries.db", description="SQLite store for partial summaries")
+    chunk_tokens: int = Field(default=2048, description="Largest chunk (and merge input) sent to the LLM")
+    summary_words: int = Field(default=150, description="Word limit for each partial and the final summary")
+    fan_in: int = Field(default=4, description="Partial summaries merged per reduce call")
+    max_concurrency: int = Field(default=4, description="Summary passes in flight at once")
+
+
+class HardwareSettings(BaseSettings):
+    """Hardware profile selection (profiles are written by ``sheaia.cli autotune``)."""
+    
+    profile_path: str = Field(default="config/hardware.yaml", description="File of hardware profiles")
+    profile: str = Field(
+        default="auto",
+        description="Profile applied over llm/embedding settings: a name, auto (the active one) or none"
+    )
 
 
 class Settings(BaseSettings):
@@ -125,8 +387,25 @@ class Settings(BaseSettings):
     embedding: EmbeddingSettings = Field(default_factory=EmbeddingSettings)
     database: DatabaseSettings = Field(default_factory=DatabaseSettings)
     api: APISettings = Field(default_factory=APISettings)
+    model_server: ModelServerSettings = Field(default_factory=ModelServerSettings)
+    admission: AdmissionSettings = Field(default_factory=AdmissionSettings)
+    batch: BatchSettings = Field(default_factory=BatchSettings)
+    singleflight: SingleFlightSettings = Field(default_factory=SingleFlightSettings)
+    tasks: TaskSettings = Field(default_factory=TaskSettings)
+    metrics: MetricsSettings = Field(default_factory=MetricsSettings)
+    health: HealthSettings = Field(default_factory=HealthSettings)
+    warmup: WarmupSettings = Field(default_factory=WarmupSettings)
     security: SecuritySettings = Field(default_factory=SecuritySettings)
     i18n: I18nSettings = Field(default_factory=I18nSettings)
+    agents: AgentSettings = Field(default_factory=AgentSettings)
+    reports: ReportSettings = Field(default_factory=ReportSettings)
+    memory: MemorySettings = Field(default_factory=MemorySettings)
+    results: ResultSettings = Field(default_factory=ResultSettings)
+    visualization: VisualizationSettings = Field(default_factory=VisualizationSettings)
+    entities: EntitySettings = Field(default_factory=EntitySettings)
+    summarize: SummarizeSettings = Field(default_factory=SummarizeSettings)
+    connectors: ConnectorSettings = Field(default_factory=ConnectorSettings)
+    hardware: HardwareSettings = Field(default_factory=HardwareSettings)
     
     @classmethod
     def from_yaml(cls, path: str | Path) -> "Settings":
@@ -136,10 +415,48 @@ class Settings(BaseSettings):
         return cls(**config) if config else cls()
 
 
+# Sections of a hardware profile that are applied to settings; anything else
+# in a profile (detected hardware, measurements) is informational.
+_PROFILE_SECTIONS = ("llm", "embedding")
+
+
+def load_hardware_profile(path: str | Path, name: str = "auto") -> dict:
+    """
+    Settings overrides from one profile in a hardware profiles file.
+
+    ``name`` "auto" picks the file's ``active_profile``; "none", a missing
+    file or an unknown profile give no overrides.
+    """
+    path = Path(path)
+    if name == "none" or not path.exists():
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        data = yaml.safe_load(f) or {}
+    if name == "auto":
+        name = data.get("active_profile") or ""
+    profile = (data.get("hardware_profiles") or {}).get(name) or {}
+    return {
+        section: dict(profile[section])
+        for section in _PROFILE_SECTIONS
+        if isinstance(profile.get(section), dict)
+    }
+
+
 @lru_cache
 def get_settings() -> Settings:
-    """Get cached settings instance."""
+    """
+    Get cached settings instance.
+
+    ``config/settings.yaml`` is read when present, then the selected
+    hardware profile's measured values replace its llm/embedding values.
+    """
+    config = {}
     config_path = Path("config/settings.yaml")
     if config_path.exists():
-        return Settings.from_yaml(config_path)
-    return Settings()
+        with open(config_path, "r", encoding="utf-8") as f:
+            config = yaml.safe_load(f) or {}
+    
+    hardware = HardwareSettings(**config.get("hardware", {}))
+    for section, values in load_hardware_profile(hardware.profile_path, hardware.profile).items():
+        config[section] = {**config.get(section, {}), **values}
+    return Settings(**config)
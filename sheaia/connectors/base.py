@@ -0,0 +1,65 @@
+"""Connector abstraction - the interface every data source implements."""
+
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Optional
+
+from pydantic import BaseModel
+
+
+class ConnectorCaps(BaseModel):
+    """What a connector can do."""
+    
+    schema_discovery: bool = True
+    incremental: bool = False
+    streaming: bool = False
+    write: bool = False
+
+
+class ColumnSchema(BaseModel):
+    """A column as the connector sees it."""
+    
+    name: str
+    type: str
+
+
+class TableSchema(BaseModel):
+    """A table (or file, or sheet) a connector exposes."""
+    
+    name: str
+    columns: list[ColumnSchema] = []
+    rows: Optional[int] = None
+    source: Optional[str] = None
+
+
+class Connector(ABC):
+    """Abstract base class for data source connectors."""
+    
+    name: str = ""
+    
+    @abstractmethod
+    async def test_connection(self) -> bool:
+        """Check that the source is reachable."""
+        ...
+    
+    @abstractmethod
+    async def discover_schema(self) -> list[TableSchema]:
+        """List the tables the source exposes and their columns."""
+        ...
+    
+    @abstractmethod
+    async def fetch_data(self, query: str) -> Any:
+        """Fetch data for a query as a DataFrame."""
+        ...
+    
+    @abstractmethod
+    async def sync_incremental(self, since: Optional[datetime] = None) -> int:
+        """Load what changed since ``since``; returns the number of rows loaded."""
+        ...
+    
+    def get_capabilities(self) -> ConnectorCaps:
+        """Return what the connector supports."""
+        return ConnectorCaps()
+
+
+__all__ = ["ConnectorCaps", "ColumnSchema", "TableSchema", "Connector"]
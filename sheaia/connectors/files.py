@@ -0,0 +1,846 @@
+"""
+File connector - CSV and Excel watch folders.
+
+Files dropped into a watch folder are profiled from sampled bytes
+(encoding, dialect, header, column types), then loaded as columnar
+batches: large CSVs are cut into line-aligned byte ranges parsed in a
+process pool, xlsx workbooks are streamed in read-only mode. A CSV that
+has only been appended to since the last load is read from where the
+last load stopped.
+"""
+
+import asyncio
+import codecs
+import csv
+import ctypes
+import ctypes.util
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+import struct
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable, Iterator, Literal, Optional
+
+import pandas as pd
+from pydantic import BaseModel
+
+from sheaia.connectors.base import ColumnSchema, Connector, ConnectorCaps, TableSchema
+from sheaia.core.metrics import CONNECTOR_ROWS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATTERNS = ("*.csv", "*.tsv", "*.txt", "*.xlsx", "*.xlsm")
+
+# Encodings tried, in order, on the sampled bytes. GB18030 covers GBK and
+# GB2312 exports, Big5 Taiwanese ones and cp874 (TIS-620) Thai ones.
+_ENCODINGS = ("utf-8", "gb18030", "big5", "cp874")
+_DELIMITERS = ",;\t|"
+_INTEGER = re.compile(r"[+-]?\d{1,18}")
+_BOOLEANS = {"true": True, "false": False, "yes": True, "no": False, "y": True, "n": False}
+# Bytes hashed to recognise a file as the one loaded before.
+_FINGERPRINT_BYTES = 64 * 1024
+
+# inotify(7) flags
+_IN_MODIFY = 0x2
+_IN_CLOSE_WRITE = 0x8
+_IN_MOVED_FROM = 0x40
+_IN_MOVED_TO = 0x80
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_IN_Q_OVERFLOW = 0x4000
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = os.O_NONBLOCK
+_IN_CLOEXEC = 0o2000000
+_WATCH_MASK = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+_EVENT = struct.Struct("iIII")
+
+ColumnType = Literal["empty", "int", "float", "bool", "datetime", "string"]
+
+
+class FileProfile(BaseModel):
+    """How to parse a delimited text file, detected from samples of it."""
+    
+    encoding: str = "utf-8"
+    delimiter: str = ","
+    quotechar: str = '"'
+    header: bool = True
+    columns: list[str] = []
+    types: dict[str, ColumnType] = {}
+    data_offset: int = 0
+    multiline: bool = False
+
+
+class FileBatch(BaseModel):
+    """A columnar batch of rows read from one file (or sheet)."""
+    
+    model_config = {"arbitrary_types_allowed": True}
+    
+    source: str
+    table: str
+    frame: pd.DataFrame
+    start: int = 0
+    end: int = 0
+    replace: bool = False
+
+
+class FileState(BaseModel):
+    """What was loaded from a file, for resuming after appends."""
+    
+    inode: int
+    size: int
+    mtime_ns: int
+    offset: int
+    fingerprint: str
+    rows: int = 0
+    profile: Optional[FileProfile] = None
+
+
+BatchSink = Callable[[FileBatch], Awaitable[None]]
+
+
+def table_name(path: str | Path, sheet: Optional[str] = None) -> str:
+    """Table name for a file (and sheet): lower-case, word characters only."""
+    name = Path(path).stem if sheet is None else f"{Path(path).stem}_{sheet}"
+    return re.sub(r"\W+", "_", name).strip("_").lower() or "data"
+
+
+def _column_names(cells: list) -> list[str]:
+    """Header cells as unique column names; blanks become ``column_N``."""
+    names: list[str] = []
+    for i, cell in enumerate(cells):
+        name = str(cell).strip() if cell is not None else ""
+        name = name or f"column_{i + 1}"
+        base, n = name, 2
+        while name in names:
+            name, n = f"{base}_{n}", n + 1
+        names.append(name)
+    return names
+
+
+def _detect_encoding(sample: bytes) -> str:
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    for encoding in _ENCODINGS:
+        try:
+            # final=False: the sample may end inside a multi-byte character.
+            codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return "latin-1"
+
+
+def _codec(encoding: str) -> str:
+    # Ranges after the first never start with the BOM.
+    return "utf-8" if encoding == "utf-8-sig" else encoding
+
+
+def _complete_lines(data: bytes, encoding: str) -> str:
+    """Decode ``data`` up to its last newline."""
+    cut = data.rfind(b"\n")
+    return data[:cut + 1].decode(encoding, errors="replace") if cut >= 0 else ""
+
+
+def _infer_type(values: pd.Series) -> ColumnType:
+    """Narrowest type every value of a string column fits."""
+    values = values.dropna().str.strip()
+    values = values[values != ""]
+    if values.empty:
+        return "empty"
+    if values.str.fullmatch(_INTEGER).all():
+        return "int"
+    if pd.to_numeric(values, errors="coerce").notna().all():
+        return "float"
+    if values.str.lower().isin(_BOOLEANS.keys()).all():
+        return "bool"
+    try:
+        if pd.to_datetime(values, errors="coerce", format="ISO8601").notna().all():
+            return "datetime"
+    except ValueError:
+        # Mixed time zones and similar: keep the text.
+        pass
+    return "string"
+
+
+def _widen(a: ColumnType, b: ColumnType) -> ColumnType:
+    if a == b or b == "empty":
+        return a
+    if a == "empty":
+        return b
+    if {a, b} == {"int", "float"}:
+        return "float"
+    return "string"
+
+
+def sniff_csv(path: str | Path, sample_bytes: int = 256 * 1024, windows: int = 4) -> FileProfile:
+    """
+    Profile a delimited file from its head and ``windows`` samples spread
+    through it, without reading the rest.
+
+    Encoding, delimiter, quoting and header come from the head; column
+    types are inferred on every sample and widened, so a column that is
+    integral at the top and fractional further down becomes float.
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        head = f.read(sample_bytes)
+        samples = []
+        for k in range(1, windows + 1):
+            offset = size * k // (windows + 1)
+            if offset <= len(head):
+                continue
+            f.seek(offset)
+            f.readline()
+            samples.append(f.read(sample_bytes // windows))
+    
+    encoding = _detect_encoding(head)
+    codec = _codec(encoding)
+    bom = len(codecs.BOM_UTF8) if encoding == "utf-8-sig" else 0
+    text = head[bom:].decode(codec, errors="replace") if size <= len(head) else _complete_lines(head[bom:], codec)
+    sample = text[:64 * 1024]
+    sniffer = csv.Sniffer()
+    try:
+        dialect = sniffer.sniff(sample, delimiters=_DELIMITERS)
+        delimiter, quotechar = dialect.delimiter, dialect.quotechar or '"'
+    except csv.Error:
+        delimiter, quotechar = ",", '"'
+    try:
+        header = sniffer.has_header(sample)
+    except csv.Error:
+        header = True
+    
+    first = next(csv.reader(io.StringIO(text), delimiter=delimiter, quotechar=quotechar), [])
+    columns = _column_names(first) if header else [f"column_{i + 1}" for i in range(len(first))]
+    data_offset = head.index(b"\n", bom) + 1 if header and b"\n" in head[bom:] else bom
+    lines = text.splitlines()
+    multiline = any(line.count(quotechar) % 2 for line in lines)
+    
+    profile = FileProfile(
+        encoding=encoding,
+        delimiter=delimiter,
+        quotechar=quotechar,
+        header=header,
+        columns=columns,
+        data_offset=data_offset,
+        multiline=multiline,
+    )
+    types: dict[str, ColumnType] = {name: "empty" for name in columns}
+    bodies = ["\n".join(lines[1:] if header else lines)] + [_complete_lines(s, codec) for s in samples]
+    for body in bodies:
+        if not body.strip():
+            continue
+        frame = pd.read_csv(io.StringIO(body), dtype=str, **_read_options(profile))
+        for name in columns:
+            types[name] = _widen(types[name], _infer_type(frame[name]))
+    profile.types = types
+    return profile
+
+
+def _read_options(profile: FileProfile) -> dict:
+    return {
+        "sep": profile.delimiter,
+        "quotechar": profile.quotechar,
+        "header": None,
+        "names": profile.columns,
+        "index_col": False,
+        "skip_blank_lines": True,
+        "on_bad_lines": "skip",
+    }
+
+
+def _dtypes(profile: FileProfile) -> dict:
+    kinds = {"int": "Int64", "float": "float64"}
+    return {name: kinds.get(kind, str) for name, kind in profile.types.items()}
+
+
+def _convert(frame: pd.DataFrame, profile: FileProfile) -> pd.DataFrame:
+    """Apply the profiled types to a frame parsed as text where needed."""
+    for name, kind in profile.types.items():
+        column = frame[name]
+        if kind in ("int", "float") and not pd.api.types.is_numeric_dtype(column):
+            column = pd.to_numeric(column, errors="coerce")
+            frame[name] = column.astype("Int64") if kind == "int" and (column.dropna() % 1 == 0).all() else column
+        elif kind == "bool":
+            frame[name] = column.str.strip().str.lower().map(_BOOLEANS).astype("boolean")
+        elif kind == "datetime":
+            try:
+                frame[name] = pd.to_datetime(column, errors="coerce", format="ISO8601")
+            except ValueError:
+                pass
+    return frame
+
+
+def parse_csv_bytes(data: bytes, profile: FileProfile) -> pd.DataFrame:
+    """Parse whole lines of a delimited file into a typed frame."""
+    options = _read_options(profile)
+    options["encoding"] = _codec(profile.encoding)
+    try:
+        frame = pd.read_csv(io.BytesIO(data), dtype=_dtypes(profile), **options)
+    except (ValueError, OverflowError):
+        # A value further down does not fit the sampled type: parse as text
+        # and coerce, leaving the misfits empty.
+        frame = pd.read_csv(io.BytesIO(data), dtype=str, **options)
+    return _convert(frame, profile)
+
+
+def _parse_range(path: str, start: int, end: int, profile: FileProfile) -> pd.DataFrame:
+    """Process-pool worker: parse bytes ``start:end`` of ``path``."""
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    return parse_csv_bytes(data, profile)
+
+
+def csv_ranges(path: str | Path, start: int, end: int, chunk_bytes: int) -> list[tuple[int, int]]:
+    """Cut ``start:end`` into ranges of about ``chunk_bytes`` that end at line breaks."""
+    bounds = [start]
+    with open(path, "rb") as f:
+        position = start + chunk_bytes
+        while position < end:
+            f.seek(position)
+            f.readline()
+            position = f.tell()
+            if position >= end:
+                break
+            bounds.append(position)
+            position += chunk_bytes
+    bounds.append(end)
+    return list(zip(bounds, bounds[1:]))
+
+
+def _line_end(path: str | Path, start: int, end: int) -> int:
+    """``end`` moved back to just after the last line break in ``start:end``."""
+    with open(path, "rb") as f:
+        position = end
+        while position > start:
+            size = min(65536, position - start)
+            f.seek(position - size)
+            cut = f.read(size).rfind(b"\n")
+            if cut >= 0:
+                return position - size + cut + 1
+            position -= size
+    return start
+
+
+class _Window(io.RawIOBase):
+    """Reads ``length`` bytes of a file from its current position, then EOF."""
+    
+    def __init__(self, f, length: int):
+        self.f = f
+        self.remaining = length
+    
+    def readable(self) -> bool:
+        return True
+    
+    def readinto(self, buffer) -> int:
+        data = self.f.read(min(len(buffer), self.remaining))
+        buffer[:len(data)] = data
+        self.remaining -= len(data)
+        return len(data)
+
+
+def _read_csv_sequential(
+    path: str,
+    start: int,
+    end: int,
+    profile: FileProfile,
+    batch_rows: int,
+) -> Iterator[pd.DataFrame]:
+    """Chunked single-reader parse of ``start:end`` for files whose quoted fields span lines."""
+    options = _read_options(profile)
+    options["encoding"] = _codec(profile.encoding)
+    with open(path, "rb") as f:
+        f.seek(start)
+        window = io.BufferedReader(_Window(f, end - start))
+        for frame in pd.read_csv(window, dtype=str, chunksize=batch_rows, **options):
+            yield _convert(frame, profile)
+
+
+def read_xlsx(path: str | Path, batch_rows: int = 50_000) -> Iterator[tuple[str, pd.DataFrame]]:
+    """
+    Stream ``(sheet, frame)`` batches from a workbook.
+
+    The workbook is opened read-only, so rows are parsed as they are read
+    rather than loading the whole sheet tree into memory. The first
+    non-empty row of each sheet is its header.
+    """
+    from openpyxl import load_workbook
+    
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        for sheet in workbook.worksheets:
+            columns: Optional[list[str]] = None
+            rows: list[tuple] = []
+            for row in sheet.iter_rows(values_only=True):
+                if columns is None:
+                    if any(cell is not None for cell in row):
+                        columns = _column_names(list(row))
+                    continue
+                rows.append(row[:len(columns)])
+                if len(rows) >= batch_rows:
+                    yield sheet.title, pd.DataFrame.from_records(rows, columns=columns).infer_objects()
+                    rows = []
+            if columns is not None and rows:
+                yield sheet.title, pd.DataFrame.from_records(rows, columns=columns).infer_objects()
+    finally:
+        workbook.close()
+
+
+def _is_xlsx(path: str | Path) -> bool:
+    return Path(path).suffix.lower() in (".xlsx", ".xlsm")
+
+
+def _fingerprint(path: str | Path, offset: int) -> str:
+    """Hash of the file head and the bytes just before ``offset``."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        digest.update(f.read(min(offset, _FINGERPRINT_BYTES)))
+        tail = max(0, offset - 4096)
+        f.seek(tail)
+        digest.update(f.read(offset - tail))
+    return digest.hexdigest()
+
+
+async def _iterate_in_thread(iterator: Iterator) -> AsyncIterator:
+    """Drive a blocking iterator from a worker thread, one item at a time."""
+    loop = asyncio.get_running_loop()
+    done = object()
+    while (item := await loop.run_in_executor(None, next, iterator, done)) is not done:
+        yield item
+
+
+class _Inotify:
+    """Minimal inotify(7) binding over libc."""
+    
+    def __init__(self, folder: Path, mask: int = _WATCH_MASK):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(self.fd, os.fsencode(folder), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch failed for {folder}")
+    
+    def read(self) -> list[tuple[int, str]]:
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events = []
+        i = 0
+        while i + _EVENT.size <= len(data):
+            _, mask, _, length = _EVENT.unpack_from(data, i)
+            name = data[i + _EVENT.size:i + _EVENT.size + length].rstrip(b"\0")
+            events.append((mask, os.fsdecode(name)))
+            i += _EVENT.size + length
+        return events
+    
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class FolderWatcher:
+    """
+    Yields files in a folder once they stop changing.
+
+    Uses inotify on Linux and falls back to polling elsewhere (or when
+    inotify is unavailable, e.g. on some network mounts). A file is
+    reported after ``debounce_s`` without events, so an export written in
+    many pieces is picked up once, when it is complete.
+    """
+    
+    def __init__(
+        self,
+        folder: str | Path,
+        patterns: tuple[str, ...] = DEFAULT_PATTERNS,
+        debounce_s: float = 2.0,
+        poll_interval_s: float = 5.0,
+        use_inotify: bool = True,
+    ):
+        self.folder = Path(folder)
+        self.patterns = tuple(patterns)
+        self.debounce_s = debounce_s
+        self.poll_interval_s = poll_interval_s
+        self.use_inotify = use_inotify and sys.platform.startswith("linux")
+    
+    def matches(self, name: str) -> bool:
+        """Whether a file name is one the watcher reports."""
+        return not name.startswith((".", "~$")) and any(fnmatch(name.lower(), p) for p in self.patterns)
+    
+    def scan(self) -> dict[str, tuple[int, int]]:
+        """Matching files and their ``(size, mtime_ns)``."""
+        files = {}
+        with os.scandir(self.folder) as entries:
+            for entry in entries:
+                if entry.is_file() and self.matches(entry.name):
+                    stat = entry.stat()
+                    files[entry.name] = (stat.st_size, stat.st_mtime_ns)
+        return files
+    
+    def _open_inotify(self) -> Optional[_Inotify]:
+        if not self.use_inotify:
+            return None
+        try:
+            return _Inotify(self.folder)
+        except (OSError, AttributeError) as e:
+            logger.warning(f"inotify unavailable for {self.folder}, polling instead: {e}")
+            return None
+    
+    async def changes(self) -> AsyncIterator[Path]:
+        """Yield paths of files that were created or changed, once each settles."""
+        loop = asyncio.get_running_loop()
+        pending: dict[str, float] = {}
+        wake = asyncio.Event()
+        notify = self._open_inotify()
+        seen = self.scan()
+        
+        if notify is not None:
+            def on_events() -> None:
+                now = loop.time()
+                for mask, name in notify.read():
+                    if mask & _IN_Q_OVERFLOW:
+                        # Events were dropped; treat everything as changed.
+                        pending.update(dict.fromkeys(self.scan(), now))
+                    elif mask & _IN_ISDIR or not self.matches(name):
+                        continue
+                    elif mask & (_IN_DELETE | _IN_MOVED_FROM):
+                        pending.pop(name, None)
+                    else:
+                        pending[name] = now
+                wake.set()
+            
+            loop.add_reader(notify.fd, on_events)
+        
+        try:
+            while True:
+                wake.clear()
+                now = loop.time()
+                if notify is None:
+                    current = self.scan()
+                    for name, signature in current.items():
+                        if seen.get(name) != signature:
+                            pending[name] = now
+                    for name in list(pending):
+                        if name not in current:
+                            del pending[name]
+                    seen = current
+                
+                for name in sorted(n for n, t in pending.items() if now - t >= self.debounce_s):
+                    del pending[name]
+                    yield self.folder / name
+                
+                timeout = None if notify is not None else self.poll_interval_s
+                if pending:
+                    due = max(0.0, min(pending.values()) + self.debounce_s - loop.time())
+                    timeout = due if timeout is None else min(timeout, due)
+                try:
+                    await asyncio.wait_for(wake.wait(), timeout)
+                except TimeoutError:
+                    pass
+        finally:
+            if notify is not None:
+                loop.remove_reader(notify.fd)
+                notify.close()
+
+
+class FileStateStore:
+    """Per-file load state, kept as a JSON file written atomically."""
+    
+    def __init__(self, path: Optional[str | Path] = None):
+        self.path = Path(path) if path else None
+        self.states: dict[str, FileState] = {}
+        if self.path is not None and self.path.exists():
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            self.states = {key: FileState(**value) for key, value in data.items()}
+    
+    def get(self, path: str | Path) -> Optional[FileState]:
+        return self.states.get(str(path))
+    
+    def set(self, path: str | Path, state: Optional[FileState]) -> None:
+        if state is None:
+            self.states.pop(str(path), None)
+        else:
+            self.states[str(path)] = state
+        self.save()
+    
+    def save(self) -> None:
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        data = {key: state.model_dump() for key, state in self.states.items()}
+        tmp.write_text(json.dumps(data, ensure_ascii=False, indent=1), encoding="utf-8")
+        tmp.replace(self.path)
+
+
+class FileConnector(Connector):
+    """
+    Watch-folder connector for CSV and Excel exports.
+
+    Every batch goes to ``sink`` in file order. ``FileBatch.replace`` marks
+    the first batch of a full (re)load, after which earlier rows of that
+    table are stale; append loads carry ``replace=False``. State is saved
+    after the sink has taken a whole file, so a crash mid-file means the
+    file is loaded again from its last saved offset (at-least-once).
+
+    Example:
+        connector = FileConnector("./data/inbox", sink=warehouse.load)
+        await connector.watch()
+    """
+    
+    name = "files"
+    
+    def __init__(
+        self,
+        folder: str | Path,
+        sink: BatchSink,
+        patterns: tuple[str, ...] = DEFAULT_PATTERNS,
+        debounce_s: float = 2.0,
+        poll_interval_s: float = 5.0,
+        chunk_bytes: int = 64 * 1024 * 1024,
+        workers: Optional[int] = None,
+        batch_rows: int = 50_000,
+        state_path: Optional[str | Path] = None,
+        use_inotify: bool = True,
+    ):
+        self.folder = Path(folder)
+        self.sink = sink
+        self.chunk_bytes = chunk_bytes
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_rows = batch_rows
+        self.watcher = FolderWatcher(self.folder, patterns, debounce_s, poll_interval_s, use_inotify)
+        self.state = FileStateStore(state_path)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._locks: dict[str, asyncio.Lock] = {}
+    
+    @classmethod
+    def from_settings(cls, settings, sink: BatchSink) -> "FileConnector":
+        """Create a connector from ``Settings.connectors.files``."""
+        files = settings.connectors.files
+        return cls(
+            folder=files.watch_dir,
+            sink=sink,
+            patterns=tuple(files.patterns),
+            debounce_s=files.debounce_s,
+            poll_interval_s=files.poll_interval_s,
+            chunk_bytes=files.chunk_mb * 1024 * 1024,
+            workers=files.workers or None,
+            batch_rows=files.batch_rows,
+            state_path=files.state_path,
+        )
+    
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool
+    
+    def get_capabilities(self) -> ConnectorCaps:
+        return ConnectorCaps(incremental=True, streaming=True)
+    
+    async def test_connection(self) -> bool:
+        return self.folder.is_dir() and os.access(self.folder, os.R_OK)
+    
+    async def profile(self, path: str | Path) -> FileProfile:
+        """Profile a CSV in the process pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.pool, sniff_csv, str(path))
+    
+    async def discover_schema(self) -> list[TableSchema]:
+        """Tables for every file in the folder; CSVs are profiled concurrently."""
+        names = sorted(self.watcher.scan())
+        csvs = [name for name in names if not _is_xlsx(name)]
+        profiles = await asyncio.gather(*(self.profile(self.folder / name) for name in csvs))
+        tables = [
+            TableSchema(
+                name=table_name(name),
+                columns=[ColumnSchema(name=c, type=profile.types.get(c, "string")) for c in profile.columns],
+                source=str(self.folder / name),
+            )
+            for name, profile in zip(csvs, profiles)
+        ]
+        for name in names:
+            if _is_xlsx(name):
+                tables.extend(await asyncio.to_thread(self._xlsx_schema, self.folder / name))
+        return tables
+    
+    def _xlsx_schema(self, path: Path) -> list[TableSchema]:
+        tables = {}
+        for sheet, frame in read_xlsx(path, batch_rows=100):
+            if sheet not in tables:
+                columns = [ColumnSchema(name=str(c), type=str(t)) for c, t in frame.dtypes.items()]
+                tables[sheet] = TableSchema(name=table_name(path, sheet), columns=columns, source=str(path))
+        return list(tables.values())
+    
+    async def fetch_data(self, query: str) -> pd.DataFrame:
+        """Read a whole file (or sheet) by table name."""
+        frames = []
+        
+        async def collect(batch: FileBatch) -> None:
+            if batch.table == query:
+                frames.append(batch.frame)
+        
+        for name in sorted(self.watcher.scan()):
+            path = self.folder / name
+            if query == table_name(name) or (_is_xlsx(name) and query.startswith(table_name(name))):
+                async for batch in self._batches(path, None):
+                    await collect(batch)
+        if not frames:
+            raise KeyError(f"No file provides table {query}")
+        return pd.concat(frames, ignore_index=True)
+    
+    async def sync_incremental(self, since: Optional[datetime] = None) -> int:
+        """Load files modified after ``since`` (all files when None)."""
+        cutoff = since.timestamp() * 1e9 if since else 0
+        rows = 0
+        for name, (_, mtime_ns) in sorted(self.watcher.scan().items()):
+            if mtime_ns > cutoff:
+                rows += await self.sync_file(self.folder / name)
+        return rows
+    
+    async def watch(self) -> None:
+        """Load what is already in the folder, then every file that changes."""
+        await self.sync_incremental()
+        async for path in self.watcher.changes():
+            try:
+                await self.sync_file(path)
+            except FileNotFoundError:
+                self.state.set(path, None)
+            except Exception as e:
+                logger.error(f"Loading {path} failed: {e}")
+    
+    async def sync_file(self, path: str | Path) -> int:
+        """Load a file, from its last offset when it was only appended to."""
+        path = Path(path)
+        lock = self._locks.setdefault(str(path), asyncio.Lock())
+        async with lock:
+            return await self._sync(path)
+    
+    async def _sync(self, path: Path) -> int:
+        stat = path.stat()
+        state = self.state.get(path)
+        if (
+            state is not None
+            and (state.size, state.mtime_ns, state.inode) == (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+            and state.offset == stat.st_size
+        ):
+            return 0
+        
+        start = None
+        if state is not None and not _is_xlsx(path) and state.inode == stat.st_ino and stat.st_size >= state.offset:
+            if await asyncio.to_thread(_fingerprint, path, state.offset) == state.fingerprint:
+                start = state.offset
+        
+        profile = None
+        if not _is_xlsx(path):
+            profile = state.profile if start is not None and state is not None else await self.profile(path)
+        # Resume from what was actually consumed, not from ``stat``: the file
+        # may have grown meanwhile, and a line still being written is left.
+        end = stat.st_size if profile is None else (start if start is not None else profile.data_offset)
+        rows = 0
+        async for batch in self._batches(path, start, profile):
+            await self.sink(batch)
+            rows += len(batch.frame)
+            end = max(end, batch.end)
+        
+        previous = state.rows if start is not None and state is not None else 0
+        self.state.set(path, FileState(
+            inode=stat.st_ino,
+            size=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+            offset=end,
+            fingerprint=await asyncio.to_thread(_fingerprint, path, end),
+            rows=previous + rows,
+            profile=profile,
+        ))
+        CONNECTOR_ROWS.labels(self.name).inc(rows)
+        logger.info(f"Loaded {rows} rows from {path.name}" + (f" after offset {start}" if start else ""))
+        return rows
+    
+    async def _batches(
+        self,
+        path: Path,
+        start: Optional[int],
+        profile: Optional[FileProfile] = None,
+    ) -> AsyncIterator[FileBatch]:
+        """Batches of a file: from ``start`` with a known profile, or a full load."""
+        if _is_xlsx(path):
+            seen: set[str] = set()
+            async for sheet, frame in _iterate_in_thread(read_xlsx(path, self.batch_rows)):
+                table = table_name(path, sheet)
+                yield FileBatch(source=str(path), table=table, frame=frame, replace=table not in seen)
+                seen.add(table)
+            return
+        
+        if profile is None:
+            profile = await self.profile(path)
+        replace = start is None
+        start = profile.data_offset if start is None else start
+        stat = path.stat()
+        end = stat.st_size
+        if time.time_ns() - stat.st_mtime_ns < self.watcher.debounce_s * 1e9:
+            # Still being written: stop after the last complete line. Each
+            # batch's ``end`` is where the next load resumes.
+            end = await asyncio.to_thread(_line_end, path, start, end)
+        if end <= start:
+            return
+        table = table_name(path)
+        
+        if profile.multiline:
+            rows = _read_csv_sequential(str(path), start, end, profile, self.batch_rows)
+            async for frame in _iterate_in_thread(rows):
+                yield FileBatch(source=str(path), table=table, frame=frame, start=start, end=end, replace=replace)
+                replace = False
+            return
+        
+        loop = asyncio.get_running_loop()
+        ranges = await asyncio.to_thread(csv_ranges, path, start, end, self.chunk_bytes)
+        pending: deque = deque()
+        try:
+            for low, high in ranges:
+                pending.append((low, high, loop.run_in_executor(self.pool, _parse_range, str(path), low, high, profile)))
+                # Keep the pool busy without holding every parsed range in memory.
+                if len(pending) >= 2 * self.workers:
+                    low, high, future = pending.popleft()
+                    yield FileBatch(source=str(path), table=table, frame=await future, start=low, end=high, replace=replace)
+                    replace = False
+            while pending:
+                low, high, future = pending.popleft()
+                yield FileBatch(source=str(path), table=table, frame=await future, start=low, end=high, replace=replace)
+                replace = False
+        finally:
+            for _, _, future in pending:
+                future.cancel()
+    
+    def close(self) -> None:
+        """Stop the worker processes."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+
+__all__ = [
+    "DEFAULT_PATTERNS",
+    "FileProfile",
+    "FileBatch",
+    "FileState",
+    "BatchSink",
+    "table_name",
+    "sniff_csv",
+    "parse_csv_bytes",
+    "csv_ranges",
+    "read_xlsx",
+    "FolderWatcher",
+    "FileStateStore",
+    "FileConnector",
+]
@@ -0,0 +1,650 @@
+"""
+Industrial time series - MQTT/OPC-UA tag ingestion.
+
+High-frequency tags are never handled row by row. Samples arrive in
+batches of NumPy arrays; the newest ``capacity`` samples of every tag sit
+in fixed-size ring buffers, and 1 s / 1 min / 1 h aggregates (count, sum,
+min, max, last) are kept up to date incrementally. Closed aggregate
+buckets are flushed in bulk as columnar batches, which is what the
+analytics cache stores and what the LLM is shown.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable, NamedTuple, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel
+
+from sheaia.core.metrics import CONNECTOR_ROWS
+
+logger = logging.getLogger(__name__)
+
+RESOLUTIONS = (1.0, 60.0, 3600.0)
+_NO_BUCKET = np.iinfo(np.int64).min
+_ROLLUP_COLUMNS = ("tag", "start", "count", "sum", "min", "max", "last")
+
+
+class TagSamples(NamedTuple):
+    """A batch of samples: tag names (or ids from ``TagStore.tag_ids``), epoch seconds, values."""
+    
+    tags: Sequence[str] | np.ndarray
+    timestamps: np.ndarray
+    values: np.ndarray
+
+
+class RollupBatch(BaseModel):
+    """Closed aggregate buckets of one resolution, one row per tag and bucket."""
+    
+    model_config = {"arbitrary_types_allowed": True}
+    
+    resolution: float
+    frame: pd.DataFrame
+
+
+RollupSink = Callable[[RollupBatch], Awaitable[None]]
+
+
+def _label(resolution: float) -> str:
+    if resolution >= 3600 and resolution % 3600 == 0:
+        return f"{int(resolution // 3600)}h"
+    if resolution >= 60 and resolution % 60 == 0:
+        return f"{int(resolution // 60)}m"
+    return f"{resolution:g}s"
+
+
+class _Rollup:
+    """Open bucket per tag for one resolution, plus buckets closed since the last drain."""
+    
+    def __init__(self, resolution: float, tags: int):
+        self.resolution = resolution
+        self.bucket = np.full(tags, _NO_BUCKET, dtype=np.int64)
+        self.count = np.zeros(tags, dtype=np.int64)
+        self.sum = np.zeros(tags)
+        self.min = np.full(tags, np.inf)
+        self.max = np.full(tags, -np.inf)
+        self.last = np.full(tags, np.nan)
+        self.closed: list[tuple[np.ndarray, ...]] = []
+        self.pending = 0
+    
+    def grow(self, tags: int) -> None:
+        extra = tags - len(self.bucket)
+        self.bucket = np.concatenate([self.bucket, np.full(extra, _NO_BUCKET, dtype=np.int64)])
+        self.count = np.concatenate([self.count, np.zeros(extra, dtype=np.int64)])
+        self.sum = np.concatenate([self.sum, np.zeros(extra)])
+        self.min = np.concatenate([self.min, np.full(extra, np.inf)])
+        self.max = np.concatenate([self.max, np.full(extra, -np.inf)])
+        self.last = np.concatenate([self.last, np.full(extra, np.nan)])
+    
+    def _emit(self, tag, bucket, count, total, low, high, last) -> None:
+        if len(tag):
+            self.closed.append((tag, bucket, count, total, low, high, last))
+            self.pending += len(tag)
+    
+    def _close(self, tags: np.ndarray) -> None:
+        tags = tags[self.count[tags] > 0]
+        self._emit(
+            tags, self.bucket[tags], self.count[tags], self.sum[tags],
+            self.min[tags], self.max[tags], self.last[tags],
+        )
+        self.count[tags] = 0
+        self.sum[tags] = 0.0
+        self.min[tags] = np.inf
+        self.max[tags] = -np.inf
+    
+    def update(self, ids: np.ndarray, timestamps: np.ndarray, values: np.ndarray) -> None:
+        """Fold a batch sorted by tag into the open buckets."""
+        buckets = np.floor(timestamps / self.resolution).astype(np.int64)
+        if len(buckets) > 1 and not (np.all(np.diff(buckets)[ids[1:] == ids[:-1]] >= 0)):
+            order = np.lexsort((buckets, ids))
+            ids, buckets, values = ids[order], buckets[order], values[order]
+        
+        # One group per (tag, bucket) in the batch.
+        edges = np.flatnonzero((ids[1:] != ids[:-1]) | (buckets[1:] != buckets[:-1])) + 1
+        starts = np.concatenate(([0], edges))
+        ends = np.concatenate((edges, [len(ids)]))
+        tag, bucket = ids[starts], buckets[starts]
+        count = ends - starts
+        total = np.add.reduceat(values, starts)
+        low = np.minimum.reduceat(values, starts)
+        high = np.maximum.reduceat(values, starts)
+        last = values[ends - 1]
+        
+        open_bucket = self.bucket[tag]
+        same = bucket == open_bucket
+        if same.any():
+            t = tag[same]
+            self.count[t] += count[same]
+            self.sum[t] += total[same]
+            self.min[t] = np.minimum(self.min[t], low[same])
+            self.max[t] = np.maximum(self.max[t], high[same])
+            self.last[t] = last[same]
+        
+        newer = bucket > open_bucket
+        late = bucket < open_bucket
+        last_of_tag = np.concatenate((tag[1:] != tag[:-1], [True]))
+        # Groups are ordered by bucket within a tag, so a tag's newest group
+        # becomes its open bucket and the one it replaces is closed.
+        opening = newer & last_of_tag
+        self._close(tag[opening])
+        # Earlier groups of this batch are already complete; late samples for
+        # a bucket that has moved on are emitted as a partial row of their own.
+        done = late | (newer & ~last_of_tag)
+        self._emit(tag[done], bucket[done], count[done], total[done], low[done], high[done], last[done])
+        
+        t = tag[opening]
+        self.bucket[t] = bucket[opening]
+        self.count[t] = count[opening]
+        self.sum[t] = total[opening]
+        self.min[t] = low[opening]
+        self.max[t] = high[opening]
+        self.last[t] = last[opening]
+    
+    def close_before(self, watermark: float) -> None:
+        """Close open buckets that ended at or before ``watermark``."""
+        active = np.flatnonzero(self.count > 0)
+        self._close(active[(self.bucket[active] + 1) * self.resolution <= watermark])
+    
+    def drain(self) -> Optional[tuple[np.ndarray, ...]]:
+        if not self.closed:
+            return None
+        columns = tuple(np.concatenate(parts) for parts in zip(*self.closed))
+        self.closed = []
+        self.pending = 0
+        return columns
+
+
+class TagStore:
+    """
+    Ring buffers and incremental rollups for many tags.
+
+    Every ``ingest`` is a handful of vectorized NumPy operations over the
+    batch - sort by tag, scatter into the rings, one ``reduceat`` per
+    aggregate and resolution - so the cost per sample does not depend on
+    the number of tags and falls as batches grow (a few hundred
+    nanoseconds per sample on one core for batches of thousands).
+    """
+    
+    def __init__(self, capacity: int = 4096, resolutions: Sequence[float] = RESOLUTIONS, tags: int = 256):
+        self.capacity = capacity
+        self.names: list[str] = []
+        self.ids: dict[str, int] = {}
+        self.samples = 0
+        self.latest = -np.inf
+        self._timestamps = np.zeros((tags, capacity))
+        self._values = np.zeros((tags, capacity))
+        self._written = np.zeros(tags, dtype=np.int64)
+        self.rollups = {float(r): _Rollup(float(r), tags) for r in resolutions}
+    
+    def _grow(self, tags: int) -> None:
+        size = max(tags, 2 * len(self._written))
+        extra = size - len(self._written)
+        self._timestamps = np.vstack([self._timestamps, np.zeros((extra, self.capacity))])
+        self._values = np.vstack([self._values, np.zeros((extra, self.capacity))])
+        self._written = np.concatenate([self._written, np.zeros(extra, dtype=np.int64)])
+        for rollup in self.rollups.values():
+            rollup.grow(size)
+    
+    def tag_id(self, name: str) -> int:
+        """Id of a tag, registering it on first use."""
+        tag = self.ids.get(name)
+        if tag is None:
+            tag = self.ids[name] = len(self.names)
+            self.names.append(name)
+            if tag >= len(self._written):
+                self._grow(tag + 1)
+        return tag
+    
+    def tag_ids(self, names: Sequence[str] | np.ndarray) -> np.ndarray:
+        """Ids for an array of tag names; each distinct name is looked up once."""
+        unique, inverse = np.unique(np.asarray(names, dtype=object), return_inverse=True)
+        return np.array([self.tag_id(str(name)) for name in unique], dtype=np.int64)[inverse]
+    
+    def ingest(
+        self,
+        tags: Sequence[str] | np.ndarray,
+        timestamps: np.ndarray,
+        values: np.ndarray,
+    ) -> int:
+        """Add a batch of samples; returns how many were added."""
+        ids = np.asarray(tags)
+        ids = ids.astype(np.int64, copy=False) if ids.dtype.kind in "iu" else self.tag_ids(ids)
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        values = np.asarray(values, dtype=np.float64)
+        n = len(ids)
+        if n == 0:
+            return 0
+        
+        order = np.argsort(ids, kind="stable")
+        ids, timestamps, values = ids[order], timestamps[order], values[order]
+        starts = np.concatenate(([0], np.flatnonzero(ids[1:] != ids[:-1]) + 1))
+        counts = np.diff(np.concatenate((starts, [n])))
+        group = ids[starts]
+        
+        # Rank of each sample within its tag; only the newest `capacity`
+        # samples of a tag are written, so no ring slot is written twice.
+        rank = np.arange(n) - np.repeat(starts, counts)
+        keep = rank >= np.repeat(counts, counts) - self.capacity
+        slots = (self._written[ids] + rank) % self.capacity
+        self._timestamps[ids[keep], slots[keep]] = timestamps[keep]
+        self._values[ids[keep], slots[keep]] = values[keep]
+        self._written[group] += counts
+        
+        for rollup in self.rollups.values():
+            rollup.update(ids, timestamps, values)
+        self.samples += n
+        self.latest = max(self.latest, float(timestamps.max()))
+        return n
+    
+    def recent(self, tag: str, seconds: Optional[float] = None) -> tuple[np.ndarray, np.ndarray]:
+        """Buffered ``(timestamps, values)`` of a tag, oldest first."""
+        i = self.ids[tag]
+        written = int(self._written[i])
+        held = min(written, self.capacity)
+        slots = (np.arange(written - held, written)) % self.capacity
+        timestamps, values = self._timestamps[i, slots], self._values[i, slots]
+        if seconds is not None and held:
+            keep = timestamps >= timestamps[-1] - seconds
+            timestamps, values = timestamps[keep], values[keep]
+        return timestamps, values
+    
+    def current(self, tag: str) -> dict[str, dict]:
+        """The open bucket of each resolution for a tag."""
+        i = self.ids[tag]
+        stats = {}
+        for resolution, rollup in self.rollups.items():
+            count = int(rollup.count[i])
+            if count:
+                stats[_label(resolution)] = {
+                    "start": float(rollup.bucket[i] * resolution),
+                    "count": count,
+                    "mean": float(rollup.sum[i] / count),
+                    "min": float(rollup.min[i]),
+                    "max": float(rollup.max[i]),
+                    "last": float(rollup.last[i]),
+                }
+        return stats
+    
+    @property
+    def pending(self) -> int:
+        """Closed bucket rows waiting to be drained."""
+        return sum(rollup.pending for rollup in self.rollups.values())
+    
+    def close_before(self, watermark: float) -> None:
+        """Close every bucket that ended at or before ``watermark`` (epoch seconds)."""
+        for rollup in self.rollups.values():
+            rollup.close_before(watermark)
+    
+    def drain(self) -> list[RollupBatch]:
+        """Take the closed buckets as one columnar batch per resolution."""
+        batches = []
+        names = np.array(self.names, dtype=object)
+        for resolution, rollup in self.rollups.items():
+            columns = rollup.drain()
+            if columns is None:
+                continue
+            tag, bucket, count, total, low, high, last = columns
+            frame = pd.DataFrame({
+                "tag": pd.Categorical.from_codes(tag, categories=names),
+                "start": bucket * resolution,
+                "count": count,
+                "sum": total,
+                "min": low,
+                "max": high,
+                "last": last,
+            })
+            batches.append(RollupBatch(resolution=resolution, frame=frame))
+        return batches
+    
+    def describe(self, tags: Optional[Sequence[str]] = None, resolution: float = 60.0) -> str:
+        """Compact per-tag summary for an LLM prompt, instead of raw samples."""
+        lines = []
+        for name in tags or self.names:
+            i = self.ids.get(name)
+            if i is None or not self._written[i]:
+                continue
+            rollup = self.rollups[resolution]
+            last = self._values[i, (self._written[i] - 1) % self.capacity]
+            line = f"{name}: last {last:.4g}"
+            if rollup.count[i]:
+                mean = rollup.sum[i] / rollup.count[i]
+                line += (
+                    f"; {_label(resolution)} mean {mean:.4g}, min {rollup.min[i]:.4g}, "
+                    f"max {rollup.max[i]:.4g}, {rollup.count[i]} samples"
+                )
+            lines.append(line)
+        return "\n".join(lines)
+
+
+class CompressedBatchWriter:
+    """
+    Rollup sink writing each batch as a compressed ``.npz`` of its columns.
+
+    Tags are stored dictionary-encoded (codes plus the distinct names), so
+    a file costs a few bytes per row. ``read_batch`` turns one back into a
+    DataFrame.
+    """
+    
+    def __init__(self, directory: str | Path):
+        self.directory = Path(directory)
+    
+    def _write(self, batch: RollupBatch) -> Path:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        frame = batch.frame
+        start = int(frame["start"].min()) if len(frame) else 0
+        path = self.directory / f"rollup_{_label(batch.resolution)}_{start}_{uuid.uuid4().hex[:8]}.npz"
+        tags = frame["tag"].cat.remove_unused_categories()
+        np.savez_compressed(
+            path,
+            resolution=np.float64(batch.resolution),
+            tag_names=np.array(tags.cat.categories, dtype=str),
+            tag=tags.cat.codes.to_numpy(),
+            **{name: frame[name].to_numpy() for name in _ROLLUP_COLUMNS[1:]},
+        )
+        return path
+    
+    async def __call__(self, batch: RollupBatch) -> None:
+        await asyncio.to_thread(self._write, batch)
+
+
+def read_batch(path: str | Path) -> RollupBatch:
+    """Load a batch written by ``CompressedBatchWriter``."""
+    with np.load(path) as data:
+        frame = pd.DataFrame({
+            "tag": pd.Categorical.from_codes(data["tag"], categories=data["tag_names"].tolist()),
+            **{name: data[name] for name in _ROLLUP_COLUMNS[1:]},
+        })
+        return RollupBatch(resolution=float(data["resolution"]), frame=frame)
+
+
+class TagIngestor:
+    """
+    Feeds a sample source into a ``TagStore`` and flushes closed buckets.
+
+    Buckets close when a tag's next bucket starts, or for tags that went
+    quiet, once the newest sample of any tag is ``grace_s`` past their end.
+    Closing on sample time rather than the local clock keeps device clock
+    skew from splitting buckets. Closed buckets are flushed to ``sink``
+    every ``flush_interval_s`` or once ``max_pending`` rows are waiting.
+    """
+    
+    def __init__(
+        self,
+        store: TagStore,
+        sink: RollupSink,
+        flush_interval_s: float = 5.0,
+        max_pending: int = 100_000,
+        grace_s: float = 2.0,
+    ):
+        self.store = store
+        self.sink = sink
+        self.flush_interval_s = flush_interval_s
+        self.max_pending = max_pending
+        self.grace_s = grace_s
+        self.flushed = 0
+    
+    @classmethod
+    def from_settings(cls, settings, sink: Optional[RollupSink] = None) -> "TagIngestor":
+        """Create an ingestor (and store) from ``Settings.connectors.industrial``."""
+        industrial = settings.connectors.industrial
+        store = TagStore(capacity=industrial.capacity, resolutions=industrial.resolutions)
+        return cls(
+            store,
+            sink or CompressedBatchWriter(industrial.output_dir),
+            flush_interval_s=industrial.flush_interval_s,
+            max_pending=industrial.max_pending,
+        )
+    
+    async def flush(self, watermark: Optional[float] = None) -> int:
+        """Close finished buckets and hand them to the sink; returns rows flushed."""
+        self.store.close_before(self.store.latest - self.grace_s if watermark is None else watermark)
+        rows = 0
+        for batch in self.store.drain():
+            await self.sink(batch)
+            rows += len(batch.frame)
+        self.flushed += rows
+        return rows
+    
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval_s)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Rollup flush failed: {e}")
+    
+    async def run(self, source: AsyncIterator[TagSamples]) -> None:
+        """Ingest from ``source`` until it ends, then flush what is left."""
+        ticker = asyncio.create_task(self._flush_periodically())
+        try:
+            async for samples in source:
+                n = self.store.ingest(*samples)
+                CONNECTOR_ROWS.labels("industrial").inc(n)
+                if self.store.pending >= self.max_pending:
+                    await self.flush()
+        finally:
+            ticker.cancel()
+        await self.flush(watermark=float("inf"))
+
+
+class TagSimulator:
+    """
+    Synthetic plant tags for tests and benchmarks.
+
+    Each tag is a slow sine around its own set point plus noise, sampled
+    at ``rate_hz``; ``every``-th tag steps between two levels, like a
+    machine state.
+    """
+    
+    def __init__(self, tags: int = 100, rate_hz: float = 10.0, seed: int = 0, every: int = 10):
+        rng = np.random.default_rng(seed)
+        self.names = np.array([f"line{i % 8 + 1}/tag{i:05d}" for i in range(tags)], dtype=object)
+        self.rate_hz = rate_hz
+        self.every = every
+        self._rng = rng
+        self._base = rng.uniform(10, 100, tags)
+        self._period = rng.uniform(30, 600, tags)
+    
+    def batch(self, start: float, duration: float) -> TagSamples:
+        """Every tag's samples from ``start`` for ``duration`` seconds, in arrival order."""
+        steps = max(1, int(round(duration * self.rate_hz)))
+        count = len(self.names)
+        times = start + np.arange(steps) / self.rate_hz
+        tag = np.tile(np.arange(count), steps)
+        timestamps = np.repeat(times, count)
+        values = self._base[tag] * (1 + 0.1 * np.sin(2 * np.pi * timestamps / self._period[tag]))
+        values += self._rng.normal(0, 0.5, len(tag))
+        steps_mask = tag % self.every == 0
+        values[steps_mask] = np.where(np.sin(timestamps[steps_mask] / 60) > 0, 1.0, 0.0)
+        return TagSamples(self.names[tag], timestamps, values)
+    
+    async def stream(
+        self,
+        start: Optional[float] = None,
+        interval_s: float = 0.1,
+        batches: Optional[int] = None,
+        realtime: bool = True,
+    ) -> AsyncIterator[TagSamples]:
+        """Yield one batch per ``interval_s``; as fast as possible when not ``realtime``."""
+        clock = time.time() if start is None else start
+        produced = 0
+        while batches is None or produced < batches:
+            yield self.batch(clock, interval_s)
+            clock += interval_s
+            produced += 1
+            await asyncio.sleep(interval_s if realtime else 0)
+
+
+def parse_payload(payload: bytes, received: float) -> tuple[float, float]:
+    """
+    ``(timestamp, value)`` from an MQTT payload.
+
+    Accepts a bare number or JSON with ``value`` (or ``v``) and an optional
+    ``ts``/``timestamp`` in epoch seconds or milliseconds; samples without
+    a timestamp get the receive time.
+    """
+    text = payload.decode("utf-8", errors="replace").strip()
+    try:
+        return received, float(text)
+    except ValueError:
+        pass
+    data = json.loads(text)
+    value = data.get("value", data.get("v"))
+    if isinstance(value, bool):
+        value = float(value)
+    ts = data.get("ts", data.get("timestamp"))
+    if ts is None:
+        return received, float(value)
+    ts = float(ts)
+    return (ts / 1000 if ts > 1e11 else ts), float(value)
+
+
+class _Collector:
+    """Thread-safe sample buffer swapped out once per batch interval."""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tags: list[str] = []
+        self._timestamps: list[float] = []
+        self._values: list[float] = []
+    
+    def add(self, tag: str, timestamp: float, value: float) -> None:
+        with self._lock:
+            self._tags.append(tag)
+            self._timestamps.append(timestamp)
+            self._values.append(value)
+    
+    def take(self) -> Optional[TagSamples]:
+        with self._lock:
+            if not self._tags:
+                return None
+            tags, timestamps, values = self._tags, self._timestamps, self._values
+            self._tags, self._timestamps, self._values = [], [], []
+        return TagSamples(np.array(tags, dtype=object), np.array(timestamps), np.array(values))
+
+
+class MQTTSource:
+    """
+    Samples from an MQTT broker; the topic is the tag name.
+
+    The paho client runs its network loop on its own thread and messages
+    are collected into one ``TagSamples`` batch per ``batch_interval_s``.
+    """
+    
+    def __init__(
+        self,
+        host: str,
+        port: int = 1883,
+        topics: Sequence[str] = ("#",),
+        batch_interval_s: float = 0.1,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+    ):
+        self.host = host
+        self.port = port
+        self.topics = list(topics)
+        self.batch_interval_s = batch_interval_s
+        self.username = username
+        self.password = password
+        self.dropped = 0
+    
+    async def stream(self) -> AsyncIterator[TagSamples]:
+        try:
+            import paho.mqtt.client as mqtt
+        except ImportError:
+            raise ImportError("paho-mqtt is required for MQTT ingestion. Install with: pip install paho-mqtt")
+        
+        collector = _Collector()
+        
+        def on_connect(client, userdata, flags, reason_code, properties):
+            for topic in self.topics:
+                client.subscribe(topic)
+        
+        def on_message(client, userdata, message):
+            try:
+                timestamp, value = parse_payload(message.payload, time.time())
+            except (ValueError, TypeError, AttributeError):
+                self.dropped += 1
+                return
+            collector.add(message.topic, timestamp, value)
+        
+        client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
+        if self.username:
+            client.username_pw_set(self.username, self.password)
+        client.on_connect = on_connect
+        client.on_message = on_message
+        await asyncio.to_thread(client.connect, self.host, self.port)
+        client.loop_start()
+        try:
+            while True:
+                await asyncio.sleep(self.batch_interval_s)
+                samples = collector.take()
+                if samples is not None:
+                    yield samples
+        finally:
+            client.loop_stop()
+            client.disconnect()
+
+
+class OPCUASource:
+    """Samples from OPC-UA data-change subscriptions; the node id is the tag name."""
+    
+    def __init__(
+        self,
+        url: str,
+        nodes: Sequence[str],
+        publishing_interval_ms: int = 100,
+        batch_interval_s: float = 0.1,
+    ):
+        self.url = url
+        self.nodes = list(nodes)
+        self.publishing_interval_ms = publishing_interval_ms
+        self.batch_interval_s = batch_interval_s
+    
+    async def stream(self) -> AsyncIterator[TagSamples]:
+        try:
+            from asyncua import Client
+        except ImportError:
+            raise ImportError("asyncua is required for OPC-UA ingestion. Install with: pip install asyncua")
+        
+        collector = _Collector()
+        
+        class Handler:
+            def datachange_notification(self, node, value, data):
+                source = data.monitored_item.Value.SourceTimestamp
+                timestamp = source.timestamp() if source else time.time()
+                try:
+                    collector.add(node.nodeid.to_string(), timestamp, float(value))
+                except (TypeError, ValueError):
+                    pass
+        
+        async with Client(self.url) as client:
+            subscription = await client.create_subscription(self.publishing_interval_ms, Handler())
+            await subscription.subscribe_data_change([client.get_node(node) for node in self.nodes])
+            while True:
+                await asyncio.sleep(self.batch_interval_s)
+                samples = collector.take()
+                if samples is not None:
+                    yield samples
+
+
+__all__ = [
+    "RESOLUTIONS",
+    "TagSamples",
+    "RollupBatch",
+    "RollupSink",
+    "TagStore",
+    "CompressedBatchWriter",
+    "read_batch",
+    "TagIngestor",
+    "TagSimulator",
+    "parse_payload",
+    "MQTTSource",
+    "OPCUASource",
+]
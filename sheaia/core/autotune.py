@@ -0,0 +1,416 @@
+"""Hardware autotuning - measure llama.cpp and embedding throughput and save the best settings."""
+
+import logging
+import math
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+import yaml
+from pydantic import BaseModel, Field
+
+logger = logging.getLogger(__name__)
+
+# Parameters the LLM sweep owns; they are what a profile's ``llm`` section holds.
+LLM_PARAMS = ("n_gpu_layers", "n_threads", "n_threads_batch", "n_batch", "n_ubatch", "use_mmap", "use_mlock")
+
+# Text used for prompts and embedding inputs; only its length matters.
+_SAMPLE_TEXT = (
+    "Production line 3 reported 412 units with a defect rate of 1.8 percent "
+    "during the night shift, while sales orders for the northern region grew "
+    "by 6 percent compared with the previous month. "
+)
+
+
+class HardwareInfo(BaseModel):
+    """What the tuned machine looks like; stored with the profile for reference."""
+    
+    hostname: str
+    cpu: str = ""
+    physical_cores: int = 1
+    logical_cores: int = 1
+    memory_gb: float = 0.0
+    gpu: Optional[str] = None
+    gpu_offload: bool = False
+
+
+class LLMTrial(BaseModel):
+    """One measured llama.cpp configuration."""
+    
+    params: dict
+    prefill_tps: float = 0.0
+    decode_tps: float = 0.0
+    load_seconds: float = 0.0
+    error: Optional[str] = None
+
+
+class EmbeddingTrial(BaseModel):
+    """One measured embedding batch size."""
+    
+    batch_size: int
+    embeddings_per_s: float = 0.0
+    error: Optional[str] = None
+
+
+class TuneResult(BaseModel):
+    """Best settings found on this machine, with every trial behind them."""
+    
+    hardware: HardwareInfo
+    llm: dict = Field(default_factory=dict)
+    embedding: dict = Field(default_factory=dict)
+    measured: dict = Field(default_factory=dict)
+    llm_trials: list[LLMTrial] = Field(default_factory=list)
+    embedding_trials: list[EmbeddingTrial] = Field(default_factory=list)
+
+
+def _physical_cores() -> Optional[int]:
+    try:
+        with open("/proc/cpuinfo", encoding="utf-8") as f:
+            cpuinfo = f.read()
+    except OSError:
+        return None
+    cores = set()
+    physical_id = core_id = ""
+    for line in cpuinfo.splitlines() + [""]:
+        key, _, value = line.partition(":")
+        key = key.strip()
+        if key == "physical id":
+            physical_id = value.strip()
+        elif key == "core id":
+            core_id = value.strip()
+        elif not key and core_id:
+            cores.add((physical_id, core_id))
+            physical_id = core_id = ""
+    return len(cores) or None
+
+
+def _cpu_name() -> str:
+    try:
+        with open("/proc/cpuinfo", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    return line.partition(":")[2].strip()
+    except OSError:
+        pass
+    return platform.processor()
+
+
+def _gpu_name() -> Optional[str]:
+    if shutil.which("nvidia-smi") is None:
+        return None
+    try:
+        out = subprocess.run(
+            ["nvidia-smi", "--query-gpu=name", "--format=csv,noheader"],
+            capture_output=True, text=True, timeout=10, check=True,
+        ).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    names = [line.strip() for line in out.splitlines() if line.strip()]
+    return ", ".join(names) or None
+
+
+def detect_hardware() -> HardwareInfo:
+    """Describe the CPU, memory and GPU of the current machine."""
+    logical = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+    try:
+        memory = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") / 1024**3
+    except (AttributeError, ValueError, OSError):
+        memory = 0.0
+    try:
+        import llama_cpp
+        
+        gpu_offload = bool(llama_cpp.llama_supports_gpu_offload())
+    except (ImportError, AttributeError):
+        gpu_offload = False
+    return HardwareInfo(
+        hostname=socket.gethostname(),
+        cpu=_cpu_name(),
+        physical_cores=min(_physical_cores() or logical, logical),
+        logical_cores=logical,
+        memory_gb=round(memory, 1),
+        gpu=_gpu_name(),
+        gpu_offload=gpu_offload,
+    )
+
+
+def llm_candidates(hardware: HardwareInfo, layers: Optional[int] = None, quick: bool = False) -> list[list[dict]]:
+    """
+    The llama.cpp sweep as groups of alternative parameter settings.
+
+    Groups are tuned one after another, each with the best values found so
+    far for the rest; the first option of each group is the starting point.
+    GPU offload comes first because it dominates everything else. Without
+    GPU offload only CPU configurations are tried.
+    """
+    if hardware.gpu_offload:
+        splits = [-1]
+        if layers:
+            splits += [layers * 3 // 4, layers // 2]
+        splits.append(0)
+    else:
+        splits = [0]
+    
+    physical, logical = hardware.physical_cores, hardware.logical_cores
+    threads = sorted({physical, logical, max(1, physical // 2)}, key=lambda n: (n != physical, n))
+    batch_threads = sorted({logical, physical}, reverse=True)
+    batches = [512, 2048] if quick else [512, 256, 1024, 2048]
+    ubatches = [512, 256, 1024] if quick else [512, 128, 256, 1024]
+    
+    groups = [
+        [{"n_gpu_layers": n} for n in splits],
+        [{"n_threads": n} for n in threads],
+        [{"n_threads_batch": n} for n in batch_threads],
+        # The micro-batch is what the backend computes at once, so a larger
+        # batch is tried with a matching one, then smaller ones under it.
+        [{"n_batch": n, "n_ubatch": n} for n in batches],
+        [{"n_ubatch": n} for n in ubatches],
+        [{"use_mmap": True, "use_mlock": False}, {"use_mmap": True, "use_mlock": True}],
+    ]
+    if not quick:
+        groups[-1].append({"use_mmap": False, "use_mlock": False})
+    return groups
+
+
+def embedding_candidates(quick: bool = False) -> list[int]:
+    """Embedding batch sizes to try, starting from the default."""
+    return [32, 16, 64] if quick else [32, 8, 16, 64, 128, 256]
+
+
+def _sample_texts(count: int) -> list[str]:
+    words = _SAMPLE_TEXT.split()
+    # Vary each text so nothing downstream can dedupe them.
+    return [f"{i}: " + " ".join(words[i % len(words):] + words[:i % len(words)]) for i in range(count)]
+
+
+def measure_llm(
+    model_path: str,
+    params: dict,
+    n_ctx: int,
+    prompt_tokens: int = 1024,
+    gen_tokens: int = 128,
+) -> LLMTrial:
+    """
+    Load the model with ``params`` and time prefill and decode.
+
+    Prefill evaluates a ``prompt_tokens`` prompt in one call; decode then
+    evaluates ``gen_tokens`` single tokens, one forward pass each, so
+    sampling and end-of-text never cut the measurement short.
+    """
+    from sheaia.core.llm import LlamaCppLLM
+    
+    llm = LlamaCppLLM(model_path, n_ctx=n_ctx, **params)
+    started = time.perf_counter()
+    llm.load_model()
+    load_seconds = time.perf_counter() - started
+    try:
+        text = _SAMPLE_TEXT * (prompt_tokens // 20 + 1)
+        tokens = llm.tokenize(text, add_bos=True)[:prompt_tokens]
+        model = llm._model
+        
+        # A short warm-up pass keeps one-time kernel setup out of the numbers.
+        model.reset()
+        model.eval(tokens[:8])
+        model.reset()
+        
+        started = time.perf_counter()
+        model.eval(tokens)
+        prefill = time.perf_counter() - started
+        
+        started = time.perf_counter()
+        for i in range(gen_tokens):
+            model.eval([tokens[i % len(tokens)]])
+        decode = time.perf_counter() - started
+    finally:
+        llm.unload_model()
+    return LLMTrial(
+        params=params,
+        prefill_tps=len(tokens) / prefill,
+        decode_tps=gen_tokens / decode,
+        load_seconds=load_seconds,
+    )
+
+
+def measure_embedding(embedder, batch_size: int, count: int = 512) -> EmbeddingTrial:
+    """Time ``embedder`` embedding ``count`` short texts in batches of ``batch_size``."""
+    texts = _sample_texts(count)
+    embedder.batch_size = batch_size
+    embedder.embed_documents(texts[:batch_size])
+    started = time.perf_counter()
+    embedder.embed_documents(texts)
+    return EmbeddingTrial(batch_size=batch_size, embeddings_per_s=len(texts) / (time.perf_counter() - started))
+
+
+class Autotuner:
+    """
+    Sweeps llama.cpp and embedding parameters and keeps the fastest.
+
+    The sweep is coordinate descent over the groups from ``llm_candidates``:
+    each group is tried with the best values found so far for the others,
+    so the number of model loads is the sum of the group sizes rather than
+    their product. A configuration is scored by the time a reference
+    request takes (``prompt_tokens`` of prefill plus ``gen_tokens`` of
+    decode), and it only replaces the current best when it is at least
+    ``min_gain`` faster, so measurement noise does not move settings.
+
+    ``llm_bench`` and ``embedding_bench`` do the measuring; they take a
+    parameter dict or a batch size and return a trial. A bench that raises
+    (a configuration that does not fit in memory, say) scores as a failure.
+    """
+    
+    def __init__(
+        self,
+        llm_bench: Optional[Callable[[dict], LLMTrial]] = None,
+        embedding_bench: Optional[Callable[[int], EmbeddingTrial]] = None,
+        prompt_tokens: int = 1024,
+        gen_tokens: int = 128,
+        min_gain: float = 0.03,
+    ):
+        self.llm_bench = llm_bench
+        self.embedding_bench = embedding_bench
+        self.prompt_tokens = prompt_tokens
+        self.gen_tokens = gen_tokens
+        self.min_gain = min_gain
+    
+    def score(self, trial: LLMTrial) -> float:
+        """Seconds for the reference request; lower is better."""
+        if trial.error or trial.prefill_tps <= 0 or trial.decode_tps <= 0:
+            return math.inf
+        return self.prompt_tokens / trial.prefill_tps + self.gen_tokens / trial.decode_tps
+    
+    def _llm_trial(self, params: dict) -> LLMTrial:
+        logger.info(f"Measuring {params}")
+        try:
+            trial = self.llm_bench(params)
+        except Exception as e:
+            logger.warning(f"Configuration {params} failed: {e}")
+            return LLMTrial(params=params, error=str(e))
+        logger.info(f"  prefill {trial.prefill_tps:.1f} tok/s, decode {trial.decode_tps:.1f} tok/s")
+        return trial
+    
+    def tune_llm(self, groups: list[list[dict]]) -> tuple[Optional[LLMTrial], list[LLMTrial]]:
+        """Best trial (None when every configuration failed) and all trials."""
+        best_params: dict = {}
+        for group in groups:
+            best_params.update(group[0])
+        
+        trials: dict[tuple, LLMTrial] = {}
+        
+        def run(params: dict) -> LLMTrial:
+            key = tuple(sorted(params.items()))
+            if key not in trials:
+                trials[key] = self._llm_trial(params)
+            return trials[key]
+        
+        best = run(dict(best_params))
+        for group in groups:
+            for option in group:
+                params = {**best_params, **option}
+                if params.get("n_ubatch", 0) > params.get("n_batch", math.inf):
+                    continue
+                trial = run(params)
+                if self.score(trial) < self.score(best) * (1 - self.min_gain):
+                    best, best_params = trial, params
+        
+        return (None if math.isinf(self.score(best)) else best), list(trials.values())
+    
+    def tune_embedding(self, batch_sizes: list[int]) -> tuple[Optional[EmbeddingTrial], list[EmbeddingTrial]]:
+        """Best embedding trial (None when all failed) and all trials."""
+        best: Optional[EmbeddingTrial] = None
+        trials = []
+        for batch_size in batch_sizes:
+            logger.info(f"Measuring embedding batch size {batch_size}")
+            try:
+                trial = self.embedding_bench(batch_size)
+            except Exception as e:
+                logger.warning(f"Embedding batch size {batch_size} failed: {e}")
+                trial = EmbeddingTrial(batch_size=batch_size, error=str(e))
+            else:
+                logger.info(f"  {trial.embeddings_per_s:.1f} embeddings/s")
+            trials.append(trial)
+            if trial.error:
+                continue
+            if best is None or trial.embeddings_per_s > best.embeddings_per_s * (1 + self.min_gain):
+                best = trial
+        return best, trials
+    
+    def run(
+        self,
+        hardware: HardwareInfo,
+        groups: Optional[list[list[dict]]] = None,
+        batch_sizes: Optional[list[int]] = None,
+    ) -> TuneResult:
+        """Run whichever sweeps have a bench and collect the results."""
+        result = TuneResult(hardware=hardware)
+        if self.llm_bench is not None and groups:
+            best, result.llm_trials = self.tune_llm(groups)
+            if best is not None:
+                result.llm = {name: best.params[name] for name in LLM_PARAMS if name in best.params}
+                result.measured.update(
+                    prefill_tps=round(best.prefill_tps, 1),
+                    decode_tps=round(best.decode_tps, 1),
+                )
+        if self.embedding_bench is not None and batch_sizes:
+            best, result.embedding_trials = self.tune_embedding(batch_sizes)
+            if best is not None:
+                result.embedding = {"batch_size": best.batch_size}
+                result.measured["embeddings_per_s"] = round(best.embeddings_per_s, 1)
+        return result
+
+
+def profile_name(hardware: HardwareInfo) -> str:
+    """Default profile name: the host name, made YAML-key friendly."""
+    name = "".join(c if c.isalnum() else "_" for c in hardware.hostname.lower()).strip("_")
+    return name or "default"
+
+
+def write_profile(path: str | Path, name: str, result: TuneResult, activate: bool = True) -> None:
+    """
+    Store ``result`` as profile ``name`` in a hardware profiles file.
+
+    Other profiles and keys in the file are kept. With ``activate`` the
+    profile becomes the file's ``active_profile``, which ``get_settings``
+    applies by default.
+    """
+    path = Path(path)
+    data = {}
+    if path.exists():
+        with open(path, "r", encoding="utf-8") as f:
+            data = yaml.safe_load(f) or {}
+    
+    profile = {"hardware": result.hardware.model_dump()}
+    if result.llm:
+        profile["llm"] = result.llm
+    if result.embedding:
+        profile["embedding"] = result.embedding
+    profile["measured"] = {**result.measured, "tuned_at": time.strftime("%Y-%m-%dT%H:%M:%S")}
+    
+    data.setdefault("hardware_profiles", {})[name] = profile
+    if activate:
+        data["active_profile"] = name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        yaml.safe_dump(data, f, sort_keys=False, allow_unicode=True)
+    tmp.replace(path)
+
+
+__all__ = [
+    "LLM_PARAMS",
+    "HardwareInfo",
+    "LLMTrial",
+    "EmbeddingTrial",
+    "TuneResult",
+    "detect_hardware",
+    "llm_candidates",
+    "embedding_candidates",
+    "measure_llm",
+    "measure_embedding",
+    "Autotuner",
+    "profile_name",
+    "write_profile",
+]
@@ -0,0 +1,399 @@
+"""Batch question answering - bulk jobs that run many chat items through the LLM."""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Literal, Optional
+
+from pydantic import BaseModel
+
+from sheaia.core.llm import BaseLLM, GenerationConfig, Prompt
+from sheaia.core.prompt import PromptAssembler, Section
+from sheaia.i18n import Language
+from sheaia.i18n.prompts import get_system_prompt
+
+logger = logging.getLogger(__name__)
+
+JobStatus = Literal["queued", "running", "done", "failed", "cancelled"]
+
+
+class BatchItem(BaseModel):
+    """One question in a batch."""
+    
+    message: str
+    language: Language = Language.EN
+    conversation_id: Optional[str] = None
+
+
+class BatchItemResult(BaseModel):
+    """Answer (or error) for one batch item, as written to the JSONL file."""
+    
+    index: int
+    conversation_id: Optional[str] = None
+    response: str = ""
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    elapsed: float = 0.0
+    error: Optional[str] = None
+
+
+class BatchStats(BaseModel):
+    """
+    Throughput of a finished job.
+
+    GPU time is the job's wall-clock time: every item runs on the one
+    shared GPU, so that is the GPU time the job occupied.
+    """
+    
+    wall_seconds: float = 0.0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    items_per_gpu_hour: float = 0.0
+    tokens_per_gpu_hour: float = 0.0
+
+
+class BatchJob(BaseModel):
+    """State of one batch job."""
+    
+    id: str
+    status: JobStatus = "queued"
+    total: int
+    completed: int = 0
+    failed: int = 0
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    path: str
+    stats: Optional[BatchStats] = None
+
+
+class BatchRunner:
+    """
+    Runs batch jobs in the background and writes results as JSONL.
+
+    Items are ordered so prompts sharing a system prompt run back to back,
+    letting the LLM's prompt cache reuse the prefix, and the prefix is
+    tokenized once per job rather than per item. Up to ``concurrency``
+    items are in flight at once; with an admission controller each item
+    takes a ``background`` slot, so interactive traffic always goes first.
+    Generation never runs on the event loop, but a single llama.cpp model
+    decodes one item at a time; ``concurrency`` only overlaps prompt
+    preparation and queueing with it.
+
+    Job state is saved next to the results (``<id>.json``) whenever it
+    changes, so any API worker sharing ``output_dir`` can report progress,
+    page results and cancel a job that another worker is running. A finished
+    job is dropped from memory once its last page of results has been read,
+    or ``retain_s`` after it ended; later requests read the saved state.
+    """
+    
+    def __init__(
+        self,
+        llm: BaseLLM,
+        output_dir: str | Path,
+        concurrency: int = 4,
+        max_tokens: int = 512,
+        admission=None,
+        retain_s: float = 3600.0,
+    ):
+        self.llm = llm
+        self.output_dir = Path(output_dir)
+        self.concurrency = concurrency
+        self.max_tokens = max_tokens
+        self.admission = admission
+        self.retain_s = retain_s
+        self.jobs: dict[str, BatchJob] = {}
+        self._offsets: dict[str, list[int]] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._assembler: Optional[PromptAssembler] = None
+        self._has_tokenizer = True
+        self._prompt_lock = threading.Lock()
+    
+    def submit(self, items: list[BatchItem], max_tokens: Optional[int] = None) -> BatchJob:
+        """Queue a job and start it in the background."""
+        self._evict_expired()
+        job_id = uuid.uuid4().hex
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        job = BatchJob(
+            id=job_id,
+            total=len(items),
+            created_at=time.time(),
+            path=str(self.output_dir / f"{job_id}.jsonl"),
+        )
+        self.jobs[job_id] = job
+        self._offsets[job_id] = []
+        self._save(job)
+        self._tasks[job_id] = asyncio.create_task(self._run(job, items, max_tokens or self.max_tokens))
+        return job
+    
+    def _state_path(self, job_id: str) -> Path:
+        return self.output_dir / f"{job_id}.json"
+    
+    def _cancel_path(self, job_id: str) -> Path:
+        return self.output_dir / f"{job_id}.cancel"
+    
+    def _save(self, job: BatchJob) -> None:
+        """Write the job state atomically, for other workers to read."""
+        path = self._state_path(job.id)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(job.model_dump_json(), encoding="utf-8")
+        os.replace(tmp, path)
+    
+    def _evict(self, job_id: str) -> None:
+        self.jobs.pop(job_id, None)
+        self._offsets.pop(job_id, None)
+    
+    def _evict_expired(self) -> None:
+        """Forget jobs that finished more than ``retain_s`` ago; their state stays on disk."""
+        cutoff = time.time() - self.retain_s
+        for job_id, job in list(self.jobs.items()):
+            if job_id not in self._tasks and job.finished_at is not None and job.finished_at < cutoff:
+                self._evict(job_id)
+    
+    def get(self, job_id: str) -> Optional[BatchJob]:
+        """A job run by this process, or saved by any worker sharing ``output_dir``."""
+        self._evict_expired()
+        job = self.jobs.get(job_id)
+        if job is not None:
+            return job
+        try:
+            return BatchJob.model_validate_json(self._state_path(job_id).read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return None
+    
+    def _prompt(self, item: BatchItem, max_tokens: int) -> Prompt:
+        """Runs in a thread: tokenizing may be a model call or a model server round trip."""
+        system = get_system_prompt(item.language)
+        turn = f"User: {item.message}\nAssistant:"
+        with self._prompt_lock:
+            if self._assembler is None and self._has_tokenizer:
+                try:
+                    self._assembler = PromptAssembler(self.llm)
+                except Exception as e:
+                    logger.info(f"Batch prompts sent as text: no usable tokenizer ({e})")
+                    self._has_tokenizer = False
+            if self._assembler is None:
+                return f"{system}\n\n{turn}"
+            sections = [Section(system, required=True, cache=True), Section(turn, required=True)]
+            return self._assembler.assemble(sections, max_tokens).tokens
+    
+    async def _acquire(self) -> None:
+        from sheaia.api.admission import AdmissionRejectedError, RequestClass
+        
+        # Batch items never give up; when shed they back off and queue again.
+        while True:
+            try:
+                await self.admission.acquire(RequestClass.BACKGROUND)
+                return
+            except AdmissionRejectedError as e:
+                await asyncio.sleep(e.retry_after)
+    
+    async def _answer(self, index: int, item: BatchItem, max_tokens: int) -> BatchItemResult:
+        from sheaia.api.admission import RequestClass
+        
+        if self.admission is not None:
+            await self._acquire()
+        started = time.perf_counter()
+        try:
+            prompt = await asyncio.to_thread(self._prompt, item, max_tokens)
+            response = await self.llm.generate(prompt, GenerationConfig(max_tokens=max_tokens))
+            return BatchItemResult(
+                index=index,
+                conversation_id=item.conversation_id,
+                response=response.text,
+                prompt_tokens=response.prompt_tokens,
+                completion_tokens=response.completion_tokens,
+                elapsed=time.perf_counter() - started,
+            )
+        except Exception as e:
+            logger.warning(f"Batch item {index} failed: {e}")
+            return BatchItemResult(
+                index=index,
+                conversation_id=item.conversation_id,
+                elapsed=time.perf_counter() - started,
+                error=str(e),
+            )
+        finally:
+            if self.admission is not None:
+                self.admission.release(RequestClass.BACKGROUND, time.perf_counter() - started)
+    
+    async def _run(self, job: BatchJob, items: list[BatchItem], max_tokens: int) -> None:
+        job.status = "running"
+        job.started_at = time.time()
+        self._save(job)
+        cancel_path = self._cancel_path(job.id)
+        started = time.perf_counter()
+        offsets = self._offsets[job.id]
+        prompt_tokens = completion_tokens = 0
+        
+        # Same-language items share a system prompt; keep them adjacent.
+        order = sorted(range(len(items)), key=lambda i: items[i].language.value)
+        queue: asyncio.Queue[int] = asyncio.Queue()
+        for i in order:
+            queue.put_nowait(i)
+        
+        try:
+            with open(job.path, "w", encoding="utf-8") as out:
+                async def worker() -> None:
+                    nonlocal prompt_tokens, completion_tokens
+                    while not queue.empty():
+                        if cancel_path.exists():
+                            # Cancelled through another API worker.
+                            return
+                        i = queue.get_nowait()
+                        result = await self._answer(i, items[i], max_tokens)
+                        offsets.append(out.tell())
+                        out.write(result.model_dump_json() + "\n")
+                        out.flush()
+                        if result.error:
+                            job.failed += 1
+                        else:
+                            job.completed += 1
+                        prompt_tokens += result.prompt_tokens
+                        completion_tokens += result.completion_tokens
+                        self._save(job)
+                
+                await asyncio.gather(*(worker() for _ in range(min(self.concurrency, len(items)))))
+            job.status = "cancelled" if cancel_path.exists() else "done"
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+            raise
+        except Exception:
+            logger.exception(f"Batch job {job.id} failed")
+            job.status = "failed"
+        finally:
+            job.finished_at = time.time()
+            wall = time.perf_counter() - started
+            hours = wall / 3600 if wall > 0 else float("inf")
+            job.stats = BatchStats(
+                wall_seconds=wall,
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                items_per_gpu_hour=(job.completed + job.failed) / hours,
+                tokens_per_gpu_hour=(prompt_tokens + completion_tokens) / hours,
+            )
+            self._tasks.pop(job.id, None)
+            self._save(job)
+            cancel_path.unlink(missing_ok=True)
+            logger.info(
+                f"Batch job {job.id} {job.status}: {job.completed}/{job.total} ok in {wall:.1f}s, "
+                f"{job.stats.items_per_gpu_hour:.0f} items/GPU-hour, "
+                f"{job.stats.tokens_per_gpu_hour:.0f} tokens/GPU-hour"
+            )
+    
+    def results(self, job_id: str, offset: int = 0, limit: int = 100) -> list[BatchItemResult]:
+        """A page of results, in completion order."""
+        offsets = self._offsets.get(job_id)
+        if offsets is None:
+            # Another worker's job: skip lines instead of seeking.
+            return self._scan(job_id, offset, limit)
+        path = self.jobs[job_id].path
+        if job_id not in self._tasks and offset + limit >= len(offsets):
+            # The last page of a finished job: later reads can scan the file.
+            self._evict(job_id)
+        offsets = offsets[offset:offset + limit]
+        if not offsets:
+            return []
+        page = []
+        with open(path, encoding="utf-8") as f:
+            f.seek(offsets[0])
+            for _ in offsets:
+                page.append(BatchItemResult(**json.loads(f.readline())))
+        return page
+    
+    def _scan(self, job_id: str, offset: int, limit: int) -> list[BatchItemResult]:
+        job = self.get(job_id)
+        if job is None:
+            raise KeyError(job_id)
+        page = []
+        try:
+            with open(job.path, encoding="utf-8") as f:
+                for n, line in enumerate(f):
+                    if len(page) >= limit or not line.endswith("\n"):
+                        break
+                    if n >= offset:
+                        page.append(BatchItemResult(**json.loads(line)))
+        except FileNotFoundError:
+            pass
+        return page
+    
+    async def wait(self, job_id: str) -> Optional[BatchJob]:
+        """Wait for a job to finish; None if it is unknown."""
+        task = self._tasks.get(job_id)
+        if task is not None:
+            await asyncio.gather(task, return_exceptions=True)
+        return self.get(job_id)
+    
+    async def cancel(self, job_id: str) -> Optional[BatchJob]:
+        """
+        Stop a job; results written so far are kept.
+
+        A job running in this process is cancelled at once. One running in
+        another worker stops before its next item (items already in flight
+        there still finish and are written).
+        """
+        task = self._tasks.get(job_id)
+        if task is not None:
+            task.cancel()
+            return await self.wait(job_id)
+        job = self.get(job_id)
+        if job is None or job.status not in ("queued", "running"):
+            return job
+        self._cancel_path(job_id).touch()
+        return job.model_copy(update={"status": "cancelled", "finished_at": time.time()})
+    
+    async def close(self) -> None:
+        """Cancel running jobs."""
+        for task in list(self._tasks.values()):
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+
+# Global batch runner (lazy initialized)
+_runner_instance: Optional[BatchRunner] = None
+
+
+def get_batch_runner(admission=None) -> BatchRunner:
+    """Get the global batch runner; ``admission`` is used when it is first created."""
+    global _runner_instance
+    
+    if _runner_instance is None:
+        from sheaia.config import get_settings
+        from sheaia.core.llm import get_llm
+        
+        settings = get_settings()
+        _runner_instance = BatchRunner(
+            llm=get_llm(),
+            output_dir=settings.batch.output_dir,
+            concurrency=settings.batch.concurrency,
+            max_tokens=settings.batch.max_tokens,
+            admission=admission,
+            retain_s=settings.batch.retain_s,
+        )
+    
+    return _runner_instance
+
+
+async def close_batch_runner() -> None:
+    """Cancel the global runner's jobs if it was created."""
+    global _runner_instance
+    
+    if _runner_instance is not None:
+        await _runner_instance.close()
+        _runner_instance = None
+
+
+__all__ = [
+    "BatchItem",
+    "BatchItemResult",
+    "BatchStats",
+    "BatchJob",
+    "BatchRunner",
+    "get_batch_runner",
+    "close_batch_runner",
+]
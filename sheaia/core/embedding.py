@@ -1,10 +1,14 @@
 """Embedding service for vector operations."""
 
 import logging
+import time
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
-import numpy as np
+from sheaia.core.metrics import EMBEDDING_BATCH_SIZE, EMBEDDING_SECONDS, MODEL_LOAD_SECONDS
+
+if TYPE_CHECKING:
+    import numpy as np
 
 logger = logging.getLogger(__name__)
 
@@ -19,14 +23,27 @@ class BaseEmbedding(ABC):
         ...
     
     @abstractmethod
-    def embed_documents(self, texts: list[str]) -> np.ndarray:
+    def embed_documents(self, texts: list[str]) -> "np.ndarray":
         """Embed a list of documents."""
         ...
     
     @abstractmethod
-    def embed_query(self, text: str) -> np.ndarray:
+    def embed_query(self, text: str) -> "np.ndarray":
         """Embed a single query text."""
         ...
+    
+    def unload_model(self) -> None:
+        """Release the model; implementations holding weights override this."""
+    
+    @property
+    def is_loaded(self) -> bool:
+        """Whether the model is ready to serve; must never trigger loading."""
+        return True
+    
+    @property
+    def is_loading(self) -> bool:
+        """Whether a load is in progress."""
+        return False
 
 
 class SentenceTransformerEmbedding(BaseEmbedding):
@@ -42,7 +59,19 @@ class SentenceTransformerEmbedding(BaseEmbedding):
         self.device = device
         self.batch_size = batch_size
         self._model = None
+        self._loading = False
         self._dimension: Optional[int] = None
+        self._batch_size_metric = EMBEDDING_BATCH_SIZE.labels(model_name)
+        self._latency_metric = EMBEDDING_SECONDS.labels(model_name)
+    
+    @classmethod
+    def from_settings(cls, settings) -> "SentenceTransformerEmbedding":
+        """Build from ``EmbeddingSettings``."""
+        return cls(
+            model_name=settings.model_name,
+            device=settings.device,
+            batch_size=settings.batch_size,
+        )
     
     def _load_model(self):
         """Lazy load the model."""
@@ -53,17 +82,23 @@ class SentenceTransformerEmbedding(BaseEmbedding):
             from sentence_transformers import SentenceTransformer
             
             logger.info(f"Loading embedding model: {self.model_name}")
+            started = time.perf_counter()
             
             device = self.device
             if device == "auto":
                 import torch
                 device = "cuda" if torch.cuda.is_available() else "cpu"
             
-            self._model = SentenceTransformer(
-                self.model_name,
-                device=device,
-            )
+            self._loading = True
+            try:
+                self._model = SentenceTransformer(
+                    self.model_name,
+                    device=device,
+                )
+            finally:
+                self._loading = False
             self._dimension = self._model.get_sentence_embedding_dimension()
+            MODEL_LOAD_SECONDS.labels("embedding", self.model_name).observe(time.perf_counter() - started)
             logger.info(f"Embedding model loaded. Dimension: {self._dimension}")
             
         except ImportError:
@@ -72,6 +107,23 @@ class SentenceTransformerEmbedding(BaseEmbedding):
                 "pip install sentence-transformers"
             )
     
+    def unload_model(self) -> None:
+        """Unload the model from memory."""
+        if self._model is not None:
+            del self._model
+            self._model = None
+            logger.info("Embedding model unloaded")
+    
+    @property
+    def is_loaded(self) -> bool:
+        """Whether the model is in memory."""
+        return self._model is not None
+    
+    @property
+    def is_loading(self) -> bool:
+        """Whether a load is in progress."""
+        return self._loading
+    
     @property
     def dimension(self) -> int:
         """Return the embedding dimension."""
@@ -79,10 +131,11 @@ class SentenceTransformerEmbedding(BaseEmbedding):
             self._load_model()
         return self._dimension  # type: ignore
     
-    def embed_documents(self, texts: list[str]) -> np.ndarray:
+    def embed_documents(self, texts: list[str]) -> "np.ndarray":
         """Embed a list of documents."""
         self._load_model()
         
+        started = time.perf_counter()
         embeddings = self._model.encode(  # type: ignore
             texts,
             batch_size=self.batch_size,
@@ -90,18 +143,23 @@ class SentenceTransformerEmbedding(BaseEmbedding):
             convert_to_numpy=True,
             normalize_embeddings=True,
         )
+        self._latency_metric.observe(time.perf_counter() - started)
+        self._batch_size_metric.observe(len(texts))
         
         return embeddings
     
-    def embed_query(self, text: str) -> np.ndarray:
+    def embed_query(self, text: str) -> "np.ndarray":
         """Embed a single query text."""
         self._load_model()
         
+        started = time.perf_counter()
         embedding = self._model.encode(  # type: ignore
             text,
             convert_to_numpy=True,
             normalize_embeddings=True,
         )
+        self._latency_metric.observe(time.perf_counter() - started)
+        self._batch_size_metric.observe(1)
         
         return embedding
 
@@ -118,11 +176,12 @@ def get_embedding() -> BaseEmbedding:
         from sheaia.config import get_settings
         
         settings = get_settings()
-        _embedding_instance = SentenceTransformerEmbedding(
-            model_name=settings.embedding.model_name,
-            device=settings.embedding.device,
-            batch_size=settings.embedding.batch_size,
-        )
+        if settings.model_server.enabled:
+            from sheaia.core.model_server import RemoteEmbedding, get_model_client
+            
+            _embedding_instance = RemoteEmbedding(get_model_client())
+        else:
+            _embedding_instance = SentenceTransformerEmbedding.from_settings(settings.embedding)
     
     return _embedding_instance
 
@@ -0,0 +1,130 @@
+"""Constrained decoding - GBNF grammars for SQL and checks for generated SQL."""
+
+import re
+from typing import Iterable, Mapping
+
+# Functions the SQL grammar allows: standard aggregates plus the ClickHouse
+# date and conditional helpers the query prompts use.
+DEFAULT_SQL_FUNCTIONS = (
+    "count", "sum", "avg", "min", "max", "round", "abs", "coalesce", "if",
+    "lower", "upper", "length", "uniq", "countIf", "sumIf", "avgIf",
+    "now", "today", "toDate", "toYear", "toMonth", "toStartOfDay",
+    "toStartOfWeek", "toStartOfMonth", "toStartOfYear", "dateDiff",
+)
+
+_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*$")
+
+# Everything but the identifier rules, which depend on the schema.
+_SQL_RULES = r'''
+root ::= ws select ws ";"? ws
+select ::= "SELECT" ws1 ("DISTINCT" ws1)? items ws1 "FROM" ws1 source (ws1 join)* (ws1 "WHERE" ws1 cond)? (ws1 "GROUP BY" ws1 groups)? (ws1 "HAVING" ws1 cond)? (ws1 "ORDER BY" ws1 orders)? (ws1 "LIMIT" ws1 int)?
+items ::= item (ws "," ws item)*
+item ::= "*" | expr (ws1 "AS" ws1 alias)?
+source ::= table (ws1 "AS" ws1 alias)?
+join ::= ("INNER" ws1 | "LEFT" ws1)? "JOIN" ws1 source ws1 "ON" ws1 cond
+groups ::= (expr | alias) (ws "," ws (expr | alias))*
+orders ::= (expr | alias) (ws1 ("ASC" | "DESC"))? (ws "," ws (expr | alias) (ws1 ("ASC" | "DESC"))?)*
+cond ::= conj (ws1 "OR" ws1 conj)*
+conj ::= pred (ws1 "AND" ws1 pred)*
+pred ::= "NOT" ws1 pred | "(" ws cond ws ")" | expr ws cmp ws expr | expr ws1 "IS" ws1 ("NOT" ws1)? "NULL" | expr ws1 ("NOT" ws1)? "IN" ws "(" ws (select | exprs) ws ")" | expr ws1 ("NOT" ws1)? "BETWEEN" ws1 expr ws1 "AND" ws1 expr | expr ws1 ("NOT" ws1)? "LIKE" ws1 string
+cmp ::= "=" | "!=" | "<>" | "<=" | ">=" | "<" | ">"
+exprs ::= expr (ws "," ws expr)*
+expr ::= term (ws ("+" | "-" | "*" | "/") ws term)*
+term ::= column | number | string | call | case | "(" ws expr ws ")"
+call ::= function ws "(" ws ("*" | ("DISTINCT" ws1)? exprs)? ws ")"
+case ::= "CASE" (ws1 "WHEN" ws1 cond ws1 "THEN" ws1 expr)+ (ws1 "ELSE" ws1 expr)? ws1 "END"
+alias ::= [a-z_] [a-z0-9_]{0,30}
+number ::= "-"? [0-9]{1,15} ("." [0-9]{1,10})?
+int ::= [0-9]{1,9}
+string ::= "'" ([^'\\\n] | "''"){0,200} "'"
+ws ::= ([ \t\n] [ \t]{0,8})?
+ws1 ::= [ \t\n] [ \t]{0,8}
+'''
+
+
+def _literal(text: str) -> str:
+    """A GBNF string literal."""
+    escaped = text.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return f'"{escaped}"'
+
+
+def _name(identifier: str, quote: str) -> str:
+    """``identifier`` as it must appear in SQL; unusual names are quoted."""
+    if _IDENTIFIER.match(identifier):
+        return identifier
+    return quote + identifier.replace(quote, quote * 2) + quote
+
+
+def _alternatives(values: Iterable[str]) -> str:
+    return " | ".join(_literal(v) for v in values)
+
+
+def sql_grammar(
+    tables: Mapping[str, Iterable[str]],
+    functions: Iterable[str] = DEFAULT_SQL_FUNCTIONS,
+    quote: str = '"',
+) -> str:
+    """
+    A GBNF grammar for single SELECT statements over ``tables``.
+
+    ``tables`` maps each allowed table to its columns; no other table or
+    column can be generated. Aliases are lower-case identifiers, so they
+    never collide with the upper-case keywords. The grammar ends after the
+    statement (and an optional semicolon), so once the query is complete
+    the model can only stop - no prose, no code fences, no second try.
+    """
+    if not tables:
+        raise ValueError("sql_grammar needs at least one table")
+    table_names = sorted({_name(table, quote) for table in tables})
+    column_names = sorted({_name(column, quote) for columns in tables.values() for column in columns})
+    if not column_names:
+        raise ValueError("sql_grammar needs at least one column")
+    
+    rules = [
+        f"table ::= {_alternatives(table_names)}",
+        f"function ::= {_alternatives(sorted(set(functions)))}",
+        'column ::= ((table | alias) ".")? column-name',
+        f"column-name ::= {_alternatives(column_names)}",
+    ]
+    return _SQL_RULES.strip() + "\n" + "\n".join(rules) + "\n"
+
+
+_FROM_TABLE = re.compile(r'\b(?:FROM|JOIN)\s+("(?:[^"]|"")+"|`[^`]+`|[A-Za-z_][A-Za-z0-9_.]*)', re.IGNORECASE)
+_QUALIFIED = re.compile(r'\b([A-Za-z_][A-Za-z0-9_]*)\.([A-Za-z_][A-Za-z0-9_]*)\b')
+_STRING = re.compile(r"'(?:[^']|'')*'")
+
+
+def check_sql(sql: str, tables: Mapping[str, Iterable[str]]) -> list[str]:
+    """
+    Cheap checks that generated SQL is a usable query over ``tables``.
+
+    Returns the problems found (an empty list means the query looks fine):
+    leftover prose or fences, statements other than SELECT, unbalanced
+    quotes or parentheses, unknown tables and unknown qualified columns.
+    It does not parse SQL; it catches what small models typically get wrong.
+    """
+    problems = []
+    text = sql.strip().rstrip(";").strip()
+    if not re.match(r"(SELECT|WITH)\b", text, re.IGNORECASE):
+        problems.append("does not start with SELECT")
+    if "```" in text or ";" in _STRING.sub("''", text):
+        problems.append("contains more than one statement or a code fence")
+    if text.count("'") % 2:
+        problems.append("unbalanced quotes")
+    bare = _STRING.sub("''", text)
+    if bare.count("(") != bare.count(")"):
+        problems.append("unbalanced parentheses")
+    
+    known = {table.lower(): {c.lower() for c in cols} for table, cols in tables.items()}
+    for match in _FROM_TABLE.finditer(bare):
+        name = match.group(1).strip('"`').lower()
+        if name not in known:
+            problems.append(f"unknown table {match.group(1)}")
+    for table, column in _QUALIFIED.findall(bare):
+        columns = known.get(table.lower())
+        if columns is not None and column.lower() not in columns:
+            problems.append(f"unknown column {table}.{column}")
+    return problems
+
+
+__all__ = ["DEFAULT_SQL_FUNCTIONS", "sql_grammar", "check_sql"]
@@ -0,0 +1,260 @@
+"""Background health probes with cached results."""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Literal, Optional, Union
+from urllib.parse import urlparse
+
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+ProbeStatus = Literal["ok", "loading", "down", "unknown"]
+
+
+class ProbeResult(BaseModel):
+    """Outcome of one health probe."""
+    
+    status: ProbeStatus
+    detail: str = ""
+    latency_ms: float = 0.0
+    checked_at: float = 0.0
+
+
+# A probe may be sync (run in a worker thread) or async.
+Probe = Callable[[], Union[ProbeResult, Awaitable[ProbeResult]]]
+
+
+class HealthMonitor:
+    """
+    Runs health probes in the background and caches their results.
+
+    Health endpoints only read the cache (the readiness response body is
+    pre-rendered after every probe cycle), so they answer in microseconds
+    and can never trigger model loading or block on a slow dependency.
+    Components can also push their state directly with ``set_state`` -
+    warm-up progress, for example.
+    """
+    
+    def __init__(
+        self,
+        interval_s: float = 5.0,
+        timeout_s: float = 2.0,
+        required: Optional[list[str]] = None,
+    ):
+        self.interval_s = interval_s
+        self.timeout_s = timeout_s
+        self.required = required
+        self._probes: dict[str, Probe] = {}
+        self._results: dict[str, ProbeResult] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._render()
+    
+    def register(self, name: str, probe: Probe) -> None:
+        """Register a probe; it reports ``unknown`` until it first runs."""
+        self._probes[name] = probe
+        self._results[name] = ProbeResult(status="unknown", detail="not checked yet")
+        self._render()
+    
+    def set_state(self, name: str, status: ProbeStatus, detail: str = "") -> None:
+        """Record a pushed state for a component without a probe."""
+        self._results[name] = ProbeResult(status=status, detail=detail, checked_at=time.time())
+        self._render()
+    
+    def _is_required(self, name: str) -> bool:
+        return self.required is None or name in self.required
+    
+    @property
+    def ready(self) -> bool:
+        """Whether every required component is ok."""
+        return all(r.status == "ok" for n, r in self._results.items() if self._is_required(n))
+    
+    async def _run_probe(self, name: str, probe: Probe) -> ProbeResult:
+        started = time.perf_counter()
+        try:
+            if asyncio.iscoroutinefunction(probe):
+                result = await asyncio.wait_for(probe(), self.timeout_s)
+            else:
+                result = await asyncio.wait_for(asyncio.to_thread(probe), self.timeout_s)
+        except TimeoutError:
+            result = ProbeResult(status="down", detail=f"probe timed out after {self.timeout_s}s")
+        except Exception as e:
+            result = ProbeResult(status="down", detail=str(e))
+        result.latency_ms = (time.perf_counter() - started) * 1000
+        result.checked_at = time.time()
+        return result
+    
+    async def run_once(self) -> None:
+        """Run all probes concurrently and refresh the cache."""
+        names = list(self._probes)
+        results = await asyncio.gather(*(self._run_probe(n, self._probes[n]) for n in names))
+        for name, result in zip(names, results):
+            previous = self._results.get(name)
+            if previous is None or previous.status != result.status:
+                logger.info(f"Health: {name} is {result.status} {result.detail}".rstrip())
+            self._results[name] = result
+        self._render()
+    
+    def _render(self) -> None:
+        ready = self.ready
+        self.ready_status_code = 200 if ready else 503
+        self.ready_body = json.dumps({
+            "status": "ready" if ready else "not_ready",
+            "checks": {name: r.status for name, r in self._results.items()},
+        }).encode()
+    
+    def snapshot(self) -> dict:
+        """Full cached probe results."""
+        return {
+            "status": "ready" if self.ready else "not_ready",
+            "required": self.required if self.required is not None else list(self._results),
+            "checks": {name: r.model_dump() for name, r in self._results.items()},
+        }
+    
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("Health probe cycle failed")
+            await asyncio.sleep(self.interval_s)
+    
+    def start(self) -> None:
+        """Start probing in the background."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+    
+    async def stop(self) -> None:
+        """Stop background probing."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Built-in probes
+
+def model_probe(get_model: Callable[[], object]) -> Probe:
+    """Probe a model's load state without ever loading it."""
+    
+    def probe() -> ProbeResult:
+        model = get_model()
+        if getattr(model, "is_loaded", False):
+            return ProbeResult(status="ok")
+        if getattr(model, "is_loading", False):
+            return ProbeResult(status="loading", detail="model is loading")
+        return ProbeResult(status="down", detail="model not loaded")
+    
+    return probe
+
+
+def sqlite_probe(path: Union[str, Path]) -> Probe:
+    """Probe that the SQLite metadata database can be opened and queried."""
+    
+    def probe() -> ProbeResult:
+        db = Path(path)
+        if not db.exists():
+            # A fresh install creates the database on first write.
+            if os.access(_existing_ancestor(db.parent), os.W_OK):
+                return ProbeResult(status="ok", detail="database will be created on first use")
+            return ProbeResult(status="down", detail=f"{db.parent} is not writable")
+        conn = sqlite3.connect(f"file:{db}?mode=ro", uri=True, timeout=1.0)
+        try:
+            conn.execute("PRAGMA schema_version").fetchone()
+        finally:
+            conn.close()
+        return ProbeResult(status="ok")
+    
+    return probe
+
+
+def tcp_probe(host: str, port: int, timeout_s: float = 1.0) -> Probe:
+    """Probe that a TCP service accepts connections."""
+    
+    async def probe() -> ProbeResult:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout_s)
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
+        return ProbeResult(status="ok", detail=f"{host}:{port}")
+    
+    return probe
+
+
+def milvus_probe(uri: str) -> Probe:
+    """Probe Milvus: a reachable server, or a writable Milvus Lite file location."""
+    parsed = urlparse(uri)
+    if parsed.scheme in ("http", "https", "tcp", "grpc") and parsed.hostname:
+        return tcp_probe(parsed.hostname, parsed.port or 19530)
+    return file_probe(uri)
+
+
+def file_probe(path: Union[str, Path]) -> Probe:
+    """Probe an embedded store file: it must exist readable, or be creatable."""
+    
+    def probe() -> ProbeResult:
+        file = Path(path)
+        if file.exists():
+            if os.access(file, os.R_OK | os.W_OK):
+                return ProbeResult(status="ok")
+            return ProbeResult(status="down", detail=f"{file} is not readable and writable")
+        if os.access(_existing_ancestor(file.parent), os.W_OK):
+            return ProbeResult(status="ok", detail="store will be created on first use")
+        return ProbeResult(status="down", detail=f"{file.parent} is not writable")
+    
+    return probe
+
+
+def _existing_ancestor(path: Path) -> Path:
+    path = path.absolute()
+    while not path.exists() and path != path.parent:
+        path = path.parent
+    return path
+
+
+def build_health_monitor(settings) -> HealthMonitor:
+    """Create a monitor with probes for the configured models and stores."""
+    from sheaia.core.embedding import get_embedding
+    from sheaia.core.llm import get_llm
+    
+    required = settings.health.required
+    if not settings.warmup.enabled:
+        # Without warm-up the models load on first use, and that request
+        # never arrives while readiness waits for them.
+        required = [name for name in required if name not in ("llm", "embedding")]
+    monitor = HealthMonitor(
+        interval_s=settings.health.probe_interval_s,
+        timeout_s=settings.health.probe_timeout_s,
+        required=required,
+    )
+    monitor.register("llm", model_probe(get_llm))
+    monitor.register("embedding", model_probe(get_embedding))
+    monitor.register("metadata", sqlite_probe(settings.database.sqlite_path))
+    monitor.register("vector", milvus_probe(settings.database.milvus_uri))
+    monitor.register(
+        "analytics",
+        tcp_probe(settings.database.clickhouse_host, settings.database.clickhouse_port),
+    )
+    return monitor
+
+
+__all__ = [
+    "ProbeResult",
+    "HealthMonitor",
+    "model_probe",
+    "sqlite_probe",
+    "tcp_probe",
+    "milvus_probe",
+    "file_probe",
+    "build_health_monitor",
+]
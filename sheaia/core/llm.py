@@ -1,14 +1,58 @@
 """LLM inference service."""
 
+import asyncio
+import json
 import logging
+import os
+import threading
+import time
 from abc import ABC, abstractmethod
-from typing import AsyncIterator, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Optional, TypeVar, Union
 
-from pydantic import BaseModel
+from pydantic import BaseModel, model_validator
+
+from sheaia.core.metrics import MODEL_LOAD_SECONDS, GenerationRecorder
 
 logger = logging.getLogger(__name__)
 
 
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap token estimate for budgeting when no tokenizer is at hand.
+    
+    CJK and Thai characters are roughly one token each; other text averages
+    about four characters per token.
+    """
+    wide = sum(1 for ch in text if ch >= "\u0e00")
+    return wide + (len(text) - wide + 3) // 4
+
+
+# Compiled grammars kept per model.
+_GRAMMAR_CACHE_SIZE = 32
+
+# A prompt is text, or token IDs already produced by the model's tokenizer.
+Prompt = Union[str, list[int]]
+
+T = TypeVar("T")
+
+# Marks the end of a stream handed over from the inference thread.
+_END = object()
+
+
+class ContextLengthExceededError(ValueError):
+    """Raised before generation when prompt plus completion cannot fit in the context."""
+    
+    def __init__(self, prompt_tokens: int, max_tokens: int, n_ctx: int):
+        super().__init__(
+            f"Prompt of {prompt_tokens} tokens plus {max_tokens} completion tokens "
+            f"exceeds the {n_ctx}-token context"
+        )
+        self.prompt_tokens = prompt_tokens
+        self.max_tokens = max_tokens
+        self.n_ctx = n_ctx
+
+
 class GenerationConfig(BaseModel):
     """Configuration for text generation."""
     
@@ -18,6 +62,17 @@ class GenerationConfig(BaseModel):
     top_k: int = 40
     repeat_penalty: float = 1.1
     stop: list[str] = []
+    # Constrained decoding (llama.cpp only; other backends ignore it). Only
+    # output the grammar accepts can be sampled, and once it is complete the
+    # only token left is end-of-text, so generation stops right there.
+    grammar: Optional[str] = None  # GBNF, e.g. from sheaia.core.grammar.sql_grammar
+    json_schema: Optional[dict] = None  # JSON schema the output must satisfy
+    
+    @model_validator(mode="after")
+    def _one_constraint(self) -> "GenerationConfig":
+        if self.grammar is not None and self.json_schema is not None:
+            raise ValueError("Set grammar or json_schema, not both")
+        return self
 
 
 class LLMResponse(BaseModel):
@@ -36,7 +91,7 @@ class BaseLLM(ABC):
     @abstractmethod
     async def generate(
         self,
-        prompt: str,
+        prompt: Prompt,
         config: Optional[GenerationConfig] = None,
     ) -> LLMResponse:
         """Generate text from prompt."""
@@ -45,7 +100,7 @@ class BaseLLM(ABC):
     @abstractmethod
     async def stream(
         self,
-        prompt: str,
+        prompt: Prompt,
         config: Optional[GenerationConfig] = None,
     ) -> AsyncIterator[str]:
         """Stream text generation token by token."""
@@ -60,10 +115,44 @@ class BaseLLM(ABC):
     def unload_model(self) -> None:
         """Unload the model from memory."""
         ...
+    
+    def count_tokens(self, text: str) -> int:
+        """Count tokens in text; implementations with a tokenizer should override."""
+        return estimate_tokens(text)
+    
+    def tokenize(self, text: str, add_bos: bool = False) -> list[int]:
+        """Tokenize text with the model's own tokenizer."""
+        raise NotImplementedError(f"{type(self).__name__} has no tokenizer")
+    
+    def detokenize(self, tokens: list[int]) -> str:
+        """Turn token IDs back into text."""
+        raise NotImplementedError(f"{type(self).__name__} has no tokenizer")
+    
+    @property
+    def context_length(self) -> Optional[int]:
+        """Context window in tokens, when known."""
+        return None
+    
+    @property
+    def is_loaded(self) -> bool:
+        """Whether the model is ready to serve; must never trigger loading."""
+        return True
+    
+    @property
+    def is_loading(self) -> bool:
+        """Whether a load is in progress."""
+        return False
 
 
 class LlamaCppLLM(BaseLLM):
-    """LLM implementation using llama.cpp."""
+    """
+    LLM implementation using llama.cpp.
+
+    llama.cpp calls block for the whole generation and a context cannot be
+    used from two threads at once, so every call runs on one dedicated
+    inference thread: the event loop stays free for status probes,
+    embeddings and other clients while requests queue for the model.
+    """
     
     def __init__(
         self,
@@ -71,12 +160,86 @@ class LlamaCppLLM(BaseLLM):
         n_ctx: int = 16384,
         n_gpu_layers: int = -1,
         n_batch: int = 512,
+        prompt_cache_bytes: int = 0,
+        use_mmap: bool = True,
+        use_mlock: bool = False,
+        n_ubatch: int = 512,
+        n_threads: Optional[int] = None,
+        n_threads_batch: Optional[int] = None,
     ):
         self.model_path = model_path
         self.n_ctx = n_ctx
         self.n_gpu_layers = n_gpu_layers
         self.n_batch = n_batch
+        self.prompt_cache_bytes = prompt_cache_bytes
+        self.use_mmap = use_mmap
+        self.use_mlock = use_mlock
+        self.n_ubatch = n_ubatch
+        self.n_threads = n_threads
+        self.n_threads_batch = n_threads_batch
+        self._grammars: dict[str, object] = {}
         self._model = None
+        self._loading = False
+        self._metrics = GenerationRecorder(os.path.basename(model_path))
+        # One inference thread for the object's lifetime; loads, unloads and
+        # switches queue on it behind the calls submitted before them.
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="llama")
+    
+    @classmethod
+    def from_settings(cls, settings) -> "LlamaCppLLM":
+        """Build from ``LLMSettings``."""
+        return cls(
+            model_path=settings.model_path,
+            n_ctx=settings.n_ctx,
+            n_gpu_layers=settings.n_gpu_layers,
+            n_batch=settings.n_batch,
+            prompt_cache_bytes=settings.prompt_cache_mb * 1024 * 1024,
+            use_mmap=settings.use_mmap,
+            use_mlock=settings.use_mlock,
+            n_ubatch=settings.n_ubatch,
+            n_threads=settings.n_threads,
+            n_threads_batch=settings.n_threads_batch,
+        )
+    
+    @property
+    def is_loaded(self) -> bool:
+        """Whether the model is in memory."""
+        return self._model is not None
+    
+    @property
+    def context_length(self) -> int:
+        """Context window in tokens."""
+        return self.n_ctx
+    
+    def tokenize(self, text: str, add_bos: bool = False) -> list[int]:
+        """Tokenize text with the model's tokenizer."""
+        if self._model is None:
+            self.load_model()
+        return self._model.tokenize(text.encode("utf-8"), add_bos=add_bos, special=True)
+    
+    def detokenize(self, tokens: list[int]) -> str:
+        """Turn token IDs back into text."""
+        if self._model is None:
+            self.load_model()
+        return self._model.detokenize(tokens).decode("utf-8", errors="replace")
+    
+    def count_tokens(self, text: str) -> int:
+        """Exact count once the model is loaded; an estimate before that."""
+        if self._model is None:
+            return estimate_tokens(text)
+        return len(self.tokenize(text))
+    
+    def _prepare(self, prompt: Prompt, config: GenerationConfig) -> list[int]:
+        """Tokenize once and fail fast if the prompt cannot fit."""
+        tokens = self.tokenize(prompt, add_bos=True) if isinstance(prompt, str) else prompt
+        if len(tokens) + config.max_tokens > self.n_ctx:
+            raise ContextLengthExceededError(len(tokens), config.max_tokens, self.n_ctx)
+        return tokens
+    
+    @property
+    def is_loading(self) -> bool:
+        """Whether a load is in progress."""
+        return self._loading
     
     def load_model(self) -> None:
         """Load the model into memory."""
@@ -87,14 +250,32 @@ class LlamaCppLLM(BaseLLM):
             from llama_cpp import Llama
             
             logger.info(f"Loading model from {self.model_path}")
-            self._model = Llama(
-                model_path=self.model_path,
-                n_ctx=self.n_ctx,
-                n_gpu_layers=self.n_gpu_layers,
-                n_batch=self.n_batch,
-                verbose=False,
-            )
-            logger.info("Model loaded successfully")
+            started = time.perf_counter()
+            self._loading = True
+            try:
+                self._model = Llama(
+                    model_path=self.model_path,
+                    n_ctx=self.n_ctx,
+                    n_gpu_layers=self.n_gpu_layers,
+                    n_batch=self.n_batch,
+                    n_ubatch=min(self.n_ubatch, self.n_batch),
+                    n_threads=self.n_threads,
+                    n_threads_batch=self.n_threads_batch,
+                    use_mmap=self.use_mmap,
+                    use_mlock=self.use_mlock,
+                    verbose=False,
+                )
+                if self.prompt_cache_bytes:
+                    # Keeps the KV state of evaluated prefixes (system prompts)
+                    # so later prompts sharing them skip re-evaluation.
+                    from llama_cpp import LlamaRAMCache
+                    
+                    self._model.set_cache(LlamaRAMCache(capacity_bytes=self.prompt_cache_bytes))
+            finally:
+                self._loading = False
+            elapsed = time.perf_counter() - started
+            MODEL_LOAD_SECONDS.labels("llm", os.path.basename(self.model_path)).observe(elapsed)
+            logger.info(f"Model loaded successfully in {elapsed:.1f}s")
         except ImportError:
             raise ImportError(
                 "llama-cpp-python is required. Install with: "
@@ -102,67 +283,164 @@ class LlamaCppLLM(BaseLLM):
             )
     
     def unload_model(self) -> None:
-        """Unload the model from memory."""
+        """Unload the model from memory once the calls queued for it have run."""
+        self._executor.submit(self._unload).result()
+    
+    def _unload(self) -> None:
         if self._model is not None:
             del self._model
             self._model = None
             logger.info("Model unloaded")
     
+    async def _run(self, fn: Callable[[], T]) -> T:
+        """Run ``fn`` on the inference thread, after any calls queued before it."""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn)
+    
+    async def switch_model(self, model_path: str) -> None:
+        """
+        Replace the loaded model with another file.
+
+        The switch runs on the inference thread: calls queued before it
+        finish on the previous model, calls made after it use the new one.
+        With mmap the previous model's pages stay in the page cache after
+        unloading, so switching back to a recently used model is fast.
+        """
+        if model_path == self.model_path and self._model is not None:
+            return
+        
+        def switch() -> None:
+            self._unload()
+            self.model_path = model_path
+            self._metrics = GenerationRecorder(os.path.basename(model_path))
+            self.load_model()
+        
+        await self._run(switch)
+    
+    def _grammar(self, config: GenerationConfig):
+        """The compiled ``LlamaGrammar`` for a config's constraint, or None."""
+        if config.grammar is None and config.json_schema is None:
+            return None
+        source = config.grammar if config.grammar is not None else json.dumps(config.json_schema, sort_keys=True)
+        grammar = self._grammars.get(source)
+        if grammar is None:
+            from llama_cpp import LlamaGrammar
+            
+            # Parsing a grammar costs milliseconds; agents reuse a handful.
+            if config.grammar is not None:
+                grammar = LlamaGrammar.from_string(config.grammar, verbose=False)
+            else:
+                grammar = LlamaGrammar.from_json_schema(source, verbose=False)
+            if len(self._grammars) >= _GRAMMAR_CACHE_SIZE:
+                self._grammars.clear()
+            self._grammars[source] = grammar
+        return grammar
+    
     async def generate(
         self,
-        prompt: str,
+        prompt: Prompt,
         config: Optional[GenerationConfig] = None,
     ) -> LLMResponse:
-        """Generate text from prompt."""
+        """Generate text from a prompt string or token IDs."""
+        return await self._run(lambda: self._generate(prompt, config or GenerationConfig()))
+    
+    def _generate(self, prompt: Prompt, config: GenerationConfig) -> LLMResponse:
         if self._model is None:
             self.load_model()
+        tokens = self._prepare(prompt, config)
         
-        config = config or GenerationConfig()
-        
+        started = time.perf_counter()
         response = self._model(
-            prompt,
+            tokens,
             max_tokens=config.max_tokens,
             temperature=config.temperature,
             top_p=config.top_p,
             top_k=config.top_k,
             repeat_penalty=config.repeat_penalty,
             stop=config.stop or None,
+            grammar=self._grammar(config),
+        )
+        
+        usage = response["usage"]
+        self._metrics.record(
+            started,
+            completion_tokens=usage["completion_tokens"],
+            prompt_tokens=usage["prompt_tokens"],
         )
         
         return LLMResponse(
             text=response["choices"][0]["text"],
-            prompt_tokens=response["usage"]["prompt_tokens"],
-            completion_tokens=response["usage"]["completion_tokens"],
-            total_tokens=response["usage"]["total_tokens"],
+            prompt_tokens=usage["prompt_tokens"],
+            completion_tokens=usage["completion_tokens"],
+            total_tokens=usage["total_tokens"],
             model=self.model_path,
         )
     
     async def stream(
         self,
-        prompt: str,
+        prompt: Prompt,
         config: Optional[GenerationConfig] = None,
     ) -> AsyncIterator[str]:
         """Stream text generation token by token."""
-        if self._model is None:
-            self.load_model()
-        
         config = config or GenerationConfig()
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
         
-        stream = self._model(
-            prompt,
-            max_tokens=config.max_tokens,
-            temperature=config.temperature,
-            top_p=config.top_p,
-            top_k=config.top_k,
-            repeat_penalty=config.repeat_penalty,
-            stop=config.stop or None,
-            stream=True,
-        )
+        def put(item) -> None:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+            except RuntimeError:
+                stop.set()  # The loop is gone; nobody is reading.
+        
+        def produce() -> None:
+            try:
+                if self._model is None:
+                    self.load_model()
+                tokens = self._prepare(prompt, config)
+                chunks = self._model(
+                    tokens,
+                    max_tokens=config.max_tokens,
+                    temperature=config.temperature,
+                    top_p=config.top_p,
+                    top_k=config.top_k,
+                    repeat_penalty=config.repeat_penalty,
+                    stop=config.stop or None,
+                    grammar=self._grammar(config),
+                    stream=True,
+                )
+                for chunk in chunks:
+                    if stop.is_set():
+                        break
+                    text = chunk["choices"][0]["text"]
+                    if text:
+                        put(text)
+            except Exception as e:
+                put(e)
+            else:
+                put(_END)
+        
+        started = time.perf_counter()
+        producer = asyncio.ensure_future(self._run(produce))
+        # Each chunk is one decoded token; only counters are touched per token.
+        first_token_at = None
+        completion_tokens = 0
+        try:
+            while True:
+                item = await queue.get()
+                if item is _END:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                completion_tokens += 1
+                yield item
+        finally:
+            # An abandoned stream stops decoding at the next token.
+            stop.set()
+            producer.cancel()
         
-        for chunk in stream:
-            text = chunk["choices"][0]["text"]
-            if text:
-                yield text
+        self._metrics.record(started, completion_tokens, first_token_at=first_token_at)
 
 
 # Global LLM instance (lazy loaded)
@@ -177,17 +455,26 @@ def get_llm() -> BaseLLM:
         from sheaia.config import get_settings
         
         settings = get_settings()
-        _llm_instance = LlamaCppLLM(
-            model_path=settings.llm.model_path,
-            n_ctx=settings.llm.n_ctx,
-            n_gpu_layers=settings.llm.n_gpu_layers,
-            n_batch=settings.llm.n_batch,
-        )
+        if settings.model_server.enabled:
+            from sheaia.core.model_server import RemoteLLM, get_model_client
+            
+            _llm_instance = RemoteLLM(get_model_client())
+        else:
+            _llm_instance = LlamaCppLLM.from_settings(settings.llm)
+        if settings.singleflight.enabled:
+            from sheaia.core.singleflight import CoalescingLLM
+            
+            # No deadline here: generations queue behind one another on the
+            # inference thread, and batch jobs and summaries may run long.
+            _llm_instance = CoalescingLLM(_llm_instance)
     
     return _llm_instance
 
 
 __all__ = [
+    "estimate_tokens",
+    "Prompt",
+    "ContextLengthExceededError",
     "GenerationConfig",
     "LLMResponse",
     "BaseLLM",
@@ -0,0 +1,373 @@
+"""Prometheus-style metrics and optional tracing spans."""
+
+import logging
+import math
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from typing import Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+# Bucket layouts shared by the instrumentation below.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TOKEN_BUCKETS = (16, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768)
+RATE_BUCKETS = (1, 2, 5, 10, 20, 30, 50, 75, 100, 150, 250, 500, 1000)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+LOAD_BUCKETS = (0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0)
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+    
+    def __init__(self):
+        self.value = 0.0
+    
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+
+class _GaugeChild:
+    __slots__ = ("value",)
+    
+    def __init__(self):
+        self.value = 0.0
+    
+    def set(self, value: float) -> None:
+        self.value = value
+    
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+    
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "count")
+    
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+    
+    def observe(self, value: float) -> None:
+        # Prometheus buckets are "less than or equal", which bisect_left gives us.
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class _Metric:
+    """
+    Base for labelled metrics.
+
+    Recording takes no locks: children are plain slot objects updated in
+    place under the GIL, and hot paths bind their child once with
+    ``labels()`` so an observation is a few attribute updates with no
+    allocation. A rare lost update under heavy thread contention is
+    accepted in exchange.
+    """
+    
+    kind = ""
+    
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._children: dict[tuple[str, ...], object] = {}
+        if not labelnames:
+            self._default = self.labels()
+    
+    def _new_child(self):
+        raise NotImplementedError
+    
+    def labels(self, *values: str):
+        """Return the child for a label combination, creating it on first use."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            child = self._children.setdefault(values, self._new_child())
+        return child
+    
+    def _label_text(self, values: tuple[str, ...], extra: str = "") -> str:
+        pairs = [f'{k}="{_escape(v)}"' for k, v in zip(self.labelnames, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+    
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in list(self._children.items()):
+            lines.extend(self._render_child(values, child))
+        return lines
+    
+    def _render_child(self, values, child) -> list[str]:
+        return [f"{self.name}{self._label_text(values)} {_format(child.value)}"]
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter."""
+    
+    kind = "counter"
+    
+    def _new_child(self):
+        return _CounterChild()
+    
+    def inc(self, amount: float = 1.0) -> None:
+        self._default.inc(amount)
+
+
+class Gauge(_Metric):
+    """Value that can go up and down."""
+    
+    kind = "gauge"
+    
+    def _new_child(self):
+        return _GaugeChild()
+    
+    def set(self, value: float) -> None:
+        self._default.set(value)
+
+
+class Histogram(_Metric):
+    """Fixed-bucket histogram."""
+    
+    kind = "histogram"
+    
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+    
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+    
+    def observe(self, value: float) -> None:
+        self._default.observe(value)
+    
+    def _render_child(self, values, child) -> list[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip((*self.buckets, math.inf), child.counts):
+            cumulative += count
+            le = 'le="' + ("+Inf" if bound == math.inf else _format(bound)) + '"'
+            lines.append(f"{self.name}_bucket{self._label_text(values, le)} {cumulative}")
+        lines.append(f"{self.name}_sum{self._label_text(values)} {_format(child.sum)}")
+        lines.append(f"{self.name}_count{self._label_text(values)} {child.count}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Registry:
+    """Collection of metrics rendered together in the text exposition format."""
+    
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+    
+    def register(self, metric: _Metric) -> _Metric:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                raise ValueError(f"Metric {metric.name} already registered with a different shape")
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+    
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+    
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+    """Create (or fetch) a counter in the default registry."""
+    return REGISTRY.register(Counter(name, documentation, labelnames))  # type: ignore[return-value]
+
+
+def gauge(name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Gauge:
+    """Create (or fetch) a gauge in the default registry."""
+    return REGISTRY.register(Gauge(name, documentation, labelnames))  # type: ignore[return-value]
+
+
+def histogram(
+    name: str,
+    documentation: str,
+    labelnames: tuple[str, ...] = (),
+    buckets: tuple[float, ...] = LATENCY_BUCKETS,
+) -> Histogram:
+    """Create (or fetch) a histogram in the default registry."""
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))  # type: ignore[return-value]
+
+
+# Hot-path metrics
+LLM_TIME_TO_FIRST_TOKEN = histogram(
+    "sheaia_llm_time_to_first_token_seconds", "Time from request to first streamed token", ("model",)
+)
+LLM_TOKENS_PER_SECOND = histogram(
+    "sheaia_llm_tokens_per_second", "Completion tokens per second of decode", ("model",), RATE_BUCKETS
+)
+LLM_PROMPT_TOKENS = histogram(
+    "sheaia_llm_prompt_tokens", "Prompt tokens per generation", ("model",), TOKEN_BUCKETS
+)
+LLM_COMPLETION_TOKENS = histogram(
+    "sheaia_llm_completion_tokens", "Completion tokens per generation", ("model",), TOKEN_BUCKETS
+)
+LLM_GENERATION_SECONDS = histogram(
+    "sheaia_llm_generation_seconds", "Wall time of a full generation", ("model",)
+)
+MODEL_LOAD_SECONDS = histogram(
+    "sheaia_model_load_seconds", "Time to load a model into memory", ("kind", "model"), LOAD_BUCKETS
+)
+EMBEDDING_BATCH_SIZE = histogram(
+    "sheaia_embedding_batch_size", "Texts per embedding call", ("model",), SIZE_BUCKETS
+)
+EMBEDDING_SECONDS = histogram(
+    "sheaia_embedding_seconds", "Latency of an embedding call", ("model",)
+)
+WEBSOCKET_FRAMES = counter(
+    "sheaia_websocket_frames_total", "WebSocket frames sent and received", ("direction",)
+)
+WEBSOCKET_FRAME_RATE = histogram(
+    "sheaia_websocket_stream_frames_per_second", "Frames per second of each streamed reply", (), RATE_BUCKETS
+)
+HTTP_REQUEST_SECONDS = histogram(
+    "sheaia_http_request_duration_seconds", "HTTP request latency", ("method", "route", "status")
+)
+ADMISSION_QUEUE_SECONDS = histogram(
+    "sheaia_admission_queue_seconds", "Time requests wait for admission", ("class",)
+)
+ADMISSION_SHED = counter(
+    "sheaia_admission_shed_total", "Requests shed by admission control", ("class", "status")
+)
+SINGLEFLIGHT_CALLS = counter(
+    "sheaia_singleflight_calls_total",
+    "Coalesced calls that started a computation or joined one already running",
+    ("name", "role"),
+)
+SINGLEFLIGHT_CALLERS = histogram(
+    "sheaia_singleflight_callers", "Callers served by one shared computation", ("name",), SIZE_BUCKETS
+)
+STAGE_SECONDS = histogram(
+    "sheaia_stage_seconds", "Duration of traced request stages", ("stage",)
+)
+CONNECTOR_ROWS = counter(
+    "sheaia_connector_rows_total", "Rows loaded by data connectors", ("connector",)
+)
+
+
+class GenerationRecorder:
+    """Per-model bound histograms, so recording a generation allocates nothing."""
+    
+    __slots__ = ("ttft", "tokens_per_second", "prompt_tokens", "completion_tokens", "seconds")
+    
+    def __init__(self, model: str):
+        self.ttft = LLM_TIME_TO_FIRST_TOKEN.labels(model)
+        self.tokens_per_second = LLM_TOKENS_PER_SECOND.labels(model)
+        self.prompt_tokens = LLM_PROMPT_TOKENS.labels(model)
+        self.completion_tokens = LLM_COMPLETION_TOKENS.labels(model)
+        self.seconds = LLM_GENERATION_SECONDS.labels(model)
+    
+    def record(
+        self,
+        started: float,
+        completion_tokens: int,
+        prompt_tokens: Optional[int] = None,
+        first_token_at: Optional[float] = None,
+    ) -> None:
+        """Record one finished generation; times come from ``time.perf_counter()``."""
+        finished = time.perf_counter()
+        self.seconds.observe(finished - started)
+        self.completion_tokens.observe(completion_tokens)
+        if prompt_tokens is not None:
+            self.prompt_tokens.observe(prompt_tokens)
+        if first_token_at is not None:
+            self.ttft.observe(first_token_at - started)
+            decode_started = first_token_at
+        else:
+            decode_started = started
+        if completion_tokens and finished > decode_started:
+            self.tokens_per_second.observe(completion_tokens / (finished - decode_started))
+
+
+# Tracing spans (off by default)
+_tracing_enabled = False
+_tracer = None
+_NOOP_SPAN = nullcontext()
+
+
+def configure_tracing(enabled: bool) -> None:
+    """
+    Enable or disable stage spans.
+    
+    Spans always feed ``sheaia_stage_seconds``; if opentelemetry is
+    installed they are also exported as OpenTelemetry spans.
+    """
+    global _tracing_enabled, _tracer
+    _tracing_enabled = enabled
+    _tracer = None
+    if enabled:
+        try:
+            from opentelemetry import trace
+            
+            _tracer = trace.get_tracer("sheaia")
+        except ImportError:
+            logger.info("opentelemetry not installed; spans are recorded as metrics only")
+
+
+@contextmanager
+def _recorded_span(name: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        if _tracer is not None:
+            with _tracer.start_as_current_span(name):
+                yield
+        else:
+            yield
+    finally:
+        STAGE_SECONDS.labels(name).observe(time.perf_counter() - started)
+
+
+def span(name: str):
+    """Trace a request stage; a shared no-op when tracing is disabled."""
+    if not _tracing_enabled:
+        return _NOOP_SPAN
+    return _recorded_span(name)
+
+
+__all__ = [
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "Registry",
+    "REGISTRY",
+    "counter",
+    "gauge",
+    "histogram",
+    "GenerationRecorder",
+    "configure_tracing",
+    "span",
+]
@@ -0,0 +1,478 @@
+"""Shared model server - one process owns the models, API workers talk to it over a Unix socket."""
+
+import asyncio
+import itertools
+import json
+import logging
+import os
+import socket
+import struct
+import threading
+from pathlib import Path
+from typing import AsyncIterator, Optional
+
+import numpy as np
+
+from sheaia.core.embedding import BaseEmbedding
+from sheaia.core.llm import BaseLLM, GenerationConfig, LLMResponse, Prompt
+
+logger = logging.getLogger(__name__)
+
+# Frame: header length, payload length, JSON header, raw payload (embeddings as float32).
+_FRAME = struct.Struct("!II")
+
+
+class ModelServerError(RuntimeError):
+    """Raised when the model server fails a request or cannot be reached."""
+
+
+def encode_frame(header: dict, payload: bytes = b"") -> bytes:
+    """Encode one protocol frame."""
+    data = json.dumps(header, separators=(",", ":")).encode()
+    return _FRAME.pack(len(data), len(payload)) + data + payload
+
+
+async def read_frame(reader: asyncio.StreamReader) -> tuple[dict, bytes]:
+    """Read one frame; raises ``asyncio.IncompleteReadError`` at EOF."""
+    header_len, payload_len = _FRAME.unpack(await reader.readexactly(_FRAME.size))
+    header = json.loads(await reader.readexactly(header_len))
+    payload = await reader.readexactly(payload_len) if payload_len else b""
+    return header, payload
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < size:
+        chunk = sock.recv(size - len(buf))
+        if not chunk:
+            raise ConnectionError("model server closed the connection")
+        buf += chunk
+    return bytes(buf)
+
+
+def _read_frame_sync(sock: socket.socket) -> tuple[dict, bytes]:
+    header_len, payload_len = _FRAME.unpack(_recv_exactly(sock, _FRAME.size))
+    header = json.loads(_recv_exactly(sock, header_len))
+    payload = _recv_exactly(sock, payload_len) if payload_len else b""
+    return header, payload
+
+
+def _array(header: dict, payload: bytes) -> np.ndarray:
+    return np.frombuffer(payload, dtype=np.float32).reshape(header["shape"])
+
+
+class ModelServer:
+    """
+    Serves one LLM and one embedding model to many API workers.
+
+    Each connection carries many concurrent requests, matched by id; stream
+    tokens are forwarded as individual frames as soon as the model yields
+    them. The socket is bound before the models load, so workers can see
+    the load progress through ``status`` while model requests wait.
+    """
+    
+    def __init__(self, llm: BaseLLM, embedding: BaseEmbedding, path: str):
+        self.llm = llm
+        self.embedding = embedding
+        self.path = path
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._ready = asyncio.Event()
+    
+    async def start(self, load: bool = True) -> None:
+        """Bind the socket, then load the models in the background."""
+        path = Path(self.path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.exists():
+            path.unlink()
+        self._server = await asyncio.start_unix_server(self._handle, path=str(path))
+        os.chmod(path, 0o600)
+        logger.info(f"Model server listening on {path}")
+        if load:
+            asyncio.create_task(self._load())
+        else:
+            self._ready.set()
+    
+    async def _load(self) -> None:
+        try:
+            await asyncio.to_thread(self.llm.load_model)
+            await asyncio.to_thread(lambda: self.embedding.dimension)
+        except Exception:
+            # Requests still go through and report the load error to the caller.
+            logger.exception("Model server failed to load models")
+        finally:
+            self._ready.set()
+    
+    async def serve_forever(self) -> None:
+        """Serve until cancelled."""
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+    
+    async def close(self) -> None:
+        """Stop accepting connections and remove the socket."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        Path(self.path).unlink(missing_ok=True)
+    
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        tasks: dict[int, asyncio.Task] = {}
+        try:
+            while True:
+                try:
+                    header, payload = await read_frame(reader)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                rid = header["id"]
+                if header["op"] == "cancel":
+                    task = tasks.pop(rid, None)
+                    if task is not None:
+                        task.cancel()
+                    continue
+                task = asyncio.create_task(self._dispatch(header, writer))
+                tasks[rid] = task
+                task.add_done_callback(lambda _, rid=rid: tasks.pop(rid, None))
+        finally:
+            for task in list(tasks.values()):
+                task.cancel()
+            writer.close()
+    
+    async def _dispatch(self, header: dict, writer: asyncio.StreamWriter) -> None:
+        rid = header["id"]
+        op = header["op"]
+        try:
+            if op == "status":
+                writer.write(encode_frame({"id": rid, **self.status()}))
+                return
+            
+            await self._ready.wait()
+            if op == "generate":
+                response = await self.llm.generate(header["prompt"], _config(header))
+                writer.write(encode_frame({"id": rid, "response": response.model_dump()}))
+            elif op == "stream":
+                async for text in self.llm.stream(header["prompt"], _config(header)):
+                    writer.write(encode_frame({"id": rid, "text": text}))
+                    await writer.drain()
+                writer.write(encode_frame({"id": rid, "done": True}))
+            elif op in ("embed_documents", "embed_query"):
+                method = getattr(self.embedding, op)
+                array = await asyncio.to_thread(method, header["input"])
+                array = np.ascontiguousarray(array, dtype=np.float32)
+                writer.write(encode_frame({"id": rid, "shape": list(array.shape)}, array.tobytes()))
+            elif op == "tokenize":
+                tokens = await asyncio.to_thread(
+                    self.llm.tokenize, header["input"], add_bos=header.get("add_bos", False)
+                )
+                writer.write(encode_frame({"id": rid, "tokens": tokens}))
+            elif op == "detokenize":
+                text = await asyncio.to_thread(self.llm.detokenize, header["input"])
+                writer.write(encode_frame({"id": rid, "text": text}))
+            elif op == "dimension":
+                writer.write(encode_frame({"id": rid, "dimension": self.embedding.dimension}))
+            else:
+                writer.write(encode_frame({"id": rid, "error": f"Unknown operation: {op}"}))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.exception(f"Model server {op} request failed")
+            writer.write(encode_frame({"id": rid, "error": f"{type(e).__name__}: {e}"}))
+        await writer.drain()
+    
+    def status(self) -> dict:
+        """Load state of both models."""
+        return {
+            "llm": {
+                "loaded": self.llm.is_loaded,
+                "loading": self.llm.is_loading,
+                "context_length": self.llm.context_length,
+            },
+            "embedding": {"loaded": self.embedding.is_loaded, "loading": self.embedding.is_loading},
+        }
+
+
+def _config(header: dict) -> Optional[GenerationConfig]:
+    config = header.get("config")
+    return GenerationConfig(**config) if config else None
+
+
+class ModelClient:
+    """
+    Connection to the model server.
+
+    Async requests share one multiplexed connection per event loop; sync
+    requests (embeddings, status) use one blocking connection per thread.
+    """
+    
+    def __init__(self, path: str, timeout_s: float = 5.0, request_timeout_s: float = 300.0):
+        self.path = path
+        self.timeout_s = timeout_s
+        self.request_timeout_s = request_timeout_s
+        self._ids = itertools.count(1)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._pending: dict[int, asyncio.Queue] = {}
+        self._connect_lock: Optional[asyncio.Lock] = None
+        self._local = threading.local()
+        self._sync_sockets: list[socket.socket] = []
+    
+    async def _connection(self) -> asyncio.StreamWriter:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._writer = None
+            self._connect_lock = asyncio.Lock()
+        async with self._connect_lock:
+            if self._writer is None or self._writer.is_closing():
+                try:
+                    reader, self._writer = await asyncio.wait_for(
+                        asyncio.open_unix_connection(self.path), self.timeout_s
+                    )
+                except (OSError, TimeoutError) as e:
+                    raise ModelServerError(f"Cannot reach model server at {self.path}: {e}") from e
+                self._reader_task = asyncio.create_task(self._read(reader))
+        return self._writer
+    
+    async def _read(self, reader: asyncio.StreamReader) -> None:
+        try:
+            while True:
+                header, payload = await read_frame(reader)
+                queue = self._pending.get(header["id"])
+                if queue is not None:
+                    queue.put_nowait((header, payload))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._writer = None
+            for queue in self._pending.values():
+                queue.put_nowait(({"error": "model server closed the connection"}, b""))
+    
+    async def _send(self, header: dict) -> tuple[int, asyncio.Queue]:
+        writer = await self._connection()
+        rid = next(self._ids)
+        queue: asyncio.Queue = asyncio.Queue()
+        self._pending[rid] = queue
+        writer.write(encode_frame({"id": rid, **header}))
+        return rid, queue
+    
+    async def request(self, op: str, **fields) -> tuple[dict, bytes]:
+        """Send a request and wait for its single response frame."""
+        rid, queue = await self._send({"op": op, **fields})
+        try:
+            header, payload = await queue.get()
+        finally:
+            del self._pending[rid]
+        if "error" in header:
+            raise ModelServerError(header["error"])
+        return header, payload
+    
+    async def stream(self, op: str, **fields) -> AsyncIterator[dict]:
+        """Send a request and yield response frames until it is done."""
+        rid, queue = await self._send({"op": op, **fields})
+        done = False
+        try:
+            while True:
+                header, _ = await queue.get()
+                if "error" in header:
+                    done = True
+                    raise ModelServerError(header["error"])
+                if header.get("done"):
+                    done = True
+                    return
+                yield header
+        finally:
+            del self._pending[rid]
+            if not done and self._writer is not None:
+                # The consumer stopped early; stop generating on the server.
+                self._writer.write(encode_frame({"id": rid, "op": "cancel"}))
+    
+    def request_sync(self, op: str, timeout_s: Optional[float] = None, **fields) -> tuple[dict, bytes]:
+        """
+        Blocking request over this thread's connection.
+
+        Waits at most ``timeout_s`` for the response, ``request_timeout_s``
+        when not given, so a stalled server cannot block the thread forever.
+        """
+        sock = getattr(self._local, "sock", None)
+        try:
+            if sock is None:
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                sock.settimeout(self.timeout_s)
+                sock.connect(self.path)
+                self._local.sock = sock
+                self._sync_sockets.append(sock)
+            sock.settimeout(self.request_timeout_s if timeout_s is None else timeout_s)
+            sock.sendall(encode_frame({"id": 0, "op": op, **fields}))
+            header, payload = _read_frame_sync(sock)
+        except OSError as e:
+            if sock is not None:
+                sock.close()
+            self._local.sock = None
+            raise ModelServerError(f"Cannot reach model server at {self.path}: {e}") from e
+        if "error" in header:
+            raise ModelServerError(header["error"])
+        return header, payload
+    
+    async def close(self) -> None:
+        """Close all connections."""
+        for sock in self._sync_sockets:
+            sock.close()
+        self._sync_sockets.clear()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._reader_task is not None:
+            await asyncio.gather(self._reader_task, return_exceptions=True)
+            self._reader_task = None
+    
+    def status(self) -> dict:
+        """Model load state, or an empty dict when the server is unreachable."""
+        try:
+            header, _ = self.request_sync("status", timeout_s=self.timeout_s)
+        except ModelServerError:
+            return {}
+        return header
+
+
+class RemoteLLM(BaseLLM):
+    """LLM served by the model server."""
+    
+    def __init__(self, client: ModelClient):
+        self.client = client
+        self._context_length: Optional[int] = None
+    
+    async def generate(
+        self,
+        prompt: Prompt,
+        config: Optional[GenerationConfig] = None,
+    ) -> LLMResponse:
+        """Generate text from a prompt string or token IDs."""
+        header, _ = await self.client.request(
+            "generate", prompt=prompt, config=config.model_dump() if config else None
+        )
+        return LLMResponse(**header["response"])
+    
+    async def stream(
+        self,
+        prompt: Prompt,
+        config: Optional[GenerationConfig] = None,
+    ) -> AsyncIterator[str]:
+        """Stream text generation token by token."""
+        async for header in self.client.stream(
+            "stream", prompt=prompt, config=config.model_dump() if config else None
+        ):
+            yield header["text"]
+    
+    def tokenize(self, text: str, add_bos: bool = False) -> list[int]:
+        """Tokenize with the served model's tokenizer."""
+        header, _ = self.client.request_sync("tokenize", input=text, add_bos=add_bos)
+        return header["tokens"]
+    
+    def detokenize(self, tokens: list[int]) -> str:
+        """Turn token IDs back into text."""
+        header, _ = self.client.request_sync("detokenize", input=tokens)
+        return header["text"]
+    
+    @property
+    def context_length(self) -> Optional[int]:
+        """Context window of the served model."""
+        if self._context_length is None:
+            self._context_length = self.client.status().get("llm", {}).get("context_length")
+        return self._context_length
+    
+    def load_model(self) -> None:
+        """Models are owned by the model server."""
+    
+    def unload_model(self) -> None:
+        """Models are owned by the model server."""
+    
+    @property
+    def is_loaded(self) -> bool:
+        """Whether the server has the model in memory."""
+        return self.client.status().get("llm", {}).get("loaded", False)
+    
+    @property
+    def is_loading(self) -> bool:
+        """Whether the server is loading the model."""
+        return self.client.status().get("llm", {}).get("loading", False)
+
+
+class RemoteEmbedding(BaseEmbedding):
+    """Embedding model served by the model server."""
+    
+    def __init__(self, client: ModelClient):
+        self.client = client
+        self._dimension: Optional[int] = None
+    
+    @property
+    def dimension(self) -> int:
+        """Return the embedding dimension."""
+        if self._dimension is None:
+            header, _ = self.client.request_sync("dimension")
+            self._dimension = header["dimension"]
+        return self._dimension
+    
+    def embed_documents(self, texts: list[str]) -> np.ndarray:
+        """Embed a list of documents."""
+        return _array(*self.client.request_sync("embed_documents", input=texts))
+    
+    def embed_query(self, text: str) -> np.ndarray:
+        """Embed a single query text."""
+        return _array(*self.client.request_sync("embed_query", input=text))
+    
+    @property
+    def is_loaded(self) -> bool:
+        """Whether the server has the model in memory."""
+        return self.client.status().get("embedding", {}).get("loaded", False)
+    
+    @property
+    def is_loading(self) -> bool:
+        """Whether the server is loading the model."""
+        return self.client.status().get("embedding", {}).get("loading", False)
+
+
+_client: Optional[ModelClient] = None
+
+
+def get_model_client() -> ModelClient:
+    """Get the process-wide model server client."""
+    global _client
+    
+    if _client is None:
+        from sheaia.config import get_settings
+        
+        settings = get_settings().model_server
+        _client = ModelClient(
+            settings.socket_path, settings.timeout_s, settings.request_timeout_s
+        )
+    
+    return _client
+
+
+async def serve_models(settings) -> None:
+    """Load the configured models and serve them until cancelled."""
+    from sheaia.core.embedding import SentenceTransformerEmbedding
+    from sheaia.core.llm import LlamaCppLLM
+    
+    server = ModelServer(
+        llm=LlamaCppLLM.from_settings(settings.llm),
+        embedding=SentenceTransformerEmbedding.from_settings(settings.embedding),
+        path=settings.model_server.socket_path,
+    )
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+
+
+__all__ = [
+    "ModelServerError",
+    "ModelServer",
+    "ModelClient",
+    "RemoteLLM",
+    "RemoteEmbedding",
+    "get_model_client",
+    "serve_models",
+]
@@ -0,0 +1,336 @@
+"""Local model registry - catalogs GGUF and embedding artifacts under ``models_dir``."""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import struct
+from pathlib import Path
+from typing import BinaryIO, Literal, Optional
+
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+GGUF_MAGIC = b"GGUF"
+
+# GGUF metadata value types -> struct format (strings and arrays are handled separately).
+_SCALARS = {
+    0: "<B", 1: "<b", 2: "<H", 3: "<h", 4: "<I", 5: "<i",
+    6: "<f", 7: "<?", 10: "<Q", 11: "<q", 12: "<d",
+}
+_STRING = 8
+_ARRAY = 9
+
+# llama.cpp ``general.file_type`` values.
+FILE_TYPES = {
+    0: "F32", 1: "F16", 2: "Q4_0", 3: "Q4_1", 7: "Q8_0", 8: "Q5_0", 9: "Q5_1",
+    10: "Q2_K", 11: "Q3_K_S", 12: "Q3_K_M", 13: "Q3_K_L", 14: "Q4_K_S", 15: "Q4_K_M",
+    16: "Q5_K_S", 17: "Q5_K_M", 18: "Q6_K", 19: "IQ2_XXS", 20: "IQ2_XS", 21: "Q2_K_S",
+    22: "IQ3_XS", 23: "IQ3_XXS", 24: "IQ1_S", 25: "IQ4_NL", 26: "IQ3_S", 27: "IQ3_M",
+    28: "IQ2_S", 29: "IQ2_M", 30: "IQ4_XS", 31: "IQ1_M", 32: "BF16",
+}
+
+_QUANT_IN_NAME = re.compile(r"(?i)\b(i?q\d_[a-z0-9_]+|q\d_\d|f16|f32|bf16)\b")
+
+# Weight files that identify a sentence-transformers / Hugging Face model directory.
+_WEIGHT_FILES = ("model.safetensors", "pytorch_model.bin")
+
+HASH_CACHE = ".registry-cache.json"
+_HASH_CHUNK = 8 * 1024 * 1024
+
+
+class ModelInfo(BaseModel):
+    """One cataloged model artifact."""
+    
+    name: str
+    path: str
+    kind: Literal["llm", "embedding"]
+    format: Literal["gguf", "sentence-transformers"]
+    size_bytes: int
+    quantization: Optional[str] = None
+    architecture: Optional[str] = None
+    context_length: Optional[int] = None
+    layers: Optional[int] = None
+    embedding_length: Optional[int] = None
+    head_count: Optional[int] = None
+    head_count_kv: Optional[int] = None
+    sha256: Optional[str] = None
+    
+    def estimated_memory_bytes(self, n_ctx: Optional[int] = None) -> int:
+        """
+        Weights plus an f16 KV cache for ``n_ctx`` tokens (the model's
+        trained context by default). Weights are mmapped, so several
+        processes loading the same file share them in the page cache.
+        """
+        if self.format != "gguf" or not (self.layers and self.embedding_length and self.head_count):
+            return self.size_bytes
+        n_ctx = n_ctx or self.context_length or 0
+        head_dim = self.embedding_length // self.head_count
+        kv_heads = self.head_count_kv or self.head_count
+        return self.size_bytes + 2 * self.layers * n_ctx * kv_heads * head_dim * 2
+
+
+class VerifyResult(BaseModel):
+    """Outcome of verifying one model."""
+    
+    name: str
+    ok: bool
+    sha256: Optional[str] = None
+    detail: str = ""
+
+
+class GGUFError(ValueError):
+    """Raised for files that are not valid GGUF."""
+
+
+def _read(f: BinaryIO, fmt: str):
+    size = struct.calcsize(fmt)
+    data = f.read(size)
+    if len(data) != size:
+        raise GGUFError("unexpected end of file in GGUF header")
+    return struct.unpack(fmt, data)[0]
+
+
+def _read_string(f: BinaryIO) -> str:
+    length = _read(f, "<Q")
+    return f.read(length).decode("utf-8", errors="replace")
+
+
+def _read_value(f: BinaryIO, value_type: int):
+    if value_type in _SCALARS:
+        return _read(f, _SCALARS[value_type])
+    if value_type == _STRING:
+        return _read_string(f)
+    if value_type == _ARRAY:
+        item_type = _read(f, "<I")
+        count = _read(f, "<Q")
+        # Arrays are tokenizer tables here; skip them without decoding.
+        if item_type in _SCALARS:
+            f.seek(count * struct.calcsize(_SCALARS[item_type]), os.SEEK_CUR)
+        else:
+            for _ in range(count):
+                _read_value(f, item_type)
+        return None
+    raise GGUFError(f"unknown GGUF value type {value_type}")
+
+
+def read_gguf_metadata(path: str | Path) -> dict:
+    """
+    Read the key/value metadata from a GGUF header.
+
+    Only the header is read; tensor data is never touched, so this is fast
+    even for multi-gigabyte files.
+    """
+    with open(path, "rb") as f:
+        if f.read(4) != GGUF_MAGIC:
+            raise GGUFError(f"{path} is not a GGUF file")
+        version = _read(f, "<I")
+        count_fmt = "<I" if version == 1 else "<Q"
+        _read(f, count_fmt)  # tensor count
+        kv_count = _read(f, count_fmt)
+        
+        metadata: dict = {"gguf.version": version}
+        for _ in range(kv_count):
+            key = _read_string(f)
+            metadata[key] = _read_value(f, _read(f, "<I"))
+        return metadata
+
+
+def sha256_file(path: str | Path) -> str:
+    """Stream a file through SHA-256."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(_HASH_CHUNK):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _gguf_info(path: Path, models_dir: Path) -> ModelInfo:
+    meta = read_gguf_metadata(path)
+    arch = meta.get("general.architecture", "")
+    file_type = meta.get("general.file_type")
+    quantization = FILE_TYPES.get(file_type) if file_type is not None else None
+    if quantization is None and (match := _QUANT_IN_NAME.search(path.stem)):
+        quantization = match.group(1).upper()
+    return ModelInfo(
+        name=path.stem,
+        path=str(path.relative_to(models_dir)),
+        kind="llm",
+        format="gguf",
+        size_bytes=path.stat().st_size,
+        quantization=quantization,
+        architecture=arch or None,
+        context_length=meta.get(f"{arch}.context_length"),
+        layers=meta.get(f"{arch}.block_count"),
+        embedding_length=meta.get(f"{arch}.embedding_length"),
+        head_count=meta.get(f"{arch}.attention.head_count"),
+        head_count_kv=meta.get(f"{arch}.attention.head_count_kv"),
+    )
+
+
+def _embedding_info(directory: Path, models_dir: Path) -> ModelInfo:
+    config = json.loads((directory / "config.json").read_text(encoding="utf-8"))
+    return ModelInfo(
+        name=directory.name,
+        path=str(directory.relative_to(models_dir)),
+        kind="embedding",
+        format="sentence-transformers",
+        size_bytes=sum(p.stat().st_size for p in directory.rglob("*") if p.is_file()),
+        quantization=config.get("torch_dtype"),
+        architecture=(config.get("architectures") or [None])[0],
+        context_length=config.get("max_position_embeddings"),
+        layers=config.get("num_hidden_layers"),
+        embedding_length=config.get("hidden_size"),
+        head_count=config.get("num_attention_heads"),
+    )
+
+
+def _weights_file(info: ModelInfo, models_dir: Path) -> Path:
+    path = models_dir / info.path
+    if info.format == "gguf":
+        return path
+    for name in _WEIGHT_FILES:
+        if (path / name).exists():
+            return path / name
+    raise FileNotFoundError(f"no weights file in {path}")
+
+
+class ModelRegistry:
+    """
+    Catalog of the models under ``models_dir``.
+
+    GGUF files anywhere below the directory are LLMs; directories with a
+    ``config.json`` and a weights file are embedding models. Content hashes
+    are cached in ``.registry-cache.json`` keyed by path, size and mtime, so
+    each file is hashed once rather than on every scan.
+    """
+    
+    def __init__(self, models_dir: str | Path):
+        self.models_dir = Path(models_dir)
+        self.cache_path = self.models_dir / HASH_CACHE
+        self._cache: Optional[dict] = None
+    
+    @classmethod
+    def from_settings(cls, settings) -> "ModelRegistry":
+        """Build a registry for ``Settings.models_dir``."""
+        return cls(settings.models_dir)
+    
+    def _load_cache(self) -> dict:
+        if self._cache is None:
+            try:
+                self._cache = json.loads(self.cache_path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                self._cache = {}
+        return self._cache
+    
+    def _save_cache(self) -> None:
+        tmp = self.cache_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self._load_cache(), indent=2, sort_keys=True), encoding="utf-8")
+        tmp.replace(self.cache_path)
+    
+    def _cached_hash(self, path: Path) -> Optional[str]:
+        entry = self._load_cache().get(str(path.relative_to(self.models_dir)))
+        stat = path.stat()
+        if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            return entry["sha256"]
+        return None
+    
+    def _record(self, path: Path, stat: os.stat_result, digest: str) -> None:
+        self._load_cache()[str(path.relative_to(self.models_dir))] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": digest,
+        }
+        self._save_cache()
+    
+    def _hash(self, path: Path) -> str:
+        digest = self._cached_hash(path)
+        if digest is None:
+            logger.info(f"Hashing {path}")
+            stat = path.stat()
+            digest = sha256_file(path)
+            self._record(path, stat, digest)
+        return digest
+    
+    def scan(self, compute_hashes: bool = False) -> list[ModelInfo]:
+        """
+        Catalog every model.
+
+        Args:
+            compute_hashes: Hash files without a cached hash; otherwise only
+                cached hashes are filled in
+        """
+        models = []
+        if not self.models_dir.exists():
+            return models
+        
+        for path in sorted(self.models_dir.rglob("*.gguf")):
+            try:
+                models.append(_gguf_info(path, self.models_dir))
+            except (GGUFError, OSError) as e:
+                logger.warning(f"Skipping {path}: {e}")
+        for config in sorted(self.models_dir.rglob("config.json")):
+            if any((config.parent / name).exists() for name in _WEIGHT_FILES):
+                models.append(_embedding_info(config.parent, self.models_dir))
+        
+        for info in models:
+            weights = _weights_file(info, self.models_dir)
+            info.sha256 = self._hash(weights) if compute_hashes else self._cached_hash(weights)
+        return models
+    
+    def get(self, name: str) -> ModelInfo:
+        """Find a model by name or path relative to ``models_dir``."""
+        for info in self.scan():
+            if name in (info.name, info.path):
+                return info
+        raise KeyError(f"Unknown model: {name}")
+    
+    def resolve(self, name: str) -> Path:
+        """Absolute path of a registered model."""
+        return self.models_dir / self.get(name).path
+    
+    def verify(self, names: Optional[list[str]] = None) -> list[VerifyResult]:
+        """
+        Re-read and fully re-hash models, comparing with the cached hash.
+
+        A mismatch with unchanged size and mtime means the file was corrupted
+        in place; the cached hash is kept as the reference, so the model keeps
+        failing verification until it is replaced. Models without a cached
+        hash have theirs recorded.
+        """
+        results = []
+        for info in self.scan():
+            if names and info.name not in names and info.path not in names:
+                continue
+            try:
+                weights = _weights_file(info, self.models_dir)
+                if info.format == "gguf":
+                    read_gguf_metadata(weights)
+                previous = self._cached_hash(weights)
+                stat = weights.stat()
+                digest = sha256_file(weights)
+            except (GGUFError, OSError) as e:
+                results.append(VerifyResult(name=info.name, ok=False, detail=str(e)))
+                continue
+            if previous is None:
+                self._record(weights, stat, digest)
+            if previous is not None and previous != digest:
+                results.append(VerifyResult(
+                    name=info.name, ok=False, sha256=digest,
+                    detail=f"checksum changed (was {previous[:12]})",
+                ))
+            else:
+                results.append(VerifyResult(name=info.name, ok=True, sha256=digest))
+        return results
+
+
+__all__ = [
+    "ModelInfo",
+    "VerifyResult",
+    "GGUFError",
+    "ModelRegistry",
+    "read_gguf_metadata",
+    "sha256_file",
+]
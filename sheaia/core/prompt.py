@@ -0,0 +1,159 @@
+"""Token-budgeted prompt assembly."""
+
+import logging
+from collections import OrderedDict
+from typing import Literal, Optional
+
+from pydantic import BaseModel
+
+from sheaia.core.llm import BaseLLM, ContextLengthExceededError
+
+logger = logging.getLogger(__name__)
+
+Truncate = Literal["none", "end", "start"]
+
+
+class Section:
+    """
+    One piece of a prompt.
+
+    Sections are packed by ``priority`` (higher first) but emitted in the
+    order given. ``required`` sections must fit whole; optional ones are
+    dropped, or cut to the space left when ``truncate`` says which end may
+    go. ``cache`` marks text that recurs across requests - system prompts,
+    schema snippets, retrieved chunks - whose tokens are worth keeping.
+    """
+    
+    __slots__ = ("text", "priority", "required", "truncate", "cache", "name")
+    
+    def __init__(
+        self,
+        text: str,
+        priority: int = 0,
+        required: bool = False,
+        truncate: Truncate = "none",
+        cache: bool = False,
+        name: str = "",
+    ):
+        self.text = text
+        self.priority = priority
+        self.required = required
+        self.truncate = truncate
+        self.cache = cache
+        self.name = name
+
+
+class AssembledPrompt(BaseModel):
+    """Packed prompt ready to pass to ``BaseLLM.generate``."""
+    
+    tokens: list[int]
+    budget: int
+    included: list[str] = []
+    truncated: list[str] = []
+    dropped: list[str] = []
+    
+    @property
+    def prompt_tokens(self) -> int:
+        """Number of prompt tokens, BOS included."""
+        return len(self.tokens)
+
+
+class PromptAssembler:
+    """
+    Packs prompt sections into ``n_ctx - max_tokens`` tokens.
+
+    Every section is tokenized exactly once per request (cached sections
+    not even that), and the result is token IDs, so the model does not
+    tokenize the prompt again. A prompt whose required sections cannot fit
+    fails here, before any generation work starts.
+    """
+    
+    def __init__(
+        self,
+        llm: BaseLLM,
+        n_ctx: Optional[int] = None,
+        separator: str = "\n\n",
+        cache_size: int = 4096,
+    ):
+        self.llm = llm
+        self.n_ctx = n_ctx or llm.context_length
+        if not self.n_ctx:
+            raise ValueError("n_ctx is required when the model does not report its context length")
+        self.cache_size = cache_size
+        self._cache: OrderedDict[str, list[int]] = OrderedDict()
+        self._bos = llm.tokenize("", add_bos=True)
+        self._separator = llm.tokenize(separator)
+    
+    def tokenize(self, text: str, cache: bool = False) -> list[int]:
+        """Tokenize text, reusing cached tokens for recurring pieces."""
+        if not cache:
+            return self.llm.tokenize(text)
+        tokens = self._cache.get(text)
+        if tokens is None:
+            tokens = self.llm.tokenize(text)
+            self._cache[text] = tokens
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(text)
+        return tokens
+    
+    def count(self, text: str, cache: bool = True) -> int:
+        """Token count of a piece of text."""
+        return len(self.tokenize(text, cache))
+    
+    def assemble(self, sections: list[Section], max_tokens: int) -> AssembledPrompt:
+        """
+        Pack sections into the context budget.
+
+        Raises:
+            ContextLengthExceededError: The required sections alone do not fit
+        """
+        budget = self.n_ctx - max_tokens - len(self._bos)
+        sep = len(self._separator)
+        encoded = [self.tokenize(section.text, section.cache) for section in sections]
+        
+        kept: dict[int, list[int]] = {i: encoded[i] for i, s in enumerate(sections) if s.required}
+        used = sum(map(len, kept.values())) + sep * max(0, len(kept) - 1)
+        if used > budget:
+            raise ContextLengthExceededError(used + len(self._bos), max_tokens, self.n_ctx)
+        
+        remaining = budget - used
+        truncated, dropped = [], []
+        optional = sorted(
+            (i for i, s in enumerate(sections) if not s.required),
+            key=lambda i: -sections[i].priority,
+        )
+        for i in optional:
+            section, tokens = sections[i], encoded[i]
+            cost = len(tokens) + (sep if kept else 0)
+            if cost <= remaining:
+                kept[i] = tokens
+                remaining -= cost
+                continue
+            room = remaining - (sep if kept else 0)
+            if section.truncate != "none" and room > 0:
+                kept[i] = tokens[:room] if section.truncate == "end" else tokens[-room:]
+                remaining = 0
+                truncated.append(section.name or f"section {i}")
+            else:
+                dropped.append(section.name or f"section {i}")
+        
+        tokens = list(self._bos)
+        for n, i in enumerate(sorted(kept)):
+            if n:
+                tokens.extend(self._separator)
+            tokens.extend(kept[i])
+        
+        if dropped or truncated:
+            logger.debug(f"Prompt over budget: dropped {dropped}, truncated {truncated}")
+        return AssembledPrompt(
+            tokens=tokens,
+            budget=budget + len(self._bos),
+            included=[sections[i].name or f"section {i}" for i in sorted(kept)],
+            truncated=truncated,
+            dropped=dropped,
+        )
+
+
+__all__ = ["Section", "AssembledPrompt", "PromptAssembler"]
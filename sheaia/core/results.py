@@ -0,0 +1,468 @@
+"""
+Result store - server-side query results, paged straight from disk.
+
+A query result is written once as an uncompressed Arrow IPC file and read
+back through a memory map: a page is a zero-copy slice of the mapped
+record batches, so serving a 2M-row result costs page-sized work per
+request and the API never holds whole tables in memory. Results expire
+after a TTL, and the least recently read are evicted when the directory
+exceeds its disk quota.
+"""
+
+import base64
+import binascii
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+import zlib
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, Literal, Optional, Sequence
+
+from pydantic import BaseModel
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+logger = logging.getLogger(__name__)
+
+ResultFormat = Literal["arrow", "ndjson"]
+Compression = Literal["none", "gzip", "zstd", "lz4"]
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+_SUFFIX = ".arrow"
+_ID = re.compile(r"[0-9a-f]{32}")
+_SQL_KEY = b"sheaia.sql"
+# Open memory maps kept around for results being paged through.
+_MAX_OPEN = 32
+
+
+class UnknownResultError(KeyError):
+    """The result does not exist or has expired."""
+
+
+class ResultColumn(BaseModel):
+    """A column of a stored result."""
+    
+    name: str
+    type: str
+
+
+class ResultInfo(BaseModel):
+    """Shape and lifetime of a stored result."""
+    
+    id: str
+    columns: list[ResultColumn]
+    rows: int
+    size_bytes: int
+    created_at: float
+    expires_at: float
+    sql: Optional[str] = None
+
+
+@dataclass
+class _Entry:
+    info: ResultInfo
+    path: Path
+    last_read: float
+    reader: Any = None
+    offsets: list[int] = field(default_factory=list)
+
+
+def encode_cursor(row: int) -> str:
+    """Opaque cursor for a row offset."""
+    return base64.urlsafe_b64encode(str(row).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> int:
+    """Row offset of a cursor; ``None`` is the start."""
+    if not cursor:
+        return 0
+    try:
+        row = int(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError):
+        raise ValueError(f"Invalid cursor: {cursor}") from None
+    if row < 0:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return row
+
+
+class ResultPage:
+    """A window of a result: zero-copy record batches plus the next cursor."""
+    
+    def __init__(self, info: ResultInfo, batches: list["pa.RecordBatch"], schema: "pa.Schema", start: int):
+        self.info = info
+        self.batches = batches
+        self.schema = schema
+        self.start = start
+        self.rows = sum(batch.num_rows for batch in batches)
+        end = start + self.rows
+        self.next_cursor = encode_cursor(end) if end < info.rows else None
+    
+    def to_table(self) -> "pa.Table":
+        import pyarrow as pa
+        
+        return pa.Table.from_batches(self.batches, schema=self.schema)
+    
+    def stream(self, format: ResultFormat = "arrow", compression: Compression = "none") -> Iterator[bytes]:
+        """
+        Encode the page for an HTTP body, one chunk per record batch.
+
+        ``gzip`` compresses the whole body (served as ``Content-Encoding``);
+        ``zstd`` and ``lz4`` compress the Arrow IPC buffers themselves.
+        """
+        if format == "ndjson" and compression in ("zstd", "lz4"):
+            raise ValueError(f"{compression} compression is only available for Arrow")
+        chunks = self._arrow(compression) if format == "arrow" else self._ndjson()
+        if compression != "gzip":
+            yield from chunks
+            return
+        deflate = zlib.compressobj(6, zlib.DEFLATED, 31)
+        for chunk in chunks:
+            if compressed := deflate.compress(chunk):
+                yield compressed
+        yield deflate.flush()
+    
+    def _arrow(self, compression: Compression) -> Iterator[bytes]:
+        import pyarrow as pa
+        
+        parts: list[bytes] = []
+        
+        class Sink:
+            closed = False
+            
+            def write(self, data) -> int:
+                parts.append(bytes(data))
+                return len(data)
+            
+            def flush(self) -> None:
+                pass
+        
+        codec = compression if compression in ("zstd", "lz4") else None
+        writer = pa.ipc.new_stream(Sink(), self.schema, options=pa.ipc.IpcWriteOptions(compression=codec))
+        for batch in self.batches:
+            writer.write_batch(batch)
+            yield b"".join(parts)
+            parts.clear()
+        writer.close()
+        yield b"".join(parts)
+    
+    def _ndjson(self) -> Iterator[bytes]:
+        for batch in self.batches:
+            lines = [json.dumps(row, ensure_ascii=False, default=str) for row in batch.to_pylist()]
+            if lines:
+                yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+class ResultStore:
+    """
+    Query results on disk, paged by cursor.
+
+    Files are written uncompressed so pages are slices of the memory map
+    rather than decoded copies; compression is applied per response.
+    ``quota_bytes`` bounds the directory: after each write, expired
+    results go first, then the least recently read.
+
+    The directory, not this object, is the source of truth: several API
+    workers can share it. A result written by another worker is opened on
+    first request, reads record their time in the file's atime, and the
+    quota is enforced against the files actually on disk.
+
+    Example:
+        store = ResultStore("./data/results", quota_bytes=10 << 30)
+        info = await store.put(frame, sql=sql)
+        page = store.page(info.id, cursor=None, limit=10_000, columns=["plant", "output"])
+    """
+    
+    def __init__(
+        self,
+        directory: str | Path,
+        quota_bytes: int = 10 << 30,
+        ttl_s: float = 86400.0,
+        batch_rows: int = 65536,
+    ):
+        self.directory = Path(directory)
+        self.quota_bytes = quota_bytes
+        self.ttl_s = ttl_s
+        self.batch_rows = batch_rows
+        self._entries: dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def from_settings(cls, settings) -> "ResultStore":
+        """Create a store using ``Settings.results``."""
+        results = settings.results
+        return cls(
+            directory=results.directory,
+            quota_bytes=results.quota_mb << 20,
+            ttl_s=results.ttl_s,
+            batch_rows=results.batch_rows,
+        )
+    
+    @property
+    def size_bytes(self) -> int:
+        """Bytes of results on disk, written by any worker."""
+        return sum(stat.st_size for _, stat in self._files())
+    
+    def _files(self) -> list[tuple[Path, os.stat_result]]:
+        """Result files in the directory with their stats."""
+        files = []
+        if self.directory.is_dir():
+            for path in self.directory.glob(f"*{_SUFFIX}"):
+                try:
+                    files.append((path, path.stat()))
+                except FileNotFoundError:
+                    pass  # Removed by another worker meanwhile.
+        return files
+    
+    def _load(self, result_id: str) -> Optional[_Entry]:
+        """Open a result this process has not seen, e.g. written by another worker (lock held)."""
+        if not _ID.fullmatch(result_id):
+            return None
+        path = self.directory / f"{result_id}{_SUFFIX}"
+        try:
+            entry = self._open(result_id, path, path.stat().st_mtime)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Dropping unreadable result {path.name}: {e}")
+            path.unlink(missing_ok=True)
+            return None
+        self._entries[result_id] = entry
+        return entry
+    
+    def _open(self, result_id: str, path: Path, created_at: float) -> _Entry:
+        import pyarrow as pa
+        
+        reader = pa.ipc.open_file(pa.memory_map(str(path), "r"))
+        offsets = [0]
+        for i in range(reader.num_record_batches):
+            offsets.append(offsets[-1] + reader.get_batch(i).num_rows)
+        metadata = reader.schema.metadata or {}
+        sql = metadata.get(_SQL_KEY)
+        info = ResultInfo(
+            id=result_id,
+            columns=[ResultColumn(name=f.name, type=str(f.type)) for f in reader.schema],
+            rows=offsets[-1],
+            size_bytes=path.stat().st_size,
+            created_at=created_at,
+            expires_at=created_at + self.ttl_s,
+            sql=sql.decode("utf-8") if sql else None,
+        )
+        return _Entry(info=info, path=path, last_read=created_at, reader=reader, offsets=offsets)
+    
+    def _batches(self, data: Any) -> tuple["pa.Schema", Iterable["pa.RecordBatch"]]:
+        import pyarrow as pa
+        
+        if isinstance(data, pa.RecordBatchReader):
+            return data.schema, data
+        if isinstance(data, pa.Table):
+            return data.schema, data.to_batches(max_chunksize=self.batch_rows)
+        if isinstance(data, pa.RecordBatch):
+            return data.schema, [data]
+        # pandas.DataFrame, without importing pandas here
+        table = pa.Table.from_pandas(data, preserve_index=False)
+        return table.schema, table.to_batches(max_chunksize=self.batch_rows)
+    
+    def write(self, data: Any, sql: Optional[str] = None) -> ResultInfo:
+        """
+        Store a result and enforce the quota.
+
+        Args:
+            data: A pyarrow Table, RecordBatch or RecordBatchReader (written
+                batch by batch, so it need not fit in memory), or a DataFrame
+            sql: The query that produced it, kept with the result
+
+        Returns:
+            The stored result's info
+
+        Raises:
+            ValueError: If the result alone is larger than the quota
+        """
+        import pyarrow as pa
+        
+        schema, batches = self._batches(data)
+        if sql:
+            schema = schema.with_metadata({**(schema.metadata or {}), _SQL_KEY: sql.encode("utf-8")})
+        result_id = uuid.uuid4().hex
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"{result_id}{_SUFFIX}"
+        partial = path.with_suffix(".partial")
+        try:
+            with pa.OSFile(str(partial), "wb") as sink, pa.ipc.new_file(sink, schema) as writer:
+                for batch in batches:
+                    if batch.num_rows > self.batch_rows:
+                        for start in range(0, batch.num_rows, self.batch_rows):
+                            writer.write_batch(batch.slice(start, self.batch_rows))
+                    elif batch.num_rows:
+                        writer.write_batch(batch)
+            partial.replace(path)
+        except BaseException:
+            partial.unlink(missing_ok=True)
+            raise
+        
+        entry = self._open(result_id, path, time.time())
+        if entry.info.size_bytes > self.quota_bytes:
+            path.unlink(missing_ok=True)
+            raise ValueError(
+                f"Result of {entry.info.size_bytes} bytes exceeds the {self.quota_bytes}-byte result quota"
+            )
+        with self._lock:
+            self._entries[result_id] = entry
+            self._enforce(keep=result_id)
+        logger.info(f"Stored result {result_id}: {entry.info.rows} rows, {entry.info.size_bytes} bytes")
+        return entry.info
+    
+    async def put(self, data: Any, sql: Optional[str] = None) -> ResultInfo:
+        """``write`` off the event loop."""
+        import asyncio
+        
+        return await asyncio.to_thread(self.write, data, sql)
+    
+    def _enforce(self, keep: Optional[str] = None) -> None:
+        """Drop expired results, then least recently read ones over the quota (lock held)."""
+        now = time.time()
+        live = []
+        for path, stat in self._files():
+            if path.stem == keep:
+                live.append((path, stat))
+            elif stat.st_mtime + self.ttl_s <= now:
+                self._drop(path.stem, path)
+            else:
+                live.append((path, stat))
+        total = sum(stat.st_size for _, stat in live)
+        for path, stat in sorted(live, key=lambda file: file[1].st_atime):
+            if total <= self.quota_bytes:
+                break
+            if path.stem != keep:
+                total -= stat.st_size
+                self._drop(path.stem, path)
+    
+    def _drop(self, result_id: str, path: Optional[Path] = None) -> None:
+        entry = self._entries.pop(result_id, None)
+        if entry is not None:
+            # Pages already handed out keep their mapping alive; unlinking is safe.
+            entry.reader = None
+            path = entry.path
+        try:
+            path.unlink(missing_ok=True)
+        except OSError as e:
+            logger.warning(f"Could not remove result {path.name}: {e}")
+    
+    def _entry(self, result_id: str) -> _Entry:
+        """A live entry, reopening its memory map if it was released (lock held)."""
+        entry = self._entries.get(result_id)
+        if entry is not None and not entry.path.exists():
+            # Deleted or evicted by another worker.
+            entry.reader = None
+            del self._entries[result_id]
+            entry = None
+        if entry is None:
+            entry = self._load(result_id)
+        if entry is None or entry.info.expires_at <= time.time():
+            if entry is not None:
+                self._drop(result_id)
+            raise UnknownResultError(result_id)
+        entry.last_read = time.time()
+        try:
+            # The read time other workers' quota enforcement sorts by.
+            os.utime(entry.path, (entry.last_read, entry.info.created_at))
+        except OSError:
+            pass
+        if entry.reader is None:
+            import pyarrow as pa
+            
+            entry.reader = pa.ipc.open_file(pa.memory_map(str(entry.path), "r"))
+            open_entries = [e for e in self._entries.values() if e.reader is not None]
+            for stale in sorted(open_entries, key=lambda e: e.last_read)[:-_MAX_OPEN]:
+                stale.reader = None
+        return entry
+    
+    def info(self, result_id: str) -> ResultInfo:
+        """Info of a live result; raises ``UnknownResultError``."""
+        with self._lock:
+            return self._entry(result_id).info
+    
+    def page(
+        self,
+        result_id: str,
+        cursor: Optional[str] = None,
+        limit: int = 10000,
+        columns: Optional[Sequence[str]] = None,
+    ) -> ResultPage:
+        """
+        Rows from ``cursor`` on, at most ``limit``, optionally projected.
+
+        Raises:
+            UnknownResultError: If the result does not exist or has expired
+            ValueError: For a bad cursor or an unknown column
+        """
+        start = decode_cursor(cursor)
+        with self._lock:
+            entry = self._entry(result_id)
+            reader, offsets = entry.reader, entry.offsets
+        schema = reader.schema.remove_metadata()
+        if columns:
+            missing = [name for name in columns if schema.get_field_index(name) < 0]
+            if missing:
+                raise ValueError(f"Unknown columns: {', '.join(missing)}")
+            import pyarrow as pa
+            
+            schema = pa.schema([schema.field(name) for name in columns])
+        
+        end = min(start + limit, offsets[-1])
+        batches = []
+        i = max(bisect_right(offsets, start) - 1, 0)
+        while start < end and i < len(offsets) - 1:
+            batch = reader.get_batch(i)
+            lo, hi = max(start - offsets[i], 0), min(end - offsets[i], batch.num_rows)
+            if hi > lo:
+                batch = batch.slice(lo, hi - lo)
+                batches.append(batch.select(list(columns)) if columns else batch)
+            i += 1
+        return ResultPage(entry.info, batches, schema, min(start, offsets[-1]))
+    
+    def delete(self, result_id: str) -> None:
+        """Remove a result; raises ``UnknownResultError``."""
+        with self._lock:
+            self._entry(result_id)
+            self._drop(result_id)
+
+
+# Global result store (lazy initialized)
+_store_instance: Optional[ResultStore] = None
+
+
+def get_result_store() -> ResultStore:
+    """Get the global result store."""
+    global _store_instance
+    
+    if _store_instance is None:
+        from sheaia.config import get_settings
+        
+        _store_instance = ResultStore.from_settings(get_settings())
+    
+    return _store_instance
+
+
+__all__ = [
+    "ARROW_MEDIA_TYPE",
+    "NDJSON_MEDIA_TYPE",
+    "ResultFormat",
+    "Compression",
+    "UnknownResultError",
+    "ResultColumn",
+    "ResultInfo",
+    "ResultPage",
+    "ResultStore",
+    "encode_cursor",
+    "decode_cursor",
+    "get_result_store",
+]
@@ -0,0 +1,314 @@
+"""Single-flight - concurrent identical requests share one running computation."""
+
+import asyncio
+import hashlib
+import logging
+import re
+import unicodedata
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional, TypeVar
+
+from sheaia.core.llm import BaseLLM, GenerationConfig, LLMResponse, Prompt
+from sheaia.core.metrics import SINGLEFLIGHT_CALLERS, SINGLEFLIGHT_CALLS
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_WHITESPACE = re.compile(r"\s+")
+# Quoted SQL literals and identifiers are kept verbatim; whitespace elsewhere is collapsed.
+_SQL_TOKENS = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|`[^`]*`|\s+")
+
+
+def _digest(*parts: str) -> str:
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+
+def normalize_message(message: str) -> str:
+    """Fold case, width and whitespace so trivially different questions match."""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", message)).strip().casefold()
+
+
+def normalize_sql(sql: str) -> str:
+    """Collapse whitespace outside quoted literals and drop trailing semicolons."""
+    collapsed = _SQL_TOKENS.sub(lambda m: " " if m.group().isspace() else m.group(), sql)
+    return collapsed.strip().rstrip(";").strip()
+
+
+def chat_key(message: str, language: str, context: str = "") -> str:
+    """
+    Coalescing key for a chat question.
+
+    ``context`` is whatever else the answer depends on that is not tied to
+    one conversation (a dashboard's filters, say); conversation history
+    must never be part of a shared computation.
+    """
+    return _digest("chat", normalize_message(message), str(language), context)
+
+
+def sql_key(sql: str) -> str:
+    """Coalescing key for a SQL query."""
+    return _digest("sql", normalize_sql(sql))
+
+
+def _prompt_key(prompt: Prompt, config: GenerationConfig) -> str:
+    text = prompt if isinstance(prompt, str) else ",".join(map(str, prompt))
+    return _digest("str" if isinstance(prompt, str) else "tokens", text, config.model_dump_json())
+
+
+class _Flight:
+    """One shared computation and the callers attached to it."""
+    
+    __slots__ = ("task", "waiters", "callers", "chunks", "changed")
+    
+    def __init__(self, streaming: bool = False):
+        self.task: Optional[asyncio.Task] = None
+        self.waiters = 0
+        self.callers = 0
+        self.chunks: Optional[list] = [] if streaming else None
+        self.changed = asyncio.Event()
+
+
+class SingleFlight:
+    """
+    Runs one computation per key no matter how many callers ask at once.
+
+    The first caller for a key starts the work; callers arriving while it
+    runs attach to it and receive the same result or the same exception.
+    Nothing is cached: once the work finishes the next caller starts it
+    anew. A caller that gives up (is cancelled) detaches without disturbing
+    the others; the work is cancelled only when its last caller leaves.
+
+    ``timeout_s`` bounds each shared computation; when it expires every
+    attached caller gets ``TimeoutError``. ``do`` and ``stream`` accept a
+    per-key override. With ``enabled`` False every call runs on its own.
+    """
+    
+    def __init__(self, name: str, timeout_s: Optional[float] = None, enabled: bool = True):
+        self.name = name
+        self.timeout_s = timeout_s
+        self.enabled = enabled
+        self.started = 0
+        self.joined = 0
+        self._flights: dict[str, _Flight] = {}
+        self._started = SINGLEFLIGHT_CALLS.labels(name, "started")
+        self._joined = SINGLEFLIGHT_CALLS.labels(name, "joined")
+        self._callers = SINGLEFLIGHT_CALLERS.labels(name)
+    
+    @property
+    def in_flight(self) -> int:
+        """Keys with a computation running."""
+        return len(self._flights)
+    
+    @property
+    def coalescing_ratio(self) -> float:
+        """Share of calls that joined running work instead of starting their own."""
+        total = self.started + self.joined
+        return self.joined / total if total else 0.0
+    
+    def _attach(
+        self,
+        key: str,
+        start: Callable[[_Flight], Awaitable],
+        timeout_s: Optional[float],
+        streaming: bool,
+    ) -> _Flight:
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(streaming)
+            self._flights[key] = flight
+            timeout_s = self.timeout_s if timeout_s is None else timeout_s
+            flight.task = asyncio.create_task(self._run(key, flight, start, timeout_s))
+            self.started += 1
+            self._started.inc()
+        else:
+            self.joined += 1
+            self._joined.inc()
+        flight.waiters += 1
+        flight.callers += 1
+        return flight
+    
+    def _detach(self, key: str, flight: _Flight) -> None:
+        flight.waiters -= 1
+        if flight.waiters == 0 and not flight.task.done():
+            # Unregister now: the task only finishes on a later loop
+            # iteration, and a caller arriving before then must start afresh.
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            flight.task.cancel()
+    
+    async def _run(
+        self,
+        key: str,
+        flight: _Flight,
+        start: Callable[[_Flight], Awaitable],
+        timeout_s: Optional[float],
+    ):
+        try:
+            if timeout_s is None:
+                return await start(flight)
+            try:
+                return await asyncio.wait_for(start(flight), timeout_s)
+            except TimeoutError:
+                raise TimeoutError(f"{self.name} timed out after {timeout_s}s") from None
+        finally:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            self._callers.observe(flight.callers)
+            flight.changed.set()
+    
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]], timeout_s: Optional[float] = None) -> T:
+        """Await ``fn()``, or the copy of it already running for ``key``."""
+        if not self.enabled:
+            return await fn()
+        
+        async def start(flight: _Flight):
+            return await fn()
+        
+        flight = self._attach(key, start, timeout_s, streaming=False)
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            self._detach(key, flight)
+    
+    async def stream(
+        self,
+        key: str,
+        fn: Callable[[], AsyncIterator[T]],
+        timeout_s: Optional[float] = None,
+    ) -> AsyncIterator[T]:
+        """
+        Iterate ``fn()``, or attach to the copy of it already running for ``key``.
+
+        Every subscriber sees every chunk: one that attaches late first gets
+        the chunks produced so far, then follows the live stream.
+        """
+        if not self.enabled:
+            async for chunk in fn():
+                yield chunk
+            return
+        
+        async def start(flight: _Flight):
+            async for chunk in fn():
+                flight.chunks.append(chunk)
+                # Wake the subscribers waiting on this event, then give the
+                # next chunk a fresh one.
+                flight.changed.set()
+                flight.changed = asyncio.Event()
+        
+        flight = self._attach(key, start, timeout_s, streaming=True)
+        index = 0
+        try:
+            while True:
+                changed = flight.changed
+                while index < len(flight.chunks):
+                    yield flight.chunks[index]
+                    index += 1
+                if flight.task.done():
+                    if index < len(flight.chunks):
+                        continue
+                    flight.task.result()
+                    return
+                await changed.wait()
+        finally:
+            self._detach(key, flight)
+
+
+def coalesce_queries(runner: Callable[[str], Awaitable[Any]], flight: Optional[SingleFlight] = None):
+    """Wrap a SQL runner so identical queries in flight at once execute once."""
+    flight = flight or get_single_flight("sql")
+    
+    async def run(sql: str):
+        return await flight.do(sql_key(sql), lambda: runner(sql))
+    
+    return run
+
+
+class CoalescingLLM(BaseLLM):
+    """
+    Shares generations between concurrent callers sending the same prompt.
+
+    The key is the full prompt (text or token IDs) plus the generation
+    config, so anything that shapes the output - conversation history
+    included - separates callers. Everything else is delegated to the
+    wrapped LLM.
+    """
+    
+    def __init__(self, llm: BaseLLM, timeout_s: Optional[float] = None):
+        self.llm = llm
+        self._generations = SingleFlight("llm.generate", timeout_s)
+        self._streams = SingleFlight("llm.stream", timeout_s)
+    
+    async def generate(self, prompt: Prompt, config: Optional[GenerationConfig] = None) -> LLMResponse:
+        """Generate, sharing the generation with identical concurrent calls."""
+        config = config or GenerationConfig()
+        key = _prompt_key(prompt, config)
+        return await self._generations.do(key, lambda: self.llm.generate(prompt, config))
+    
+    async def stream(self, prompt: Prompt, config: Optional[GenerationConfig] = None) -> AsyncIterator[str]:
+        """Stream, fanning one generation's tokens out to identical concurrent calls."""
+        config = config or GenerationConfig()
+        key = _prompt_key(prompt, config)
+        async with aclosing(self._streams.stream(key, lambda: self.llm.stream(prompt, config))) as tokens:
+            async for token in tokens:
+                yield token
+    
+    def load_model(self) -> None:
+        self.llm.load_model()
+    
+    def unload_model(self) -> None:
+        self.llm.unload_model()
+    
+    def count_tokens(self, text: str) -> int:
+        return self.llm.count_tokens(text)
+    
+    def tokenize(self, text: str, add_bos: bool = False) -> list[int]:
+        return self.llm.tokenize(text, add_bos)
+    
+    def detokenize(self, tokens: list[int]) -> str:
+        return self.llm.detokenize(tokens)
+    
+    @property
+    def context_length(self) -> Optional[int]:
+        return self.llm.context_length
+    
+    @property
+    def is_loaded(self) -> bool:
+        return self.llm.is_loaded
+    
+    @property
+    def is_loading(self) -> bool:
+        return self.llm.is_loading
+    
+    def __getattr__(self, name: str):
+        # Backend-specific extras (switch_model, model_path, ...).
+        if name == "llm":
+            raise AttributeError(name)
+        return getattr(self.llm, name)
+
+
+# Named single-flight groups (lazy initialized)
+_groups: dict[str, SingleFlight] = {}
+
+
+def get_single_flight(name: str) -> SingleFlight:
+    """Get the shared single-flight group ``name``, configured from ``Settings.singleflight``."""
+    group = _groups.get(name)
+    if group is None:
+        from sheaia.config import get_settings
+        
+        settings = get_settings().singleflight
+        group = _groups[name] = SingleFlight(name, settings.timeout_s, settings.enabled)
+    return group
+
+
+__all__ = [
+    "normalize_message",
+    "normalize_sql",
+    "chat_key",
+    "sql_key",
+    "SingleFlight",
+    "coalesce_queries",
+    "CoalescingLLM",
+    "get_single_flight",
+]
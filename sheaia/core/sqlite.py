@@ -0,0 +1,51 @@
+"""SQLite connections owned by a dedicated thread."""
+
+import asyncio
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+
+class SQLiteExecutor:
+    """
+    Base for stores backed by one SQLite file.
+
+    The connection is opened lazily and used only from a single worker
+    thread: subclasses write their queries as plain methods that call
+    ``_connect`` and await them through ``_run``, so disk I/O never blocks
+    the event loop. Subclasses set ``schema`` and, where they need more
+    than WAL, ``pragmas`` and ``isolation_level``.
+    """
+    
+    schema: str = ""
+    pragmas: tuple[str, ...] = ("journal_mode=WAL",)
+    isolation_level: Optional[str] = ""
+    
+    def __init__(self, path: str | Path, thread_name: str):
+        self.path = Path(path)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=thread_name)
+        self._conn: Optional[sqlite3.Connection] = None
+    
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if str(self.path) != ":memory:":
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(
+                self.path, check_same_thread=False, isolation_level=self.isolation_level
+            )
+            for pragma in self.pragmas:
+                self._conn.execute(f"PRAGMA {pragma}")
+            self._conn.executescript(self.schema)
+        return self._conn
+    
+    async def _run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+    
+    def _shutdown(self) -> None:
+        """Stop the thread once queued work is done, then close the connection."""
+        self._executor.shutdown(wait=True)
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
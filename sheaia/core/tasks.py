@@ -0,0 +1,877 @@
+"""Background task queue - durable jobs for indexing, sync and reports."""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import socket
+import sqlite3
+import time
+import uuid
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Literal, Optional
+
+from pydantic import BaseModel
+
+from sheaia.core.sqlite import SQLiteExecutor
+
+logger = logging.getLogger(__name__)
+
+TaskStatus = Literal["queued", "running", "done", "failed", "cancelled"]
+
+
+class Task(BaseModel):
+    """One unit of background work."""
+    
+    id: str
+    type: str
+    key: Optional[str] = None
+    payload: dict = {}
+    priority: int = 0
+    status: TaskStatus = "queued"
+    attempts: int = 0
+    max_attempts: int = 3
+    run_at: float
+    lease_until: Optional[float] = None
+    worker: Optional[str] = None
+    progress: float = 0.0
+    message: str = ""
+    result: Any = None
+    error: Optional[str] = None
+    created_at: float
+    updated_at: float
+
+
+class TaskCancelledError(Exception):
+    """Raised inside a handler when its task was cancelled or its lease was lost."""
+
+
+class TaskBackend(ABC):
+    """
+    Storage for tasks.
+
+    ``claim`` atomically hands the best ready task to one worker under a
+    lease, honouring per-type concurrency limits across every worker; a
+    task whose lease expires (its worker died) is queued again.
+    """
+    
+    @abstractmethod
+    async def enqueue(self, task: Task) -> Task:
+        """Store a task; with a key already queued or running, return that task instead."""
+        ...
+    
+    @abstractmethod
+    async def claim(self, limits: dict[str, int], worker: str, lease_s: float) -> Optional[Task]:
+        """Claim the highest-priority ready task of the given types, or None."""
+        ...
+    
+    @abstractmethod
+    async def update(
+        self,
+        task_id: str,
+        worker: str,
+        lease_s: float,
+        progress: Optional[float] = None,
+        message: Optional[str] = None,
+    ) -> bool:
+        """Extend a lease and record progress; False if the worker no longer owns the task."""
+        ...
+    
+    @abstractmethod
+    async def complete(self, task_id: str, worker: str, result: Any = None) -> bool:
+        """Mark a running task done."""
+        ...
+    
+    @abstractmethod
+    async def fail(self, task_id: str, worker: str, error: str, retry_at: Optional[float] = None) -> bool:
+        """Mark a running task failed, or queue it again at ``retry_at``."""
+        ...
+    
+    @abstractmethod
+    async def cancel(self, task_id: str) -> bool:
+        """Cancel a queued or running task; running handlers stop at their next progress report."""
+        ...
+    
+    @abstractmethod
+    async def get(self, task_id: str) -> Optional[Task]:
+        """Look up a task."""
+        ...
+    
+    @abstractmethod
+    async def list(self, status: Optional[TaskStatus] = None, limit: int = 100) -> list[Task]:
+        """Most recently created tasks."""
+        ...
+    
+    @abstractmethod
+    async def prune(self, max_age_s: float) -> int:
+        """Delete finished tasks older than ``max_age_s``."""
+        ...
+    
+    async def close(self) -> None:
+        """Release connections."""
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    type TEXT NOT NULL,
+    key TEXT,
+    payload TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL,
+    max_attempts INTEGER NOT NULL,
+    run_at REAL NOT NULL,
+    lease_until REAL,
+    worker TEXT,
+    progress REAL NOT NULL,
+    message TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tasks_ready ON tasks (status, type, priority DESC, run_at);
+CREATE UNIQUE INDEX IF NOT EXISTS tasks_active_key ON tasks (key)
+    WHERE key IS NOT NULL AND status IN ('queued', 'running');
+"""
+
+_COLUMNS = [
+    "id", "type", "key", "payload", "priority", "status", "attempts", "max_attempts", "run_at",
+    "lease_until", "worker", "progress", "message", "result", "error", "created_at", "updated_at",
+]
+
+
+def _to_row(task: Task) -> tuple:
+    data = task.model_dump()
+    data["payload"] = json.dumps(task.payload, ensure_ascii=False)
+    data["result"] = json.dumps(task.result, ensure_ascii=False, default=str)
+    return tuple(data[c] for c in _COLUMNS)
+
+
+def _from_row(row: tuple) -> Task:
+    data = dict(zip(_COLUMNS, row))
+    data["payload"] = json.loads(data["payload"])
+    data["result"] = json.loads(data["result"]) if data["result"] else None
+    return Task(**data)
+
+
+class SQLiteTaskBackend(SQLiteExecutor, TaskBackend):
+    """
+    Task storage in a local SQLite file.
+
+    Works offline and in tests; several worker processes on one host can
+    share the file, since claims run in ``BEGIN IMMEDIATE`` transactions.
+    """
+    
+    schema = _SCHEMA
+    pragmas = ("journal_mode=WAL", "synchronous=NORMAL", "busy_timeout=5000")
+    # Autocommit; claims manage their own transactions.
+    isolation_level = None
+    
+    def __init__(self, path: str | Path):
+        super().__init__(path, "sheaia-tasks")
+    
+    # -- SQLite (runs on the backend thread) --------------------------------
+    
+    def _select(self, where: str, args: tuple = ()) -> list[Task]:
+        rows = self._connect().execute(f"SELECT {', '.join(_COLUMNS)} FROM tasks {where}", args).fetchall()
+        return [_from_row(row) for row in rows]
+    
+    def _enqueue(self, task: Task) -> Task:
+        conn = self._connect()
+        try:
+            conn.execute(f"INSERT INTO tasks VALUES ({', '.join('?' * len(_COLUMNS))})", _to_row(task))
+            return task
+        except sqlite3.IntegrityError:
+            existing = self._select("WHERE key = ? AND status IN ('queued', 'running')", (task.key,))
+            if not existing:
+                raise
+            return existing[0]
+    
+    def _claim(self, limits: dict[str, int], worker: str, lease_s: float) -> Optional[Task]:
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Leases that ran out belong to dead workers.
+            conn.execute(
+                "UPDATE tasks SET status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'queued' END, "
+                "error = 'lease expired', worker = NULL, lease_until = NULL, updated_at = ? "
+                "WHERE status = 'running' AND lease_until < ?",
+                (now, now),
+            )
+            running = dict(conn.execute(
+                "SELECT type, COUNT(*) FROM tasks WHERE status = 'running' GROUP BY type"
+            ).fetchall())
+            types = [t for t, limit in limits.items() if limit < 0 or running.get(t, 0) < limit]
+            if not types:
+                conn.execute("COMMIT")
+                return None
+            row = conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM tasks WHERE status = 'queued' AND run_at <= ? "
+                f"AND type IN ({', '.join('?' * len(types))}) ORDER BY priority DESC, run_at LIMIT 1",
+                (now, *types),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            task = _from_row(row)
+            task.status, task.worker, task.lease_until = "running", worker, now + lease_s
+            task.attempts += 1
+            task.updated_at = now
+            conn.execute(
+                "UPDATE tasks SET status = 'running', attempts = ?, worker = ?, lease_until = ?, "
+                "updated_at = ? WHERE id = ?",
+                (task.attempts, worker, task.lease_until, now, task.id),
+            )
+            conn.execute("COMMIT")
+            return task
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+    
+    def _update(self, task_id, worker, lease_s, progress, message) -> bool:
+        now = time.time()
+        cursor = self._connect().execute(
+            "UPDATE tasks SET lease_until = ?, progress = COALESCE(?, progress), "
+            "message = COALESCE(?, message), updated_at = ? "
+            "WHERE id = ? AND worker = ? AND status = 'running'",
+            (now + lease_s, progress, message, now, task_id, worker),
+        )
+        return cursor.rowcount == 1
+    
+    def _finish(self, task_id, worker, status, result, error, retry_at) -> bool:
+        cursor = self._connect().execute(
+            "UPDATE tasks SET status = ?, result = ?, error = ?, run_at = COALESCE(?, run_at), "
+            "progress = CASE WHEN ? = 'done' THEN 1.0 ELSE progress END, "
+            "worker = NULL, lease_until = NULL, updated_at = ? "
+            "WHERE id = ? AND worker = ? AND status = 'running'",
+            (
+                status, json.dumps(result, ensure_ascii=False, default=str), error, retry_at,
+                status, time.time(), task_id, worker,
+            ),
+        )
+        return cursor.rowcount == 1
+    
+    def _cancel(self, task_id: str) -> bool:
+        cursor = self._connect().execute(
+            "UPDATE tasks SET status = 'cancelled', worker = NULL, lease_until = NULL, updated_at = ? "
+            "WHERE id = ? AND status IN ('queued', 'running')",
+            (time.time(), task_id),
+        )
+        return cursor.rowcount == 1
+    
+    def _prune(self, older_than: float) -> int:
+        return self._connect().execute(
+            "DELETE FROM tasks WHERE status IN ('done', 'failed', 'cancelled') AND updated_at < ?",
+            (older_than,),
+        ).rowcount
+    
+    # -- TaskBackend --------------------------------------------------------
+    
+    async def enqueue(self, task: Task) -> Task:
+        return await self._run(self._enqueue, task)
+    
+    async def claim(self, limits: dict[str, int], worker: str, lease_s: float) -> Optional[Task]:
+        return await self._run(self._claim, limits, worker, lease_s)
+    
+    async def update(self, task_id, worker, lease_s, progress=None, message=None) -> bool:
+        return await self._run(self._update, task_id, worker, lease_s, progress, message)
+    
+    async def complete(self, task_id: str, worker: str, result: Any = None) -> bool:
+        return await self._run(self._finish, task_id, worker, "done", result, None, None)
+    
+    async def fail(self, task_id: str, worker: str, error: str, retry_at: Optional[float] = None) -> bool:
+        status = "queued" if retry_at is not None else "failed"
+        return await self._run(self._finish, task_id, worker, status, None, error, retry_at)
+    
+    async def cancel(self, task_id: str) -> bool:
+        return await self._run(self._cancel, task_id)
+    
+    async def get(self, task_id: str) -> Optional[Task]:
+        tasks = await self._run(self._select, "WHERE id = ?", (task_id,))
+        return tasks[0] if tasks else None
+    
+    async def list(self, status: Optional[TaskStatus] = None, limit: int = 100) -> list[Task]:
+        if status is None:
+            return await self._run(self._select, "ORDER BY created_at DESC LIMIT ?", (limit,))
+        return await self._run(
+            self._select, "WHERE status = ? ORDER BY created_at DESC LIMIT ?", (status, limit)
+        )
+    
+    async def prune(self, max_age_s: float) -> int:
+        return await self._run(self._prune, time.time() - max_age_s)
+    
+    async def close(self) -> None:
+        await asyncio.to_thread(self._shutdown)
+
+
+# Ready tasks live in one sorted set per type, scored so the lowest score is
+# the highest priority, then the earliest run time.
+_PRIORITY_SCALE = 1e10
+
+_ENQUEUE = """
+local p, id, key = ARGV[1], ARGV[2], ARGV[3]
+if key ~= '' then
+    local existing = redis.call('GET', p .. ':key:' .. key)
+    if existing then return existing end
+    redis.call('SET', p .. ':key:' .. key, id)
+end
+local fields = {}
+for i = 8, #ARGV do fields[#fields + 1] = ARGV[i] end
+redis.call('HSET', p .. ':task:' .. id, unpack(fields))
+local run_at, now = tonumber(ARGV[6]), tonumber(ARGV[7])
+if run_at > now then
+    redis.call('ZADD', p .. ':delayed', run_at, id)
+else
+    redis.call('ZADD', p .. ':ready:' .. ARGV[4], -tonumber(ARGV[5]) * 1e10 + run_at, id)
+end
+redis.call('ZADD', p .. ':index', now, id)
+return id
+"""
+
+_CLAIM = """
+local p, now, lease, worker = ARGV[1], tonumber(ARGV[2]), tonumber(ARGV[3]), ARGV[4]
+local function ready(id, h, at)
+    local score = -tonumber(redis.call('HGET', h, 'priority')) * 1e10 + at
+    redis.call('ZADD', p .. ':ready:' .. redis.call('HGET', h, 'type'), score, id)
+end
+for _, id in ipairs(redis.call('ZRANGEBYSCORE', p .. ':delayed', '-inf', now)) do
+    redis.call('ZREM', p .. ':delayed', id)
+    local h = p .. ':task:' .. id
+    ready(id, h, tonumber(redis.call('HGET', h, 'run_at')))
+end
+local best, best_type, best_score
+for i = 5, #ARGV, 2 do
+    local t, limit = ARGV[i], tonumber(ARGV[i + 1])
+    local running = p .. ':running:' .. t
+    for _, id in ipairs(redis.call('ZRANGEBYSCORE', running, '-inf', now)) do
+        redis.call('ZREM', running, id)
+        local h = p .. ':task:' .. id
+        if tonumber(redis.call('HGET', h, 'attempts')) >= tonumber(redis.call('HGET', h, 'max_attempts')) then
+            redis.call('HSET', h, 'status', 'failed', 'error', 'lease expired', 'worker', '', 'updated_at', now)
+            local key = redis.call('HGET', h, 'key')
+            if key and key ~= '' then redis.call('DEL', p .. ':key:' .. key) end
+        else
+            redis.call('HSET', h, 'status', 'queued', 'error', 'lease expired', 'worker', '', 'updated_at', now)
+            ready(id, h, now)
+        end
+    end
+    if limit < 0 or redis.call('ZCARD', running) < limit then
+        local top = redis.call('ZRANGE', p .. ':ready:' .. t, 0, 0, 'WITHSCORES')
+        if top[1] and (best_score == nil or tonumber(top[2]) < best_score) then
+            best, best_type, best_score = top[1], t, tonumber(top[2])
+        end
+    end
+end
+if not best then return false end
+redis.call('ZREM', p .. ':ready:' .. best_type, best)
+redis.call('ZADD', p .. ':running:' .. best_type, now + lease, best)
+local h = p .. ':task:' .. best
+redis.call('HINCRBY', h, 'attempts', 1)
+redis.call('HSET', h, 'status', 'running', 'worker', worker, 'lease_until', now + lease, 'updated_at', now)
+return best
+"""
+
+_UPDATE = """
+local p, id, worker, now, lease = ARGV[1], ARGV[2], ARGV[3], tonumber(ARGV[4]), tonumber(ARGV[5])
+local h = p .. ':task:' .. id
+if redis.call('HGET', h, 'worker') ~= worker or redis.call('HGET', h, 'status') ~= 'running' then
+    return 0
+end
+redis.call('ZADD', p .. ':running:' .. redis.call('HGET', h, 'type'), now + lease, id)
+redis.call('HSET', h, 'lease_until', now + lease, 'updated_at', now)
+if ARGV[6] ~= '' then redis.call('HSET', h, 'progress', ARGV[6]) end
+if ARGV[7] ~= '' then redis.call('HSET', h, 'message', ARGV[7]) end
+return 1
+"""
+
+_FINISH = """
+local p, id, worker, status, now = ARGV[1], ARGV[2], ARGV[3], ARGV[4], tonumber(ARGV[5])
+local h = p .. ':task:' .. id
+if redis.call('HGET', h, 'worker') ~= worker or redis.call('HGET', h, 'status') ~= 'running' then
+    return 0
+end
+redis.call('ZREM', p .. ':running:' .. redis.call('HGET', h, 'type'), id)
+local fields = {}
+for i = 8, #ARGV do fields[#fields + 1] = ARGV[i] end
+redis.call('HSET', h, 'status', status, 'worker', '', 'lease_until', '', 'updated_at', now, unpack(fields))
+if status == 'queued' then
+    redis.call('HSET', h, 'run_at', ARGV[6])
+    redis.call('ZADD', p .. ':delayed', tonumber(ARGV[6]), id)
+else
+    local key = redis.call('HGET', h, 'key')
+    if key and key ~= '' then redis.call('DEL', p .. ':key:' .. key) end
+    redis.call('EXPIRE', h, tonumber(ARGV[7]))
+end
+return 1
+"""
+
+_CANCEL = """
+local p, id, now = ARGV[1], ARGV[2], tonumber(ARGV[3])
+local h = p .. ':task:' .. id
+local status = redis.call('HGET', h, 'status')
+if status ~= 'queued' and status ~= 'running' then return 0 end
+local t = redis.call('HGET', h, 'type')
+redis.call('ZREM', p .. ':ready:' .. t, id)
+redis.call('ZREM', p .. ':running:' .. t, id)
+redis.call('ZREM', p .. ':delayed', id)
+redis.call('HSET', h, 'status', 'cancelled', 'worker', '', 'lease_until', '', 'updated_at', now)
+local key = redis.call('HGET', h, 'key')
+if key and key ~= '' then redis.call('DEL', p .. ':key:' .. key) end
+redis.call('EXPIRE', h, tonumber(ARGV[4]))
+return 1
+"""
+
+
+class RedisTaskBackend(TaskBackend):
+    """
+    Task storage in Redis, for workers spread over several hosts.
+
+    Every state change is a Lua script, so claims, dedup and concurrency
+    limits stay atomic however many workers there are. Finished tasks
+    expire after ``retention_s``. Requires a standalone (non-cluster)
+    Redis, since the scripts touch keys derived from their arguments.
+    """
+    
+    def __init__(self, url: str, prefix: str = "sheaia:tasks", retention_s: float = 7 * 86400):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise ImportError("redis is required for the Redis task backend. Install with: pip install redis")
+        
+        self.prefix = prefix
+        self.retention_s = int(retention_s)
+        self._client = redis.from_url(url, decode_responses=True)
+        self._enqueue = self._client.register_script(_ENQUEUE)
+        self._claim = self._client.register_script(_CLAIM)
+        self._update = self._client.register_script(_UPDATE)
+        self._finish = self._client.register_script(_FINISH)
+        self._cancel = self._client.register_script(_CANCEL)
+    
+    def _fields(self, task: Task) -> list:
+        data = task.model_dump()
+        data["payload"] = json.dumps(task.payload, ensure_ascii=False)
+        data["result"] = json.dumps(task.result, ensure_ascii=False, default=str)
+        fields = []
+        for name, value in data.items():
+            fields.extend([name, "" if value is None else value])
+        return fields
+    
+    def _task(self, data: dict) -> Optional[Task]:
+        if not data:
+            return None
+        values = {k: (v if v != "" else None) for k, v in data.items()}
+        values["payload"] = json.loads(values.get("payload") or "{}")
+        values["result"] = json.loads(values["result"]) if values.get("result") else None
+        values["message"] = data.get("message", "")
+        return Task(**values)
+    
+    async def enqueue(self, task: Task) -> Task:
+        task_id = await self._enqueue(args=[
+            self.prefix, task.id, task.key or "", task.type, task.priority, task.run_at, time.time(),
+            *self._fields(task),
+        ])
+        return task if task_id == task.id else await self.get(task_id)
+    
+    async def claim(self, limits: dict[str, int], worker: str, lease_s: float) -> Optional[Task]:
+        args = [self.prefix, time.time(), lease_s, worker]
+        for task_type, limit in limits.items():
+            args.extend([task_type, limit])
+        task_id = await self._claim(args=args)
+        return await self.get(task_id) if task_id else None
+    
+    async def update(self, task_id, worker, lease_s, progress=None, message=None) -> bool:
+        return bool(await self._update(args=[
+            self.prefix, task_id, worker, time.time(), lease_s,
+            "" if progress is None else progress, "" if message is None else message,
+        ]))
+    
+    async def complete(self, task_id: str, worker: str, result: Any = None) -> bool:
+        return bool(await self._finish(args=[
+            self.prefix, task_id, worker, "done", time.time(), "", self.retention_s,
+            "result", json.dumps(result, ensure_ascii=False, default=str), "progress", 1.0,
+        ]))
+    
+    async def fail(self, task_id: str, worker: str, error: str, retry_at: Optional[float] = None) -> bool:
+        status = "queued" if retry_at is not None else "failed"
+        return bool(await self._finish(args=[
+            self.prefix, task_id, worker, status, time.time(), retry_at or "", self.retention_s,
+            "error", error,
+        ]))
+    
+    async def cancel(self, task_id: str) -> bool:
+        return bool(await self._cancel(args=[self.prefix, task_id, time.time(), self.retention_s]))
+    
+    async def get(self, task_id: str) -> Optional[Task]:
+        return self._task(await self._client.hgetall(f"{self.prefix}:task:{task_id}"))
+    
+    async def list(self, status: Optional[TaskStatus] = None, limit: int = 100) -> list[Task]:
+        tasks, start = [], 0
+        while len(tasks) < limit:
+            ids = await self._client.zrevrange(f"{self.prefix}:index", start, start + limit - 1)
+            if not ids:
+                break
+            start += len(ids)
+            async with self._client.pipeline(transaction=False) as pipe:
+                for task_id in ids:
+                    pipe.hgetall(f"{self.prefix}:task:{task_id}")
+                rows = await pipe.execute()
+            for row in rows:
+                task = self._task(row)
+                if task is not None and (status is None or task.status == status):
+                    tasks.append(task)
+        return tasks[:limit]
+    
+    async def prune(self, max_age_s: float) -> int:
+        # Finished task hashes expire on their own; drop their index entries.
+        index = f"{self.prefix}:index"
+        ids = await self._client.zrangebyscore(index, "-inf", time.time() - max_age_s)
+        removed = 0
+        for task_id in ids:
+            if not await self._client.exists(f"{self.prefix}:task:{task_id}"):
+                removed += await self._client.zrem(index, task_id)
+        return removed
+    
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+class TaskContext:
+    """What a handler sees: its task, and a way to report progress."""
+    
+    def __init__(self, task: Task, backend: TaskBackend, worker: str, lease_s: float):
+        self.task = task
+        self.backend = backend
+        self.worker = worker
+        self.lease_s = lease_s
+    
+    @property
+    def payload(self) -> dict:
+        """The task's payload."""
+        return self.task.payload
+    
+    async def report(self, progress: Optional[float] = None, message: Optional[str] = None) -> None:
+        """
+        Record progress (0-1) and extend the lease.
+
+        Raises:
+            TaskCancelledError: The task was cancelled or another worker took it over
+        """
+        if not await self.backend.update(self.task.id, self.worker, self.lease_s, progress, message):
+            raise TaskCancelledError(self.task.id)
+
+
+Handler = Callable[[TaskContext], Awaitable[Any]]
+
+
+class TaskType(BaseModel):
+    """A registered kind of task and how it is run."""
+    
+    model_config = {"arbitrary_types_allowed": True}
+    
+    name: str
+    handler: Handler
+    concurrency: int = 1
+    max_attempts: int = 3
+    backoff_s: float = 5.0
+    max_backoff_s: float = 600.0
+    priority: int = 0
+    
+    def retry_delay(self, attempts: int) -> float:
+        """Exponential backoff with jitter before attempt ``attempts + 1``."""
+        delay = min(self.backoff_s * 2 ** (attempts - 1), self.max_backoff_s)
+        return delay * random.uniform(0.5, 1.0)
+
+
+# Task types registered with @task, used by queues that are not given their own.
+TASK_TYPES: dict[str, TaskType] = {}
+
+
+def task(
+    name: str,
+    concurrency: int = 1,
+    max_attempts: int = 3,
+    backoff_s: float = 5.0,
+    max_backoff_s: float = 600.0,
+    priority: int = 0,
+) -> Callable[[Handler], Handler]:
+    """
+    Register a task handler.
+
+    Example:
+        >>> @task("index.documents", concurrency=2)
+        ... async def index_documents(ctx: TaskContext) -> dict:
+        ...     await ctx.report(0.5, "embedded 500 chunks")
+    """
+    
+    def decorator(handler: Handler) -> Handler:
+        TASK_TYPES[name] = TaskType(
+            name=name,
+            handler=handler,
+            concurrency=concurrency,
+            max_attempts=max_attempts,
+            backoff_s=backoff_s,
+            max_backoff_s=max_backoff_s,
+            priority=priority,
+        )
+        return handler
+    
+    return decorator
+
+
+class TaskQueue:
+    """Enqueues and inspects tasks; the API process uses this without running any."""
+    
+    def __init__(self, backend: TaskBackend, types: Optional[dict[str, TaskType]] = None):
+        self.backend = backend
+        self.types = TASK_TYPES if types is None else types
+    
+    @classmethod
+    def from_settings(cls, settings) -> "TaskQueue":
+        """Build a queue on the configured backend."""
+        config = settings.tasks
+        if config.backend == "redis":
+            return cls(RedisTaskBackend(config.redis_url, retention_s=config.retention_s))
+        return cls(SQLiteTaskBackend(config.sqlite_path))
+    
+    async def enqueue(
+        self,
+        task_type: str,
+        payload: Optional[dict] = None,
+        key: Optional[str] = None,
+        priority: Optional[int] = None,
+        delay_s: float = 0.0,
+        max_attempts: Optional[int] = None,
+    ) -> Task:
+        """
+        Queue a task.
+
+        Args:
+            task_type: Registered task type name
+            payload: JSON-serializable handler input
+            key: Deduplication key; while a task with this key is queued or
+                running, enqueueing it again returns the existing task
+            priority: Higher runs first; defaults to the type's priority
+            delay_s: Earliest start, relative to now
+            max_attempts: Overrides the type's attempt limit
+        """
+        spec = self.types.get(task_type)
+        now = time.time()
+        return await self.backend.enqueue(Task(
+            id=uuid.uuid4().hex,
+            type=task_type,
+            key=key,
+            payload=payload or {},
+            priority=priority if priority is not None else (spec.priority if spec else 0),
+            max_attempts=max_attempts or (spec.max_attempts if spec else 3),
+            run_at=now + delay_s,
+            created_at=now,
+            updated_at=now,
+        ))
+    
+    async def get(self, task_id: str) -> Optional[Task]:
+        """Look up a task."""
+        return await self.backend.get(task_id)
+    
+    async def list(self, status: Optional[TaskStatus] = None, limit: int = 100) -> list[Task]:
+        """Most recently created tasks."""
+        return await self.backend.list(status, limit)
+    
+    async def cancel(self, task_id: str) -> bool:
+        """Cancel a queued or running task."""
+        return await self.backend.cancel(task_id)
+    
+    async def close(self) -> None:
+        """Release backend connections."""
+        await self.backend.close()
+
+
+class TaskWorker:
+    """
+    Claims and runs tasks until stopped.
+
+    At most ``concurrency`` tasks run in this worker at once, and no task
+    type runs more than its limit across all workers. Failed tasks are
+    retried with exponential backoff until ``max_attempts``; a background
+    heartbeat keeps the lease alive while a handler runs. Every
+    ``prune_interval_s`` the worker deletes tasks that finished more than
+    ``retention_s`` ago.
+    """
+    
+    def __init__(
+        self,
+        queue: TaskQueue,
+        concurrency: int = 4,
+        limits: Optional[dict[str, int]] = None,
+        lease_s: float = 60.0,
+        poll_interval_s: float = 1.0,
+        worker_id: Optional[str] = None,
+        retention_s: float = 7 * 86400,
+        prune_interval_s: float = 3600.0,
+    ):
+        self.queue = queue
+        self.concurrency = concurrency
+        self.limits = {name: spec.concurrency for name, spec in queue.types.items()}
+        self.limits.update({k: v for k, v in (limits or {}).items() if k in self.limits})
+        self.lease_s = lease_s
+        self.poll_interval_s = poll_interval_s
+        self.retention_s = retention_s
+        self.prune_interval_s = prune_interval_s
+        self._next_prune = 0.0
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._running: set[asyncio.Task] = set()
+        self._stopping = asyncio.Event()
+    
+    @classmethod
+    def from_settings(cls, settings, queue: TaskQueue) -> "TaskWorker":
+        """Build a worker using ``Settings.tasks``."""
+        config = settings.tasks
+        return cls(
+            queue,
+            concurrency=config.concurrency,
+            limits=config.limits,
+            lease_s=config.lease_s,
+            poll_interval_s=config.poll_interval_s,
+            retention_s=config.retention_s,
+        )
+    
+    async def _heartbeat(self, ctx: TaskContext, handler: asyncio.Task) -> None:
+        while True:
+            await asyncio.sleep(self.lease_s / 3)
+            if not await self.queue.backend.update(ctx.task.id, self.worker_id, self.lease_s):
+                handler.cancel()
+                return
+    
+    async def _execute(self, task: Task) -> None:
+        backend = self.queue.backend
+        spec = self.queue.types[task.type]
+        ctx = TaskContext(task, backend, self.worker_id, self.lease_s)
+        started = time.perf_counter()
+        handler = asyncio.ensure_future(spec.handler(ctx))
+        heartbeat = asyncio.create_task(self._heartbeat(ctx, handler))
+        try:
+            result = await handler
+        except TaskCancelledError:
+            logger.info(f"Task {task.id} ({task.type}) cancelled")
+            return
+        except asyncio.CancelledError:
+            # A heartbeat that returned found the task cancelled or taken over.
+            if heartbeat.done() and not heartbeat.cancelled():
+                logger.info(f"Task {task.id} ({task.type}) cancelled")
+                return
+            raise
+        except Exception as e:
+            if task.attempts < task.max_attempts:
+                delay = spec.retry_delay(task.attempts)
+                logger.warning(
+                    f"Task {task.id} ({task.type}) failed, attempt {task.attempts}/{task.max_attempts}; "
+                    f"retrying in {delay:.1f}s: {e}"
+                )
+                await backend.fail(task.id, self.worker_id, str(e), retry_at=time.time() + delay)
+            else:
+                logger.exception(f"Task {task.id} ({task.type}) failed after {task.attempts} attempts")
+                await backend.fail(task.id, self.worker_id, str(e))
+            return
+        finally:
+            heartbeat.cancel()
+        
+        await backend.complete(task.id, self.worker_id, result)
+        logger.info(f"Task {task.id} ({task.type}) done in {time.perf_counter() - started:.1f}s")
+    
+    async def _prune(self) -> None:
+        if time.monotonic() < self._next_prune:
+            return
+        self._next_prune = time.monotonic() + self.prune_interval_s
+        try:
+            removed = await self.queue.backend.prune(self.retention_s)
+        except Exception:
+            logger.exception("Pruning finished tasks failed")
+            return
+        if removed:
+            logger.info(f"Pruned {removed} finished tasks")
+    
+    async def run_once(self) -> int:
+        """Claim tasks into free slots; returns how many were started."""
+        started = 0
+        while len(self._running) < self.concurrency and not self._stopping.is_set():
+            claimed = await self.queue.backend.claim(self.limits, self.worker_id, self.lease_s)
+            if claimed is None:
+                break
+            job = asyncio.create_task(self._execute(claimed))
+            self._running.add(job)
+            job.add_done_callback(self._running.discard)
+            started += 1
+        return started
+    
+    async def run(self) -> None:
+        """Run until ``stop()``; running tasks finish before this returns."""
+        if not self.limits:
+            logger.warning("No task types registered; worker has nothing to run")
+        logger.info(f"Task worker {self.worker_id} started for {sorted(self.limits)}")
+        stop = asyncio.create_task(self._stopping.wait())
+        try:
+            while not self._stopping.is_set():
+                await self._prune()
+                await self.run_once()
+                # Wake when a slot frees up, on the poll interval, or on stop.
+                await asyncio.wait(
+                    {stop, *self._running},
+                    timeout=self.poll_interval_s,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+            if self._running:
+                await asyncio.gather(*self._running, return_exceptions=True)
+        finally:
+            stop.cancel()
+        logger.info(f"Task worker {self.worker_id} stopped")
+    
+    def stop(self) -> None:
+        """Stop claiming new tasks; ``run()`` returns once running ones finish."""
+        self._stopping.set()
+
+
+# Global task queue (lazy initialized)
+_queue_instance: Optional[TaskQueue] = None
+
+
+def get_task_queue() -> TaskQueue:
+    """Get the global task queue."""
+    global _queue_instance
+    
+    if _queue_instance is None:
+        from sheaia.config import get_settings
+        
+        _queue_instance = TaskQueue.from_settings(get_settings())
+    
+    return _queue_instance
+
+
+async def close_task_queue() -> None:
+    """Close the global task queue if it was created."""
+    global _queue_instance
+    
+    if _queue_instance is not None:
+        await _queue_instance.close()
+        _queue_instance = None
+
+
+__all__ = [
+    "Task",
+    "TaskStatus",
+    "TaskCancelledError",
+    "TaskBackend",
+    "SQLiteTaskBackend",
+    "RedisTaskBackend",
+    "TaskContext",
+    "TaskType",
+    "TASK_TYPES",
+    "task",
+    "TaskQueue",
+    "TaskWorker",
+    "get_task_queue",
+    "close_task_queue",
+]
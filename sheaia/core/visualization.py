@@ -0,0 +1,439 @@
+"""
+Visualization data - downsampled chart series and compact series summaries.
+
+MES and historian queries return millions of points per tag: too many for
+a browser chart and far too many for a prompt. Series are reduced on the
+server with vectorized min-max bucketing and LTTB (Largest-Triangle-Three-
+Buckets) to a target point count per chart; min-max levels are cached so
+zooming into a window reuses them instead of rescanning the raw series.
+The LLM gets a few-line summary of the same series rather than raw rows.
+"""
+
+import logging
+import math
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Any, Hashable, Literal, Optional, Sequence
+
+import numpy as np
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+Method = Literal["lttb", "minmax"]
+
+# LTTB runs on min-max preselected points, this many per output point.
+_MINMAX_RATIO = 4
+# Cached levels use buckets of 4**k raw points.
+_LEVEL_BASE = 4
+
+
+def _as_float(x: np.ndarray) -> np.ndarray:
+    """Numeric view of an x axis; datetimes become nanoseconds."""
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype("datetime64[ns]").astype(np.int64).astype(np.float64)
+    return x.astype(np.float64, copy=False)
+
+
+def _bucket_extremes(y: np.ndarray, width: int) -> np.ndarray:
+    """Sorted indices of each ``width``-point bucket's minimum and maximum, plus both ends."""
+    size = len(y)
+    buckets = math.ceil(size / width)
+    padded = np.full(buckets * width, np.inf)
+    padded[:size] = y
+    base = np.arange(buckets) * width
+    low = base + padded.reshape(buckets, width).argmin(axis=1)
+    padded[size:] = -np.inf
+    high = base + padded.reshape(buckets, width).argmax(axis=1)
+    return np.unique(np.concatenate(([0], low, high, [size - 1])))
+
+
+def minmax_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Indices of the minimum and maximum of equal-count buckets, at most ``n_out``.
+
+    The first and last points are always kept, so the result spans the
+    series. Returns sorted, unique indices.
+    """
+    if len(y) <= n_out:
+        return np.arange(len(y))
+    # Two points per bucket, leaving room for both ends.
+    return _bucket_extremes(np.asarray(y, dtype=np.float64), math.ceil(len(y) / max((n_out - 2) // 2, 1)))
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int, preselect: bool = True) -> np.ndarray:
+    """
+    Indices chosen by Largest-Triangle-Three-Buckets.
+
+    LTTB picks, bucket by bucket, the point forming the largest triangle
+    with the previous pick and the next bucket's average, which keeps the
+    visual shape. Each step depends on the previous pick, so the loop runs
+    over buckets; with ``preselect`` long series are first reduced to
+    ``4 * n_out`` min-max points (MinMaxLTTB), so its cost does not grow
+    with the raw length.
+    """
+    size = len(y)
+    if size <= n_out or n_out < 3:
+        return np.arange(size) if size <= n_out else np.array([0, size - 1])[:n_out]
+    if preselect and size > n_out * _MINMAX_RATIO:
+        chosen = minmax_indices(y, n_out * _MINMAX_RATIO)
+    else:
+        chosen = np.arange(size)
+    xs = _as_float(np.asarray(x)[chosen])
+    ys = np.asarray(y, dtype=np.float64)[chosen]
+    count = len(chosen)
+    if count <= n_out:
+        return chosen
+    
+    # n_out - 2 buckets over the interior points; the ends are fixed.
+    edges = np.linspace(1, count - 1, n_out - 1).astype(np.int64)
+    sizes = np.diff(edges)
+    next_x = np.append(np.add.reduceat(xs[1:-1], edges[:-1] - 1) / sizes, xs[-1])[1:]
+    next_y = np.append(np.add.reduceat(ys[1:-1], edges[:-1] - 1) / sizes, ys[-1])[1:]
+    
+    picks = np.empty(n_out, dtype=np.int64)
+    picks[0], picks[-1] = 0, count - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        ax, ay = xs[a], ys[a]
+        area = np.abs((ax - next_x[i]) * (ys[lo:hi] - ay) - (ax - xs[lo:hi]) * (next_y[i] - ay))
+        a = lo + int(area.argmax())
+        picks[i + 1] = a
+    return chosen[picks]
+
+
+def downsample(x: np.ndarray, y: np.ndarray, n_out: int, method: Method = "lttb") -> tuple[np.ndarray, np.ndarray]:
+    """
+    Reduce a series to at most ``n_out`` points.
+
+    Missing values (NaN) are dropped first. ``minmax`` keeps every bucket's
+    extremes (spikes survive, best for dense sensor data); ``lttb`` keeps
+    the visual shape with evenly spread points.
+    """
+    x, y = np.asarray(x), np.asarray(y, dtype=np.float64)
+    keep = ~np.isnan(y)
+    if not keep.all():
+        x, y = x[keep], y[keep]
+    index = lttb_indices(x, y, n_out) if method == "lttb" else minmax_indices(y, n_out)
+    return x[index], y[index]
+
+
+class SeriesLevels:
+    """
+    One series with cached min-max levels for zooming.
+
+    Level ``k`` holds the extremes of fixed buckets of ``4**k`` raw points,
+    aligned to the start of the series, so any window can be cut out of it
+    with a binary search. A window is served from the coarsest level that
+    still has enough points in it, then reduced to the requested count;
+    levels are built on first use.
+    """
+    
+    def __init__(self, x: np.ndarray, y: np.ndarray):
+        x, y = np.asarray(x), np.asarray(y, dtype=np.float64)
+        keep = ~np.isnan(y)
+        if not keep.all():
+            x, y = x[keep], y[keep]
+        xf = _as_float(x)
+        if len(xf) > 1 and (np.diff(xf) < 0).any():
+            order = np.argsort(xf, kind="stable")
+            x, y, xf = x[order], y[order], xf[order]
+        self.x = x
+        self.y = y
+        self._xf = xf
+        self._levels: dict[int, np.ndarray] = {}
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return len(self.y)
+    
+    @property
+    def nbytes(self) -> int:
+        return self.x.nbytes + self.y.nbytes + self._xf.nbytes + sum(a.nbytes for a in self._levels.values())
+    
+    def _level(self, k: int) -> np.ndarray:
+        with self._lock:
+            index = self._levels.get(k)
+            if index is None:
+                index = _bucket_extremes(self.y, _LEVEL_BASE ** k)
+                self._levels[k] = index
+            return index
+    
+    def _position(self, value: Any, side: Literal["left", "right"]) -> int:
+        dtype = self.x.dtype if np.issubdtype(self.x.dtype, np.datetime64) else np.float64
+        return int(np.searchsorted(self._xf, _as_float(np.asarray([value], dtype=dtype))[0], side))
+    
+    def bounds(self, start: Any = None, end: Any = None) -> tuple[int, int]:
+        """Raw index range of the points between ``start`` and ``end``."""
+        lo = 0 if start is None else self._position(start, "left")
+        hi = len(self.y) if end is None else self._position(end, "right")
+        return lo, max(lo, hi)
+    
+    def window(
+        self,
+        n_out: int,
+        start: Any = None,
+        end: Any = None,
+        method: Method = "lttb",
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """At most ``n_out`` points between ``start`` and ``end`` (inclusive, in x units)."""
+        lo, hi = self.bounds(start, end)
+        count = hi - lo
+        if count <= n_out:
+            return self.x[lo:hi], self.y[lo:hi]
+        
+        # Coarsest level leaving ~4 points per output point in the window.
+        k = int(math.log(2 * count / (_MINMAX_RATIO * n_out), _LEVEL_BASE)) if count > 2 * _MINMAX_RATIO * n_out else 0
+        if k > 0:
+            level = self._level(k)
+            index = level[np.searchsorted(level, lo):np.searchsorted(level, hi)]
+            if len(index) == 0 or index[0] != lo:
+                index = np.concatenate(([lo], index))
+            if index[-1] != hi - 1:
+                index = np.append(index, hi - 1)
+        else:
+            index = np.arange(lo, hi)
+        
+        x, y = self.x[index], self.y[index]
+        if method == "minmax":
+            picked = minmax_indices(y, n_out)
+        else:
+            picked = lttb_indices(x, y, n_out, preselect=k == 0)
+        return x[picked], y[picked]
+    
+    def summarize(self, name: str = "value", points: int = 12, start: Any = None, end: Any = None) -> "SeriesSummary":
+        """Summary of the window; the outline comes from the cached levels."""
+        lo, hi = self.bounds(start, end)
+        if hi == lo:
+            return SeriesSummary(name=name, count=0)
+        x, y = self.x[lo:hi], self.y[lo:hi]
+        low, high = int(y.argmin()), int(y.argmax())
+        outline_x, outline_y = self.window(points, start, end)
+        return SeriesSummary(
+            name=name,
+            count=hi - lo,
+            start=format_x(x[0]),
+            end=format_x(x[-1]),
+            first=float(y[0]),
+            last=float(y[-1]),
+            mean=float(y.mean()),
+            std=float(y.std()),
+            min=float(y[low]),
+            min_at=format_x(x[low]),
+            max=float(y[high]),
+            max_at=format_x(x[high]),
+            shape=[(format_x(a), float(b)) for a, b in zip(outline_x, outline_y)],
+        )
+
+
+class SeriesCache:
+    """Series with their levels, least recently used evicted past ``max_bytes``."""
+    
+    def __init__(self, max_bytes: int = 256 << 20):
+        self.max_bytes = max_bytes
+        self._series: OrderedDict[Hashable, SeriesLevels] = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: Hashable) -> Optional[SeriesLevels]:
+        with self._lock:
+            series = self._series.get(key)
+            if series is not None:
+                self._series.move_to_end(key)
+            return series
+    
+    def put(self, key: Hashable, series: SeriesLevels) -> SeriesLevels:
+        with self._lock:
+            self._series[key] = series
+            self._series.move_to_end(key)
+            total = sum(s.nbytes for s in self._series.values())
+            while total > self.max_bytes and len(self._series) > 1:
+                _, evicted = self._series.popitem(last=False)
+                total -= evicted.nbytes
+            return series
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+def format_x(value: Any) -> str:
+    """An x value for a prompt: datetimes to the minute (or day), numbers compactly."""
+    if isinstance(value, np.datetime64):
+        text = str(value.astype("datetime64[m]")).replace("T", " ")
+        return text[:10] if text.endswith(" 00:00") else text
+    if isinstance(value, (datetime, date)):
+        return format_x(np.datetime64(value))
+    return f"{float(value):.6g}"
+
+
+def _format_y(value: float) -> str:
+    return f"{value:.4g}"
+
+
+class SeriesSummary(BaseModel):
+    """Compact description of a series for a prompt."""
+    
+    name: str
+    count: int
+    start: str = ""
+    end: str = ""
+    first: float = 0.0
+    last: float = 0.0
+    mean: float = 0.0
+    std: float = 0.0
+    min: float = 0.0
+    min_at: str = ""
+    max: float = 0.0
+    max_at: str = ""
+    shape: list[tuple[str, float]] = []
+    
+    def render(self) -> str:
+        if not self.count:
+            return f"{self.name}: no values"
+        change = f" (change {_format_y(self.last - self.first)}"
+        # A percentage of a start near zero says nothing.
+        if abs(self.first) > self.std:
+            change += f", {(self.last - self.first) / abs(self.first):+.1%}"
+        change += ")"
+        lines = [
+            f"{self.name}: {self.count:,} points, {self.start} to {self.end}",
+            f"  first {_format_y(self.first)}, last {_format_y(self.last)}{change}, "
+            f"mean {_format_y(self.mean)}, std {_format_y(self.std)}",
+            f"  min {_format_y(self.min)} at {self.min_at}, max {_format_y(self.max)} at {self.max_at}",
+        ]
+        if self.shape:
+            lines.append("  shape: " + ", ".join(f"{x} {_format_y(y)}" for x, y in self.shape))
+        return "\n".join(lines)
+
+
+def summarize_series(x: np.ndarray, y: np.ndarray, name: str = "value", points: int = 12) -> SeriesSummary:
+    """
+    Summarize a series: extent, statistics, extremes and an LTTB outline.
+
+    Args:
+        x: Timestamps (datetime64) or numbers, in any order
+        y: Values; NaN counts as missing
+        name: Series name for the rendered text
+        points: Outline points; LTTB keeps peaks and turns among them
+
+    Returns:
+        The summary; ``render()`` gives the prompt text
+    """
+    return SeriesLevels(x, y).summarize(name, points)
+
+
+def _column(values: list) -> tuple[Optional[str], Optional[np.ndarray]]:
+    """Classify a row column as ``number``, ``datetime`` or neither."""
+    if all(isinstance(v, (int, float, np.number)) or v is None for v in values) and not all(
+        isinstance(v, bool) for v in values
+    ):
+        return "number", np.asarray([np.nan if v is None else v for v in values], dtype=np.float64)
+    if all(isinstance(v, (str, datetime, date, np.datetime64)) for v in values):
+        try:
+            return "datetime", np.asarray(values, dtype="datetime64[ns]")
+        except (ValueError, TypeError):
+            return None, None
+    return None, None
+
+
+def describe_rows(
+    rows: Sequence[dict],
+    points: int = 12,
+    max_series: int = 8,
+) -> Optional[str]:
+    """
+    Summaries of the time series in query rows, or ``None`` if there are none.
+
+    The x axis is the first datetime column or, failing that, the first
+    numeric one if it is sorted (within each series); other numeric columns
+    are series. A text column with a few distinct values (a tag or line
+    name) splits them into one series per value. Tables whose only numeric
+    axis is unordered - ids, codes, category totals - are not series.
+    """
+    if not rows or not isinstance(rows[0], dict):
+        return None
+    columns = list(rows[0])
+    typed = {name: _column([row.get(name) for row in rows]) for name in columns}
+    dates = [name for name in columns if typed[name][0] == "datetime"]
+    numbers = [name for name in columns if typed[name][0] == "number"]
+    x_name = dates[0] if dates else (numbers[0] if len(numbers) > 1 else None)
+    values = [name for name in numbers if name != x_name]
+    if x_name is None or not values:
+        return None
+    x = typed[x_name][1]
+    
+    groups: dict[str, np.ndarray] = {"": np.arange(len(rows))}
+    labels = [name for name in columns if typed[name][0] is None]
+    if labels:
+        keys = np.asarray([str(row.get(labels[0])) for row in rows])
+        distinct = np.unique(keys)
+        if len(distinct) * len(values) > max_series:
+            return None
+        groups = {f"{labels[0]}={key} ": np.flatnonzero(keys == key) for key in distinct}
+    if typed[x_name][0] == "number" and not all(np.all(np.diff(x[index]) >= 0) for index in groups.values()):
+        return None
+    
+    summaries = [
+        summarize_series(x[index], typed[name][1][index], f"{prefix}{name}", points).render()
+        for prefix, index in groups.items()
+        for name in values
+    ]
+    return "\n".join(summaries[:max_series])
+
+
+def load_series(store, result_id: str, x: str, y: str, cache: Optional[SeriesCache] = None) -> SeriesLevels:
+    """
+    A series from two columns of a stored query result, cached by result and columns.
+
+    Raises:
+        UnknownResultError: If the result does not exist or has expired
+        ValueError: For unknown columns, or a value column that is not numeric
+    """
+    cache = cache or get_series_cache()
+    key = (result_id, x, y)
+    series = cache.get(key)
+    if series is None:
+        rows = store.info(result_id).rows
+        table = store.page(result_id, limit=max(rows, 1), columns=[x, y]).to_table()
+        try:
+            values = np.asarray(table[y].to_numpy(), dtype=np.float64)
+            axis = table[x].to_numpy()
+            _as_float(axis)
+        except (TypeError, ValueError):
+            raise ValueError(f"Cannot chart {y} over {x}: both must be numeric or timestamps") from None
+        series = cache.put(key, SeriesLevels(axis, values))
+    return series
+
+
+# Global series cache (lazy initialized)
+_cache_instance: Optional[SeriesCache] = None
+
+
+def get_series_cache() -> SeriesCache:
+    """Get the global series cache."""
+    global _cache_instance
+    
+    if _cache_instance is None:
+        from sheaia.config import get_settings
+        
+        _cache_instance = SeriesCache(get_settings().visualization.cache_mb << 20)
+    
+    return _cache_instance
+
+
+__all__ = [
+    "Method",
+    "minmax_indices",
+    "lttb_indices",
+    "downsample",
+    "SeriesLevels",
+    "SeriesCache",
+    "SeriesSummary",
+    "summarize_series",
+    "describe_rows",
+    "load_series",
+    "format_x",
+    "get_series_cache",
+]
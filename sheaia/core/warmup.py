@@ -0,0 +1,83 @@
+"""Startup warm-up - preload models and prime prompt prefixes before taking traffic."""
+
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from sheaia.core.embedding import BaseEmbedding
+from sheaia.core.health import HealthMonitor
+from sheaia.core.llm import BaseLLM, GenerationConfig
+from sheaia.i18n import Language
+from sheaia.i18n.prompts import get_system_prompt
+
+logger = logging.getLogger(__name__)
+
+COMPONENT = "warmup"
+
+_PROBE_CONFIG = GenerationConfig(max_tokens=1, temperature=0.0)
+
+
+async def warm_up(
+    llm: BaseLLM,
+    embedding: BaseEmbedding,
+    monitor: Optional[HealthMonitor] = None,
+    languages: Optional[list[Language]] = None,
+    prime_prompts: bool = True,
+) -> None:
+    """
+    Load both models concurrently, then run a one-token generation per
+    language and a dummy embedding.
+
+    The generation evaluates each language's system prompt, faulting in
+    the weights and kernels and leaving the prefix in the LLM's prompt
+    cache. Progress is pushed to ``monitor`` under ``warmup``, which stays
+    ``loading`` - and so keeps the app not ready - until this finishes.
+    Loading, priming and embedding all run off the event loop, so health
+    checks keep answering throughout.
+    """
+    
+    def report(status: str, detail: str) -> None:
+        logger.info(f"Warm-up: {detail}")
+        if monitor is not None:
+            monitor.set_state(COMPONENT, status, detail)
+    
+    started = time.perf_counter()
+    try:
+        report("loading", "loading models")
+        await asyncio.gather(
+            asyncio.to_thread(llm.load_model),
+            asyncio.to_thread(lambda: embedding.dimension),
+        )
+        
+        if prime_prompts:
+            for language in languages or list(Language):
+                report("loading", f"priming {language.value} system prompt")
+                # Same prefix build_prompt() puts in front of every agent prompt.
+                await llm.generate(f"{get_system_prompt(language)}\n\n", _PROBE_CONFIG)
+        else:
+            report("loading", "running a test generation")
+            await llm.generate("Hello", _PROBE_CONFIG)
+        
+        report("loading", "warming embedding model")
+        await asyncio.to_thread(embedding.embed_query, "warm-up")
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.exception("Warm-up failed")
+        if monitor is not None:
+            monitor.set_state(COMPONENT, "down", f"warm-up failed: {e}")
+        return
+    
+    report("ok", f"warm in {time.perf_counter() - started:.1f}s")
+
+
+async def shut_down() -> None:
+    """Unload the global models, if this process created them."""
+    from sheaia.core import embedding, llm
+    
+    models = [m for m in (llm._llm_instance, embedding._embedding_instance) if m is not None]
+    await asyncio.gather(*(asyncio.to_thread(m.unload_model) for m in models))
+
+
+__all__ = ["warm_up", "shut_down"]
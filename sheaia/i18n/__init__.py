@@ -1,7 +1,14 @@
 """Internationalization module for SHEAIA."""
 
+import hashlib
+import json
+import sys
+from contextvars import ContextVar, Token
 from enum import Enum
-from typing import Dict
+from functools import lru_cache
+from pathlib import Path
+from string import Formatter
+from typing import Dict, Optional, Tuple
 
 
 class Language(str, Enum):
@@ -15,24 +22,53 @@ class Language(str, Enum):
     @classmethod
     def from_string(cls, value: str) -> "Language":
         """Parse language from string, with fallback to English."""
-        value = value.lower().strip()
-        
-        # Handle various formats
-        if value.startswith("zh-tw") or value.startswith("zh-hant"):
-            return cls.ZH_TW
-        elif value.startswith("zh"):
-            return cls.ZH_CN
-        elif value.startswith("th"):
-            return cls.TH
-        elif value.startswith("en"):
-            return cls.EN
-        
-        # Try exact match
-        for lang in cls:
-            if lang.value.lower() == value:
-                return lang
-        
-        return cls.EN  # Default fallback
+        return match_language(value) or Language.EN
+
+
+@lru_cache(maxsize=512)
+def match_language(value: str) -> Optional[Language]:
+    """
+    Map a language tag to a supported language, or None if there is none.
+
+    Memoized: the same few tags arrive on every request.
+    """
+    value = value.lower().strip()
+    
+    # Handle various formats
+    if value.startswith("zh-tw") or value.startswith("zh-hant") or value in ("zh-hk", "zh-mo"):
+        return Language.ZH_TW
+    elif value.startswith("zh"):
+        return Language.ZH_CN
+    elif value.startswith("th"):
+        return Language.TH
+    elif value.startswith("en"):
+        return Language.EN
+    
+    # Try exact match
+    for lang in Language:
+        if lang.value.lower() == value:
+            return lang
+    
+    return None
+
+
+# Language of the request being handled; set by the API's LanguageMiddleware.
+_current_language: ContextVar[Language] = ContextVar("sheaia_language", default=Language.EN)
+
+
+def get_language() -> Language:
+    """Language of the current request (English outside of one)."""
+    return _current_language.get()
+
+
+def set_language(lang: Language) -> Token:
+    """Make ``lang`` the current language; pass the token to ``reset_language``."""
+    return _current_language.set(lang)
+
+
+def reset_language(token: Token) -> None:
+    """Restore the language that was current before ``set_language``."""
+    _current_language.reset(token)
 
 
 # Translation dictionary
@@ -219,13 +255,103 @@ TRANSLATIONS: Dict[str, Dict[Language, str]] = {
 }
 
 
-def t(key: str, lang: Language = Language.EN, **kwargs: str) -> str:
+# Compiled catalog: one flat key -> text table per language, English fallback
+# already applied, plus the parsed form of every template with placeholders.
+# Rebuilt by compile_catalog() whenever TRANSLATIONS changes.
+_Parsed = Optional[tuple[tuple[str, Optional[str]], ...]]
+
+_CATALOG: Dict[Language, Dict[str, str]] = {}
+_PARSED: Dict[Language, Dict[str, _Parsed]] = {}
+_EXPORT_CACHE: Dict[Language, Tuple[bytes, str]] = {}
+
+# Marks templates without placeholders, which never need formatting.
+_PLAIN = object()
+
+
+def _parse(template: str) -> _Parsed:
+    """
+    Split a template into (literal, field) pairs, or None when it needs the
+    full ``str.format`` machinery (format specs, conversions, attribute access).
+    """
+    parts = []
+    try:
+        for literal, field, spec, conversion in Formatter().parse(template):
+            if spec or conversion or (field is not None and not field.isidentifier()):
+                return None
+            parts.append((literal, field))
+    except ValueError:
+        return None
+    return tuple(parts)
+
+
+def compile_catalog() -> None:
+    """Rebuild the per-language lookup tables from ``TRANSLATIONS``."""
+    catalog: Dict[Language, Dict[str, str]] = {lang: {} for lang in Language}
+    parsed: Dict[Language, Dict[str, _Parsed]] = {lang: {} for lang in Language}
+    for key, translations in TRANSLATIONS.items():
+        fallback = translations.get(Language.EN) or key
+        for lang in Language:
+            template = sys.intern(translations.get(lang) or fallback)
+            catalog[lang][key] = template
+            if "{" in template or "}" in template:
+                parsed[lang][key] = _parse(template)
+    
+    _CATALOG.clear()
+    _CATALOG.update(catalog)
+    _PARSED.clear()
+    _PARSED.update(parsed)
+    _EXPORT_CACHE.clear()
+
+
+_LANGUAGE_CODES = {lang.value.lower(): lang for lang in Language}
+
+
+def _flatten(data: dict, prefix: str = "") -> Dict[str, str]:
+    flat = {}
+    for key, value in data.items():
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{prefix}{key}."))
+        else:
+            flat[f"{prefix}{key}"] = str(value)
+    return flat
+
+
+def load_catalog(path: str | Path, lang: Optional[Language] = None) -> int:
+    """
+    Merge an external JSON catalog into the translations.
+
+    The file holds one language, flat (``{"common.save": "Save"}``) or nested
+    as the frontend locale files are (``{"common": {"save": "Save"}}``); the
+    language defaults to the file name, e.g. ``zh-CN.json``.
+
+    Returns:
+        Number of keys loaded
+    """
+    path = Path(path)
+    lang = lang or Language.from_string(path.stem)
+    entries = _flatten(json.loads(path.read_text(encoding="utf-8")))
+    for key, text in entries.items():
+        TRANSLATIONS.setdefault(key, {})[lang] = text
+    compile_catalog()
+    return len(entries)
+
+
+def load_catalogs(directory: str | Path) -> int:
+    """Load every ``<language>.json`` catalog in a directory."""
+    total = 0
+    for path in sorted(Path(directory).glob("*.json")):
+        if path.stem.lower() in _LANGUAGE_CODES:
+            total += load_catalog(path, _LANGUAGE_CODES[path.stem.lower()])
+    return total
+
+
+def t(key: str, lang: Optional[Language] = None, **kwargs: str) -> str:
     """
     Translate a key to the specified language with interpolation.
     
     Args:
         key: Translation key (e.g., "error.connection_failed")
-        lang: Target language
+        lang: Target language; defaults to the current request's language
         **kwargs: Interpolation values
     
     Returns:
@@ -235,29 +361,65 @@ def t(key: str, lang: Language = Language.EN, **kwargs: str) -> str:
         >>> t("error.connection_failed", Language.ZH_CN, source="MySQL")
         "无法连接到 MySQL。请检查您的凭据。"
     """
-    translations = TRANSLATIONS.get(key, {})
-    template = translations.get(lang)
+    if lang is None:
+        lang = _current_language.get()
+    template = (_CATALOG.get(lang) or _CATALOG[Language.EN]).get(key, key)
+    if not kwargs:
+        return template
     
-    # Fallback to English
-    if not template:
-        template = translations.get(Language.EN, key)
-    
-    # Apply interpolation
-    if kwargs:
+    parts = (_PARSED.get(lang) or _PARSED[Language.EN]).get(key, _PLAIN)
+    if parts is _PLAIN:
+        return template
+    if parts is None:
         try:
             return template.format(**kwargs)
         except KeyError:
             return template
     
-    return template
+    out = []
+    for literal, field in parts:
+        out.append(literal)
+        if field is not None:
+            if field not in kwargs:
+                return template
+            out.append(str(kwargs[field]))
+    return "".join(out)
 
 
 def get_translations_for_language(lang: Language) -> Dict[str, str]:
     """Get all translations for a specific language (for frontend export)."""
-    result = {}
-    for key, translations in TRANSLATIONS.items():
-        result[key] = translations.get(lang, translations.get(Language.EN, key))
-    return result
+    return dict(_CATALOG[lang])
+
+
+def export_translations(lang: Language) -> Tuple[bytes, str]:
+    """
+    JSON body and ETag for the frontend catalog of a language.
+
+    Serialized once per language and catalog version, so serving it costs
+    a dict lookup; the ETag changes whenever a catalog is (re)loaded.
+    """
+    export = _EXPORT_CACHE.get(lang)
+    if export is None:
+        body = json.dumps(_CATALOG[lang], ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode()
+        export = (body, f'"{hashlib.sha256(body).hexdigest()[:32]}"')
+        _EXPORT_CACHE[lang] = export
+    return export
+
+
+compile_catalog()
 
 
-__all__ = ["Language", "t", "get_translations_for_language", "TRANSLATIONS"]
+__all__ = [
+    "Language",
+    "match_language",
+    "get_language",
+    "set_language",
+    "reset_language",
+    "t",
+    "get_translations_for_language",
+    "export_translations",
+    "compile_catalog",
+    "load_catalog",
+    "load_catalogs",
+    "TRANSLATIONS",
+]
@@ -0,0 +1,109 @@
+"""Language negotiation - Accept-Language parsing and message language detection."""
+
+from functools import lru_cache
+from typing import Optional
+
+from sheaia.i18n import Language, get_language, match_language, set_language
+
+# Characters that exist in only one of the two Chinese scripts; the counts
+# of each decide between zh-CN and zh-TW.
+_SIMPLIFIED = set("们这说为发过时会对经动问题实现还应关样开数据库报产线单设备质检总额销订户务导处员区东门马贵见读谁请车长运进选录页类观")
+_TRADITIONAL = set("們這說為發過時會對經動問題實現還應關樣開數據庫報產線單設備質檢總額銷訂戶務導處員區東門馬貴見讀誰請車長運進選錄頁類觀")
+_SIMPLIFIED, _TRADITIONAL = _SIMPLIFIED - _TRADITIONAL, _TRADITIONAL - _SIMPLIFIED
+
+# Only this much of a message is inspected.
+_DETECT_CHARS = 200
+
+_HAN_WEIGHT = 3
+
+
+@lru_cache(maxsize=1024)
+def parse_accept_language(header: str) -> Optional[Language]:
+    """
+    Best supported language in an ``Accept-Language`` header, honouring
+    q-values, or None when nothing in it is supported.
+
+    Memoized: browsers send the same header on every request, so after the
+    first request each distinct header costs a dictionary lookup.
+    """
+    ranked = []
+    for position, item in enumerate(header.split(",")):
+        tag, _, params = item.partition(";")
+        tag = tag.strip()
+        if not tag or tag == "*":
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if q > 0:
+            ranked.append((-q, position, tag))
+    
+    for _, _, tag in sorted(ranked):
+        lang = match_language(tag)
+        if lang is not None:
+            return lang
+    return None
+
+
+def detect_language(text: str) -> Optional[Language]:
+    """
+    Guess a message's language from its script.
+
+    Thai script means Thai; mostly Han characters mean Chinese, Traditional
+    when script-specific characters say so; Latin letters mean English. Returns
+    None when the text gives nothing to go on (digits, punctuation).
+    """
+    thai = han = latin = simplified = traditional = 0
+    for char in text[:_DETECT_CHARS]:
+        code = ord(char)
+        if 0x0E00 <= code <= 0x0E7F:
+            thai += 1
+        elif 0x4E00 <= code <= 0x9FFF or 0x3400 <= code <= 0x4DBF:
+            han += 1
+            if char in _SIMPLIFIED:
+                simplified += 1
+            elif char in _TRADITIONAL:
+                traditional += 1
+        elif char.isascii() and char.isalpha():
+            latin += 1
+    
+    # A Han character carries about as much as a Latin word, so Chinese with
+    # English table names stays Chinese and English with a place name English.
+    if thai and thai >= han:
+        return Language.TH
+    if han and han * _HAN_WEIGHT >= latin:
+        return Language.ZH_TW if traditional > simplified else Language.ZH_CN
+    if latin:
+        return Language.EN
+    return None
+
+
+def choose_language(explicit: Optional[str], message: str = "", negotiated: bool = True) -> Language:
+    """
+    Pick the language for one message of the current request.
+
+    An explicit, supported ``explicit`` value (a request body's
+    ``language``) wins. Otherwise the language negotiated by the
+    middleware stands; only when the client stated no preference at all
+    (``negotiated`` is False) is the message itself inspected.
+    """
+    lang = match_language(explicit) if explicit else None
+    if lang is None and not negotiated and message:
+        lang = detect_language(message)
+    return lang or get_language()
+
+
+def resolve_language(explicit: Optional[str], message: str = "", negotiated: bool = True) -> Language:
+    """``choose_language``, then make the result the request's current language."""
+    lang = choose_language(explicit, message, negotiated)
+    if lang is not get_language():
+        set_language(lang)
+    return lang
+
+
+__all__ = ["parse_accept_language", "detect_language", "choose_language", "resolve_language"]
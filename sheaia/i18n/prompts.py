@@ -125,4 +125,296 @@ def get_sql_generation_prompt(lang: Language, schema: str, question: str) -> str
     return template.format(schema=schema, question=question)
 
 
-__all__ = ["SYSTEM_PROMPTS", "get_system_prompt", "get_sql_generation_prompt"]
+# Document question-answering prompts
+DOCUMENT_QA_PROMPT = {
+    Language.EN: """Answer the user's question using only the document excerpts below.
+
+Document excerpts:
+{context}
+
+User question: {question}
+
+Answer concisely and cite the document each fact comes from. If the excerpts do not contain the answer, say so.""",
+
+    Language.ZH_CN: """仅使用以下文档摘录回答用户的问题。
+
+文档摘录：
+{context}
+
+用户问题：{question}
+
+简洁地回答，并注明每条信息来自哪个文档。如果摘录中没有答案，请说明。""",
+
+    Language.ZH_TW: """僅使用以下文件摘錄回答用戶的問題。
+
+文件摘錄：
+{context}
+
+用戶問題：{question}
+
+簡潔地回答，並註明每條資訊來自哪個文件。如果摘錄中沒有答案，請說明。""",
+
+    Language.TH: """ตอบคำถามของผู้ใช้โดยใช้เฉพาะข้อความที่ตัดมาจากเอกสารด้านล่าง
+
+ข้อความจากเอกสาร:
+{context}
+
+คำถามของผู้ใช้: {question}
+
+ตอบอย่างกระชับและระบุเอกสารที่มาของข้อมูลแต่ละส่วน หากข้อความไม่มีคำตอบ ให้บอกตามนั้น""",
+}
+
+
+# Coordinator synthesis prompts
+SYNTHESIS_PROMPT = {
+    Language.EN: """Combine the findings from the specialist agents into one answer to the user's question.
+
+Findings:
+{findings}
+
+User question: {question}
+
+Write a single coherent answer. Keep the source citations and mention if some findings are missing.""",
+
+    Language.ZH_CN: """将各专业代理的结果整合为对用户问题的一个回答。
+
+结果：
+{findings}
+
+用户问题：{question}
+
+写出一个连贯的回答。保留数据来源引用，如果部分结果缺失请说明。""",
+
+    Language.ZH_TW: """將各專業代理的結果整合為對用戶問題的一個回答。
+
+結果：
+{findings}
+
+用戶問題：{question}
+
+寫出一個連貫的回答。保留資料來源引用，如果部分結果缺失請說明。""",
+
+    Language.TH: """รวมผลลัพธ์จากตัวแทนผู้เชี่ยวชาญให้เป็นคำตอบเดียวสำหรับคำถามของผู้ใช้
+
+ผลลัพธ์:
+{findings}
+
+คำถามของผู้ใช้: {question}
+
+เขียนคำตอบที่สอดคล้องกันเพียงคำตอบเดียว คงการอ้างอิงแหล่งข้อมูลไว้ และแจ้งหากผลลัพธ์บางส่วนขาดหายไป""",
+}
+
+
+
+# Report section prompts
+REPORT_SECTION_PROMPT = {
+    Language.EN: """Write the "{title}" section of a business report from the data below.
+
+Data:
+{data}
+
+Instructions: {instruction}
+
+Write in English. Use the figures from the data, cite the tables they come from, and do not invent numbers.""",
+
+    Language.ZH_CN: """根据以下数据撰写业务报告中的"{title}"部分。
+
+数据：
+{data}
+
+要求：{instruction}
+
+使用简体中文撰写。使用数据中的数字，注明其来源表，不要编造数字。""",
+
+    Language.ZH_TW: """根據以下資料撰寫業務報告中的「{title}」部分。
+
+資料：
+{data}
+
+要求：{instruction}
+
+使用繁體中文撰寫。使用資料中的數字，註明其來源表，不要編造數字。""",
+
+    Language.TH: """เขียนส่วน "{title}" ของรายงานธุรกิจจากข้อมูลด้านล่าง
+
+ข้อมูล:
+{data}
+
+คำแนะนำ: {instruction}
+
+เขียนเป็นภาษาไทย ใช้ตัวเลขจากข้อมูล ระบุตารางที่มาของตัวเลข และห้ามสร้างตัวเลขขึ้นเอง""",
+}
+
+# Rolling conversation summary prompts
+CONVERSATION_SUMMARY_PROMPT = {
+    Language.EN: """Update the running summary of a conversation with the new turns below.
+
+Current summary:
+{summary}
+
+New turns:
+{turns}
+
+Write the updated summary in at most {max_words} words. Keep names, numbers, tables, filters and open questions the user may refer back to.""",
+
+    Language.ZH_CN: """用下面的新对话内容更新对话摘要。
+
+当前摘要：
+{summary}
+
+新对话内容：
+{turns}
+
+用不超过 {max_words} 个字写出更新后的摘要。保留用户之后可能提到的名称、数字、表、筛选条件和未解决的问题。""",
+
+    Language.ZH_TW: """用下面的新對話內容更新對話摘要。
+
+目前摘要：
+{summary}
+
+新對話內容：
+{turns}
+
+用不超過 {max_words} 個字寫出更新後的摘要。保留用戶之後可能提到的名稱、數字、表、篩選條件和未解決的問題。""",
+
+    Language.TH: """ปรับปรุงสรุปการสนทนาด้วยข้อความใหม่ด้านล่าง
+
+สรุปปัจจุบัน:
+{summary}
+
+ข้อความใหม่:
+{turns}
+
+เขียนสรุปที่ปรับปรุงแล้วไม่เกิน {max_words} คำ เก็บชื่อ ตัวเลข ตาราง เงื่อนไขการกรอง และคำถามที่ยังค้างอยู่ซึ่งผู้ใช้อาจอ้างถึงอีก""",
+}
+
+# Long-document summarization prompts: one pass per chunk, then merges
+DOCUMENT_CHUNK_SUMMARY_PROMPT = {
+    Language.EN: """Summarize this part of a longer document.
+
+{heading}{text}
+
+Write at most {max_words} words in English. Keep parties, dates, amounts, obligations, figures and conclusions; leave out boilerplate.{focus}""",
+
+    Language.ZH_CN: """总结一份长文档中的这一部分。
+
+{heading}{text}
+
+用简体中文写，不超过 {max_words} 个字。保留当事方、日期、金额、义务、数字和结论，省略套话。{focus}""",
+
+    Language.ZH_TW: """總結一份長文件中的這一部分。
+
+{heading}{text}
+
+用繁體中文寫，不超過 {max_words} 個字。保留當事方、日期、金額、義務、數字和結論，省略套話。{focus}""",
+
+    Language.TH: """สรุปส่วนนี้ของเอกสารขนาดยาว
+
+{heading}{text}
+
+เขียนเป็นภาษาไทยไม่เกิน {max_words} คำ เก็บคู่สัญญา วันที่ จำนวนเงิน ข้อผูกพัน ตัวเลข และข้อสรุปไว้ ตัดข้อความทั่วไปออก{focus}""",
+}
+
+DOCUMENT_SUMMARY_MERGE_PROMPT = {
+    Language.EN: """Below are summaries of consecutive parts of one document, in order.
+
+{summaries}
+
+Merge them into one summary of at most {max_words} words in English. Keep the facts, figures and obligations; drop repetition.{focus}""",
+
+    Language.ZH_CN: """以下是同一文档中连续各部分的摘要，按顺序排列。
+
+{summaries}
+
+将它们合并为一份不超过 {max_words} 个字的简体中文摘要。保留事实、数字和义务，去掉重复内容。{focus}""",
+
+    Language.ZH_TW: """以下是同一文件中連續各部分的摘要，按順序排列。
+
+{summaries}
+
+將它們合併為一份不超過 {max_words} 個字的繁體中文摘要。保留事實、數字和義務，去掉重複內容。{focus}""",
+
+    Language.TH: """ด้านล่างคือสรุปของส่วนต่อเนื่องของเอกสารฉบับเดียว เรียงตามลำดับ
+
+{summaries}
+
+รวมเป็นสรุปเดียวเป็นภาษาไทยไม่เกิน {max_words} คำ เก็บข้อเท็จจริง ตัวเลข และข้อผูกพันไว้ ตัดส่วนที่ซ้ำออก{focus}""",
+}
+
+_SUMMARY_FOCUS = {
+    Language.EN: " Focus on: {focus}",
+    Language.ZH_CN: "重点关注：{focus}",
+    Language.ZH_TW: "重點關注：{focus}",
+    Language.TH: " เน้นที่: {focus}",
+}
+
+
+def _summary_focus(lang: Language, focus: str) -> str:
+    if not focus:
+        return ""
+    return _SUMMARY_FOCUS.get(lang, _SUMMARY_FOCUS[Language.EN]).format(focus=focus)
+
+
+def get_chunk_summary_prompt(
+    lang: Language,
+    text: str,
+    max_words: int,
+    heading: str = "",
+    focus: str = "",
+) -> str:
+    """Get the summary prompt for one chunk of a long document."""
+    template = DOCUMENT_CHUNK_SUMMARY_PROMPT.get(lang, DOCUMENT_CHUNK_SUMMARY_PROMPT[Language.EN])
+    return template.format(
+        text=text,
+        max_words=max_words,
+        heading=f"{heading}\n\n" if heading else "",
+        focus=_summary_focus(lang, focus),
+    )
+
+
+def get_summary_merge_prompt(lang: Language, summaries: str, max_words: int, focus: str = "") -> str:
+    """Get the prompt that merges partial summaries of a long document."""
+    template = DOCUMENT_SUMMARY_MERGE_PROMPT.get(lang, DOCUMENT_SUMMARY_MERGE_PROMPT[Language.EN])
+    return template.format(summaries=summaries, max_words=max_words, focus=_summary_focus(lang, focus))
+
+
+def get_conversation_summary_prompt(
+    lang: Language,
+    summary: str,
+    turns: str,
+    max_words: int,
+) -> str:
+    """Get rolling conversation summary prompt for the specified language."""
+    template = CONVERSATION_SUMMARY_PROMPT.get(lang, CONVERSATION_SUMMARY_PROMPT[Language.EN])
+    return template.format(summary=summary or "-", turns=turns, max_words=max_words)
+
+
+def get_document_qa_prompt(lang: Language, context: str, question: str) -> str:
+    """Get document question-answering prompt for the specified language."""
+    template = DOCUMENT_QA_PROMPT.get(lang, DOCUMENT_QA_PROMPT[Language.EN])
+    return template.format(context=context, question=question)
+
+
+def get_report_section_prompt(lang: Language, title: str, data: str, instruction: str) -> str:
+    """Get report section prompt for the specified language."""
+    template = REPORT_SECTION_PROMPT.get(lang, REPORT_SECTION_PROMPT[Language.EN])
+    return template.format(title=title, data=data, instruction=instruction)
+
+
+def get_synthesis_prompt(lang: Language, findings: str, question: str) -> str:
+    """Get coordinator synthesis prompt for the specified language."""
+    template = SYNTHESIS_PROMPT.get(lang, SYNTHESIS_PROMPT[Language.EN])
+    return template.format(findings=findings, question=question)
+
+
+__all__ = [
+    "SYSTEM_PROMPTS",
+    "get_system_prompt",
+    "get_sql_generation_prompt",
+    "get_document_qa_prompt",
+    "get_conversation_summary_prompt",
+    "get_chunk_summary_prompt",
+    "get_summary_merge_prompt",
+    "get_synthesis_prompt",
+    "get_report_section_prompt",
+]
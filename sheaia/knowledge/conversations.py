@@ -0,0 +1,417 @@
+"""Conversation memory with bounded, summarized context windows."""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import Callable, Literal, Optional
+
+from pydantic import BaseModel
+
+from sheaia.core.llm import BaseLLM, GenerationConfig, estimate_tokens
+from sheaia.core.sqlite import SQLiteExecutor
+from sheaia.i18n import Language
+from sheaia.i18n.prompts import get_conversation_summary_prompt, get_system_prompt
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversations (
+    id TEXT PRIMARY KEY,
+    summary TEXT NOT NULL DEFAULT '',
+    summarized_upto INTEGER NOT NULL DEFAULT 0,
+    language TEXT NOT NULL DEFAULT 'en',
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS conversation_turns (
+    conversation_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    tokens INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (conversation_id, seq)
+);
+"""
+
+_ROLE_LABELS = {"user": "User", "assistant": "Assistant"}
+
+
+class Turn(BaseModel):
+    """A single message in a conversation."""
+    
+    seq: int
+    role: Literal["user", "assistant"]
+    content: str
+    tokens: int
+    created_at: float
+
+
+class ConversationContext(BaseModel):
+    """Prompt assembled from a conversation under a token budget."""
+    
+    prompt: str
+    tokens: int
+    turns: int
+    summarized: bool
+
+
+class _Conversation:
+    """Hot-tier state: the rolling summary plus the verbatim tail."""
+    
+    __slots__ = (
+        "id", "summary", "summarized_upto", "language", "recent", "next_seq", "lock", "writers", "folding"
+    )
+    
+    def __init__(self, conversation_id: str):
+        self.id = conversation_id
+        self.summary = ""
+        self.summarized_upto = 0
+        self.language = Language.EN
+        self.recent: deque[Turn] = deque()
+        self.next_seq = 1
+        self.lock = asyncio.Lock()
+        # Appends holding or waiting for the lock; a second copy loaded
+        # while they run would hand out sequence numbers they already used.
+        self.writers = 0
+        self.folding: Optional[asyncio.Task] = None
+
+
+class ConversationStore(SQLiteExecutor):
+    """
+    SQLite-backed conversation store with an in-memory hot tier.
+
+    Only the last ``max_recent_turns`` turns are kept verbatim; older turns
+    are folded into a rolling summary in the background, a bounded chunk at a
+    time. Loading a conversation reads the summary and the verbatim tail only,
+    so context size and prefill time stay flat however long it grows.
+    """
+    
+    schema = _SCHEMA
+    pragmas = ("journal_mode=WAL", "synchronous=NORMAL")
+    
+    def __init__(
+        self,
+        path: str | Path,
+        llm: Optional[BaseLLM] = None,
+        max_recent_turns: int = 8,
+        summary_max_tokens: int = 512,
+        hot_capacity: int = 1024,
+        context_budget_tokens: int = 4096,
+        token_counter: Optional[Callable[[str], int]] = None,
+    ):
+        super().__init__(path, "sheaia-conversations")
+        self.llm = llm
+        self.max_recent_turns = max_recent_turns
+        self.summary_max_tokens = summary_max_tokens
+        self.hot_capacity = hot_capacity
+        self.context_budget_tokens = context_budget_tokens
+        self.count_tokens = token_counter or (llm.count_tokens if llm else estimate_tokens)
+        self._hot: OrderedDict[str, _Conversation] = OrderedDict()
+    
+    # -- SQLite (runs on the store thread) ---------------------------------
+    
+    def _load(self, conversation_id: str, limit: int) -> tuple[Optional[tuple], list[tuple], int]:
+        conn = self._connect()
+        header = conn.execute(
+            "SELECT summary, summarized_upto, language FROM conversations WHERE id = ?",
+            (conversation_id,),
+        ).fetchone()
+        summarized_upto = header[1] if header else 0
+        rows = conn.execute(
+            "SELECT seq, role, content, tokens, created_at FROM conversation_turns "
+            "WHERE conversation_id = ? AND seq > ? ORDER BY seq DESC LIMIT ?",
+            (conversation_id, summarized_upto, limit),
+        ).fetchall()
+        last = conn.execute(
+            "SELECT MAX(seq) FROM conversation_turns WHERE conversation_id = ?",
+            (conversation_id,),
+        ).fetchone()[0]
+        return header, rows[::-1], last or 0
+    
+    def _write_turn(self, conversation_id: str, turn: Turn, language: str) -> None:
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT INTO conversations (id, language, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET language = excluded.language, "
+                "updated_at = excluded.updated_at",
+                (conversation_id, language, turn.created_at),
+            )
+            conn.execute(
+                "INSERT INTO conversation_turns VALUES (?, ?, ?, ?, ?, ?)",
+                (conversation_id, turn.seq, turn.role, turn.content, turn.tokens, turn.created_at),
+            )
+    
+    def _write_summary(self, conversation_id: str, summary: str, summarized_upto: int) -> None:
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "UPDATE conversations SET summary = ?, summarized_upto = ?, updated_at = ? WHERE id = ?",
+                (summary, summarized_upto, time.time(), conversation_id),
+            )
+    
+    def _backlog(self, conversation_id: str, after: int, before: int, limit: int) -> list[tuple]:
+        return self._connect().execute(
+            "SELECT seq, role, content, tokens, created_at FROM conversation_turns "
+            "WHERE conversation_id = ? AND seq > ? AND seq < ? ORDER BY seq LIMIT ?",
+            (conversation_id, after, before, limit),
+        ).fetchall()
+    
+    def _history(self, conversation_id: str) -> list[tuple]:
+        return self._connect().execute(
+            "SELECT seq, role, content, tokens, created_at FROM conversation_turns "
+            "WHERE conversation_id = ? ORDER BY seq",
+            (conversation_id,),
+        ).fetchall()
+    
+    # -- Hot tier ----------------------------------------------------------
+    
+    async def _get(self, conversation_id: str) -> _Conversation:
+        conversation = self._hot.get(conversation_id)
+        if conversation is not None:
+            self._hot.move_to_end(conversation_id)
+            return conversation
+        
+        # Bound the read: anything beyond twice the verbatim window is
+        # already due for summarization and is never put in a prompt. If
+        # folding fell behind, the turns between the summary and this tail
+        # are folded from SQLite in the background.
+        header, rows, last_seq = await self._run(
+            self._load, conversation_id, self.max_recent_turns * 2
+        )
+        
+        # Another coroutine may have loaded it while we were waiting.
+        conversation = self._hot.get(conversation_id)
+        if conversation is not None:
+            return conversation
+        
+        conversation = _Conversation(conversation_id)
+        if header:
+            conversation.summary, conversation.summarized_upto = header[0], header[1]
+            conversation.language = Language.from_string(header[2])
+        conversation.recent.extend(
+            Turn(seq=r[0], role=r[1], content=r[2], tokens=r[3], created_at=r[4]) for r in rows
+        )
+        conversation.next_seq = last_seq + 1
+        
+        self._hot[conversation_id] = conversation
+        while len(self._hot) > self.hot_capacity:
+            # Writes go through to SQLite, so eviction never loses data.
+            _, evicted = self._hot.popitem(last=False)
+            if evicted.writers or (evicted.folding and not evicted.folding.done()):
+                self._hot[evicted.id] = evicted
+                break
+        if self._behind(conversation):
+            conversation.folding = asyncio.create_task(self._fold(conversation))
+        return conversation
+    
+    def _backlogged(self, conversation: _Conversation) -> bool:
+        """Whether turns between the summary and the verbatim tail are not loaded."""
+        first = conversation.recent[0].seq if conversation.recent else conversation.next_seq
+        return first > conversation.summarized_upto + 1
+    
+    def _behind(self, conversation: _Conversation) -> bool:
+        return len(conversation.recent) > self.max_recent_turns or self._backlogged(conversation)
+    
+    # -- Public API --------------------------------------------------------
+    
+    async def append(
+        self,
+        conversation_id: str,
+        role: Literal["user", "assistant"],
+        content: str,
+        language: Language = Language.EN,
+    ) -> Turn:
+        """Record a turn and schedule summarization of overflowing turns."""
+        conversation = await self._get(conversation_id)
+        conversation.writers += 1
+        try:
+            async with conversation.lock:
+                turn = Turn(
+                    seq=conversation.next_seq,
+                    role=role,
+                    content=content,
+                    tokens=self.count_tokens(content),
+                    created_at=time.time(),
+                )
+                conversation.next_seq += 1
+                conversation.language = language
+                await self._run(self._write_turn, conversation_id, turn, language.value)
+                conversation.recent.append(turn)
+        finally:
+            conversation.writers -= 1
+        
+        if self._behind(conversation) and (conversation.folding is None or conversation.folding.done()):
+            conversation.folding = asyncio.create_task(self._fold(conversation))
+        return turn
+    
+    async def _fold(self, conversation: _Conversation) -> None:
+        """
+        Fold turns beyond the verbatim window into the rolling summary.
+
+        Only contiguous turns are folded: turns that were never loaded (the
+        backlog left when an earlier fold failed or the process stopped) are
+        read back from SQLite and folded first, in window-sized chunks.
+        """
+        while self._behind(conversation):
+            backlogged = self._backlogged(conversation)
+            if backlogged:
+                first = conversation.recent[0].seq if conversation.recent else conversation.next_seq
+                rows = await self._run(
+                    self._backlog, conversation.id, conversation.summarized_upto, first, self.max_recent_turns
+                )
+                overflow = [Turn(seq=r[0], role=r[1], content=r[2], tokens=r[3], created_at=r[4]) for r in rows]
+            else:
+                overflow = list(conversation.recent)[: len(conversation.recent) - self.max_recent_turns]
+            if not overflow:
+                # Nothing stored in the gap (a turn whose write failed).
+                conversation.summarized_upto = first - 1
+                continue
+            try:
+                summary = await self._summarize(conversation.summary, overflow, conversation.language)
+            except Exception:
+                logger.exception(f"Failed to summarize conversation {conversation.id}")
+                return
+            
+            async with conversation.lock:
+                if not backlogged:
+                    for _ in overflow:
+                        conversation.recent.popleft()
+                conversation.summary = summary
+                conversation.summarized_upto = overflow[-1].seq
+                await self._run(self._write_summary, conversation.id, summary, overflow[-1].seq)
+    
+    async def _summarize(self, summary: str, turns: list[Turn], language: Language) -> str:
+        transcript = "\n".join(f"{_ROLE_LABELS[t.role]}: {t.content}" for t in turns)
+        if self.llm is not None:
+            prompt = get_conversation_summary_prompt(
+                language, summary, transcript, max_words=self.summary_max_tokens * 3 // 4
+            )
+            response = await self.llm.generate(
+                prompt,
+                GenerationConfig(max_tokens=self.summary_max_tokens, temperature=0.2),
+            )
+            return self._clip(response.text.strip())
+        
+        # Without a model, keep the first line of each turn as an extractive summary.
+        lines = [f"{_ROLE_LABELS[t.role]}: {t.content.splitlines()[0][:200]}" for t in turns if t.content]
+        return self._clip("\n".join(filter(None, [summary, *lines])))
+    
+    def _clip(self, summary: str) -> str:
+        """Drop the oldest summary lines until it fits its token budget."""
+        lines = summary.splitlines()
+        while len(lines) > 1 and self.count_tokens("\n".join(lines)) > self.summary_max_tokens:
+            lines.pop(0)
+        return "\n".join(lines)
+    
+    async def build_context(
+        self,
+        conversation_id: str,
+        message: str,
+        language: Language = Language.EN,
+        budget_tokens: Optional[int] = None,
+    ) -> ConversationContext:
+        """
+        Build a prompt for the next reply that fits within the token budget.
+
+        The system prompt and new message always go in; the rolling summary
+        and then the most recent turns (newest first) fill what is left.
+        """
+        budget_tokens = budget_tokens or self.context_budget_tokens
+        conversation = await self._get(conversation_id)
+        system = get_system_prompt(language)
+        user = f"User: {message}\nAssistant:"
+        remaining = budget_tokens - self.count_tokens(system) - self.count_tokens(user)
+        
+        summary_block = ""
+        if conversation.summary:
+            summary_block = f"Conversation summary:\n{conversation.summary}"
+            summary_tokens = self.count_tokens(summary_block)
+            if summary_tokens <= remaining:
+                remaining -= summary_tokens
+            else:
+                summary_block = ""
+        
+        history: list[str] = []
+        for turn in reversed(conversation.recent):
+            line = f"{_ROLE_LABELS[turn.role]}: {turn.content}"
+            cost = turn.tokens + 2
+            if cost > remaining:
+                break
+            history.append(line)
+            remaining -= cost
+        history.reverse()
+        
+        prompt = "\n\n".join(filter(None, [system, summary_block, "\n".join(history), user]))
+        return ConversationContext(
+            prompt=prompt,
+            tokens=budget_tokens - remaining,
+            turns=len(history),
+            summarized=bool(summary_block),
+        )
+    
+    async def history(self, conversation_id: str) -> list[Turn]:
+        """Return the full verbatim history (for export, not for prompts)."""
+        rows = await self._run(self._history, conversation_id)
+        return [Turn(seq=r[0], role=r[1], content=r[2], tokens=r[3], created_at=r[4]) for r in rows]
+    
+    async def summary(self, conversation_id: str) -> str:
+        """Return the current rolling summary."""
+        return (await self._get(conversation_id)).summary
+    
+    async def flush(self) -> None:
+        """Wait for pending background summarization."""
+        pending = [c.folding for c in self._hot.values() if c.folding and not c.folding.done()]
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+    
+    async def close(self) -> None:
+        """Finish pending work and close the database."""
+        await self.flush()
+        # Waits for queued SQLite work; keep that off the event loop.
+        await asyncio.to_thread(self._shutdown)
+
+
+# Global conversation store (lazy initialized)
+_store_instance: Optional[ConversationStore] = None
+
+
+def get_conversation_store() -> ConversationStore:
+    """Get the global conversation store."""
+    global _store_instance
+    
+    if _store_instance is None:
+        from sheaia.config import get_settings
+        from sheaia.core.llm import get_llm
+        
+        settings = get_settings()
+        _store_instance = ConversationStore(
+            path=settings.database.sqlite_path,
+            llm=get_llm(),
+            max_recent_turns=settings.memory.max_recent_turns,
+            summary_max_tokens=settings.memory.summary_max_tokens,
+            hot_capacity=settings.memory.hot_capacity,
+            context_budget_tokens=settings.memory.context_budget_tokens,
+        )
+    
+    return _store_instance
+
+
+async def close_conversation_store() -> None:
+    """Close the global conversation store if it was created."""
+    global _store_instance
+    
+    if _store_instance is not None:
+        await _store_instance.close()
+        _store_instance = None
+
+
+__all__ = [
+    "Turn",
+    "ConversationContext",
+    "ConversationStore",
+    "get_conversation_store",
+    "close_conversation_store",
+]
@@ -0,0 +1,746 @@
+"""
+Entity resolution - linking the same customer, supplier or part across systems.
+
+CRM, ERP and MES name the same company differently ("Acme Co., Ltd",
+"ACME有限公司", "Acme Corp."). Comparing every record with every other is
+O(n²) - 10¹² pairs for a million records per side - so candidates come from
+blocking indexes instead:
+
+- MinHash LSH over character trigrams of normalized names;
+- an IVF nearest-neighbour index over name embeddings (``embed_documents``),
+  which catches translations and transliterations that share no characters;
+- exact buckets of shared identifiers (tax or registration codes).
+
+Candidate pairs are scored in vectorized chunks, matches are merged with a
+union-find, and everything is incremental: records added by a later sync
+are only compared against what they collide with.
+"""
+
+import asyncio
+import logging
+import math
+import re
+import threading
+import time
+import unicodedata
+from typing import Optional, Sequence
+
+import numpy as np
+from pydantic import BaseModel
+
+from sheaia.core.embedding import BaseEmbedding
+
+logger = logging.getLogger(__name__)
+
+# Legal forms stripped before comparing names.
+_LEGAL_WORDS = re.compile(
+    r"\b(?:co|company|corp|corporation|inc|incorporated|ltd|limited|llc|plc|gmbh|ag|sa|pte|pcl|"
+    r"public|bhd|sdn|kk|the)\b"
+)
+# Matched after NFKC, which splits Thai SARA AM, so the pattern is normalized too.
+_LEGAL_CJK_THAI = re.compile(unicodedata.normalize(
+    "NFKC",
+    "股份有限公司|有限责任公司|有限責任公司|有限公司|株式会社|公司|บริษัท|จำกัด|มหาชน|ห้างหุ้นส่วน",
+))
+_PUNCTUATION = re.compile(r"[^\w\u0e00-\u0e7f]+")
+_CODE_NOISE = re.compile(r"[^0-9a-z]+")
+
+# Names longer than this are compared on their first characters only.
+_MAX_NAME_CHARS = 48
+# Shingle and band hashing constants (odd, 64-bit).
+_SHINGLE_MIX = np.array([0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9], dtype=np.uint64)
+_BAND_MIX = np.uint64(0xFF51AFD7ED558CCD)
+# Pairs scored per chunk, bounding scoring memory.
+_SCORE_CHUNK = 1 << 19
+# Records resolved per step of a large ``add``, bounding candidate-pair memory.
+_ADD_BATCH = 100_000
+
+
+def normalize_name(name: str) -> str:
+    """Casefolded name without punctuation or legal forms (Co., Ltd, 有限公司, จำกัด)."""
+    text = unicodedata.normalize("NFKC", name).casefold()
+    text = _LEGAL_CJK_THAI.sub(" ", text)
+    text = _PUNCTUATION.sub(" ", text)
+    text = _LEGAL_WORDS.sub(" ", text)
+    return " ".join(text.split())
+
+
+def normalize_code(code: Optional[str]) -> str:
+    """Identifier with case, spaces and separators removed."""
+    if not code:
+        return ""
+    return _CODE_NOISE.sub("", unicodedata.normalize("NFKC", str(code)).casefold())
+
+
+def _stable_hash(values: Sequence[str]) -> np.ndarray:
+    """64-bit hashes of strings, 0 for empty ones (numpy, not per-process ``hash``)."""
+    if not len(values):
+        return np.zeros(0, dtype=np.uint64)
+    width = max(max(len(v) for v in values), 1)
+    points = np.array(values, dtype=f"<U{width}").view(np.uint32).reshape(len(values), width).astype(np.uint64)
+    hashes = np.full(len(values), 0xCBF29CE484222325, dtype=np.uint64)
+    for column in points.T:
+        hashes = (hashes ^ column) * np.uint64(0x100000001B3)
+    hashes |= np.uint64(1)
+    hashes[points[:, 0] == 0] = 0
+    return hashes
+
+
+class MinHasher:
+    """
+    MinHash signatures of character trigrams, vectorized over a batch.
+
+    Names are laid out as a UTF-32 matrix, so shingling and hashing are
+    array operations rather than a Python loop per name. Each of the
+    ``num_perm`` permutations is a multiply-shift hash.
+    """
+    
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self._a = rng.integers(1, 2**63, num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2**63, num_perm, dtype=np.uint64)
+    
+    def signatures(self, names: Sequence[str], chunk: int = 50_000) -> np.ndarray:
+        """``(len(names), num_perm)`` uint32 signatures; empty names get all-max rows."""
+        out = np.empty((len(names), self.num_perm), dtype=np.uint32)
+        for start in range(0, len(names), chunk):
+            out[start:start + chunk] = self._chunk(names[start:start + chunk])
+        return out
+    
+    def _chunk(self, names: Sequence[str]) -> np.ndarray:
+        padded = [f" {name[:_MAX_NAME_CHARS]} " if name else "" for name in names]
+        width = max(max((len(p) for p in padded), default=0), 3)
+        points = np.array(padded, dtype=f"<U{width}").view(np.uint32).reshape(len(padded), width).astype(np.uint64)
+        shingles = points[:, :-2] * _SHINGLE_MIX[0] + points[:, 1:-1] * _SHINGLE_MIX[1] + points[:, 2:] * _SHINGLE_MIX[2]
+        lengths = np.fromiter((len(p) for p in padded), dtype=np.int64, count=len(padded))
+        invalid = np.arange(width - 2)[None, :] >= (lengths - 2)[:, None]
+        signatures = np.empty((len(names), self.num_perm), dtype=np.uint32)
+        for k in range(self.num_perm):
+            hashed = (shingles * self._a[k] + self._b[k]) >> np.uint64(32)
+            hashed[invalid] = 0xFFFFFFFF
+            signatures[:, k] = hashed.min(axis=1)
+        return signatures
+
+
+def band_keys(signatures: np.ndarray, rows: int) -> np.ndarray:
+    """
+    LSH band keys: one 64-bit hash per band of ``rows`` signature values.
+
+    Records sharing any band key are candidates; with ``b`` bands of ``r``
+    rows a pair of Jaccard similarity ``s`` collides with probability
+    ``1 - (1 - s**r)**b``. Rows of all-max signatures (empty names) get 0,
+    meaning no key.
+    """
+    count, perms = signatures.shape
+    bands = perms // rows
+    values = signatures[:, :bands * rows].astype(np.uint64).reshape(count, bands, rows)
+    keys = np.zeros((count, bands), dtype=np.uint64)
+    for r in range(rows):
+        keys = (keys ^ values[:, :, r]) * _BAND_MIX + np.uint64(r + 1)
+    keys ^= np.arange(bands, dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+    keys |= np.uint64(1)
+    keys[(signatures == 0xFFFFFFFF).all(axis=1)] = 0
+    return keys
+
+
+def _distinct(values: np.ndarray) -> np.ndarray:
+    """Sorted distinct values; a plain sort is faster than ``np.unique`` on large integer arrays."""
+    values = np.sort(values)
+    return values[np.r_[True, values[1:] != values[:-1]]] if len(values) else values
+
+
+def _expand(query: np.ndarray, lo: np.ndarray, hi: np.ndarray, ids: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Pairs of each ``query[i]`` with ``ids[lo[i]:hi[i]]``."""
+    counts = hi - lo
+    total = int(counts.sum())
+    if not total:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    shift = np.repeat(lo - (np.cumsum(counts) - counts), counts)
+    return np.repeat(query, counts), ids[np.arange(total) + shift]
+
+
+class BandIndex:
+    """
+    Records by blocking key, one sorted key array per band.
+
+    New records are looked up with binary searches and merged in with
+    ``np.insert``, so a sync adding ``n`` records to an index of ``N`` costs
+    ``O(n log N + N)`` per band with no re-sort. Buckets larger than
+    ``max_bucket`` (keys shared by very common names) are skipped.
+    """
+    
+    def __init__(self, bands: int, max_bucket: int = 20):
+        self.max_bucket = max_bucket
+        self.keys = [np.zeros(0, dtype=np.uint64) for _ in range(bands)]
+        self.ids = [np.zeros(0, dtype=np.int64) for _ in range(bands)]
+    
+    def add(self, keys: np.ndarray, ids: np.ndarray, within: bool = True) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Insert ``(len(ids), bands)`` keys and return candidate pairs (new, other).
+
+        ``within=False`` skips pairs inside the batch, e.g. when the batch
+        comes from one source and only cross-source pairs matter.
+        """
+        firsts, seconds = [], []
+        for band in range(len(self.keys)):
+            column = keys[:, band]
+            valid = column != 0
+            column, members = column[valid], ids[valid]
+            order = np.argsort(column, kind="stable")
+            column, members = column[order], members[order]
+            
+            # Against records already indexed.
+            existing = self.keys[band]
+            lo = np.searchsorted(existing, column, "left")
+            hi = np.searchsorted(existing, column, "right")
+            small = (hi - lo) <= self.max_bucket
+            first, second = _expand(members[small], lo[small], hi[small], self.ids[band])
+            firsts.append(first)
+            seconds.append(second)
+            
+            # Within the batch: equal keys are adjacent after sorting.
+            if within and len(column) > 1:
+                starts = np.flatnonzero(np.r_[True, column[1:] != column[:-1]])
+                lengths = np.diff(np.r_[starts, len(column)])
+                usable = np.repeat((lengths > 1) & (lengths <= self.max_bucket), lengths)
+                for gap in range(1, min(int(lengths.max()), self.max_bucket + 1)):
+                    same = (column[gap:] == column[:-gap]) & usable[gap:]
+                    if not same.any():
+                        break
+                    firsts.append(members[gap:][same])
+                    seconds.append(members[:-gap][same])
+            
+            self.keys[band] = np.insert(existing, lo, column)
+            self.ids[band] = np.insert(self.ids[band], lo, members)
+        return np.concatenate(firsts), np.concatenate(seconds)
+
+
+class IVFIndex:
+    """
+    Inverted-file nearest-neighbour index over normalized embeddings.
+
+    Vectors are assigned to the nearest of ``nlist`` k-means centroids; a
+    query searches the ``nprobe`` lists nearest to it, so each search scans
+    about ``nprobe / nlist`` of the records. Centroids are trained on the
+    first batch and retrained (reassigning every vector) when the index has
+    grown ``retrain_growth`` times since.
+    """
+    
+    def __init__(self, nprobe: int = 4, retrain_growth: int = 8, seed: int = 0):
+        self.nprobe = nprobe
+        self.retrain_growth = retrain_growth
+        self._rng = np.random.default_rng(seed)
+        self.vectors = np.zeros((0, 0), dtype=np.float32)
+        self.centroids = np.zeros((0, 0), dtype=np.float32)
+        self.assign = np.zeros(0, dtype=np.int64)
+        self._trained_at = 0
+    
+    def __len__(self) -> int:
+        return len(self.vectors)
+    
+    def _nearest(self, vectors: np.ndarray, count: int = 1, chunk: int = 65536) -> np.ndarray:
+        out = np.empty((len(vectors), count), dtype=np.int64)
+        for start in range(0, len(vectors), chunk):
+            scores = vectors[start:start + chunk] @ self.centroids.T
+            if count == 1:
+                out[start:start + chunk, 0] = scores.argmax(axis=1)
+            else:
+                out[start:start + chunk] = np.argpartition(-scores, count - 1, axis=1)[:, :count]
+        return out
+    
+    def _train(self) -> None:
+        size = len(self.vectors)
+        nlist = max(1, min(int(math.sqrt(size)), 4096))
+        sample = self.vectors[self._rng.choice(size, min(size, nlist * 64), replace=False)]
+        self.centroids = sample[self._rng.choice(len(sample), nlist, replace=False)].copy()
+        for _ in range(8):
+            labels = self._nearest(sample)[:, 0]
+            sums = np.zeros_like(self.centroids)
+            np.add.at(sums, labels, sample)
+            counts = np.bincount(labels, minlength=nlist)
+            moved = counts > 0
+            self.centroids[moved] = sums[moved] / np.linalg.norm(sums[moved], axis=1, keepdims=True)
+        self.assign = self._nearest(self.vectors)[:, 0]
+        self._trained_at = size
+        logger.info(f"Trained entity IVF index: {nlist} lists over {size} vectors")
+    
+    def add(self, vectors: np.ndarray) -> None:
+        vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        vectors = vectors.astype(np.float32, copy=False)
+        self.vectors = vectors if not len(self.vectors) else np.concatenate([self.vectors, vectors])
+        if not self._trained_at or len(self.vectors) >= self._trained_at * self.retrain_growth:
+            self._train()
+        else:
+            self.assign = np.concatenate([self.assign, self._nearest(vectors)[:, 0]])
+    
+    def search(
+        self,
+        queries: np.ndarray,
+        k: int,
+        exclude: Optional[np.ndarray] = None,
+        groups: Optional[np.ndarray] = None,
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Up to ``k`` neighbours per probed list for indexed records ``queries``.
+
+        ``groups`` (one label per record) excludes neighbours with the
+        query's own label, e.g. records from the same source system.
+
+        Returns:
+            Query ids, neighbour ids and cosine similarities
+        """
+        probes = self._nearest(self.vectors[queries], min(self.nprobe, len(self.centroids)))
+        order = np.argsort(self.assign, kind="stable")
+        starts = np.searchsorted(self.assign[order], np.arange(len(self.centroids) + 1))
+        flat_lists = probes.ravel()
+        flat_queries = np.repeat(queries, probes.shape[1])
+        by_list = np.argsort(flat_lists, kind="stable")
+        flat_lists, flat_queries = flat_lists[by_list], flat_queries[by_list]
+        bounds = np.searchsorted(flat_lists, np.arange(len(self.centroids) + 1))
+        
+        found_q, found_n, found_s = [], [], []
+        for cell in np.flatnonzero(np.diff(bounds)):
+            members = order[starts[cell]:starts[cell + 1]]
+            asking = flat_queries[bounds[cell]:bounds[cell + 1]]
+            if not len(members):
+                continue
+            scores = self.vectors[asking] @ self.vectors[members].T
+            scores[asking[:, None] == members[None, :]] = -np.inf
+            if groups is not None:
+                scores[groups[asking][:, None] == groups[members][None, :]] = -np.inf
+            take = min(k, len(members))
+            best = np.argpartition(-scores, take - 1, axis=1)[:, :take]
+            best_scores = np.take_along_axis(scores, best, axis=1)
+            keep = np.isfinite(best_scores)
+            found_q.append(np.repeat(asking, take).reshape(-1, take)[keep])
+            found_n.append(members[best][keep])
+            found_s.append(best_scores[keep])
+        if not found_q:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, np.zeros(0, dtype=np.float32)
+        return np.concatenate(found_q), np.concatenate(found_n), np.concatenate(found_s)
+
+
+class UnionFind:
+    """
+    Disjoint sets over record indices, with batched unions.
+
+    ``union`` takes arrays of edges and hooks roots in vectorized rounds,
+    always under the smaller index, so each cluster's root is its oldest
+    record and stays the same as later records join.
+    """
+    
+    def __init__(self, size: int = 0):
+        self.parent = np.arange(size, dtype=np.int64)
+    
+    def __len__(self) -> int:
+        return len(self.parent)
+    
+    def copy(self) -> "UnionFind":
+        clone = UnionFind()
+        clone.parent = self.parent.copy()
+        return clone
+    
+    def grow(self, size: int) -> None:
+        if size > len(self.parent):
+            self.parent = np.concatenate([self.parent, np.arange(len(self.parent), size, dtype=np.int64)])
+    
+    def _compress(self) -> None:
+        while True:
+            grand = self.parent[self.parent]
+            if np.array_equal(grand, self.parent):
+                return
+            self.parent = grand
+    
+    def union(self, a: np.ndarray, b: np.ndarray) -> int:
+        """Merge the sets of each ``a[i]`` and ``b[i]``; returns the number of merges."""
+        if not len(a):
+            return 0
+        self._compress()
+        touched = np.concatenate([a, b])
+        before = len(_distinct(self.parent[touched]))
+        while True:
+            root_a, root_b = self.parent[a], self.parent[b]
+            differ = root_a != root_b
+            if not differ.any():
+                break
+            a, b = a[differ], b[differ]
+            np.minimum.at(self.parent, np.maximum(root_a[differ], root_b[differ]), np.minimum(root_a[differ], root_b[differ]))
+            self._compress()
+        return before - len(_distinct(self.parent[touched]))
+    
+    def roots(self) -> np.ndarray:
+        """Root (oldest record) of every record."""
+        self._compress()
+        return self.parent
+
+
+class ResolveStats(BaseModel):
+    """What one ``add`` did."""
+    
+    added: int
+    updated: int = 0
+    candidates: dict[str, int] = {}
+    scored: int = 0
+    matched: int = 0
+    linked: int = 0
+    merged: int = 0
+    elapsed: float = 0.0
+    
+    def merge(self, other: "ResolveStats") -> "ResolveStats":
+        """Totals of two steps of one ``add``."""
+        candidates = dict(self.candidates)
+        for name, count in other.candidates.items():
+            candidates[name] = candidates.get(name, 0) + count
+        return ResolveStats(
+            added=self.added + other.added,
+            updated=self.updated + other.updated,
+            candidates=candidates,
+            scored=self.scored + other.scored,
+            matched=self.matched + other.matched,
+            linked=self.linked + other.linked,
+            merged=self.merged + other.merged,
+        )
+
+
+class EntityResolver:
+    """
+    Incremental cross-system entity resolution.
+
+    Each ``add`` blocks the new records against everything indexed (and
+    each other), scores the candidate pairs and merges matches into
+    clusters. A pair's score is the weighted mean of its MinHash name
+    similarity and, with an embedding model, its embedding cosine; equal
+    shared codes force a match and different ones rule it out. By default
+    only records from different sources are linked, and a new record links
+    only to its best match in each other source, so one loose match cannot
+    chain unrelated clusters together.
+
+    Memory is dominated by signatures (4 bytes × ``num_perm`` per record),
+    band arrays (12 bytes per band per record) and, with embeddings, the
+    float32 vectors.
+
+    Lookups (``entity_of``, ``members``, ``mapping``) may run while an
+    ``add`` is in progress on its worker thread: each batch builds its
+    records, source ids, clusters and latest-version map aside and
+    publishes them together at the end, so a lookup sees either the
+    state before the batch or after it.
+
+    Example:
+        resolver = EntityResolver(embedding=get_embedding())
+        await resolver.add("crm", crm_ids, crm_names)
+        await resolver.add("erp", erp_ids, erp_names, codes=erp_tax_ids)
+        resolver.entity_of("erp", "K-1042")       # "crm:C-77"
+        resolver.mapping("crm", "erp")             # [("C-77", "K-1042"), ...]
+    """
+    
+    def __init__(
+        self,
+        embedding: Optional[BaseEmbedding] = None,
+        threshold: float = 0.7,
+        num_perm: int = 64,
+        band_rows: int = 4,
+        max_bucket: int = 20,
+        neighbors: int = 3,
+        nprobe: int = 4,
+        name_weight: float = 0.5,
+        embedding_weight: float = 0.5,
+        cross_source_only: bool = True,
+        best_only: bool = True,
+    ):
+        self.embedding = embedding
+        self.threshold = threshold
+        self.band_rows = band_rows
+        self.neighbors = neighbors
+        self.name_weight = name_weight
+        self.embedding_weight = embedding_weight if embedding is not None else 0.0
+        self.cross_source_only = cross_source_only
+        self.best_only = best_only
+        self.hasher = MinHasher(num_perm)
+        self.names_index = BandIndex(num_perm // band_rows, max_bucket)
+        self.codes_index = BandIndex(1, max_bucket)
+        self.vectors = IVFIndex(nprobe) if embedding is not None else None
+        self.clusters = UnionFind()
+        self.sources: list[str] = []
+        self.ids: list[str] = []
+        self.names: list[str] = []
+        self._source = np.zeros(0, dtype=np.int32)
+        self._signatures = np.zeros((0, num_perm), dtype=np.uint32)
+        self._codes = np.zeros(0, dtype=np.uint64)
+        self._latest: dict[str, dict[str, int]] = {}
+        self._lock = asyncio.Lock()
+        self._published = threading.Lock()
+    
+    @classmethod
+    def from_settings(cls, settings, embedding: Optional[BaseEmbedding] = None) -> "EntityResolver":
+        """Create a resolver using ``Settings.entities``."""
+        entities = settings.entities
+        if embedding is None and entities.use_embeddings:
+            from sheaia.core.embedding import get_embedding
+            
+            embedding = get_embedding()
+        return cls(
+            embedding=embedding,
+            threshold=entities.threshold,
+            num_perm=entities.num_perm,
+            band_rows=entities.band_rows,
+            max_bucket=entities.max_bucket,
+            neighbors=entities.neighbors,
+        )
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    async def add(
+        self,
+        source: str,
+        ids: Sequence[str],
+        names: Sequence[str],
+        codes: Optional[Sequence[Optional[str]]] = None,
+    ) -> ResolveStats:
+        """
+        Index records from one source and link them to matching entities.
+
+        Records already present with the same name are skipped; a changed
+        name adds a new version, kept in the record's cluster.
+
+        Args:
+            source: System the records come from ("crm", "erp", ...)
+            ids: Record ids within the source
+            names: Display names
+            codes: Optional shared identifiers (tax or registration numbers)
+
+        Returns:
+            Counts of candidates, matches and merges
+        """
+        async with self._lock:
+            started = time.perf_counter()
+            known = self._latest.get(source, {})
+            codes = codes if codes is not None else [None] * len(ids)
+            fresh, previous = [], []
+            for i, (record_id, name) in enumerate(zip(ids, names)):
+                record_id = str(record_id)
+                index = known.get(record_id)
+                if index is None or self.names[index] != name:
+                    fresh.append(i)
+                    previous.append(-1 if index is None else index)
+            if not fresh:
+                return ResolveStats(added=0, elapsed=time.perf_counter() - started)
+            
+            stats = ResolveStats(added=0)
+            for start in range(0, len(fresh), _ADD_BATCH):
+                batch = fresh[start:start + _ADD_BATCH]
+                normalized = [normalize_name(names[i]) for i in batch]
+                vectors = None
+                if self.embedding is not None:
+                    vectors = await asyncio.to_thread(self._embed, normalized)
+                stats = stats.merge(await asyncio.to_thread(
+                    self._add,
+                    source,
+                    [str(ids[i]) for i in batch],
+                    [names[i] for i in batch],
+                    normalized,
+                    [normalize_code(codes[i]) for i in batch],
+                    np.asarray(previous[start:start + _ADD_BATCH], dtype=np.int64),
+                    vectors,
+                ))
+            stats.elapsed = time.perf_counter() - started
+            logger.info(
+                f"Entity resolution: {stats.added} {source} records, {stats.scored} candidate pairs, "
+                f"{stats.matched} matches in {stats.elapsed:.2f}s"
+            )
+            return stats
+    
+    def _embed(self, names: list[str], chunk: int = 8192) -> np.ndarray:
+        parts = [
+            np.asarray(self.embedding.embed_documents(names[start:start + chunk]), dtype=np.float32)
+            for start in range(0, len(names), chunk)
+        ]
+        return np.concatenate(parts)
+    
+    def _add(
+        self,
+        source: str,
+        ids: list[str],
+        names: list[str],
+        normalized: list[str],
+        codes: list[str],
+        previous: np.ndarray,
+        vectors: Optional[np.ndarray],
+    ) -> ResolveStats:
+        # Lookup state is built aside and published at the end; signatures,
+        # codes and the candidate indexes are only read by adds and scoring.
+        first = len(self.ids)
+        total = first + len(ids)
+        new = np.arange(first, total, dtype=np.int64)
+        if source not in self.sources:
+            self.sources.append(source)
+        source_id = self.sources.index(source)
+        known = dict(self._latest.get(source, {}))
+        for index, record_id in zip(new, ids):
+            known[record_id] = int(index)
+        record_sources = np.concatenate([self._source, np.full(len(ids), source_id, dtype=np.int32)])
+        signatures = self.hasher.signatures(normalized)
+        self._signatures = np.concatenate([self._signatures, signatures])
+        code_hashes = _stable_hash(codes)
+        self._codes = np.concatenate([self._codes, code_hashes])
+        clusters = self.clusters.copy()
+        clusters.grow(total)
+        
+        candidates = {}
+        pairs = []
+        within = not self.cross_source_only
+        a, b = self.names_index.add(band_keys(signatures, self.band_rows), new, within)
+        candidates["minhash"] = len(a)
+        pairs.append((a, b))
+        a, b = self.codes_index.add(code_hashes[:, None], new, within)
+        candidates["code"] = len(a)
+        pairs.append((a, b))
+        if self.vectors is not None and vectors is not None:
+            self.vectors.add(vectors)
+            groups = record_sources if self.cross_source_only else None
+            a, b, _ = self.vectors.search(new, self.neighbors, groups=groups)
+            candidates["embedding"] = len(a)
+            pairs.append((a, b))
+        
+        a = np.concatenate([p[0] for p in pairs])
+        b = np.concatenate([p[1] for p in pairs])
+        if self.cross_source_only:
+            keep = record_sources[a] != record_sources[b]
+            a, b = a[keep], b[keep]
+        if len(a):
+            low, high = np.minimum(a, b), np.maximum(a, b)
+            unique = _distinct(low * np.int64(total) + high)
+            a, b = unique // total, unique % total
+        
+        scored = len(a)
+        matched_a, matched_b, matched_score = [a[:0]], [b[:0]], [np.zeros(0)]
+        for start in range(0, len(a), _SCORE_CHUNK):
+            chunk_a, chunk_b = a[start:start + _SCORE_CHUNK], b[start:start + _SCORE_CHUNK]
+            score = self.score(chunk_a, chunk_b)
+            match = score >= self.threshold
+            matched_a.append(chunk_a[match])
+            matched_b.append(chunk_b[match])
+            matched_score.append(score[match])
+        a, b, score = np.concatenate(matched_a), np.concatenate(matched_b), np.concatenate(matched_score)
+        matched = len(a)
+        if self.best_only and len(a):
+            # ``b`` is always the newer record; keep its best match per other source.
+            group = b * len(self.sources) + record_sources[a]
+            order = np.lexsort((-score, group))
+            best = np.r_[True, group[order][1:] != group[order][:-1]]
+            a, b = a[order][best], b[order][best]
+        
+        # A renamed record stays linked to its earlier versions.
+        renamed = previous >= 0
+        edges_a, edges_b = np.concatenate([a, new[renamed]]), np.concatenate([b, previous[renamed]])
+        merged = clusters.union(edges_a, edges_b)
+        
+        with self._published:
+            self.ids = self.ids + ids
+            self.names = self.names + names
+            self._source = record_sources
+            self.clusters = clusters
+            self._latest = {**self._latest, source: known}
+        return ResolveStats(
+            added=len(ids),
+            updated=int(renamed.sum()),
+            candidates=candidates,
+            scored=scored,
+            matched=matched,
+            linked=len(a),
+            merged=merged,
+        )
+    
+    def score(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """Match scores of record pairs, vectorized; 1.0 for equal codes, 0.0 for different ones."""
+        name = (self._signatures[a] == self._signatures[b]).mean(axis=1)
+        score = name * self.name_weight
+        if self.embedding_weight and self.vectors is not None:
+            vectors = self.vectors.vectors
+            cosine = np.einsum("ij,ij->i", vectors[a], vectors[b])
+            score = score + np.clip(cosine, 0.0, 1.0) * self.embedding_weight
+        score = score / (self.name_weight + self.embedding_weight)
+        code_a, code_b = self._codes[a], self._codes[b]
+        both = (code_a != 0) & (code_b != 0)
+        score[both & (code_a == code_b)] = 1.0
+        score[both & (code_a != code_b)] = 0.0
+        return score
+    
+    def _view(self) -> tuple[list[str], np.ndarray, UnionFind, dict[str, dict[str, int]]]:
+        """Consistent ids, source ids, clusters and latest versions, as last published."""
+        with self._published:
+            return self.ids, self._source, self.clusters, self._latest
+    
+    @staticmethod
+    def _index(latest: dict[str, dict[str, int]], source: str, record_id: str) -> int:
+        index = latest.get(source, {}).get(str(record_id))
+        if index is None:
+            raise KeyError(f"Unknown record {source}:{record_id}")
+        return index
+    
+    def entity_of(self, source: str, record_id: str) -> str:
+        """Entity key of a record: ``source:id`` of the oldest record in its cluster."""
+        ids, record_sources, clusters, latest = self._view()
+        root = int(clusters.roots()[self._index(latest, source, record_id)])
+        return f"{self.sources[record_sources[root]]}:{ids[root]}"
+    
+    def members(self, source: str, record_id: str) -> list[tuple[str, str]]:
+        """``(source, id)`` of every current record of the same entity."""
+        ids, record_sources, clusters, latest = self._view()
+        roots = clusters.roots()
+        indices = np.flatnonzero(roots == roots[self._index(latest, source, record_id)])
+        members = []
+        for index in indices.tolist():
+            name, member_id = self.sources[record_sources[index]], ids[index]
+            if latest[name][member_id] == index:
+                members.append((name, member_id))
+        return members
+    
+    def mapping(self, source_a: str, source_b: str) -> list[tuple[str, str]]:
+        """Id pairs of ``source_a`` and ``source_b`` records resolved to the same entity."""
+        _, _, clusters, latest = self._view()
+        roots = clusters.roots()
+        ids_a = list(latest.get(source_a, {}).items())
+        ids_b = list(latest.get(source_b, {}).items())
+        if not ids_a or not ids_b:
+            return []
+        index_a = np.fromiter((i for _, i in ids_a), dtype=np.int64, count=len(ids_a))
+        index_b = np.fromiter((i for _, i in ids_b), dtype=np.int64, count=len(ids_b))
+        order = np.argsort(roots[index_b], kind="stable")
+        sorted_roots = roots[index_b][order]
+        lo = np.searchsorted(sorted_roots, roots[index_a], "left")
+        hi = np.searchsorted(sorted_roots, roots[index_a], "right")
+        left, right = _expand(np.arange(len(ids_a)), lo, hi, order)
+        return [(ids_a[i][0], ids_b[j][0]) for i, j in zip(left.tolist(), right.tolist())]
+
+
+# Global entity resolver (lazy initialized)
+_resolver_instance: Optional[EntityResolver] = None
+
+
+def get_entity_resolver() -> EntityResolver:
+    """Get the global entity resolver."""
+    global _resolver_instance
+    
+    if _resolver_instance is None:
+        from sheaia.config import get_settings
+        
+        _resolver_instance = EntityResolver.from_settings(get_settings())
+    
+    return _resolver_instance
+
+
+__all__ = [
+    "normalize_name",
+    "normalize_code",
+    "MinHasher",
+    "band_keys",
+    "BandIndex",
+    "IVFIndex",
+    "UnionFind",
+    "ResolveStats",
+    "EntityResolver",
+    "get_entity_resolver",
+]
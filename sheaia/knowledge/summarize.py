@@ -0,0 +1,421 @@
+"""Long-document summarization - structural chunking, parallel map passes, hierarchical reduce."""
+
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+from pydantic import BaseModel
+
+from sheaia.core.llm import BaseLLM, GenerationConfig, estimate_tokens
+from sheaia.core.sqlite import SQLiteExecutor
+from sheaia.i18n import Language, get_language
+from sheaia.i18n.prompts import (
+    get_chunk_summary_prompt,
+    get_summary_merge_prompt,
+    get_system_prompt,
+)
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS summary_parts (
+    key TEXT PRIMARY KEY,
+    summary TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+# Lines that open a new section: Markdown headings, numbered clauses and the
+# article/chapter markers of English, Chinese and Thai contracts.
+_HEADING = re.compile(
+    r"^\s*(?:#{1,6}\s+\S"
+    r"|(?:article|section|clause|chapter|schedule|appendix)\s+[\dIVXLC]+\b"
+    r"|\d+(?:\.\d+)*[.)]?\s+\S"
+    r"|第[一二三四五六七八九十百千\d]+[条條章节節款部]"
+    r"|(?:หมวด|ข้อ|มาตรา)\s*(?:ที่\s*)?\d+)",
+    re.IGNORECASE,
+)
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+|(?<=[。！？])")
+# Finer separators tried, in order, for a block that is still too long.
+_SEPARATORS = ("\n\n", "\n", _SENTENCE_END)
+
+
+class Chunk(BaseModel):
+    """One piece of a document, summarized on its own."""
+    
+    index: int
+    text: str
+    heading: str = ""
+    tokens: int
+    
+    @property
+    def key(self) -> str:
+        """Content hash; unchanged chunks of an edited document keep it."""
+        return hashlib.sha256(f"{self.heading}\0{self.text}".encode()).hexdigest()
+
+
+class DocumentSummary(BaseModel):
+    """Summary of a document and what producing it cost."""
+    
+    summary: str
+    chunks: int
+    levels: int
+    llm_calls: int = 0
+    cached: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    elapsed: float = 0.0
+
+
+def _sections(text: str) -> list[tuple[str, str]]:
+    """Split on heading lines into ``(heading, section text)`` pairs."""
+    sections: list[tuple[str, list[str]]] = [("", [])]
+    for line in text.splitlines():
+        if _HEADING.match(line) and len(line) <= 200:
+            sections.append((line.strip(), [line]))
+        else:
+            sections[-1][1].append(line)
+    return [(heading, "\n".join(lines).strip()) for heading, lines in sections if "".join(lines).strip()]
+
+
+def _split(text: str, max_tokens: int, count_tokens: Callable[[str], int], level: int = 0) -> list[tuple[str, int]]:
+    """Break ``text`` into ``(block, tokens)`` pieces of at most ``max_tokens``."""
+    tokens = count_tokens(text)
+    if tokens <= max_tokens:
+        return [(text, tokens)]
+    if level < len(_SEPARATORS):
+        separator = _SEPARATORS[level]
+        parts = separator.split(text) if isinstance(separator, re.Pattern) else text.split(separator)
+        parts = [part.strip() for part in parts if part.strip()]
+        if len(parts) > 1:
+            return [piece for part in parts for piece in _split(part, max_tokens, count_tokens, level + 1)]
+        return _split(text, max_tokens, count_tokens, level + 1)
+    # No separator left (one enormous sentence): cut by length.
+    pieces = -(-tokens // max_tokens)
+    size = -(-len(text) // pieces)
+    return [(text[i:i + size], count_tokens(text[i:i + size])) for i in range(0, len(text), size)]
+
+
+def _cut_point(text: str, probability: float) -> bool:
+    """Whether ``text`` ends a run; decided by its hash alone, true for ``probability`` of texts."""
+    value = int.from_bytes(hashlib.sha256(text.encode()).digest()[:8], "big")
+    return value < probability * 2**64
+
+
+def split_document(
+    text: str,
+    max_tokens: int = 2048,
+    count_tokens: Callable[[str], int] = estimate_tokens,
+) -> list[Chunk]:
+    """
+    Split a document into chunks of at most ``max_tokens`` along its structure.
+
+    Sections (at heading lines) always start a chunk and are broken at
+    paragraphs, then lines, then sentences only when they are too long.
+    Within a section, a chunk ends after a block whose hash falls under a
+    threshold scaled by the block's size, about once per half of
+    ``max_tokens``. Cut points are content-defined rather than positional:
+    inserting, deleting or editing text changes the chunks around it and
+    the rest of the document keeps its chunks (and their cached summaries).
+    """
+    target = max(max_tokens // 2, 1)
+    minimum = max_tokens // 8
+    chunks: list[Chunk] = []
+    blocks: list[str] = []
+    size = 0
+    heading = ""
+    
+    def flush() -> None:
+        nonlocal blocks, size
+        if blocks:
+            chunks.append(Chunk(index=len(chunks), text="\n\n".join(blocks), heading=heading, tokens=size))
+        blocks, size = [], 0
+    
+    for section_heading, section in _sections(text):
+        flush()
+        for block, tokens in _split(section, max_tokens, count_tokens):
+            if blocks and size + tokens > max_tokens:
+                flush()
+            if not blocks:
+                # A chunk starting mid-section still knows where it is.
+                heading = section_heading if not block.startswith(section_heading) else ""
+            blocks.append(block)
+            size += tokens
+            if size >= minimum and _cut_point(block, tokens / target):
+                flush()
+    flush()
+    return chunks
+
+
+class SummaryCache(SQLiteExecutor):
+    """
+    SQLite memo of partial summaries keyed by the hash of their input, so
+    re-summarizing an edited document only redoes the changed branches.
+    """
+    
+    schema = _SCHEMA
+    
+    def __init__(self, path: str | Path = ":memory:"):
+        super().__init__(path, "sheaia-summaries")
+    
+    def _get(self, key: str) -> Optional[str]:
+        row = self._connect().execute("SELECT summary FROM summary_parts WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+    
+    def _put(self, key: str, summary: str) -> None:
+        conn = self._connect()
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO summary_parts VALUES (?, ?, ?)", (key, summary, time.time()))
+    
+    def _prune(self, older_than: float) -> int:
+        conn = self._connect()
+        with conn:
+            return conn.execute("DELETE FROM summary_parts WHERE created_at < ?", (older_than,)).rowcount
+    
+    async def get(self, key: str) -> Optional[str]:
+        """A cached summary, or None."""
+        return await self._run(self._get, key)
+    
+    async def put(self, key: str, summary: str) -> None:
+        """Cache a summary."""
+        await self._run(self._put, key, summary)
+    
+    async def prune(self, max_age_s: float) -> int:
+        """Drop summaries older than ``max_age_s``; returns how many were removed."""
+        return await self._run(self._prune, time.time() - max_age_s)
+    
+    def close(self) -> None:
+        """Close the connection and stop the cache thread."""
+        self._shutdown()
+
+
+class _Run:
+    """Counters for one ``summarize`` call."""
+    
+    __slots__ = ("calls", "cached", "prompt_tokens", "completion_tokens", "parts")
+    
+    def __init__(self):
+        self.calls = self.cached = self.prompt_tokens = self.completion_tokens = 0
+        self.parts: dict[str, asyncio.Future] = {}
+
+
+class Summarizer:
+    """
+    Map-reduce summarizer for documents longer than the context window.
+
+    The document is split along its structure (``split_document``), every
+    chunk is summarized concurrently (up to ``max_concurrency`` LLM calls
+    in flight), and the partial summaries are merged up to ``fan_in`` at a time,
+    level by level, until one remains. Every partial summary is cached
+    under the hash of its input, so an edited document only re-runs the
+    chunks that changed and the merges above them.
+    """
+    
+    def __init__(
+        self,
+        llm: BaseLLM,
+        cache: Optional[SummaryCache] = None,
+        chunk_tokens: int = 2048,
+        summary_words: int = 150,
+        fan_in: int = 4,
+        max_concurrency: int = 4,
+        token_counter: Optional[Callable[[str], int]] = None,
+    ):
+        if fan_in < 2:
+            raise ValueError("fan_in must be at least 2")
+        if chunk_tokens < 2 * summary_words:
+            # Otherwise two partial summaries may never fit one merge prompt.
+            raise ValueError("chunk_tokens must hold at least two summaries of summary_words words")
+        self.llm = llm
+        self.cache = cache or SummaryCache()
+        self.chunk_tokens = chunk_tokens
+        self.summary_words = summary_words
+        self.fan_in = fan_in
+        self.max_concurrency = max_concurrency
+        self.count_tokens = token_counter or llm.count_tokens
+        self.config = GenerationConfig(max_tokens=max(64, summary_words * 2), temperature=0.2)
+    
+    @classmethod
+    def from_settings(cls, settings, llm: Optional[BaseLLM] = None) -> "Summarizer":
+        """Build a summarizer using ``Settings.summarize``."""
+        if llm is None:
+            from sheaia.core.llm import get_llm
+            
+            llm = get_llm()
+        return cls(
+            llm=llm,
+            cache=SummaryCache(settings.summarize.cache_path),
+            chunk_tokens=settings.summarize.chunk_tokens,
+            summary_words=settings.summarize.summary_words,
+            fan_in=settings.summarize.fan_in,
+            max_concurrency=settings.summarize.max_concurrency,
+        )
+    
+    def _key(self, kind: str, language: Language, focus: str, *inputs: str) -> str:
+        payload = json.dumps([kind, language.value, focus, self.summary_words, *inputs], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    async def _part(
+        self,
+        key: str,
+        prompt: str,
+        language: Language,
+        limit: asyncio.Semaphore,
+        run: _Run,
+    ) -> str:
+        # Repeated text (boilerplate clauses, equal partial summaries) is
+        # summarized once per run even before its result reaches the cache.
+        if key not in run.parts:
+            run.parts[key] = asyncio.ensure_future(self._compute(key, prompt, language, limit, run))
+        return await run.parts[key]
+    
+    async def _compute(
+        self,
+        key: str,
+        prompt: str,
+        language: Language,
+        limit: asyncio.Semaphore,
+        run: _Run,
+    ) -> str:
+        cached = await self.cache.get(key)
+        if cached is not None:
+            run.cached += 1
+            return cached
+        # Every pass shares the system prompt, so the prompt cache reuses it.
+        async with limit:
+            response = await self.llm.generate(f"{get_system_prompt(language)}\n\n{prompt}", self.config)
+        run.calls += 1
+        run.prompt_tokens += response.prompt_tokens
+        run.completion_tokens += response.completion_tokens
+        summary = response.text.strip()
+        await self.cache.put(key, summary)
+        return summary
+    
+    def _groups(self, summaries: list[str]) -> list[list[str]]:
+        """
+        Consecutive groups of up to ``fan_in`` summaries that fit one merge prompt.
+
+        A group ends after a summary whose hash marks a cut point, about one
+        in ``fan_in``, so groups follow content rather than position: a
+        changed, added or removed chunk only regroups its neighbours. A
+        single summary passes to the next level as it is.
+        """
+        groups: list[list[str]] = []
+        size = 0
+        closed = True
+        for summary in summaries:
+            tokens = self.count_tokens(summary)
+            if closed or len(groups[-1]) >= self.fan_in or size + tokens > self.chunk_tokens:
+                groups.append([])
+                size = 0
+            groups[-1].append(summary)
+            size += tokens
+            closed = _cut_point(summary, 1 / self.fan_in)
+        if len(groups) == len(summaries):
+            # No merge at all (every summary a cut point or over budget).
+            return self._pairs(summaries)
+        return groups
+    
+    def _pairs(self, summaries: list[str]) -> list[list[str]]:
+        """
+        Positional groups of up to ``fan_in`` summaries that fit one merge prompt.
+
+        A group always takes at least two summaries, even over budget, so
+        the level shrinks; only the last group may be a single one.
+        """
+        groups: list[list[str]] = []
+        size = 0
+        for summary in summaries:
+            tokens = self.count_tokens(summary)
+            if not groups or len(groups[-1]) >= self.fan_in or (size + tokens > self.chunk_tokens and len(groups[-1]) > 1):
+                groups.append([])
+                size = 0
+            groups[-1].append(summary)
+            size += tokens
+        return groups
+    
+    async def summarize(
+        self,
+        text: str,
+        language: Optional[Language] = None,
+        focus: str = "",
+    ) -> DocumentSummary:
+        """
+        Summarize a document of any length.
+
+        Args:
+            text: Document text
+            language: Summary language; defaults to the current request's
+            focus: Optional topic the summary should concentrate on
+
+        Returns:
+            The summary with chunk, level, cache and token counts
+        """
+        started = time.perf_counter()
+        language = language or get_language()
+        chunks = split_document(text, self.chunk_tokens, self.count_tokens)
+        if not chunks:
+            return DocumentSummary(summary="", chunks=0, levels=0)
+        
+        run = _Run()
+        limit = asyncio.Semaphore(self.max_concurrency)
+        summaries = await asyncio.gather(*(
+            self._part(
+                self._key("chunk", language, focus, chunk.key),
+                get_chunk_summary_prompt(language, chunk.text, self.summary_words, chunk.heading, focus),
+                language,
+                limit,
+                run,
+            )
+            for chunk in chunks
+        ))
+        
+        levels = 1
+        while len(summaries) > 1:
+            levels += 1
+            groups = self._groups(summaries)
+            summaries = await asyncio.gather(*(
+                self._merge(group, language, focus, limit, run) for group in groups
+            ))
+        
+        logger.info(
+            f"Summarized {len(chunks)} chunks in {levels} levels: {run.calls} LLM calls, "
+            f"{run.cached} cached, {run.prompt_tokens} prompt tokens"
+        )
+        return DocumentSummary(
+            summary=summaries[0],
+            chunks=len(chunks),
+            levels=levels,
+            llm_calls=run.calls,
+            cached=run.cached,
+            prompt_tokens=run.prompt_tokens,
+            completion_tokens=run.completion_tokens,
+            elapsed=time.perf_counter() - started,
+        )
+    
+    async def _merge(
+        self,
+        group: list[str],
+        language: Language,
+        focus: str,
+        limit: asyncio.Semaphore,
+        run: _Run,
+    ) -> str:
+        if len(group) == 1:
+            return group[0]
+        prompt = get_summary_merge_prompt(
+            language, "\n\n".join(f"[{i + 1}] {s}" for i, s in enumerate(group)), self.summary_words, focus
+        )
+        return await self._part(self._key("merge", language, focus, *group), prompt, language, limit, run)
+    
+    def close(self) -> None:
+        """Close the cache."""
+        self.cache.close()
+
+
+__all__ = ["Chunk", "DocumentSummary", "split_document", "SummaryCache", "Summarizer"]
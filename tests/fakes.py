@@ -0,0 +1,137 @@
+"""Test doubles shared across the test suite."""
+
+import asyncio
+import re
+import time
+from typing import AsyncIterator, Optional
+
+import numpy as np
+
+from sheaia.core.embedding import BaseEmbedding
+from sheaia.core.llm import BaseLLM, GenerationConfig, LLMResponse, Prompt
+
+BOS = 1
+
+
+class FakeLLM(BaseLLM):
+    """
+    Scripted LLM with per-prompt latencies.
+
+    ``script`` maps a marker substring to ``(latency_seconds, reply)``; the
+    first marker found in the prompt decides the reply.
+    """
+    
+    def __init__(
+        self,
+        script: Optional[dict[str, tuple[float, str]]] = None,
+        default: str = "ok",
+        latency: float = 0.0,
+    ):
+        self.script = script or {}
+        self.default = (latency, default)
+        self.calls: list[str] = []
+        self.loaded = False
+        self.n_ctx = 4096
+        self.vocab: dict[str, int] = {}
+        self.tokenize_calls = 0
+    
+    @property
+    def context_length(self) -> int:
+        return self.n_ctx
+    
+    def tokenize(self, text: str, add_bos: bool = False) -> list[int]:
+        """Word-level tokenizer: every word and every whitespace run is one token."""
+        self.tokenize_calls += 1
+        tokens = [BOS] if add_bos else []
+        for piece in re.findall(r"\S+|\s+", text):
+            tokens.append(self.vocab.setdefault(piece, len(self.vocab) + 2))
+        return tokens
+    
+    def detokenize(self, tokens: list[int]) -> str:
+        words = {i: piece for piece, i in self.vocab.items()}
+        return "".join(words.get(t, "") for t in tokens)
+    
+    def _lookup(self, prompt: Prompt) -> tuple[float, str]:
+        if not isinstance(prompt, str):
+            prompt = self.detokenize(prompt)
+        for marker, entry in self.script.items():
+            if marker in prompt:
+                return entry
+        return self.default
+    
+    async def generate(
+        self,
+        prompt: Prompt,
+        config: Optional[GenerationConfig] = None,
+    ) -> LLMResponse:
+        self.calls.append(prompt if isinstance(prompt, str) else self.detokenize(prompt))
+        latency, text = self._lookup(prompt)
+        await asyncio.sleep(latency)
+        prompt_tokens = len(prompt.split()) if isinstance(prompt, str) else len(prompt)
+        completion_tokens = len(text.split())
+        return LLMResponse(
+            text=text,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=prompt_tokens + completion_tokens,
+            model="fake",
+        )
+    
+    async def stream(
+        self,
+        prompt: Prompt,
+        config: Optional[GenerationConfig] = None,
+    ) -> AsyncIterator[str]:
+        self.calls.append(prompt if isinstance(prompt, str) else self.detokenize(prompt))
+        latency, text = self._lookup(prompt)
+        await asyncio.sleep(latency)
+        for word in text.split(" "):
+            yield word + " "
+    
+    def load_model(self) -> None:
+        self.loaded = True
+    
+    def unload_model(self) -> None:
+        self.loaded = False
+
+
+class FakeLlama:
+    """
+    Stands in for ``llama_cpp.Llama``; ``result`` builds each completion.
+
+    Like the real thing, a call blocks its thread for ``latency`` seconds.
+    """
+    
+    def __init__(self, result, latency: float = 0.0):
+        self.result = result
+        self.latency = latency
+        self.prompts: list = []
+        self.kwargs: list[dict] = []
+    
+    def tokenize(self, text: bytes, add_bos: bool = True, special: bool = False) -> list[int]:
+        return [BOS] * add_bos + list(text)
+    
+    def __call__(self, prompt, **kwargs):
+        self.prompts.append(prompt)
+        self.kwargs.append(kwargs)
+        time.sleep(self.latency)
+        return self.result()
+
+
+class FakeEmbedding(BaseEmbedding):
+    """Deterministic embedding: one-hot-ish vectors from the text length."""
+    
+    def __init__(self, dimension: int = 8):
+        self._dim = dimension
+    
+    @property
+    def dimension(self) -> int:
+        return self._dim
+    
+    def embed_documents(self, texts: list[str]) -> np.ndarray:
+        return np.stack([self.embed_query(text) for text in texts])
+    
+    def embed_query(self, text: str) -> np.ndarray:
+        vector = np.zeros(self._dim, dtype=np.float32)
+        vector[len(text) % self._dim] = 1.0
+        return vector
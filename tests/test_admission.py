@@ -0,0 +1,237 @@
+"""Tests for request admission control."""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route, WebSocketRoute
+from starlette.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from sheaia.api.admission import (
+    DEFAULT_ROUTES,
+    AdmissionController,
+    AdmissionMiddleware,
+    AdmissionRejectedError,
+    ClassLimits,
+    RequestClass,
+    classify,
+)
+
+
+def make_controller(max_concurrency: int = 1, max_queue: int = 8, max_wait_s: float = 5.0):
+    limits = {
+        cls: ClassLimits(max_concurrency=max_concurrency, max_queue=max_queue, max_wait_s=max_wait_s)
+        for cls in RequestClass
+    }
+    return AdmissionController(limits, max_concurrency=max_concurrency)
+
+
+class TestAdmissionController:
+    """Tests for priority queues and shedding."""
+    
+    async def test_immediate_admission(self):
+        controller = make_controller()
+        
+        waited = await controller.acquire(RequestClass.REPORT)
+        
+        assert waited == 0.0
+        assert controller.active == 1
+    
+    async def test_interactive_served_before_background(self):
+        controller = make_controller()
+        await controller.acquire(RequestClass.REPORT)
+        order = []
+        
+        async def request(cls):
+            await controller.acquire(cls)
+            order.append(cls)
+            controller.release(cls)
+        
+        tasks = [asyncio.create_task(request(RequestClass.BACKGROUND))]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(request(RequestClass.SQL)))
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(request(RequestClass.INTERACTIVE)))
+        await asyncio.sleep(0)
+        
+        controller.release(RequestClass.REPORT)
+        await asyncio.gather(*tasks)
+        
+        assert order == [RequestClass.INTERACTIVE, RequestClass.SQL, RequestClass.BACKGROUND]
+    
+    async def test_queue_full_rejected_with_429(self):
+        controller = make_controller(max_queue=1)
+        await controller.acquire(RequestClass.REPORT)
+        waiter = asyncio.create_task(controller.acquire(RequestClass.REPORT))
+        await asyncio.sleep(0)
+        
+        with pytest.raises(AdmissionRejectedError) as exc:
+            await controller.acquire(RequestClass.REPORT)
+        
+        assert exc.value.status_code == 429
+        assert controller.stats[RequestClass.REPORT].rejected == 1
+        waiter.cancel()
+    
+    async def test_wait_past_deadline_shed_with_503(self):
+        controller = make_controller()
+        await controller.acquire(RequestClass.SQL)
+        
+        with pytest.raises(AdmissionRejectedError) as exc:
+            await controller.acquire(RequestClass.SQL, deadline=time.monotonic() + 0.05)
+        
+        assert exc.value.status_code == 503
+        assert controller.snapshot()["classes"]["sql"]["queued"] == 0
+    
+    async def test_deadline_aware_shedding(self):
+        controller = make_controller()
+        await controller.acquire(RequestClass.REPORT)
+        controller.release(RequestClass.REPORT, service_time=10.0)
+        await controller.acquire(RequestClass.REPORT)
+        
+        started = time.monotonic()
+        with pytest.raises(AdmissionRejectedError) as exc:
+            await controller.acquire(RequestClass.REPORT, deadline=time.monotonic() + 1.0)
+        
+        # Shed up front from the service-time estimate instead of waiting it out.
+        assert time.monotonic() - started < 0.1
+        assert exc.value.status_code == 503
+        assert exc.value.retry_after >= 10.0
+    
+    async def test_class_concurrency_limit(self):
+        limits = {cls: ClassLimits(max_concurrency=1, max_queue=8, max_wait_s=1.0) for cls in RequestClass}
+        controller = AdmissionController(limits, max_concurrency=4)
+        await controller.acquire(RequestClass.REPORT)
+        
+        # Reports are capped at one, but other classes still get the free slots.
+        assert await controller.acquire(RequestClass.SQL) == 0.0
+        with pytest.raises(AdmissionRejectedError):
+            await controller.acquire(RequestClass.REPORT, deadline=time.monotonic() + 0.02)
+    
+    async def test_queue_time_recorded(self):
+        controller = make_controller()
+        await controller.acquire(RequestClass.SQL)
+        waiter = asyncio.create_task(controller.acquire(RequestClass.SQL))
+        await asyncio.sleep(0.05)
+        controller.release(RequestClass.SQL)
+        waited = await waiter
+        
+        stats = controller.snapshot()["classes"]["sql"]
+        assert waited >= 0.05
+        assert stats["admitted"] == 2
+        assert stats["queue_time_max_s"] >= 0.05
+
+
+class TestClassify:
+    """Tests for request classification."""
+    
+    def test_by_path(self):
+        assert classify({"path": "/api/v1/chat", "headers": []}, DEFAULT_ROUTES) == RequestClass.INTERACTIVE
+        assert classify({"path": "/api/v1/reports/42", "headers": []}, DEFAULT_ROUTES) == RequestClass.REPORT
+        assert classify({"path": "/health", "headers": []}, DEFAULT_ROUTES) is None
+    
+    def test_by_method(self):
+        submit = {"path": "/api/v1/chat/batch", "method": "POST", "headers": []}
+        poll = {"path": "/api/v1/chat/batch/abc/results", "method": "GET", "headers": []}
+        assert classify(submit, DEFAULT_ROUTES) == RequestClass.BACKGROUND
+        assert classify(poll, DEFAULT_ROUTES) == RequestClass.INTERACTIVE
+    
+    def test_header_override(self):
+        scope = {"path": "/api/v1/chat", "headers": [(b"x-sheaia-priority", b"background")]}
+        assert classify(scope, DEFAULT_ROUTES, trust_header=True) == RequestClass.BACKGROUND
+        assert classify(scope, DEFAULT_ROUTES) == RequestClass.INTERACTIVE
+
+
+class TestAdmissionMiddleware:
+    """Tests for the ASGI middleware."""
+    
+    async def test_shed_request_gets_retry_after(self):
+        release = asyncio.Event()
+        
+        async def slow(request):
+            await release.wait()
+            return PlainTextResponse("done")
+        
+        controller = make_controller(max_queue=0)
+        app = AdmissionMiddleware(Starlette(routes=[Route("/api/v1/reports", slow)]), controller)
+        transport = httpx.ASGITransport(app=app)
+        
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            first = asyncio.create_task(client.get("/api/v1/reports"))
+            await asyncio.sleep(0.05)
+            shed = await client.get("/api/v1/reports")
+            release.set()
+            ok = await first
+        
+        assert shed.status_code == 429
+        assert int(shed.headers["Retry-After"]) >= 1
+        assert ok.status_code == 200
+        assert controller.active == 0
+    
+    async def test_unclassified_paths_bypass(self):
+        async def health(request):
+            return PlainTextResponse("ok")
+        
+        controller = make_controller(max_concurrency=0, max_queue=0)
+        app = AdmissionMiddleware(Starlette(routes=[Route("/health", health)]), controller)
+        transport = httpx.ASGITransport(app=app)
+        
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get("/health")
+        
+        assert response.status_code == 200
+    
+    async def test_priority_header_needs_trusted_client(self):
+        seen = []
+        
+        async def reports(request):
+            seen.append(controller.stats[RequestClass.INTERACTIVE].admitted)
+            return PlainTextResponse("ok")
+        
+        controller = make_controller()
+        app = AdmissionMiddleware(
+            Starlette(routes=[Route("/api/v1/reports", reports)]), controller, trusted_clients=["10.0.0.0/8"]
+        )
+        headers = {"X-SHEAIA-Priority": "interactive"}
+        
+        for client in (("203.0.113.7", 1234), ("10.1.2.3", 1234)):
+            transport = httpx.ASGITransport(app=app, client=client)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                await http.get("/api/v1/reports", headers=headers)
+        
+        assert controller.stats[RequestClass.REPORT].admitted == 1
+        assert controller.stats[RequestClass.INTERACTIVE].admitted == 1
+    
+    def test_websocket_messages_admitted(self):
+        async def echo(websocket):
+            await websocket.accept()
+            try:
+                while True:
+                    text = await websocket.receive_text()
+                    await websocket.send_text(f"{text}:{controller.active}")
+            except WebSocketDisconnect:
+                pass
+        
+        controller = make_controller(max_queue=0)
+        app = AdmissionMiddleware(Starlette(routes=[WebSocketRoute("/api/v1/chat/stream", echo)]), controller)
+        
+        with TestClient(app) as client, client.websocket_connect("/api/v1/chat/stream") as websocket:
+            # Each message holds a slot while it is handled; an idle connection holds none.
+            websocket.send_text("a")
+            assert websocket.receive_text() == "a:1"
+            websocket.send_text("b")
+            assert websocket.receive_text() == "b:1"
+            
+            controller._start(RequestClass.INTERACTIVE)
+            websocket.send_text("c")
+            assert websocket.receive_json()["type"] == "error"
+            controller.release(RequestClass.INTERACTIVE)
+            
+            websocket.send_text("d")
+            assert websocket.receive_text() == "d:1"
+        
+        assert controller.active == 0
+        assert controller.stats[RequestClass.INTERACTIVE].rejected == 1
@@ -0,0 +1,135 @@
+"""Tests for the agent coordinator."""
+
+import time
+
+import pytest
+
+from sheaia.agents import Coordinator, DocumentAgent, QueryAgent
+from sheaia.agents.query import extract_sql
+from sheaia.i18n import Language
+from tests.fakes import FakeLLM
+
+SQL_MARKER = "Generate a valid SQL query"
+DOC_MARKER = "document excerpts"
+SYNTH_MARKER = "Combine the findings"
+
+
+async def retriever(question: str) -> list[dict]:
+    return [{"content": "Contract renews every March.", "source": "contract.pdf"}]
+
+
+def make_coordinator(llm: FakeLLM, budget: float = 5.0) -> Coordinator:
+    return Coordinator(
+        agents=[
+            QueryAgent(llm, schema="orders(id, customer, amount)"),
+            DocumentAgent(llm, retriever=retriever),
+        ],
+        llm=llm,
+        latency_budget_s=budget,
+    )
+
+
+class TestCoordinator:
+    """Tests for parallel fan-out and the latency budget."""
+    
+    async def test_branches_run_concurrently(self):
+        llm = FakeLLM({
+            SQL_MARKER: (0.3, "SELECT SUM(amount) FROM orders"),
+            DOC_MARKER: (0.4, "Renews every March [contract.pdf]."),
+            SYNTH_MARKER: (0.05, "Combined answer"),
+        })
+        coordinator = make_coordinator(llm)
+        
+        started = time.perf_counter()
+        result = await coordinator.run("What did ACME order and when does it renew?")
+        wall = time.perf_counter() - started
+        
+        # Slowest branch (0.4) plus synthesis (0.05) - not the 0.75s sum.
+        assert 0.45 <= wall < 0.65
+        assert result.answer == "Combined answer"
+        assert result.results["query"].status == "ok"
+        assert result.results["document"].status == "ok"
+        assert result.sql == "SELECT SUM(amount) FROM orders"
+        assert result.sources == [{"type": "document", "source": "contract.pdf"}]
+    
+    async def test_wall_time_tracks_slowest_branch(self):
+        llm = FakeLLM({
+            SQL_MARKER: (0.1, "SELECT 1"),
+            DOC_MARKER: (0.5, "Slow document answer"),
+            SYNTH_MARKER: (0.0, "Combined"),
+        })
+        coordinator = make_coordinator(llm)
+        
+        started = time.perf_counter()
+        result = await coordinator.run("question")
+        wall = time.perf_counter() - started
+        
+        assert result.results["query"].elapsed < 0.2
+        assert 0.5 <= wall < 0.65
+    
+    async def test_slow_branch_abandoned_at_budget(self):
+        llm = FakeLLM({
+            SQL_MARKER: (0.05, "SELECT 1"),
+            DOC_MARKER: (5.0, "too late"),
+        })
+        coordinator = make_coordinator(llm, budget=0.2)
+        
+        started = time.perf_counter()
+        result = await coordinator.run("question")
+        wall = time.perf_counter() - started
+        
+        assert wall < 0.4
+        assert result.abandoned == ["document"]
+        assert result.results["query"].status == "ok"
+        assert result.answer == "SELECT 1"
+    
+    async def test_all_branches_fail(self):
+        llm = FakeLLM({SQL_MARKER: (1.0, ""), DOC_MARKER: (1.0, "")})
+        coordinator = make_coordinator(llm, budget=0.05)
+        
+        result = await coordinator.run("question", language=Language.EN)
+        
+        assert "Query execution failed" in result.answer
+        assert sorted(result.abandoned) == ["document", "query"]
+    
+    async def test_branch_error_isolated(self):
+        async def broken(question: str) -> list[dict]:
+            raise RuntimeError("vector store down")
+        
+        llm = FakeLLM({SQL_MARKER: (0.0, "SELECT 1")})
+        coordinator = Coordinator(
+            agents=[QueryAgent(llm), DocumentAgent(llm, retriever=broken)],
+            llm=llm,
+            latency_budget_s=1.0,
+        )
+        
+        result = await coordinator.run("question")
+        
+        assert result.results["document"].status == "error"
+        assert "vector store down" in result.results["document"].error
+        assert result.answer == "SELECT 1"
+    
+    async def test_explicit_tasks(self):
+        llm = FakeLLM({SQL_MARKER: (0.0, "SELECT 1"), DOC_MARKER: (0.0, "doc")})
+        coordinator = make_coordinator(llm)
+        
+        result = await coordinator.run("question", tasks=["query"])
+        
+        assert list(result.results) == ["query"]
+    
+    async def test_unknown_task_rejected(self):
+        coordinator = make_coordinator(FakeLLM())
+        
+        with pytest.raises(ValueError):
+            await coordinator.run("question", tasks=["missing"])
+
+
+class TestQueryAgent:
+    """Tests for SQL extraction."""
+    
+    def test_extract_sql_from_fence(self):
+        text = "Here you go:\n```sql\nSELECT * FROM t;\n```"
+        assert extract_sql(text) == "SELECT * FROM t"
+    
+    def test_extract_plain_sql(self):
+        assert extract_sql("  SELECT 1;  ") == "SELECT 1"
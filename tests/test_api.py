@@ -1,15 +1,28 @@
 """Tests for API endpoints."""
 
+import asyncio
+
 import pytest
 from fastapi.testclient import TestClient
 
 from sheaia.api import app
+from sheaia.knowledge.conversations import ConversationStore, get_conversation_store
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Conversation store backed by a temporary database."""
+    store = ConversationStore(tmp_path / "metadata.db")
+    yield store
+    asyncio.run(store.close())
 
 
 @pytest.fixture
-def client():
+def client(store):
     """Create test client."""
-    return TestClient(app)
+    app.dependency_overrides[get_conversation_store] = lambda: store
+    yield TestClient(app)
+    app.dependency_overrides.clear()
 
 
 class TestHealthEndpoints:
@@ -23,10 +36,36 @@ class TestHealthEndpoints:
         assert data["service"] == "sheaia"
     
     def test_readiness_check(self, client):
+        # No probes have run and no model is loaded, so the app is not ready yet.
         response = client.get("/health/ready")
+        assert response.status_code == 503
+        data = response.json()
+        assert data["status"] == "not_ready"
+        assert data["checks"]["llm"] == "unknown"
+    
+    def test_deep_health_check(self, client):
+        response = client.get("/health/deep")
         assert response.status_code == 200
         data = response.json()
-        assert data["status"] == "ready"
+        assert set(data["checks"]) >= {"llm", "embedding", "metadata", "vector", "analytics"}
+    
+    
+    def test_admission_stats(self, client):
+        client.post("/api/v1/chat", json={"message": "Hello"})
+        response = client.get("/health/admission")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["classes"]["interactive"]["admitted"] >= 1
+        assert list(data["classes"]) == ["interactive", "sql", "report", "background"]
+    
+    
+    def test_metrics_endpoint(self, client):
+        client.post("/api/v1/chat", json={"message": "Hello"})
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert 'route="/api/v1/chat"' in response.text
+        assert "sheaia_admission_queue_seconds_bucket" in response.text
 
 
 class TestChatEndpoints:
@@ -55,3 +94,75 @@ class TestChatEndpoints:
             "message": ""
         })
         assert response.status_code == 422  # Validation error
+    
+    def test_chat_keeps_conversation(self, client, store):
+        first = client.post("/api/v1/chat", json={"message": "Hello"}).json()
+        conversation_id = first["conversation_id"]
+        assert conversation_id != "new-conversation"
+        
+        second = client.post("/api/v1/chat", json={
+            "message": "And again",
+            "conversation_id": conversation_id,
+        }).json()
+        assert second["conversation_id"] == conversation_id
+        
+        history = asyncio.run(store.history(conversation_id))
+        assert [turn.role for turn in history] == ["user", "assistant", "user", "assistant"]
+        assert history[2].content == "And again"
+
+
+class TestI18nEndpoints:
+    """Tests for the translation catalog export."""
+    
+    def test_catalog(self, client):
+        response = client.get("/api/v1/i18n/zh-CN")
+        assert response.status_code == 200
+        assert response.json()["common.save"] == "保存"
+        assert response.headers["etag"]
+    
+    def test_not_modified(self, client):
+        etag = client.get("/api/v1/i18n/th").headers["etag"]
+        
+        response = client.get("/api/v1/i18n/th", headers={"If-None-Match": etag})
+        
+        assert response.status_code == 304
+        assert response.content == b""
+
+
+class TestLanguageNegotiation:
+    """Tests for per-request language resolution."""
+    
+    def test_accept_language(self, client):
+        response = client.post(
+            "/api/v1/chat",
+            json={"message": "Hello"},
+            headers={"Accept-Language": "fr-FR, th;q=0.9, en;q=0.8"},
+        )
+        assert response.headers["content-language"] == "th"
+        assert "ฉันได้รับข้อความของคุณ" in response.json()["response"]
+    
+    def test_query_beats_cookie_and_header(self, client):
+        client.cookies.set("lang", "zh-CN")
+        response = client.get("/health?lang=zh-TW", headers={"Accept-Language": "th"})
+        assert response.headers["content-language"] == "zh-TW"
+        
+        response = client.get("/health", headers={"Accept-Language": "th"})
+        assert response.headers["content-language"] == "zh-CN"
+    
+    def test_body_language_wins(self, client):
+        response = client.post(
+            "/api/v1/chat",
+            json={"message": "Hello", "language": "zh-CN"},
+            headers={"Accept-Language": "th"},
+        )
+        assert response.headers["content-language"] == "zh-CN"
+    
+    def test_detected_when_nothing_explicit(self, client):
+        response = client.post("/api/v1/chat", json={"message": "上個月的產線數據"})
+        assert response.headers["content-language"] == "zh-TW"
+        
+        # A stated preference is respected even if the message is in another language.
+        response = client.post(
+            "/api/v1/chat", json={"message": "上個月的產線數據"}, headers={"Accept-Language": "en"}
+        )
+        assert response.headers["content-language"] == "en"
@@ -0,0 +1,216 @@
+"""Tests for hardware autotuning and hardware profiles."""
+
+import math
+
+import yaml
+
+from sheaia.config import get_settings
+from sheaia.config.settings import load_hardware_profile
+from sheaia.core.autotune import (
+    Autotuner,
+    EmbeddingTrial,
+    HardwareInfo,
+    LLMTrial,
+    llm_candidates,
+    measure_embedding,
+    profile_name,
+    write_profile,
+)
+from sheaia.core.llm import LlamaCppLLM
+
+CPU_ONLY = HardwareInfo(hostname="edge-01", physical_cores=8, logical_cores=16)
+WITH_GPU = HardwareInfo(hostname="dev-box", physical_cores=8, logical_cores=16, gpu_offload=True)
+
+
+def fake_machine(params: dict) -> LLMTrial:
+    """Prefill likes threads and big batches; decode likes physical cores; mlock does nothing."""
+    if params.get("n_gpu_layers") == -1:
+        raise RuntimeError("out of VRAM")
+    prefill = params["n_threads_batch"] * params["n_ubatch"] / 64 * (1 + params["n_gpu_layers"])
+    decode = 100.0 - 5 * abs(params["n_threads"] - 8)
+    return LLMTrial(params=params, prefill_tps=prefill, decode_tps=decode)
+
+
+class TestCandidates:
+    """The sweep adapts to the machine."""
+    
+    def test_cpu_only_never_offloads(self):
+        groups = llm_candidates(CPU_ONLY, layers=24)
+        assert groups[0] == [{"n_gpu_layers": 0}]
+        threads = [option["n_threads"] for option in groups[1]]
+        assert threads[0] == 8
+        assert set(threads) == {4, 8, 16}
+    
+    def test_gpu_splits_use_layer_count(self):
+        groups = llm_candidates(WITH_GPU, layers=48)
+        assert [option["n_gpu_layers"] for option in groups[0]] == [-1, 36, 24, 0]
+    
+    def test_quick_is_smaller(self):
+        full = sum(len(group) for group in llm_candidates(WITH_GPU, layers=48))
+        quick = sum(len(group) for group in llm_candidates(WITH_GPU, layers=48, quick=True))
+        assert quick < full
+
+
+class TestAutotuner:
+    """Coordinate descent over the candidate groups."""
+    
+    def test_finds_fast_settings_and_survives_failures(self):
+        tuner = Autotuner(llm_bench=fake_machine)
+        best, trials = tuner.tune_llm(llm_candidates(WITH_GPU, layers=48))
+        
+        assert best.params["n_gpu_layers"] == 36
+        assert best.params["n_threads"] == 8
+        assert best.params["n_threads_batch"] == 16
+        assert best.params["n_ubatch"] == 2048
+        assert best.params["n_batch"] == 2048
+        # mlock is no faster, so the default stays.
+        assert best.params["use_mlock"] is False
+        assert any(trial.error == "out of VRAM" for trial in trials)
+    
+    def test_never_tries_ubatch_above_batch(self):
+        seen = []
+        
+        def bench(params):
+            seen.append(params)
+            return LLMTrial(params=params, prefill_tps=100.0, decode_tps=10.0)
+        
+        Autotuner(llm_bench=bench).tune_llm(llm_candidates(CPU_ONLY))
+        assert seen and all(params["n_ubatch"] <= params["n_batch"] for params in seen)
+    
+    def test_each_configuration_measured_once(self):
+        calls = []
+        
+        def bench(params):
+            calls.append(tuple(sorted(params.items())))
+            return LLMTrial(params=params, prefill_tps=100.0, decode_tps=10.0)
+        
+        Autotuner(llm_bench=bench).tune_llm(llm_candidates(CPU_ONLY))
+        assert len(calls) == len(set(calls))
+    
+    def test_all_failures(self):
+        def bench(params):
+            raise RuntimeError("no")
+        
+        best, trials = Autotuner(llm_bench=bench).tune_llm(llm_candidates(CPU_ONLY))
+        assert best is None
+        assert trials
+    
+    def test_score_is_reference_request_time(self):
+        tuner = Autotuner(prompt_tokens=1000, gen_tokens=100)
+        assert tuner.score(LLMTrial(params={}, prefill_tps=500, decode_tps=50)) == 4.0
+        assert math.isinf(tuner.score(LLMTrial(params={}, error="oom")))
+    
+    def test_embedding_batch_size(self):
+        def bench(batch_size):
+            if batch_size > 64:
+                raise RuntimeError("out of memory")
+            return EmbeddingTrial(batch_size=batch_size, embeddings_per_s=batch_size * 10.0)
+        
+        best, trials = Autotuner(embedding_bench=bench).tune_embedding([32, 16, 64, 128])
+        assert best.batch_size == 64
+        assert trials[-1].error == "out of memory"
+    
+    def test_measure_embedding_sets_batch_size(self):
+        class Embedder:
+            batch_size = 32
+            seen = []
+            
+            def embed_documents(self, texts):
+                self.seen.append(len(texts))
+        
+        embedder = Embedder()
+        trial = measure_embedding(embedder, 16, count=40)
+        assert embedder.batch_size == 16
+        assert embedder.seen == [16, 40]
+        assert trial.embeddings_per_s > 0
+    
+    def test_run_collects_profile_values(self):
+        tuner = Autotuner(
+            llm_bench=fake_machine,
+            embedding_bench=lambda b: EmbeddingTrial(batch_size=b, embeddings_per_s=float(b)),
+        )
+        result = tuner.run(CPU_ONLY, llm_candidates(CPU_ONLY, quick=True), [16, 32])
+        assert set(result.llm) == {
+            "n_gpu_layers", "n_threads", "n_threads_batch", "n_batch", "n_ubatch", "use_mmap", "use_mlock"
+        }
+        assert result.embedding == {"batch_size": 32}
+        assert {"prefill_tps", "decode_tps", "embeddings_per_s"} <= set(result.measured)
+
+
+class TestProfiles:
+    """Profiles are written next to existing ones and applied by get_settings."""
+    
+    def result(self):
+        tuner = Autotuner(
+            llm_bench=fake_machine,
+            embedding_bench=lambda b: EmbeddingTrial(batch_size=b, embeddings_per_s=float(b)),
+        )
+        return tuner.run(CPU_ONLY, llm_candidates(CPU_ONLY, quick=True), [16, 64])
+    
+    def test_profile_name(self):
+        assert profile_name(HardwareInfo(hostname="Build-Box.local")) == "build_box_local"
+    
+    def test_write_keeps_other_profiles(self, tmp_path):
+        path = tmp_path / "hardware.yaml"
+        path.write_text(yaml.safe_dump({"hardware_profiles": {"prod_amd": {"llm": {"n_batch": 256}}}}))
+        
+        write_profile(path, "edge_01", self.result())
+        data = yaml.safe_load(path.read_text())
+        
+        assert data["active_profile"] == "edge_01"
+        assert data["hardware_profiles"]["prod_amd"] == {"llm": {"n_batch": 256}}
+        assert data["hardware_profiles"]["edge_01"]["embedding"] == {"batch_size": 64}
+        assert data["hardware_profiles"]["edge_01"]["hardware"]["hostname"] == "edge-01"
+    
+    def test_load_selects_profile(self, tmp_path):
+        path = tmp_path / "hardware.yaml"
+        write_profile(path, "edge_01", self.result())
+        write_profile(path, "other", self.result(), activate=False)
+        
+        overrides = load_hardware_profile(path)
+        assert set(overrides) == {"llm", "embedding"}
+        assert overrides["llm"]["n_threads"] == 8
+        assert load_hardware_profile(path, "other") == overrides
+        assert load_hardware_profile(path, "none") == {}
+        assert load_hardware_profile(path, "missing") == {}
+        assert load_hardware_profile(tmp_path / "absent.yaml") == {}
+    
+    def test_get_settings_applies_active_profile(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "config").mkdir()
+        (tmp_path / "config" / "settings.yaml").write_text(
+            yaml.safe_dump({"llm": {"n_batch": 512, "n_ctx": 4096}, "embedding": {"batch_size": 32}})
+        )
+        write_profile(tmp_path / "config" / "hardware.yaml", "edge_01", self.result())
+        
+        get_settings.cache_clear()
+        try:
+            settings = get_settings()
+        finally:
+            get_settings.cache_clear()
+        
+        assert settings.llm.n_threads == 8
+        assert settings.llm.n_batch == 2048
+        assert settings.llm.n_ctx == 4096
+        assert settings.embedding.batch_size == 64
+    
+    def test_profile_can_be_disabled(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "config").mkdir()
+        (tmp_path / "config" / "settings.yaml").write_text(yaml.safe_dump({"hardware": {"profile": "none"}}))
+        write_profile(tmp_path / "config" / "hardware.yaml", "edge_01", self.result())
+        
+        get_settings.cache_clear()
+        try:
+            settings = get_settings()
+        finally:
+            get_settings.cache_clear()
+        
+        assert settings.llm.n_threads is None
+        assert settings.embedding.batch_size == 32
+    
+    def test_llm_takes_tuned_parameters(self):
+        settings = get_settings().llm.model_copy(update={"n_threads": 6, "n_ubatch": 256})
+        llm = LlamaCppLLM.from_settings(settings)
+        assert llm.n_threads == 6
+        assert llm.n_ubatch == 256
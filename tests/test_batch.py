@@ -0,0 +1,185 @@
+"""Tests for batch chat jobs."""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from sheaia.api.admission import AdmissionController, ClassLimits, RequestClass
+from sheaia.core.batch import BatchItem, BatchRunner
+from sheaia.i18n import Language
+from tests.fakes import FakeLLM
+
+
+def items(n: int) -> list[BatchItem]:
+    languages = [Language.EN, Language.TH]
+    return [BatchItem(message=f"KPI check for plant {i}", language=languages[i % 2]) for i in range(n)]
+
+
+@pytest.fixture
+def runner(tmp_path):
+    return BatchRunner(FakeLLM(default="all good", latency=0.01), tmp_path, concurrency=4)
+
+
+class TestBatchRunner:
+    """Tests for running, ordering and paging batch jobs."""
+    
+    async def test_all_items_written(self, runner):
+        job = runner.submit(items(10))
+        job = await runner.wait(job.id)
+        
+        assert job.status == "done"
+        assert job.completed == 10
+        lines = [json.loads(line) for line in open(job.path, encoding="utf-8")]
+        assert sorted(line["index"] for line in lines) == list(range(10))
+        assert all(line["response"] == "all good" for line in lines)
+    
+    async def test_shared_prefix_reuse(self, runner):
+        job = runner.submit(items(10))
+        await runner.wait(job.id)
+        llm = runner.llm
+        
+        # Same-language prompts run back to back ...
+        languages = ["คุณ" in call for call in llm.calls]
+        assert languages == sorted(languages)
+        # ... and each system prompt is tokenized once, not once per item.
+        assert llm.tokenize_calls == 2 + 2 + 10  # BOS/separator, two system prompts, ten questions
+    
+    async def test_results_paged(self, runner):
+        job = runner.submit(items(7))
+        await runner.wait(job.id)
+        
+        first = runner.results(job.id, offset=0, limit=5)
+        second = runner.results(job.id, offset=5, limit=5)
+        
+        assert len(first) == 5 and len(second) == 2
+        assert {r.index for r in first + second} == set(range(7))
+    
+    async def test_finished_jobs_evicted(self, tmp_path):
+        runner = BatchRunner(FakeLLM(), tmp_path, retain_s=60)
+        read = await runner.wait(runner.submit(items(3)).id)
+        kept = await runner.wait(runner.submit(items(3)).id)
+        
+        assert len(runner.results(read.id, limit=10)) == 3
+        assert read.id not in runner.jobs and kept.id in runner.jobs
+        
+        runner.retain_s = 0
+        assert runner.get(kept.id).status == "done"
+        assert runner.jobs == {} and runner._offsets == {}
+        # Evicted jobs are served from their saved state.
+        assert len(runner.results(kept.id, limit=10)) == 3
+        assert (await runner.wait(read.id)).completed == 3
+    
+    async def test_stats(self, runner):
+        job = await runner.wait(runner.submit(items(8)).id)
+        
+        assert job.stats.wall_seconds > 0
+        assert job.stats.completion_tokens == 16
+        assert job.stats.items_per_gpu_hour == pytest.approx(8 * 3600 / job.stats.wall_seconds)
+    
+    async def test_failed_items_recorded(self, tmp_path):
+        class FlakyLLM(FakeLLM):
+            async def generate(self, prompt, config=None):
+                if "plant 3" in self.detokenize(prompt):
+                    raise RuntimeError("CUDA out of memory")
+                return await super().generate(prompt, config)
+        
+        runner = BatchRunner(FlakyLLM(), tmp_path)
+        job = await runner.wait(runner.submit(items(5)).id)
+        
+        assert job.status == "done"
+        assert (job.completed, job.failed) == (4, 1)
+        failed = [r for r in runner.results(job.id) if r.error]
+        assert failed[0].index == 3
+    
+    async def test_cancel(self, tmp_path):
+        runner = BatchRunner(FakeLLM(latency=0.05), tmp_path, concurrency=1)
+        job = runner.submit(items(100))
+        await asyncio.sleep(0.12)
+        
+        job = await runner.cancel(job.id)
+        
+        assert job.status == "cancelled"
+        assert 0 < job.completed < 100
+        assert len(runner.results(job.id, limit=1000)) == job.completed
+    
+    async def test_other_worker_sees_and_cancels_job(self, tmp_path):
+        owner = BatchRunner(FakeLLM(latency=0.05), tmp_path, concurrency=1)
+        other = BatchRunner(FakeLLM(), tmp_path)
+        job = owner.submit(items(100))
+        await asyncio.sleep(0.12)
+        
+        seen = other.get(job.id)
+        assert seen.status == "running" and seen.completed > 0
+        assert len(other.results(job.id, limit=1000)) == seen.completed
+        assert (await other.cancel(job.id)).status == "cancelled"
+        
+        job = await owner.wait(job.id)
+        assert job.status == "cancelled"
+        assert job.completed < 100
+        assert other.get(job.id).status == "cancelled"
+        assert other.get("nope") is None
+    
+    async def test_prompt_falls_back_to_text_without_tokenizer(self, tmp_path):
+        class BrokenTokenizer(FakeLLM):
+            @property
+            def context_length(self):
+                raise AttributeError("_context_length")
+        
+        runner = BatchRunner(BrokenTokenizer(), tmp_path)
+        job = await runner.wait(runner.submit(items(3)).id)
+        
+        assert (job.completed, job.failed) == (3, 0)
+        assert all(isinstance(call, str) and "plant" in call for call in runner.llm.calls)
+    
+    async def test_items_yield_to_interactive(self, tmp_path):
+        limits = {cls: ClassLimits(max_concurrency=1, max_queue=100, max_wait_s=10) for cls in RequestClass}
+        controller = AdmissionController(limits, max_concurrency=1)
+        runner = BatchRunner(FakeLLM(latency=0.02), tmp_path, concurrency=4, admission=controller)
+        
+        job = runner.submit(items(6))
+        await asyncio.sleep(0.01)
+        waited = await controller.acquire(RequestClass.INTERACTIVE)
+        controller.release(RequestClass.INTERACTIVE)
+        await runner.wait(job.id)
+        
+        # The interactive request only waited for the item already running.
+        assert waited < 0.05
+        assert controller.stats[RequestClass.BACKGROUND].admitted == 6
+
+
+class TestBatchAPI:
+    """Tests for the batch endpoints."""
+    
+    async def test_submit_poll_and_page(self, runner):
+        from sheaia.api import app
+        from sheaia.api.routes.batch import batch_runner
+        
+        app.dependency_overrides[batch_runner] = lambda: runner
+        try:
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                response = await client.post("/api/v1/chat/batch", json={
+                    "items": [{"message": f"Output of plant {i}?", "language": "zh-CN"} for i in range(5)],
+                })
+                assert response.status_code == 202
+                job_id = response.json()["id"]
+                
+                await runner.wait(job_id)
+                status = (await client.get(f"/api/v1/chat/batch/{job_id}")).json()
+                page = (await client.get(f"/api/v1/chat/batch/{job_id}/results", params={"limit": 3})).json()
+                rest = (await client.get(
+                    f"/api/v1/chat/batch/{job_id}/results", params={"offset": page["next_offset"]}
+                )).json()
+                download = await client.get(f"/api/v1/chat/batch/{job_id}/results.jsonl")
+                missing = await client.get("/api/v1/chat/batch/nope")
+        finally:
+            app.dependency_overrides.clear()
+        
+        assert status["status"] == "done"
+        assert status["stats"]["items_per_gpu_hour"] > 0
+        assert len(page["results"]) == 3 and page["next_offset"] == 3
+        assert len(rest["results"]) == 2 and rest["next_offset"] is None
+        assert len(download.text.splitlines()) == 5
+        assert missing.status_code == 404
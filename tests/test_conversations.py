@@ -0,0 +1,160 @@
+"""Tests for conversation memory."""
+
+import asyncio
+
+import pytest
+
+from sheaia.i18n import Language
+from sheaia.knowledge.conversations import ConversationStore
+from tests.fakes import FakeLLM
+
+
+@pytest.fixture
+async def store(tmp_path):
+    store = ConversationStore(tmp_path / "metadata.db", max_recent_turns=4, summary_max_tokens=64)
+    yield store
+    await store.close()
+
+
+async def add_exchanges(store: ConversationStore, conversation_id: str, count: int) -> None:
+    for i in range(count):
+        await store.append(conversation_id, "user", f"Question {i} about plant {i % 7} output")
+        await store.append(conversation_id, "assistant", f"Answer {i}: output was {i * 10} units")
+
+
+class TestConversationStore:
+    """Tests for the verbatim window and rolling summary."""
+    
+    async def test_recent_turns_verbatim(self, store):
+        await add_exchanges(store, "c1", 2)
+        
+        context = await store.build_context("c1", "Next question")
+        
+        assert "Question 0 about plant 0 output" in context.prompt
+        assert "Answer 1: output was 10 units" in context.prompt
+        assert context.prompt.endswith("User: Next question\nAssistant:")
+        assert context.turns == 4
+        assert not context.summarized
+    
+    async def test_older_turns_summarized(self, store):
+        await add_exchanges(store, "c1", 6)
+        await store.flush()
+        
+        context = await store.build_context("c1", "Next question")
+        
+        assert context.summarized
+        assert context.turns == 4
+        assert "Question 3" in await store.summary("c1")
+        # Summarized turns are not repeated verbatim.
+        assert "User: Question 0" not in context.prompt.split("Conversation summary:")[-1].split("\n\n", 1)[-1]
+    
+    async def test_llm_rolling_summary(self, tmp_path):
+        llm = FakeLLM({"running summary": (0.0, "User is comparing plant output.")})
+        store = ConversationStore(tmp_path / "m.db", llm=llm, max_recent_turns=2)
+        try:
+            await add_exchanges(store, "c1", 3)
+            await store.flush()
+            
+            assert await store.summary("c1") == "User is comparing plant output."
+            # Each fold only sends the overflowing turns, not the whole history.
+            assert all(call.count("Question") <= 4 for call in llm.calls)
+        finally:
+            await store.close()
+    
+    async def test_context_flat_as_conversation_grows(self, store):
+        await add_exchanges(store, "c1", 10)
+        await store.flush()
+        short = await store.build_context("c1", "Next question")
+        
+        await add_exchanges(store, "c1", 290)
+        await store.flush()
+        long = await store.build_context("c1", "Next question")
+        
+        assert long.turns == short.turns
+        assert long.tokens <= short.tokens + store.summary_max_tokens
+        assert len(await store.history("c1")) == 600
+    
+    async def test_budget_respected(self, store):
+        await store.append("c1", "user", "word " * 400)
+        await store.append("c1", "assistant", "short answer")
+        
+        context = await store.build_context("c1", "Next question", budget_tokens=500)
+        
+        assert context.tokens <= 500
+        assert "short answer" in context.prompt
+        assert "word word" not in context.prompt
+    
+    async def test_reload_from_disk_is_bounded(self, tmp_path):
+        path = tmp_path / "metadata.db"
+        first = ConversationStore(path, max_recent_turns=4)
+        await add_exchanges(first, "c1", 20)
+        await first.close()
+        
+        second = ConversationStore(path, max_recent_turns=4)
+        try:
+            conversation = await second._get("c1")
+            assert len(conversation.recent) == 4
+            assert conversation.summary
+            turn = await second.append("c1", "user", "after restart", Language.ZH_CN)
+            assert turn.seq == 41
+        finally:
+            await second.close()
+    
+    async def test_backlog_folded_after_reload(self, tmp_path):
+        path = tmp_path / "metadata.db"
+        first = ConversationStore(path, max_recent_turns=4)
+        
+        async def down(summary, turns, language):
+            raise RuntimeError("model unavailable")
+        
+        first._summarize = down
+        await add_exchanges(first, "c1", 10)
+        await first.close()
+        
+        second = ConversationStore(path, max_recent_turns=4)
+        folded: list[int] = []
+        summarize = second._summarize
+        
+        async def record(summary, turns, language):
+            folded.extend(turn.seq for turn in turns)
+            return await summarize(summary, turns, language)
+        
+        second._summarize = record
+        try:
+            conversation = await second._get("c1")
+            await second.flush()
+            
+            # Every turn older than the window is folded, in order, none skipped.
+            assert folded == list(range(1, 17))
+            assert conversation.summarized_upto == 16
+            assert [turn.seq for turn in conversation.recent] == [17, 18, 19, 20]
+        finally:
+            await second.close()
+    
+    async def test_hot_tier_eviction(self, tmp_path):
+        store = ConversationStore(tmp_path / "m.db", hot_capacity=2)
+        try:
+            for conversation_id in ("a", "b", "c"):
+                await store.append(conversation_id, "user", f"hello {conversation_id}")
+            
+            assert list(store._hot) == ["b", "c"]
+            context = await store.build_context("a", "again")
+            assert "hello a" in context.prompt
+        finally:
+            await store.close()
+    
+    async def test_no_eviction_with_appends_pending(self, tmp_path):
+        store = ConversationStore(tmp_path / "m.db", hot_capacity=1)
+        try:
+            pending = [asyncio.create_task(store.append("a", "user", f"turn {i}")) for i in range(4)]
+            while "a" not in store._hot:
+                await asyncio.sleep(0)
+            # Loading "b" would evict "a" while its appends wait on the lock.
+            await store.append("b", "user", "hello")
+            await store.append("a", "user", "turn 4")
+            await asyncio.gather(*pending)
+            history = await store.history("a")
+            
+            assert [turn.seq for turn in history] == [1, 2, 3, 4, 5]
+        finally:
+            await store.close()
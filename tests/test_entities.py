@@ -0,0 +1,181 @@
+"""Tests for cross-system entity resolution."""
+
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+
+from sheaia.knowledge.entities import (
+    BandIndex,
+    EntityResolver,
+    MinHasher,
+    UnionFind,
+    band_keys,
+    normalize_code,
+    normalize_name,
+)
+
+
+class AliasEmbedding:
+    """Vectors by lookup: names in the same alias group embed identically."""
+    
+    dimension = 8
+    
+    def __init__(self, groups: list[list[str]]):
+        self.groups = {normalize_name(name): i for i, group in enumerate(groups) for name in group}
+        self.documents = 0
+    
+    def embed_documents(self, texts):
+        self.documents += len(texts)
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            vectors[row, self.groups.get(text, self.dimension - 1) % self.dimension] = 1.0
+        return vectors
+
+
+class TestNormalize:
+    """Name and code normalization."""
+    
+    def test_legal_forms_and_punctuation(self):
+        assert normalize_name("Acme Co., Ltd") == "acme"
+        assert normalize_name("ACME Corporation") == "acme"
+        assert normalize_name("ACME有限公司") == "acme"
+        assert normalize_name("ＡＣＭＥ　Ｉｎｃ．") == "acme"
+    
+    def test_thai(self):
+        assert normalize_name("บริษัท สยามสตีล จำกัด (มหาชน)") == "สยามสตีล"
+    
+    def test_code(self):
+        assert normalize_code(" 91-3100 00AB ") == "91310000ab"
+        assert normalize_code(None) == ""
+
+
+class TestBlocking:
+    """MinHash signatures, LSH bands and union-find."""
+    
+    def test_minhash_estimates_jaccard(self):
+        signatures = MinHasher(num_perm=256).signatures(["shanghai precision tools", "shanghai precision tool", "nordic dairy"])
+        similar = (signatures[0] == signatures[1]).mean()
+        different = (signatures[0] == signatures[2]).mean()
+        assert similar > 0.7
+        assert different < 0.1
+    
+    def test_band_index_pairs_new_records_only(self):
+        signatures = MinHasher(num_perm=16).signatures(["alpha steel", "alpha steel", "beta foods"])
+        keys = band_keys(signatures, rows=4)
+        index = BandIndex(bands=4)
+        first, second = index.add(keys[:1], np.array([0]))
+        assert len(first) == 0
+        first, second = index.add(keys[1:], np.array([1, 2]))
+        assert set(zip(first.tolist(), second.tolist())) == {(1, 0)}
+    
+    def test_band_index_within_batch(self):
+        signatures = MinHasher(num_perm=16).signatures(["alpha steel", "alpha steel"])
+        first, second = BandIndex(bands=4).add(band_keys(signatures, rows=4), np.array([0, 1]))
+        assert set(zip(first.tolist(), second.tolist())) == {(1, 0)}
+        first, _ = BandIndex(bands=4).add(band_keys(signatures, rows=4), np.array([0, 1]), within=False)
+        assert len(first) == 0
+    
+    def test_union_find_roots_are_oldest(self):
+        clusters = UnionFind(6)
+        assert clusters.union(np.array([5, 3]), np.array([3, 1])) == 2
+        assert clusters.union(np.array([4]), np.array([5])) == 1
+        assert clusters.roots().tolist() == [0, 1, 2, 1, 1, 1]
+        assert clusters.union(np.array([4]), np.array([1])) == 0
+
+
+class TestEntityResolver:
+    """Incremental resolution across sources."""
+    
+    async def test_links_across_sources(self):
+        resolver = EntityResolver()
+        await resolver.add("crm", ["C1", "C2", "C3"], ["Acme Co., Ltd", "Nordic Dairy AB", "Shanghai Precision Tools"])
+        stats = await resolver.add("erp", ["K1", "K2"], ["ACME有限公司", "Shanghai Precision Tool Co"])
+        
+        assert stats.added == 2
+        assert sorted(resolver.mapping("crm", "erp")) == [("C1", "K1"), ("C3", "K2")]
+        assert resolver.entity_of("erp", "K1") == "crm:C1"
+        assert sorted(resolver.members("crm", "C3")) == [("crm", "C3"), ("erp", "K2")]
+        assert resolver.entity_of("crm", "C2") == "crm:C2"
+    
+    async def test_same_source_is_not_linked(self):
+        resolver = EntityResolver()
+        await resolver.add("crm", ["C1", "C2"], ["Acme Ltd", "Acme Inc"])
+        assert resolver.members("crm", "C1") == [("crm", "C1")]
+    
+    async def test_codes_decide(self):
+        resolver = EntityResolver()
+        await resolver.add("crm", ["C1", "C2"], ["Acme", "Nordic Dairy"], codes=["913100-001", "556677"])
+        await resolver.add("erp", ["K1", "K2"], ["Apex Holdings", "Nordic Dairy"], codes=["913100001", "000000"])
+        
+        # Same tax id despite different names; same name despite different tax ids.
+        assert resolver.mapping("crm", "erp") == [("C1", "K1")]
+    
+    async def test_embedding_blocking(self):
+        embedding = AliasEmbedding([["Acme", "艾克米"]])
+        resolver = EntityResolver(embedding=embedding, threshold=0.5)
+        await resolver.add("crm", ["C1", "C2"], ["Acme", "Nordic Dairy"])
+        stats = await resolver.add("erp", ["K1"], ["艾克米有限公司"])
+        
+        assert stats.candidates["embedding"] > 0
+        assert resolver.mapping("crm", "erp") == [("C1", "K1")]
+    
+    async def test_incremental_and_renames(self):
+        embedding = AliasEmbedding([])
+        resolver = EntityResolver(embedding=embedding)
+        await resolver.add("crm", ["C1", "C2"], ["Acme Ltd", "Nordic Dairy"])
+        await resolver.add("erp", ["K1"], ["Acme"])
+        
+        # Unchanged records are skipped, embeddings included.
+        embedded = embedding.documents
+        stats = await resolver.add("crm", ["C1", "C2"], ["Acme Ltd", "Nordic Dairy"])
+        assert stats.added == 0
+        assert embedding.documents == embedded
+        
+        stats = await resolver.add("crm", ["C1"], ["Acme Holdings Ltd"])
+        assert stats.added == 1
+        assert stats.updated == 1
+        assert embedding.documents == embedded + 1
+        assert resolver.entity_of("crm", "C1") == "crm:C1"
+        assert resolver.mapping("crm", "erp") == [("C1", "K1")]
+        assert len(resolver) == 4
+    
+    async def test_lookups_during_add_see_published_state(self):
+        resolver = EntityResolver()
+        await resolver.add("crm", ["C1", "C2"], ["Acme Co., Ltd", "Nordic Dairy AB"])
+        await resolver.add("erp", ["K1"], ["ACME有限公司"])
+        
+        scoring, resume = threading.Event(), threading.Event()
+        score = resolver.score
+        
+        def paused(a, b):
+            scoring.set()
+            resume.wait(5)
+            return score(a, b)
+        
+        resolver.score = paused
+        adding = asyncio.create_task(resolver.add("erp", ["K2"], ["Nordic Dairy"]))
+        assert await asyncio.to_thread(scoring.wait, 5)
+        try:
+            # Mid-add, lookups see the state before the batch, never half of it.
+            assert resolver.mapping("crm", "erp") == [("C1", "K1")]
+            assert resolver.members("crm", "C2") == [("crm", "C2")]
+            with pytest.raises(KeyError):
+                resolver.entity_of("erp", "K2")
+        finally:
+            resume.set()
+        await adding
+        
+        assert resolver.entity_of("erp", "K2") == "crm:C2"
+        assert sorted(resolver.mapping("crm", "erp")) == [("C1", "K1"), ("C2", "K2")]
+    
+    def test_from_settings(self):
+        from sheaia.config.settings import Settings
+        
+        settings = Settings()
+        settings.entities.use_embeddings = False
+        settings.entities.threshold = 0.8
+        resolver = EntityResolver.from_settings(settings)
+        assert resolver.embedding is None
+        assert resolver.threshold == 0.8
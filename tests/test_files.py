@@ -0,0 +1,274 @@
+"""Tests for the CSV/Excel watch-folder connector."""
+
+import asyncio
+import time
+
+import pandas as pd
+import pytest
+
+from sheaia.connectors.files import (
+    FileConnector,
+    FolderWatcher,
+    csv_ranges,
+    parse_csv_bytes,
+    read_xlsx,
+    sniff_csv,
+    table_name,
+)
+
+HEADER = "day,line,units,rate,ok,note\n"
+
+
+def rows(start: int, count: int) -> str:
+    return "".join(
+        f"2025-01-{1 + i % 28:02d},{i % 4},{i},{i / 4},{'true' if i % 2 else 'false'},batch {i}\n"
+        for i in range(start, start + count)
+    )
+
+
+class Sink:
+    """Collects batches the way a warehouse loader would receive them."""
+    
+    def __init__(self):
+        self.batches = []
+    
+    async def __call__(self, batch):
+        self.batches.append(batch)
+    
+    def frame(self) -> pd.DataFrame:
+        return pd.concat([b.frame for b in self.batches], ignore_index=True)
+
+
+@pytest.fixture
+def sink():
+    return Sink()
+
+
+@pytest.fixture
+def connector(tmp_path, sink):
+    inbox = tmp_path / "inbox"
+    inbox.mkdir()
+    connector = FileConnector(
+        inbox, sink, chunk_bytes=2048, workers=2, state_path=tmp_path / "state.json", use_inotify=False
+    )
+    yield connector
+    connector.close()
+
+
+class TestSniff:
+    """Profiling from sampled bytes."""
+    
+    def test_types_and_header(self, tmp_path):
+        path = tmp_path / "output.csv"
+        path.write_text(HEADER + rows(0, 200))
+        profile = sniff_csv(path)
+        assert profile.header and profile.delimiter == ","
+        assert profile.columns == ["day", "line", "units", "rate", "ok", "note"]
+        assert profile.types == {
+            "day": "datetime", "line": "int", "units": "int", "rate": "float", "ok": "bool", "note": "string",
+        }
+        assert profile.data_offset == len(HEADER)
+    
+    def test_later_samples_widen_types(self, tmp_path):
+        path = tmp_path / "widen.csv"
+        path.write_text("id;qty\n" + "".join(f"{i};{i}\n" for i in range(20000)) + "".join(f"{i};{i}.5\n" for i in range(20000)))
+        profile = sniff_csv(path, sample_bytes=16 * 1024)
+        assert profile.delimiter == ";"
+        assert profile.types == {"id": "int", "qty": "float"}
+    
+    def test_chinese_export_with_legacy_encoding(self, tmp_path):
+        path = tmp_path / "产量.csv"
+        path.write_bytes("日期,产线,数量\n2025-01-01,一号线,10\n2025-01-02,二号线,12\n".encode("gb18030"))
+        profile = sniff_csv(path)
+        assert profile.encoding == "gb18030"
+        assert profile.columns == ["日期", "产线", "数量"]
+        frame = parse_csv_bytes(path.read_bytes()[profile.data_offset:], profile)
+        assert frame["产线"].tolist() == ["一号线", "二号线"]
+    
+    def test_bom(self, tmp_path):
+        path = tmp_path / "bom.csv"
+        path.write_bytes(b"\xef\xbb\xbfa,b\n1,2\n")
+        profile = sniff_csv(path)
+        assert profile.columns == ["a", "b"]
+        assert profile.data_offset == 7
+
+
+class TestParsing:
+    """Byte ranges and typed parsing."""
+    
+    def test_ranges_end_at_line_breaks(self, tmp_path):
+        path = tmp_path / "big.csv"
+        path.write_text(HEADER + rows(0, 500))
+        size = path.stat().st_size
+        ranges = csv_ranges(path, len(HEADER), size, 1000)
+        data = path.read_bytes()
+        assert len(ranges) > 5
+        assert ranges[0][0] == len(HEADER) and ranges[-1][1] == size
+        assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+        assert all(data[end - 1:end] == b"\n" for _, end in ranges)
+    
+    def test_misfit_values_become_missing(self, tmp_path):
+        path = tmp_path / "units.csv"
+        path.write_text("units\n" + "1\n" * 10)
+        profile = sniff_csv(path)
+        frame = parse_csv_bytes(b"3\nn/a\n5\n", profile)
+        assert str(frame["units"].dtype) == "Int64"
+        assert frame["units"].isna().tolist() == [False, True, False]
+    
+    def test_xlsx_streams_sheets(self, tmp_path):
+        from openpyxl import Workbook
+        
+        workbook = Workbook()
+        workbook.active.title = "Line 1"
+        workbook.active.append(["day", "units"])
+        for i in range(25):
+            workbook.active.append([f"2025-01-{i + 1:02d}", i])
+        other = workbook.create_sheet("Line 2")
+        other.append([None])
+        other.append(["day", "units"])
+        other.append(["2025-01-01", 7])
+        workbook.save(tmp_path / "plant.xlsx")
+        
+        batches = list(read_xlsx(tmp_path / "plant.xlsx", batch_rows=10))
+        assert [(sheet, len(frame)) for sheet, frame in batches] == [("Line 1", 10), ("Line 1", 10), ("Line 1", 5), ("Line 2", 1)]
+        assert batches[-1][1]["units"].tolist() == [7]
+        assert table_name(tmp_path / "plant.xlsx", "Line 2") == "plant_line_2"
+
+
+class TestFileConnector:
+    """Loading, appends and state."""
+    
+    async def test_parallel_load_matches_pandas(self, connector, sink):
+        path = connector.folder / "output.csv"
+        path.write_text(HEADER + rows(0, 1000))
+        
+        assert await connector.sync_file(path) == 1000
+        
+        assert len(sink.batches) > 4
+        assert [b.replace for b in sink.batches] == [True] + [False] * (len(sink.batches) - 1)
+        frame = sink.frame()
+        expected = pd.read_csv(path)
+        assert frame["units"].tolist() == expected["units"].tolist()
+        assert frame["note"].tolist() == expected["note"].tolist()
+        assert str(frame["day"].dtype).startswith("datetime64")
+    
+    async def test_append_loads_only_new_rows(self, connector, sink):
+        path = connector.folder / "output.csv"
+        path.write_text(HEADER + rows(0, 100))
+        await connector.sync_file(path)
+        size = path.stat().st_size
+        sink.batches.clear()
+        
+        with open(path, "a") as f:
+            f.write(rows(100, 50))
+        assert await connector.sync_file(path) == 50
+        
+        assert sink.batches[0].start == size and not sink.batches[0].replace
+        assert sink.frame()["units"].tolist() == list(range(100, 150))
+        assert connector.state.get(path).rows == 150
+    
+    async def test_rewrite_reloads(self, connector, sink):
+        path = connector.folder / "output.csv"
+        path.write_text(HEADER + rows(0, 100))
+        await connector.sync_file(path)
+        sink.batches.clear()
+        
+        path.write_text(HEADER + rows(500, 120))
+        assert await connector.sync_file(path) == 120
+        assert sink.batches[0].replace
+        assert sink.frame()["units"].tolist()[0] == 500
+    
+    async def test_unchanged_and_restarted(self, tmp_path, connector, sink):
+        path = connector.folder / "output.csv"
+        path.write_text(HEADER + rows(0, 100))
+        await connector.sync_file(path)
+        assert await connector.sync_file(path) == 0
+        
+        with open(path, "a") as f:
+            f.write(rows(100, 5))
+        restarted = FileConnector(connector.folder, sink, workers=1, state_path=tmp_path / "state.json")
+        try:
+            assert await restarted.sync_file(path) == 5
+        finally:
+            restarted.close()
+    
+    async def test_growth_during_load_not_duplicated(self, connector, sink, monkeypatch):
+        from sheaia.connectors import files
+        
+        path = connector.folder / "output.csv"
+        path.write_text(HEADER + rows(0, 100))
+        await connector.sync_file(path)
+        sink.batches.clear()
+        
+        # The writer appends again between the sync's stat and the load.
+        fingerprint = files._fingerprint
+        
+        def fingerprint_then_append(target, offset):
+            monkeypatch.setattr(files, "_fingerprint", fingerprint)
+            digest = fingerprint(target, offset)
+            with open(path, "a") as f:
+                f.write(rows(150, 10))
+            return digest
+        
+        monkeypatch.setattr(files, "_fingerprint", fingerprint_then_append)
+        with open(path, "a") as f:
+            f.write(rows(100, 50))
+        loaded = await connector.sync_file(path)
+        loaded += await connector.sync_file(path)
+        
+        assert loaded == 60
+        assert connector.state.get(path).rows == 160
+        assert sorted(sink.frame()["units"].tolist()) == list(range(100, 160))
+    
+    async def test_partial_line_waits(self, connector, sink):
+        path = connector.folder / "output.csv"
+        line = rows(100, 1)
+        path.write_text(HEADER + rows(0, 100) + line[:10])
+        assert await connector.sync_file(path) == 100
+        
+        with open(path, "a") as f:
+            f.write(line[10:])
+        assert await connector.sync_file(path) == 1
+        assert sink.frame()["note"].iloc[-1] == "batch 100"
+    
+    async def test_quoted_newlines(self, connector, sink):
+        path = connector.folder / "notes.csv"
+        path.write_text('id,note\n' + "".join(f'{i},"line one\nline two {i}"\n' for i in range(300)))
+        assert await connector.sync_file(path) == 300
+        assert sink.frame()["note"].iloc[-1] == "line one\nline two 299"
+    
+    async def test_sync_all_and_schema(self, connector, sink):
+        (connector.folder / "a.csv").write_text(HEADER + rows(0, 10))
+        (connector.folder / "b.tsv").write_text("x\ty\n1\t2\n")
+        (connector.folder / "ignored.json").write_text("{}")
+        
+        assert await connector.sync_incremental() == 11
+        tables = {t.name: t for t in await connector.discover_schema()}
+        assert set(tables) == {"a", "b"}
+        assert [c.type for c in tables["b"].columns] == ["int", "int"]
+        assert (await connector.fetch_data("b"))["y"].tolist() == [2]
+
+
+class TestFolderWatcher:
+    """Debounced change notification."""
+    
+    @pytest.mark.parametrize("use_inotify", [True, False])
+    async def test_reports_settled_file_once(self, tmp_path, use_inotify):
+        watcher = FolderWatcher(tmp_path, debounce_s=0.2, poll_interval_s=0.05, use_inotify=use_inotify)
+        changes = watcher.changes()
+        first = asyncio.ensure_future(changes.__anext__())
+        await asyncio.sleep(0.05)
+        
+        path = tmp_path / "export.csv"
+        started = time.monotonic()
+        for i in range(5):
+            with open(path, "a") as f:
+                f.write(rows(i * 10, 10))
+            await asyncio.sleep(0.05)
+        (tmp_path / "ignored.json").write_text("{}")
+        
+        assert await asyncio.wait_for(first, 2) == path
+        assert time.monotonic() - started >= 0.2
+        with pytest.raises(TimeoutError):
+            await asyncio.wait_for(changes.__anext__(), 0.4)
+        await changes.aclose()
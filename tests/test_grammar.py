@@ -0,0 +1,133 @@
+"""Tests for constrained decoding."""
+
+import re
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from sheaia.agents.query import QueryAgent
+from sheaia.core.grammar import check_sql, sql_grammar
+from sheaia.core.llm import GenerationConfig, LlamaCppLLM
+from tests.fakes import FakeLlama, FakeLLM
+
+TABLES = {
+    "orders": ["id", "customer_id", "amount", "created_at"],
+    "customers": ["id", "name", "region"],
+}
+
+
+def rules(grammar: str) -> tuple[set[str], set[str]]:
+    """Rule names a GBNF grammar defines and the ones it references."""
+    defined, used = set(), set()
+    for line in grammar.strip().splitlines():
+        name, _, body = line.partition("::=")
+        defined.add(name.strip())
+        body = re.sub(r'"(?:\\.|[^"\\])*"', "", body)
+        body = re.sub(r"\[(?:\\.|[^\]\\])*\]", "", body)
+        used |= set(re.findall(r"[a-z][a-z0-9-]*", body))
+    return defined, used
+
+
+class TestSQLGrammar:
+    """Grammar construction from the allowed schema."""
+    
+    def test_every_rule_defined(self):
+        defined, used = rules(sql_grammar(TABLES))
+        assert "root" in defined
+        assert used <= defined
+    
+    def test_only_allowed_names(self):
+        grammar = sql_grammar(TABLES)
+        table = next(line for line in grammar.splitlines() if line.startswith("table ::="))
+        assert table == 'table ::= "customers" | "orders"'
+        columns = next(line for line in grammar.splitlines() if line.startswith("column-name ::="))
+        assert '"region"' in columns and '"amount"' in columns
+        assert "secret" not in grammar
+    
+    def test_unusual_names_quoted_and_escaped(self):
+        grammar = sql_grammar({"daily output": ['line "A"', "qty"]})
+        assert r'"\"daily output\""' in grammar
+        assert r'"\"line \"\"A\"\"\""' in grammar
+    
+    def test_needs_a_table(self):
+        with pytest.raises(ValueError):
+            sql_grammar({})
+
+
+class TestCheckSQL:
+    """The cheap checks used to decide whether to retry."""
+    
+    def test_good_query(self):
+        sql = "SELECT c.name, sum(o.amount) FROM orders o JOIN customers c ON o.customer_id = c.id GROUP BY c.name;"
+        assert check_sql(sql, TABLES) == []
+    
+    def test_prose_and_unknown_names(self):
+        assert "does not start with SELECT" in check_sql("Here is the query: SELECT 1", TABLES)
+        assert check_sql("SELECT * FROM invoices", TABLES) == ["unknown table invoices"]
+        assert check_sql("SELECT orders.total FROM orders", TABLES) == ["unknown column orders.total"]
+        assert "unbalanced parentheses" in check_sql("SELECT count(id FROM orders", TABLES)
+    
+    def test_literals_are_ignored(self):
+        assert check_sql("SELECT id FROM customers WHERE name = 'a; b (c'", TABLES) == []
+
+
+class TestGenerationConfig:
+    """Constraint options on GenerationConfig and their llama.cpp plumbing."""
+    
+    def test_one_constraint_at_a_time(self):
+        with pytest.raises(ValueError):
+            GenerationConfig(grammar="root ::= \"x\"", json_schema={"type": "object"})
+    
+    @pytest.fixture
+    def grammars(self, monkeypatch):
+        compiled = []
+        
+        class LlamaGrammar:
+            @classmethod
+            def from_string(cls, grammar, verbose=True):
+                compiled.append(("gbnf", grammar))
+                return cls()
+            
+            @classmethod
+            def from_json_schema(cls, schema, verbose=True):
+                compiled.append(("json", schema))
+                return cls()
+        
+        monkeypatch.setitem(sys.modules, "llama_cpp", SimpleNamespace(LlamaGrammar=LlamaGrammar))
+        return compiled
+    
+    async def test_grammar_passed_and_compiled_once(self, grammars):
+        llm = LlamaCppLLM(model_path="grammar-test.gguf", n_ctx=256)
+        llm._model = FakeLlama(lambda: {
+            "choices": [{"text": "SELECT 1"}],
+            "usage": {"prompt_tokens": 3, "completion_tokens": 2, "total_tokens": 5},
+        })
+        config = GenerationConfig(max_tokens=16, grammar=sql_grammar(TABLES))
+        
+        await llm.generate([1, 2, 3], config)
+        await llm.generate([1, 2, 3], config)
+        await llm.generate([1, 2, 3], GenerationConfig(max_tokens=16))
+        
+        assert [kind for kind, _ in grammars] == ["gbnf"]
+        assert llm._model.kwargs[0]["grammar"] is llm._model.kwargs[1]["grammar"]
+        assert llm._model.kwargs[2]["grammar"] is None
+    
+    async def test_json_schema(self, grammars):
+        llm = LlamaCppLLM(model_path="grammar-test.gguf", n_ctx=256)
+        llm._model = FakeLlama(lambda: {
+            "choices": [{"text": "{}"}],
+            "usage": {"prompt_tokens": 3, "completion_tokens": 1, "total_tokens": 4},
+        })
+        schema = {"type": "object", "properties": {"tasks": {"type": "array", "items": {"type": "string"}}}}
+        
+        await llm.generate([1, 2, 3], GenerationConfig(max_tokens=16, json_schema=schema))
+        
+        assert grammars[0][0] == "json"
+        assert '"tasks"' in grammars[0][1]
+    
+    def test_query_agent_constrains_to_tables(self):
+        agent = QueryAgent(llm=FakeLLM(), schema="orders(id, amount)", tables=TABLES)
+        assert agent.config.grammar == sql_grammar(TABLES)
+        assert agent.config.temperature == 0.1
+        assert QueryAgent(llm=FakeLLM()).config.grammar is None
@@ -0,0 +1,129 @@
+"""Tests for cached health probes."""
+
+import asyncio
+import json
+import time
+
+from sheaia.config import Settings
+from sheaia.core.health import (
+    HealthMonitor,
+    ProbeResult,
+    build_health_monitor,
+    model_probe,
+    sqlite_probe,
+)
+
+
+class FakeModel:
+    def __init__(self, loaded: bool = False, loading: bool = False):
+        self.is_loaded = loaded
+        self.is_loading = loading
+
+
+class TestHealthMonitor:
+    """Tests for probe scheduling and cached readiness."""
+    
+    async def test_ready_when_required_probes_ok(self):
+        monitor = HealthMonitor(required=["llm"])
+        monitor.register("llm", lambda: ProbeResult(status="ok"))
+        monitor.register("analytics", lambda: ProbeResult(status="down", detail="refused"))
+        
+        assert monitor.ready_status_code == 503
+        await monitor.run_once()
+        
+        # Optional components being down does not block readiness.
+        assert monitor.ready_status_code == 200
+        body = json.loads(monitor.ready_body)
+        assert body == {"status": "ready", "checks": {"llm": "ok", "analytics": "down"}}
+    
+    async def test_probes_run_concurrently_with_timeout(self):
+        async def slow() -> ProbeResult:
+            await asyncio.sleep(5)
+            return ProbeResult(status="ok")
+        
+        async def fast() -> ProbeResult:
+            await asyncio.sleep(0.1)
+            return ProbeResult(status="ok")
+        
+        monitor = HealthMonitor(timeout_s=0.2)
+        monitor.register("slow", slow)
+        monitor.register("a", fast)
+        monitor.register("b", fast)
+        
+        started = time.perf_counter()
+        await monitor.run_once()
+        
+        assert time.perf_counter() - started < 0.4
+        checks = monitor.snapshot()["checks"]
+        assert checks["slow"]["status"] == "down"
+        assert "timed out" in checks["slow"]["detail"]
+        assert checks["a"]["status"] == "ok"
+        assert checks["a"]["latency_ms"] >= 100
+    
+    async def test_probe_exception_reported_down(self):
+        def broken() -> ProbeResult:
+            raise ConnectionRefusedError("connection refused")
+        
+        monitor = HealthMonitor()
+        monitor.register("vector", broken)
+        await monitor.run_once()
+        
+        result = monitor.snapshot()["checks"]["vector"]
+        assert result["status"] == "down"
+        assert "refused" in result["detail"]
+    
+    async def test_background_refresh(self):
+        state = {"status": "down"}
+        monitor = HealthMonitor(interval_s=0.02)
+        monitor.register("llm", lambda: ProbeResult(status=state["status"]))
+        
+        monitor.start()
+        try:
+            await asyncio.sleep(0.05)
+            assert not monitor.ready
+            state["status"] = "ok"
+            await asyncio.sleep(0.1)
+            assert monitor.ready
+        finally:
+            await monitor.stop()
+    
+    def test_pushed_state(self):
+        monitor = HealthMonitor()
+        monitor.set_state("llm", "loading", "warming up")
+        
+        assert monitor.ready_status_code == 503
+        assert monitor.snapshot()["checks"]["llm"]["detail"] == "warming up"
+    
+    def test_models_required_only_with_warmup(self):
+        settings = Settings()
+        assert "llm" in build_health_monitor(settings).required
+        
+        # Nothing would ever load the models, so readiness must not wait for them.
+        settings.warmup.enabled = False
+        required = build_health_monitor(settings).required
+        assert "llm" not in required and "embedding" not in required
+        assert "metadata" in required
+
+
+class TestProbes:
+    """Tests for the built-in probes."""
+    
+    def test_model_probe_never_loads(self):
+        assert model_probe(lambda: FakeModel(loaded=True))().status == "ok"
+        assert model_probe(lambda: FakeModel(loading=True))().status == "loading"
+        assert model_probe(lambda: FakeModel())().status == "down"
+    
+    async def test_sqlite_probe(self, tmp_path):
+        import sqlite3
+        
+        path = tmp_path / "metadata.db"
+        assert sqlite_probe(path)().status == "ok"
+        
+        sqlite3.connect(path).close()
+        assert sqlite_probe(path)().status == "ok"
+        
+        path.write_bytes(b"not a database" * 100)
+        monitor = HealthMonitor()
+        monitor.register("metadata", sqlite_probe(path))
+        await monitor.run_once()
+        assert monitor.snapshot()["checks"]["metadata"]["status"] == "down"
@@ -1,8 +1,32 @@
 """Tests for i18n module."""
 
+import json
+
 import pytest
 
-from sheaia.i18n import Language, t, get_translations_for_language
+from sheaia import i18n
+from sheaia.i18n import (
+    Language,
+    export_translations,
+    get_language,
+    get_translations_for_language,
+    load_catalog,
+    load_catalogs,
+    reset_language,
+    set_language,
+    t,
+)
+from sheaia.i18n.negotiation import choose_language, detect_language, parse_accept_language, resolve_language
+
+
+@pytest.fixture
+def restore_translations():
+    """Undo catalogs loaded by a test."""
+    saved = {key: dict(value) for key, value in i18n.TRANSLATIONS.items()}
+    yield
+    i18n.TRANSLATIONS.clear()
+    i18n.TRANSLATIONS.update(saved)
+    i18n.compile_catalog()
 
 
 class TestLanguage:
@@ -63,6 +87,15 @@ class TestTranslation:
         # Even if a key only has English, it should work
         result = t("common.save", Language.EN)
         assert result == "Save"
+    
+    def test_missing_placeholder_returns_template(self):
+        assert t("connector.last_sync", Language.EN, source="x") == "Last synced: {time}"
+    
+    def test_format_spec_falls_back_to_str_format(self, restore_translations):
+        i18n.TRANSLATIONS["test.progress"] = {Language.EN: "{done}/{total} ({pct:.0%})"}
+        i18n.compile_catalog()
+        
+        assert t("test.progress", Language.TH, done="3", total="4", pct=0.75) == "3/4 (75%)"
 
 
 class TestGetTranslations:
@@ -79,3 +112,77 @@ class TestGetTranslations:
         
         assert translations["common.save"] == "保存"
         assert translations["chat.send"] == "发送"
+    
+    def test_export_matches_catalog(self):
+        body, etag = export_translations(Language.ZH_TW)
+        
+        assert json.loads(body) == get_translations_for_language(Language.ZH_TW)
+        assert export_translations(Language.ZH_TW) == (body, etag)
+        assert export_translations(Language.TH)[1] != etag
+
+
+class TestCatalogFiles:
+    """Tests for loading external JSON catalogs."""
+    
+    def test_nested_catalog(self, tmp_path, restore_translations):
+        path = tmp_path / "zh-CN.json"
+        path.write_text(json.dumps({"chat": {"thinking": "思考中...", "showSQL": "显示SQL"}}), encoding="utf-8")
+        _, etag = export_translations(Language.ZH_CN)
+        
+        assert load_catalog(path) == 2
+        
+        assert t("chat.showSQL", Language.ZH_CN) == "显示SQL"
+        assert t("chat.showSQL", Language.TH) == "chat.showSQL"  # no English either
+        assert export_translations(Language.ZH_CN)[1] != etag
+    
+    def test_directory(self, tmp_path, restore_translations):
+        (tmp_path / "en.json").write_text(json.dumps({"reports": {"title": "Reports"}}), encoding="utf-8")
+        (tmp_path / "th.json").write_text(json.dumps({"reports.title": "รายงาน"}), encoding="utf-8")
+        (tmp_path / "package.json").write_text("{}", encoding="utf-8")
+        
+        assert load_catalogs(tmp_path) == 2
+        assert t("reports.title", Language.TH) == "รายงาน"
+        assert t("reports.title", Language.ZH_TW) == "Reports"
+
+
+class TestNegotiation:
+    """Tests for Accept-Language parsing, detection and the request language."""
+    
+    def test_accept_language_q_values(self):
+        assert parse_accept_language("de-DE,th;q=0.8,en;q=0.9") == Language.EN
+        assert parse_accept_language("zh-HK;q=0.5, fr") == Language.ZH_TW
+        assert parse_accept_language("en;q=0, th;q=0.1") == Language.TH
+    
+    def test_accept_language_nothing_supported(self):
+        assert parse_accept_language("de, fr;q=0.9, *;q=0.1") is None
+        assert parse_accept_language("") is None
+    
+    def test_detect_language(self):
+        assert detect_language("上个月的产线数据") == Language.ZH_CN
+        assert detect_language("上個月的產線數據") == Language.ZH_TW
+        assert detect_language("ยอดขายเดือนที่แล้ว") == Language.TH
+        assert detect_language("查询 orders 表中上个月的总额") == Language.ZH_CN
+        assert detect_language("Sales for Q3 in 華東") == Language.EN
+        assert detect_language("What were sales last month?") == Language.EN
+        assert detect_language("42 / 7 = ?") is None
+    
+    def test_resolve_precedence(self):
+        token = set_language(Language.TH)
+        try:
+            assert resolve_language("zh-TW", "hello") == Language.ZH_TW
+            assert get_language() == Language.ZH_TW
+            assert choose_language("de", "hello", negotiated=True) == Language.ZH_TW
+            assert choose_language(None, "上个月的数据", negotiated=False) == Language.ZH_CN
+            assert choose_language(None, "上个月的数据", negotiated=True) == Language.ZH_TW
+        finally:
+            reset_language(token)
+        assert get_language() == Language.EN
+    
+    def test_t_uses_current_language(self):
+        token = set_language(Language.ZH_CN)
+        try:
+            assert t("common.save") == "保存"
+            assert t("common.save", Language.EN) == "Save"
+        finally:
+            reset_language(token)
+        assert t("common.save") == "Save"
@@ -0,0 +1,136 @@
+"""Tests for industrial tag ingestion."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from sheaia.connectors.industrial import (
+    CompressedBatchWriter,
+    TagIngestor,
+    TagSimulator,
+    TagStore,
+    parse_payload,
+    read_batch,
+)
+
+
+def reference_rollup(samples, resolution: float) -> pd.DataFrame:
+    """The same aggregates computed the slow, obvious way."""
+    frame = pd.DataFrame({"tag": np.asarray(samples.tags, dtype=str), "ts": samples.timestamps, "v": samples.values})
+    frame["start"] = np.floor(frame["ts"] / resolution) * resolution
+    grouped = frame.groupby(["tag", "start"])["v"]
+    return grouped.agg(["count", "sum", "min", "max", "last"]).reset_index()
+
+
+def collected(batches, resolution: float) -> pd.DataFrame:
+    frames = [b.frame for b in batches if b.resolution == resolution]
+    frame = pd.concat(frames, ignore_index=True)
+    frame["tag"] = frame["tag"].astype(str)
+    return frame.sort_values(["tag", "start"]).reset_index(drop=True)
+
+
+class Sink:
+    """Collects flushed rollup batches."""
+    
+    def __init__(self):
+        self.batches = []
+    
+    async def __call__(self, batch):
+        self.batches.append(batch)
+
+
+class TestTagStore:
+    """Ring buffers and rollups."""
+    
+    def test_ring_keeps_newest_samples_in_order(self):
+        store = TagStore(capacity=8, tags=1)
+        store.ingest(["a"] * 5, np.arange(5.0), np.arange(5.0))
+        store.ingest(["a", "b"] * 10, np.repeat(np.arange(5.0, 15.0), 2), np.repeat(np.arange(5.0, 15.0), 2))
+        
+        timestamps, values = store.recent("a")
+        assert values.tolist() == list(range(7, 15))
+        assert timestamps.tolist() == values.tolist()
+        assert store.recent("b", seconds=2)[1].tolist() == [12.0, 13.0, 14.0]
+        assert store.samples == 25
+    
+    def test_rollups_match_reference(self):
+        simulator = TagSimulator(tags=20, rate_hz=7.0, seed=1)
+        store = TagStore(capacity=64, resolutions=(1.0, 60.0))
+        sink = []
+        everything = []
+        for i in range(30):
+            batch = simulator.batch(1_000_000.0 + i * 4.3, 4.3)
+            everything.append(batch)
+            store.ingest(*batch)
+            sink.extend(store.drain())
+        store.close_before(float("inf"))
+        sink.extend(store.drain())
+        
+        samples = type(everything[0])(*(np.concatenate(parts) for parts in zip(*everything)))
+        for resolution in (1.0, 60.0):
+            expected = reference_rollup(samples, resolution)
+            actual = collected(sink, resolution)
+            assert len(actual) == len(expected)
+            for column in ("count", "sum", "min", "max", "last"):
+                np.testing.assert_allclose(actual[column], expected[column])
+    
+    def test_unsorted_and_late_samples(self):
+        store = TagStore(resolutions=(10.0,))
+        store.ingest(["t"] * 4, np.array([25.0, 21.0, 3.0, 29.0]), np.array([1.0, 2.0, 3.0, 4.0]))
+        assert store.current("t")["10s"]["count"] == 3
+        store.ingest(["t"], np.array([5.0]), np.array([9.0]))
+        store.close_before(float("inf"))
+        
+        frame = store.drain()[0].frame.sort_values(["start", "count"])
+        assert frame[["start", "count", "sum"]].values.tolist() == [[0.0, 1, 3.0], [0.0, 1, 9.0], [20.0, 3, 7.0]]
+    
+    def test_current_and_describe(self):
+        store = TagStore()
+        store.ingest(["line1/speed"] * 3, np.array([120.0, 121.0, 122.0]), np.array([10.0, 20.0, 30.0]))
+        stats = store.current("line1/speed")
+        assert stats["1m"] == {"start": 120.0, "count": 3, "mean": 20.0, "min": 10.0, "max": 30.0, "last": 30.0}
+        assert "1s" in stats and "1h" in stats
+        assert store.describe() == "line1/speed: last 30; 1m mean 20, min 10, max 30, 3 samples"
+    
+    def test_tag_ids_and_growth(self):
+        store = TagStore(capacity=4, tags=2)
+        ids = store.tag_ids([f"tag{i}" for i in range(10)] * 2)
+        assert ids.tolist() == list(range(10)) * 2
+        store.ingest(ids, np.arange(20.0), np.arange(20.0))
+        assert store.recent("tag9")[1].tolist() == [9.0, 19.0]
+
+
+class TestIngestion:
+    """Sources, flushing and the compressed batch files."""
+    
+    async def test_simulated_stream_is_flushed_in_bulk(self, tmp_path):
+        writer = CompressedBatchWriter(tmp_path)
+        sink = Sink()
+        
+        async def both(batch):
+            await sink(batch)
+            await writer(batch)
+        
+        store = TagStore(resolutions=(1.0, 60.0))
+        ingestor = TagIngestor(store, both, flush_interval_s=60, max_pending=500)
+        simulator = TagSimulator(tags=50, rate_hz=20.0)
+        await ingestor.run(simulator.stream(start=0.0, interval_s=0.5, batches=40, realtime=False))
+        
+        assert store.samples == 50 * 20 * 20
+        assert ingestor.flushed == 50 * 20 + 50
+        assert len(sink.batches) < 20
+        files = sorted(tmp_path.glob("rollup_1s_*.npz"))
+        assert files
+        restored = read_batch(files[0])
+        original = next(b for b in sink.batches if b.resolution == 1.0)
+        pd.testing.assert_frame_equal(
+            restored.frame.assign(tag=restored.frame["tag"].astype(str)),
+            original.frame.assign(tag=original.frame["tag"].astype(str)),
+        )
+    
+    def test_payloads(self):
+        assert parse_payload(b"42.5", 100.0) == (100.0, 42.5)
+        assert parse_payload(b'{"value": 1, "ts": 1700000000123}', 0.0) == (1700000000.123, 1.0)
+        assert parse_payload(b'{"v": true}', 5.0) == (5.0, 1.0)
+        with pytest.raises(ValueError):
+            parse_payload(b"running", 0.0)
@@ -0,0 +1,117 @@
+"""Tests for metrics and tracing."""
+
+import time
+
+import pytest
+
+from sheaia.core import metrics
+from sheaia.core.llm import LlamaCppLLM
+from sheaia.core.metrics import Counter, GenerationRecorder, Histogram, Registry
+from tests.fakes import FakeLlama
+
+
+class TestMetricTypes:
+    """Tests for counters, histograms and the text exposition format."""
+    
+    def test_histogram_buckets_are_cumulative(self):
+        registry = Registry()
+        hist = registry.register(Histogram("test_seconds", "Test", ("route",), buckets=(0.1, 1.0)))
+        
+        child = hist.labels("/a")
+        for value in (0.05, 0.1, 0.5, 5.0):
+            child.observe(value)
+        
+        text = registry.render()
+        assert 'test_seconds_bucket{route="/a",le="0.1"} 2' in text
+        assert 'test_seconds_bucket{route="/a",le="1"} 3' in text
+        assert 'test_seconds_bucket{route="/a",le="+Inf"} 4' in text
+        assert 'test_seconds_count{route="/a"} 4' in text
+        assert "# TYPE test_seconds histogram" in text
+    
+    def test_counter_without_labels(self):
+        registry = Registry()
+        total = registry.register(Counter("test_total", "Test"))
+        
+        total.inc()
+        total.inc(2)
+        
+        assert "test_total 3" in registry.render()
+    
+    def test_label_count_checked(self):
+        hist = Histogram("test_seconds", "Test", ("a", "b"))
+        with pytest.raises(ValueError):
+            hist.labels("only-one")
+    
+    def test_labels_cached(self):
+        hist = Histogram("test_seconds", "Test", ("a",))
+        assert hist.labels("x") is hist.labels("x")
+    
+    def test_label_values_escaped(self):
+        registry = Registry()
+        total = registry.register(Counter("test_total", "Test", ("path",)))
+        total.labels('a"b').inc()
+        assert 'path="a\\"b"' in registry.render()
+    
+    def test_conflicting_registration(self):
+        registry = Registry()
+        registry.register(Counter("test_total", "Test"))
+        with pytest.raises(ValueError):
+            registry.register(Histogram("test_total", "Test"))
+
+
+class TestInstrumentation:
+    """Tests for hot-path recording."""
+    
+    def test_generation_recorder(self):
+        recorder = GenerationRecorder("recorder-test")
+        started = time.perf_counter() - 1.0
+        
+        recorder.record(started, completion_tokens=50, prompt_tokens=200, first_token_at=started + 0.5)
+        
+        assert recorder.prompt_tokens.sum == 200
+        assert recorder.completion_tokens.sum == 50
+        assert recorder.ttft.sum == pytest.approx(0.5)
+        assert recorder.tokens_per_second.sum == pytest.approx(100, rel=0.05)
+    
+    async def test_llama_generate_records_usage(self):
+        llm = LlamaCppLLM(model_path="models/llm/metrics-test.gguf")
+        llm._model = FakeLlama(lambda: {
+            "choices": [{"text": "hello"}],
+            "usage": {"prompt_tokens": 12, "completion_tokens": 3, "total_tokens": 15},
+        })
+        
+        await llm.generate("prompt")
+        
+        child = metrics.LLM_PROMPT_TOKENS.labels("metrics-test.gguf")
+        assert child.count == 1
+        assert child.sum == 12
+    
+    async def test_llama_stream_records_ttft(self):
+        llm = LlamaCppLLM(model_path="models/llm/stream-test.gguf")
+        llm._model = FakeLlama(lambda: iter(
+            {"choices": [{"text": token}]} for token in ("a", "b", "c")
+        ))
+        
+        tokens = [token async for token in llm.stream("prompt")]
+        
+        assert tokens == ["a", "b", "c"]
+        assert metrics.LLM_TIME_TO_FIRST_TOKEN.labels("stream-test.gguf").count == 1
+        assert metrics.LLM_COMPLETION_TOKENS.labels("stream-test.gguf").sum == 3
+
+
+class TestSpans:
+    """Tests for optional tracing spans."""
+    
+    def test_disabled_span_is_shared_noop(self):
+        metrics.configure_tracing(False)
+        assert metrics.span("a") is metrics.span("b")
+    
+    def test_enabled_span_records_stage(self):
+        metrics.configure_tracing(True)
+        try:
+            with metrics.span("test.stage"):
+                time.sleep(0.01)
+        finally:
+            metrics.configure_tracing(False)
+        
+        assert metrics.STAGE_SECONDS.labels("test.stage").sum >= 0.01
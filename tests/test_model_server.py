@@ -0,0 +1,205 @@
+"""Tests for the shared model server."""
+
+import asyncio
+import socket
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from sheaia.core.llm import LlamaCppLLM
+from sheaia.core.model_server import (
+    ModelClient,
+    ModelServer,
+    ModelServerError,
+    RemoteEmbedding,
+    RemoteLLM,
+)
+from sheaia.core.prompt import PromptAssembler, Section
+from tests.fakes import FakeEmbedding, FakeLlama, FakeLLM
+
+
+@pytest.fixture
+async def server(tmp_path):
+    llm = FakeLLM({"slow": (0.2, "slow reply"), "long": (0.0, " ".join(["tok"] * 2000))})
+    server = ModelServer(llm, FakeEmbedding(), str(tmp_path / "models.sock"))
+    await server.start(load=False)
+    yield server
+    await server.close()
+
+
+@pytest.fixture
+async def client(server):
+    client = ModelClient(server.path)
+    yield client
+    await client.close()
+
+
+class TestRemoteLLM:
+    """Tests for generation over the socket."""
+    
+    async def test_generate(self, client):
+        response = await RemoteLLM(client).generate("hello there")
+        
+        assert response.text == "ok"
+        assert response.prompt_tokens == 2
+    
+    async def test_stream(self, client):
+        tokens = [t async for t in RemoteLLM(client).stream("say hi")]
+        
+        assert tokens == ["ok "]
+    
+    async def test_concurrent_requests_share_connection(self, server, client):
+        llm = RemoteLLM(client)
+        
+        started = time.perf_counter()
+        results = await asyncio.gather(*(llm.generate(f"slow {i}") for i in range(5)))
+        
+        assert time.perf_counter() - started < 0.5
+        assert all(r.text == "slow reply" for r in results)
+        assert len(server.llm.calls) == 5
+    
+    async def test_stream_overhead(self, client):
+        started = time.perf_counter()
+        tokens = [t async for t in RemoteLLM(client).stream("long")]
+        elapsed = time.perf_counter() - started
+        
+        assert len(tokens) == 2000
+        # Per-token forwarding cost stays far below a real decode step (~20ms).
+        assert elapsed / len(tokens) < 0.001
+    
+    async def test_abandoned_stream_is_cancelled(self, client):
+        stream = RemoteLLM(client).stream("long")
+        async for _ in stream:
+            break
+        await stream.aclose()
+        
+        # The connection is still usable afterwards.
+        assert (await RemoteLLM(client).generate("hi")).text == "ok"
+    
+    async def test_prompt_assembly(self, server, client):
+        llm = RemoteLLM(client)
+        # Tokenizing is a blocking call, as it is from the API's agent threads.
+        assembler = await asyncio.to_thread(PromptAssembler, llm)
+        prompt = await asyncio.to_thread(
+            assembler.assemble, [Section("system", required=True), Section("hello there")], 10
+        )
+        
+        assert assembler.n_ctx == 4096
+        assert (await llm.generate(prompt.tokens)).text == "ok"
+        assert server.llm.calls == ["system\n\nhello there"]
+    
+    async def test_unreachable_server(self, tmp_path):
+        llm = RemoteLLM(ModelClient(str(tmp_path / "missing.sock"), timeout_s=0.1))
+        
+        with pytest.raises(ModelServerError):
+            await llm.generate("hi")
+        assert not llm.is_loaded
+
+
+class TestRemoteEmbedding:
+    """Tests for embeddings over the socket."""
+    
+    async def test_embed(self, client):
+        embedding = RemoteEmbedding(client)
+        
+        documents = await asyncio.to_thread(embedding.embed_documents, ["a", "bb", "ccc"])
+        query = await asyncio.to_thread(embedding.embed_query, "bb")
+        
+        assert documents.shape == (3, 8)
+        assert documents.dtype == np.float32
+        np.testing.assert_array_equal(query, FakeEmbedding().embed_query("bb"))
+        assert await asyncio.to_thread(lambda: embedding.dimension) == 8
+    
+    async def test_status(self, client):
+        status = await asyncio.to_thread(client.status)
+        
+        assert status["llm"] == {"loaded": True, "loading": False, "context_length": 4096}
+        assert status["embedding"]["loaded"]
+    
+    def test_stalled_server(self, tmp_path):
+        path = str(tmp_path / "stalled.sock")
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as listener:
+            # Accepts connections into the backlog but never answers.
+            listener.bind(path)
+            listener.listen()
+            embedding = RemoteEmbedding(ModelClient(path, request_timeout_s=0.2))
+            
+            started = time.perf_counter()
+            with pytest.raises(ModelServerError):
+                embedding.embed_query("hi")
+            
+            assert time.perf_counter() - started < 1.0
+
+
+class TestBlockingModel:
+    """A llama.cpp generation must not stall the server's event loop."""
+    
+    @pytest.fixture
+    async def llama_server(self, tmp_path):
+        llm = LlamaCppLLM("model.gguf", n_ctx=4096)
+        completion = {
+            "choices": [{"text": "done"}],
+            "usage": {"prompt_tokens": 3, "completion_tokens": 1, "total_tokens": 4},
+        }
+        llm._model = FakeLlama(lambda: completion, latency=1.0)
+        server = ModelServer(llm, FakeEmbedding(), str(tmp_path / "models.sock"))
+        await server.start(load=False)
+        yield server
+        await server.close()
+    
+    async def test_status_during_generation(self, llama_server):
+        client = ModelClient(llama_server.path, timeout_s=0.5)
+        try:
+            generation = asyncio.create_task(RemoteLLM(client).generate("hi"))
+            await asyncio.sleep(0.1)
+            
+            started = time.perf_counter()
+            status = await asyncio.to_thread(client.status)
+            documents = await asyncio.to_thread(RemoteEmbedding(client).embed_documents, ["a"])
+            
+            assert time.perf_counter() - started < 0.5
+            assert status["llm"]["loaded"]
+            assert documents.shape == (1, 8)
+            assert not generation.done()
+            assert (await generation).text == "done"
+        finally:
+            await client.close()
+    
+    async def test_switch_model_on_inference_thread(self, monkeypatch):
+        threads = []
+        
+        def completion():
+            threads.append(threading.current_thread())
+            return {
+                "choices": [{"text": "done"}],
+                "usage": {"prompt_tokens": 3, "completion_tokens": 1, "total_tokens": 4},
+            }
+        
+        llm = LlamaCppLLM("old.gguf", n_ctx=4096)
+        llm._model = old = FakeLlama(completion, latency=0.1)
+        new = FakeLlama(completion)
+        monkeypatch.setattr(llm, "load_model", lambda: setattr(llm, "_model", new))
+        
+        queued = [asyncio.create_task(llm.generate("hi")) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        await llm.switch_model("new.gguf")
+        await llm.generate("hi")
+        await asyncio.gather(*queued)
+        
+        # Calls queued before the switch finish on the old model, all on one thread.
+        assert (len(old.prompts), len(new.prompts)) == (2, 1)
+        assert len(set(threads)) == 1
+        assert llm.model_path == "new.gguf"
+    
+    async def test_stream_from_inference_thread(self, llama_server):
+        chunks = [{"choices": [{"text": t}]} for t in ("a", "b", "c")]
+        llama_server.llm._model = FakeLlama(lambda: iter(chunks), latency=0.2)
+        client = ModelClient(llama_server.path)
+        try:
+            tokens = [t async for t in RemoteLLM(client).stream("hi")]
+        finally:
+            await client.close()
+        
+        assert tokens == ["a", "b", "c"]
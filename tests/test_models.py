@@ -0,0 +1,157 @@
+"""Tests for the local model registry."""
+
+import json
+import os
+import struct
+
+import pytest
+
+from sheaia.core import models
+from sheaia.core.models import GGUFError, ModelRegistry, read_gguf_metadata
+
+
+def gguf_string(value: str) -> bytes:
+    data = value.encode()
+    return struct.pack("<Q", len(data)) + data
+
+
+def write_gguf(path, metadata: dict, payload: bytes = b"\0" * 1024) -> None:
+    """Write a minimal GGUF v3 file: header, metadata, no tensors."""
+    body = b""
+    for key, value in metadata.items():
+        body += gguf_string(key)
+        if isinstance(value, str):
+            body += struct.pack("<I", 8) + gguf_string(value)
+        elif isinstance(value, list):
+            # String array, like a tokenizer vocabulary.
+            body += struct.pack("<IIQ", 9, 8, len(value)) + b"".join(gguf_string(v) for v in value)
+        else:
+            body += struct.pack("<II", 4, value)
+    header = b"GGUF" + struct.pack("<IQQ", 3, 0, len(metadata))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(header + body + payload)
+
+
+QWEN = {
+    "general.architecture": "qwen2",
+    "general.name": "Qwen2.5 14B Instruct",
+    "tokenizer.ggml.tokens": ["a", "b", "c"],
+    "general.file_type": 15,
+    "qwen2.context_length": 32768,
+    "qwen2.block_count": 48,
+    "qwen2.embedding_length": 5120,
+    "qwen2.attention.head_count": 40,
+    "qwen2.attention.head_count_kv": 8,
+}
+
+
+@pytest.fixture
+def models_dir(tmp_path):
+    write_gguf(tmp_path / "llm" / "qwen2.5-14b-instruct-q4_k_m.gguf", QWEN)
+    embedding = tmp_path / "embedding" / "bge-m3"
+    embedding.mkdir(parents=True)
+    (embedding / "config.json").write_text(json.dumps({
+        "architectures": ["XLMRobertaModel"],
+        "hidden_size": 1024,
+        "max_position_embeddings": 8194,
+        "num_hidden_layers": 24,
+        "torch_dtype": "float32",
+    }))
+    (embedding / "model.safetensors").write_bytes(b"\1" * 2048)
+    return tmp_path
+
+
+class TestGGUF:
+    """Tests for GGUF header parsing."""
+    
+    def test_read_metadata(self, tmp_path):
+        path = tmp_path / "m.gguf"
+        write_gguf(path, QWEN)
+        
+        meta = read_gguf_metadata(path)
+        
+        assert meta["general.architecture"] == "qwen2"
+        assert meta["qwen2.context_length"] == 32768
+        assert meta["tokenizer.ggml.tokens"] is None  # arrays are skipped
+    
+    def test_not_gguf(self, tmp_path):
+        path = tmp_path / "m.gguf"
+        path.write_bytes(b"PK\3\4 not a model")
+        
+        with pytest.raises(GGUFError):
+            read_gguf_metadata(path)
+
+
+class TestModelRegistry:
+    """Tests for cataloging, hash caching and verification."""
+    
+    def test_scan(self, models_dir):
+        found = {info.name: info for info in ModelRegistry(models_dir).scan()}
+        
+        llm = found["qwen2.5-14b-instruct-q4_k_m"]
+        assert llm.kind == "llm"
+        assert llm.quantization == "Q4_K_M"
+        assert llm.context_length == 32768
+        assert llm.path == os.path.join("llm", "qwen2.5-14b-instruct-q4_k_m.gguf")
+        assert llm.sha256 is None
+        
+        embedding = found["bge-m3"]
+        assert embedding.kind == "embedding"
+        assert embedding.embedding_length == 1024
+    
+    def test_memory_estimate_includes_kv_cache(self, models_dir):
+        llm = ModelRegistry(models_dir).get("qwen2.5-14b-instruct-q4_k_m")
+        
+        # 48 layers * 8 KV heads * 128 head dim * K and V * f16
+        per_token = 2 * 48 * 8 * 128 * 2
+        assert llm.estimated_memory_bytes(n_ctx=1000) == llm.size_bytes + 1000 * per_token
+    
+    def test_hash_computed_once(self, models_dir, monkeypatch):
+        hashed = []
+        original = models.sha256_file
+        monkeypatch.setattr(models, "sha256_file", lambda path: hashed.append(path) or original(path))
+        
+        first = ModelRegistry(models_dir).scan(compute_hashes=True)
+        second = ModelRegistry(models_dir).scan(compute_hashes=True)
+        
+        assert len(hashed) == 2
+        assert [m.sha256 for m in first] == [m.sha256 for m in second]
+        assert all(m.sha256 for m in ModelRegistry(models_dir).scan())
+    
+    def test_hash_recomputed_after_change(self, models_dir):
+        registry = ModelRegistry(models_dir)
+        registry.scan(compute_hashes=True)
+        before = registry.get("bge-m3").sha256
+        
+        weights = models_dir / "embedding" / "bge-m3" / "model.safetensors"
+        weights.write_bytes(b"\2" * 4096)
+        
+        assert registry.get("bge-m3").sha256 is None
+        registry.scan(compute_hashes=True)
+        assert registry.get("bge-m3").sha256 not in (None, before)
+    
+    def test_verify_detects_in_place_corruption(self, models_dir):
+        registry = ModelRegistry(models_dir)
+        registry.scan(compute_hashes=True)
+        assert all(result.ok for result in registry.verify())
+        
+        path = models_dir / "llm" / "qwen2.5-14b-instruct-q4_k_m.gguf"
+        stat = path.stat()
+        data = bytearray(path.read_bytes())
+        data[-1] = 0xFF
+        path.write_bytes(bytes(data))
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        
+        results = {r.name: r for r in registry.verify()}
+        assert not results["qwen2.5-14b-instruct-q4_k_m"].ok
+        assert "checksum changed" in results["qwen2.5-14b-instruct-q4_k_m"].detail
+        assert results["bge-m3"].ok
+        
+        # The reference hash survives a failed check.
+        results = {r.name: r for r in registry.verify()}
+        assert not results["qwen2.5-14b-instruct-q4_k_m"].ok
+        assert not ModelRegistry(models_dir).verify(["qwen2.5-14b-instruct-q4_k_m"])[0].ok
+    
+    def test_unknown_model(self, models_dir):
+        with pytest.raises(KeyError):
+            ModelRegistry(models_dir).get("missing")
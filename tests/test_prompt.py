@@ -0,0 +1,109 @@
+"""Tests for token-budgeted prompt assembly."""
+
+import pytest
+
+from sheaia.core.llm import ContextLengthExceededError, GenerationConfig, LlamaCppLLM
+from sheaia.core.prompt import PromptAssembler, Section
+from tests.fakes import BOS, FakeLlama, FakeLLM
+
+
+def words(n: int, word: str = "w") -> str:
+    return " ".join([word] * n)
+
+
+@pytest.fixture
+def llm():
+    return FakeLLM()
+
+
+class TestPromptAssembler:
+    """Tests for packing, truncation and token caching."""
+    
+    def test_fits_whole(self, llm):
+        assembler = PromptAssembler(llm, n_ctx=100)
+        
+        prompt = assembler.assemble([Section("system", required=True), Section("hello there")], max_tokens=10)
+        
+        assert prompt.tokens[0] == BOS
+        assert llm.detokenize(prompt.tokens) == "system\n\nhello there"
+        assert prompt.dropped == []
+    
+    def test_low_priority_dropped(self, llm):
+        assembler = PromptAssembler(llm, n_ctx=60)
+        sections = [
+            Section("system", required=True, name="system"),
+            Section(words(20, "low"), priority=1, name="low"),
+            Section(words(20, "high"), priority=5, name="high"),
+            Section("question?", required=True, name="question"),
+        ]
+        
+        prompt = assembler.assemble(sections, max_tokens=10)
+        
+        assert prompt.included == ["system", "high", "question"]
+        assert prompt.dropped == ["low"]
+        # Emitted in the given order, not the packing order.
+        assert llm.detokenize(prompt.tokens).startswith("system\n\nhigh")
+        assert prompt.prompt_tokens <= 60 - 10
+    
+    def test_truncatable_section_cut_to_fit(self, llm):
+        assembler = PromptAssembler(llm, n_ctx=30)
+        
+        prompt = assembler.assemble(
+            [Section("q", required=True), Section(words(50), truncate="end", name="chunk")],
+            max_tokens=5,
+        )
+        
+        assert prompt.truncated == ["chunk"]
+        assert prompt.prompt_tokens == 30 - 5
+    
+    def test_required_overflow_fails_fast(self, llm):
+        assembler = PromptAssembler(llm, n_ctx=50)
+        
+        with pytest.raises(ContextLengthExceededError) as exc:
+            assembler.assemble([Section(words(40), required=True)], max_tokens=20)
+        
+        assert exc.value.n_ctx == 50
+    
+    def test_cached_sections_tokenized_once(self, llm):
+        assembler = PromptAssembler(llm, n_ctx=1000)
+        
+        def sections(question):
+            return [Section("system prompt", required=True, cache=True), Section(question)]
+        
+        assembler.assemble(sections("first"), max_tokens=10)
+        before = llm.tokenize_calls
+        assembler.assemble(sections("second"), max_tokens=10)
+        
+        # Only the new question is tokenized.
+        assert llm.tokenize_calls == before + 1
+    
+    async def test_tokens_passed_to_model(self, llm):
+        assembler = PromptAssembler(llm)
+        prompt = assembler.assemble([Section("Generate a valid SQL query")], max_tokens=10)
+        
+        await llm.generate(prompt.tokens)
+        
+        assert llm.calls == ["Generate a valid SQL query"]
+
+
+class TestLlamaBudget:
+    """Tests for the context check in LlamaCppLLM."""
+    
+    async def test_overlong_prompt_rejected_before_generation(self):
+        llm = LlamaCppLLM(model_path="budget-test.gguf", n_ctx=64)
+        llm._model = FakeLlama(lambda: {"choices": [{"text": ""}], "usage": {}})
+        
+        with pytest.raises(ContextLengthExceededError):
+            await llm.generate("x" * 60, GenerationConfig(max_tokens=16))
+        assert llm._model.prompts == []
+    
+    async def test_token_prompt_not_retokenized(self):
+        llm = LlamaCppLLM(model_path="budget-test.gguf", n_ctx=64)
+        llm._model = FakeLlama(lambda: {
+            "choices": [{"text": "ok"}],
+            "usage": {"prompt_tokens": 3, "completion_tokens": 1, "total_tokens": 4},
+        })
+        
+        await llm.generate([1, 2, 3], GenerationConfig(max_tokens=8))
+        
+        assert llm._model.prompts == [[1, 2, 3]]
@@ -0,0 +1,207 @@
+"""Tests for the report engine."""
+
+import asyncio
+import time
+
+import pytest
+
+from sheaia.agents.reports import (
+    QueryStep,
+    Report,
+    ReportEngine,
+    ReportScheduler,
+    ReportSection,
+    StepCache,
+    SummarizeStep,
+)
+from sheaia.i18n import Language
+from tests.fakes import FakeLLM
+
+ALL_LANGUAGES = list(Language)
+
+
+class FakeWarehouse:
+    """Query runner and version provider over in-memory tables."""
+    
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.versions = {"orders": "1", "production": "1"}
+        self.queries: list[str] = []
+    
+    async def query(self, sql: str) -> list[dict]:
+        self.queries.append(sql)
+        await asyncio.sleep(self.latency)
+        return [{"table": sql.split()[-1], "total": 42}]
+    
+    async def table_versions(self, tables: list[str]) -> dict[str, str]:
+        return {table: self.versions[table] for table in tables}
+
+
+def daily_report() -> Report:
+    return Report(
+        name="daily",
+        title="report.generated",
+        steps=[
+            QueryStep("sales", "SELECT SUM(amount) FROM orders", sources=["orders"]),
+            QueryStep("output", "SELECT SUM(units) FROM production", sources=["production"]),
+            SummarizeStep("summary", ["sales", "output"], "Summarize the day.", title="report.executive_summary"),
+            SummarizeStep("findings", ["output"], "List notable production changes.", title="report.key_findings"),
+        ],
+        sections=[
+            ReportSection(title="report.executive_summary", step="summary"),
+            ReportSection(title="report.key_findings", step="findings"),
+        ],
+    )
+
+
+@pytest.fixture
+def warehouse():
+    return FakeWarehouse()
+
+
+@pytest.fixture
+def engine(warehouse):
+    return ReportEngine(warehouse.query, warehouse.table_versions, llm=FakeLLM(default="Output up 5%"))
+
+
+class TestReportDefinition:
+    """Tests for DAG validation."""
+    
+    def test_unknown_dependency(self):
+        with pytest.raises(ValueError, match="unknown steps"):
+            Report("r", [SummarizeStep("s", ["missing"], "x")], [])
+    
+    def test_cycle(self):
+        steps = [QueryStep("a", "SELECT 1", [], depends_on=["b"]), QueryStep("b", "SELECT 2", [], depends_on=["a"])]
+        with pytest.raises(ValueError, match="cycle"):
+            Report("r", steps, [])
+    
+    def test_shared_step_cannot_depend_on_language(self):
+        steps = [SummarizeStep("s", [], "x"), QueryStep("q", "SELECT 1", [], depends_on=["s"])]
+        with pytest.raises(ValueError, match="once for all languages"):
+            Report("r", steps, [])
+
+
+class TestReportEngine:
+    """Tests for memoized, parallel report generation."""
+    
+    async def test_languages_share_queries(self, engine, warehouse):
+        run = await engine.run(daily_report(), ALL_LANGUAGES)
+        
+        assert len(warehouse.queries) == 2
+        assert set(run.rendered) == set(ALL_LANGUAGES)
+        assert len(run.computed) == 2 + 2 * len(ALL_LANGUAGES)
+        assert "## 执行摘要" in run.rendered[Language.ZH_CN].content
+        assert "## ข้อค้นพบสำคัญ" in run.rendered[Language.TH].content
+        assert run.rendered[Language.EN].sections["Executive Summary"] == "Output up 5%"
+    
+    async def test_unchanged_data_is_reused(self, engine, warehouse):
+        await engine.run(daily_report(), ALL_LANGUAGES)
+        run = await engine.run(daily_report(), ALL_LANGUAGES)
+        
+        assert run.computed == []
+        assert len(warehouse.queries) == 2
+        assert len(engine.llm.calls) == 2 * len(ALL_LANGUAGES)
+    
+    async def test_only_changed_sources_recompute(self, engine, warehouse):
+        await engine.run(daily_report(), [Language.EN])
+        warehouse.versions["orders"] = "2"
+        
+        run = await engine.run(daily_report(), [Language.EN])
+        
+        # Sales changed, so the summary built on it reruns; production did not.
+        assert sorted(run.computed) == ["sales", "summary[en]"]
+        assert sorted(run.reused) == ["findings[en]", "output"]
+    
+    async def test_definition_change_recomputes(self, engine):
+        await engine.run(daily_report(), [Language.EN])
+        report = daily_report()
+        report.steps["findings"].instruction = "List the three biggest changes."
+        
+        run = await engine.run(report, [Language.EN])
+        
+        assert run.computed == ["findings[en]"]
+    
+    async def test_independent_steps_run_in_parallel(self):
+        warehouse = FakeWarehouse(latency=0.2)
+        engine = ReportEngine(warehouse.query, warehouse.table_versions, llm=FakeLLM(latency=0.1))
+        
+        started = time.perf_counter()
+        await engine.run(daily_report(), ALL_LANGUAGES)
+        wall = time.perf_counter() - started
+        
+        # Two parallel queries (0.2) then eight summaries, four at a time (2 x 0.1).
+        assert wall < 0.6
+    
+    async def test_results_survive_restart(self, tmp_path, warehouse):
+        path = tmp_path / "reports.db"
+        first = ReportEngine(warehouse.query, warehouse.table_versions, llm=FakeLLM(), cache=StepCache(path))
+        await first.run(daily_report())
+        first.cache.close()
+        
+        second = ReportEngine(warehouse.query, warehouse.table_versions, llm=FakeLLM(), cache=StepCache(path))
+        run = await second.run(daily_report())
+        
+        assert run.computed == []
+    
+    async def test_failed_step_is_not_memoized(self, warehouse):
+        llm = FakeLLM()
+        engine = ReportEngine(warehouse.query, warehouse.table_versions, llm=llm)
+        
+        async def broken(sql: str) -> list[dict]:
+            raise RuntimeError("warehouse down")
+        
+        engine.query_runner = broken
+        with pytest.raises(RuntimeError):
+            await engine.run(daily_report())
+        engine.query_runner = warehouse.query
+        run = await engine.run(daily_report())
+        
+        assert sorted(run.computed) == ["findings[en]", "output", "sales", "summary[en]"]
+    
+    async def test_unknown_versions_are_not_memoized(self, warehouse):
+        engine = ReportEngine(warehouse.query, llm=FakeLLM())
+        await engine.run(daily_report())
+        run = await engine.run(daily_report())
+        
+        assert run.reused == []
+        assert len(warehouse.queries) == 4
+    
+    async def test_query_without_sources_is_not_memoized(self, engine, warehouse):
+        report = Report(
+            "adhoc",
+            [QueryStep("latest", "SELECT * FROM orders", []), QueryStep("output", "SELECT * FROM production", ["production"])],
+            [ReportSection(title="Orders", step="latest"), ReportSection(title="Output", step="output")],
+        )
+        await engine.run(report)
+        run = await engine.run(report)
+        
+        assert run.computed == ["latest"]
+        assert run.reused == ["output"]
+
+
+class TestReportScheduler:
+    """Tests for scheduled runs."""
+    
+    async def test_runs_on_interval(self, engine, warehouse):
+        scheduler = ReportScheduler(engine)
+        scheduler.add(daily_report(), interval_s=0.05, languages=[Language.EN, Language.ZH_TW])
+        
+        scheduler.start()
+        await asyncio.sleep(0.12)
+        await scheduler.stop()
+        
+        run = scheduler.latest["daily"]
+        assert set(run.rendered) == {Language.EN, Language.ZH_TW}
+        assert run.computed == []  # later runs hit the memo
+        assert len(warehouse.queries) == 2
+    
+    async def test_prunes_cache(self, engine):
+        await engine.cache.put("old", "sales", [])
+        scheduler = ReportScheduler(engine, cache_retention_s=0.0, prune_interval_s=0.05)
+        
+        scheduler.start()
+        await asyncio.sleep(0.02)
+        await scheduler.stop()
+        
+        assert await engine.cache.get("old") == (False, None)
@@ -0,0 +1,155 @@
+"""Tests for the server-side query result store and API."""
+
+import gzip
+import json
+import os
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+from fastapi.testclient import TestClient
+
+from sheaia.api import app
+from sheaia.api.routes.results import result_store
+from sheaia.core.results import ResultStore, UnknownResultError, decode_cursor, encode_cursor
+
+
+def table(rows: int) -> pa.Table:
+    return pa.table({
+        "id": pa.array(range(rows), pa.int64()),
+        "plant": pa.array([f"工厂{i % 3}" for i in range(rows)]),
+        "output": pa.array([i * 0.5 for i in range(rows)]),
+    })
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ResultStore(tmp_path / "results", batch_rows=1000)
+
+
+class TestResultStore:
+    """Writing, paging, projection and eviction."""
+    
+    def test_cursor_pages_cover_result(self, store):
+        info = store.write(table(2500), sql="SELECT * FROM output")
+        assert info.rows == 2500 and info.sql == "SELECT * FROM output"
+        assert [c.name for c in info.columns] == ["id", "plant", "output"]
+        
+        ids, cursor, pages = [], None, 0
+        while True:
+            page = store.page(info.id, cursor, limit=700)
+            ids.extend(page.to_table()["id"].to_pylist())
+            pages += 1
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+        assert ids == list(range(2500)) and pages == 4
+        assert decode_cursor(encode_cursor(1400)) == 1400
+    
+    def test_pages_are_zero_copy_and_projected(self, store):
+        info = store.write(pd.DataFrame({"a": range(3000), "b": [float(i) for i in range(3000)]}))
+        page = store.page(info.id, encode_cursor(900), limit=200, columns=["b"])
+        assert page.schema.names == ["b"]
+        assert [batch.num_rows for batch in page.batches] == [100, 100]
+        assert page.to_table()["b"].to_pylist() == [float(i) for i in range(900, 1100)]
+        # A slice of the mapped file, not a decoded copy.
+        assert not page.batches[0].column(0).buffers()[1].is_mutable
+        
+        with pytest.raises(ValueError, match="Unknown columns: c"):
+            store.page(info.id, columns=["b", "c"])
+        with pytest.raises(ValueError):
+            store.page(info.id, "not a cursor!")
+    
+    def test_streams_round_trip(self, store):
+        info = store.write(table(2500))
+        for compression in ("none", "zstd", "lz4"):
+            body = b"".join(store.page(info.id, limit=1500).stream("arrow", compression))
+            assert pa.ipc.open_stream(body).read_all()["id"].to_pylist() == list(range(1500))
+        body = gzip.decompress(b"".join(store.page(info.id, limit=3).stream("ndjson", "gzip")))
+        assert [json.loads(line) for line in body.splitlines()][1] == {"id": 1, "plant": "工厂1", "output": 0.5}
+        with pytest.raises(ValueError):
+            list(store.page(info.id).stream("ndjson", "zstd"))
+    
+    def test_quota_evicts_least_recently_read(self, store):
+        first = store.write(table(2000))
+        store.quota_bytes = first.size_bytes * 2 + 100
+        second = store.write(table(2000))
+        store.page(first.id, limit=1)
+        third = store.write(table(2000))
+        
+        assert store.info(first.id) and store.info(third.id)
+        with pytest.raises(UnknownResultError):
+            store.info(second.id)
+        assert len(list(store.directory.iterdir())) == 2
+        with pytest.raises(ValueError, match="quota"):
+            store.write(table(20000))
+    
+    def test_expiry_and_restart(self, store):
+        info = store.write(table(10))
+        restarted = ResultStore(store.directory, ttl_s=3600)
+        assert restarted.page(info.id).rows == 10
+        
+        os.utime(store.directory / f"{info.id}.arrow", (time.time() - 7200,) * 2)
+        with pytest.raises(UnknownResultError):
+            ResultStore(store.directory, ttl_s=3600).info(info.id)
+        assert not list(store.directory.iterdir())
+    
+    
+    def test_workers_share_directory(self, store):
+        other = ResultStore(store.directory, batch_rows=1000)
+        first = store.write(table(2000))
+        assert other.page(first.id).rows == 2000
+        
+        # The quota counts results written by either worker.
+        second = other.write(table(2000))
+        store.quota_bytes = first.size_bytes + second.size_bytes + 100
+        time.sleep(0.01)
+        other.page(first.id, limit=1)
+        store.write(table(2000))
+        assert store.size_bytes <= store.quota_bytes
+        with pytest.raises(UnknownResultError):
+            other.info(second.id)
+        
+        other.delete(first.id)
+        with pytest.raises(UnknownResultError):
+            store.info(first.id)
+        with pytest.raises(UnknownResultError):
+            store.info("../../etc/passwd")
+
+
+class TestResultEndpoints:
+    """Tests for /api/v1/results."""
+    
+    @pytest.fixture
+    def client(self, store):
+        app.dependency_overrides[result_store] = lambda: store
+        yield TestClient(app)
+        app.dependency_overrides.clear()
+    
+    def test_arrow_pages(self, client, store):
+        info = store.write(table(2500))
+        url = f"/api/v1/results/{info.id}"
+        response = client.get(url, params={"limit": 2000, "columns": "id,output"},
+                              headers={"Accept": "application/vnd.apache.arrow.stream"})
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/vnd.apache.arrow.stream"
+        assert response.headers["x-total-rows"] == "2500"
+        first = pa.ipc.open_stream(response.content).read_all()
+        assert first.column_names == ["id", "output"] and first.num_rows == 2000
+        
+        response = client.get(url, params={"cursor": response.headers["x-next-cursor"], "format": "arrow", "compression": "zstd"})
+        assert pa.ipc.open_stream(response.content).read_all()["id"].to_pylist() == list(range(2000, 2500))
+        assert "x-next-cursor" not in response.headers
+    
+    def test_ndjson_gzip_and_errors(self, client, store):
+        info = store.write(table(5))
+        response = client.get(f"/api/v1/results/{info.id}", params={"limit": 2})
+        assert response.headers["content-encoding"] == "gzip"
+        assert [json.loads(line)["id"] for line in response.text.splitlines()] == [0, 1]
+        assert client.get(f"/api/v1/results/{info.id}/info").json()["rows"] == 5
+        
+        assert client.get(f"/api/v1/results/{info.id}", params={"columns": "nope"}).status_code == 400
+        assert client.get(f"/api/v1/results/{info.id}", params={"compression": "lz4"}).status_code == 400
+        assert client.delete(f"/api/v1/results/{info.id}").status_code == 204
+        assert client.get(f"/api/v1/results/{info.id}").status_code == 404
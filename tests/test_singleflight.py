@@ -0,0 +1,244 @@
+"""Tests for single-flight request coalescing."""
+
+import asyncio
+
+import pytest
+
+from sheaia.core import llm as llm_module
+from sheaia.core.llm import GenerationConfig, get_llm
+from sheaia.core.singleflight import (
+    CoalescingLLM,
+    SingleFlight,
+    chat_key,
+    coalesce_queries,
+    normalize_sql,
+    sql_key,
+)
+from tests.fakes import FakeLLM
+
+
+class TestKeys:
+    """Normalization decides which requests count as identical."""
+    
+    def test_chat_key_ignores_case_width_and_whitespace(self):
+        assert chat_key("  Today's  OUTPUT? ", "en") == chat_key("today's output?", "en")
+        assert chat_key("ＯＥＥ", "en") == chat_key("oee", "en")
+        assert chat_key("output", "en") != chat_key("output", "th")
+        assert chat_key("output", "en", "line=3") != chat_key("output", "en")
+    
+    def test_sql_keeps_literals(self):
+        assert normalize_sql("SELECT  *\n FROM t  WHERE a = 'x  y';") == "SELECT * FROM t WHERE a = 'x  y'"
+        assert sql_key("select 1") == sql_key("select   1;")
+        assert sql_key("SELECT 'A'") != sql_key("SELECT 'a'")
+
+
+class TestSingleFlight:
+    """One computation per key, shared by everyone who asks while it runs."""
+    
+    async def test_concurrent_callers_share_one_call(self):
+        flight = SingleFlight("test")
+        calls = 0
+        
+        async def work():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.02)
+            return calls
+        
+        results = await asyncio.gather(*(flight.do("k", work) for _ in range(10)))
+        
+        assert results == [1] * 10
+        assert calls == 1
+        assert flight.coalescing_ratio == 0.9
+        assert flight.in_flight == 0
+    
+    async def test_results_are_not_cached(self):
+        flight = SingleFlight("test")
+        calls = []
+        
+        async def work():
+            calls.append(1)
+            return len(calls)
+        
+        assert await flight.do("k", work) == 1
+        assert await flight.do("k", work) == 2
+    
+    async def test_errors_reach_every_caller(self):
+        flight = SingleFlight("test")
+        
+        async def work():
+            await asyncio.sleep(0.01)
+            raise ValueError("query failed")
+        
+        results = await asyncio.gather(*(flight.do("k", work) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(r, ValueError) for r in results)
+    
+    async def test_timeout_per_key(self):
+        flight = SingleFlight("test", timeout_s=10)
+        
+        async def slow():
+            await asyncio.sleep(1)
+        
+        results = await asyncio.gather(
+            flight.do("k", slow, timeout_s=0.02),
+            flight.do("k", slow),
+            return_exceptions=True,
+        )
+        assert all(isinstance(r, TimeoutError) for r in results)
+        assert flight.in_flight == 0
+    
+    async def test_cancelled_caller_leaves_others_alone(self):
+        flight = SingleFlight("test")
+        
+        async def work():
+            await asyncio.sleep(0.05)
+            return "done"
+        
+        first = asyncio.create_task(flight.do("k", work))
+        second = asyncio.create_task(flight.do("k", work))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        
+        assert await second == "done"
+        with pytest.raises(asyncio.CancelledError):
+            await first
+    
+    async def test_last_caller_leaving_cancels_work(self):
+        flight = SingleFlight("test")
+        cancelled = asyncio.Event()
+        
+        async def work():
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+        
+        caller = asyncio.create_task(flight.do("k", work))
+        await asyncio.sleep(0.01)
+        caller.cancel()
+        await asyncio.wait_for(cancelled.wait(), 1)
+        assert flight.in_flight == 0
+    
+    async def test_caller_after_last_leaves_starts_afresh(self):
+        flight = SingleFlight("test", timeout_s=5)
+        
+        async def work():
+            await asyncio.sleep(0.05)
+            return "done"
+        
+        caller = asyncio.create_task(flight.do("k", work))
+        await asyncio.sleep(0.01)
+        caller.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+        
+        # The abandoned work may still be unwinding; it must not be joined.
+        assert await flight.do("k", work) == "done"
+    
+    async def test_disabled_runs_every_call(self):
+        flight = SingleFlight("test", enabled=False)
+        calls = []
+        
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+        
+        await asyncio.gather(*(flight.do("k", work) for _ in range(3)))
+        assert len(calls) == 3
+
+
+class TestStreams:
+    """Streaming subscribers share one token fan-out."""
+    
+    async def test_late_subscriber_gets_every_chunk(self):
+        flight = SingleFlight("test")
+        calls = 0
+        
+        async def tokens():
+            nonlocal calls
+            calls += 1
+            for token in ["a", "b", "c", "d"]:
+                await asyncio.sleep(0.01)
+                yield token
+        
+        async def collect(delay):
+            await asyncio.sleep(delay)
+            return [token async for token in flight.stream("k", tokens)]
+        
+        results = await asyncio.gather(collect(0), collect(0.025))
+        assert results == [["a", "b", "c", "d"]] * 2
+        assert calls == 1
+    
+    async def test_stream_error_reaches_subscribers(self):
+        flight = SingleFlight("test")
+        
+        async def tokens():
+            yield "a"
+            await asyncio.sleep(0.01)
+            raise RuntimeError("model crashed")
+        
+        async def collect():
+            seen = []
+            with pytest.raises(RuntimeError, match="model crashed"):
+                async for token in flight.stream("k", tokens):
+                    seen.append(token)
+            return seen
+        
+        assert await asyncio.gather(collect(), collect()) == [["a"], ["a"]]
+
+
+class TestWrappers:
+    """LLM and SQL wrappers."""
+    
+    async def test_coalescing_llm(self):
+        fake = FakeLLM(default="forty two", latency=0.02)
+        llm = CoalescingLLM(fake)
+        config = GenerationConfig(max_tokens=16)
+        
+        responses = await asyncio.gather(*(llm.generate("how many?", config) for _ in range(5)))
+        assert {r.text for r in responses} == {"forty two"}
+        assert len(fake.calls) == 1
+        
+        await asyncio.gather(llm.generate("how many?", config), llm.generate("how many?"))
+        assert len(fake.calls) == 3
+    
+    async def test_coalescing_llm_stream(self):
+        fake = FakeLLM(default="forty two", latency=0.02)
+        llm = CoalescingLLM(fake)
+        
+        async def collect():
+            return "".join([token async for token in llm.stream("how many?")])
+        
+        assert await asyncio.gather(collect(), collect()) == ["forty two "] * 2
+        assert len(fake.calls) == 1
+    
+    async def test_coalescing_llm_delegates(self):
+        fake = FakeLLM()
+        llm = CoalescingLLM(fake)
+        llm.load_model()
+        assert fake.loaded and llm.is_loaded
+        assert llm.tokenize("a b") == fake.tokenize("a b")
+        assert llm.n_ctx == 4096
+    
+    def test_global_llm_has_no_deadline(self, monkeypatch):
+        monkeypatch.setattr(llm_module, "_llm_instance", None)
+        
+        llm = get_llm()
+        
+        # Generations queue on one inference thread; only chat and SQL groups time out.
+        assert isinstance(llm, CoalescingLLM)
+        assert llm._generations.timeout_s is None and llm._streams.timeout_s is None
+    
+    async def test_coalesce_queries(self):
+        executed = []
+        
+        async def runner(sql):
+            executed.append(sql)
+            await asyncio.sleep(0.01)
+            return [{"n": 1}]
+        
+        run = coalesce_queries(runner, SingleFlight("sql-test"))
+        rows = await asyncio.gather(run("SELECT count(*) FROM orders"), run("SELECT count(*)\nFROM orders;"))
+        assert rows == [[{"n": 1}]] * 2
+        assert len(executed) == 1
@@ -0,0 +1,53 @@
+"""Startup-time budget: CLI and API cold starts must stay lazy."""
+
+import subprocess
+import sys
+import time
+
+import pytest
+
+# Generous enough for a loaded CI machine; a regression that imports the model
+# stack at startup costs seconds, not milliseconds.
+BUDGETS = {
+    "cli": (["-m", "sheaia.cli"], 1.0),
+    "api": (["-c", "from sheaia.api import app"], 3.0),
+}
+
+HEAVY = (
+    "numpy", "pandas", "torch", "sentence_transformers", "llama_cpp",
+    "langchain", "langchain_core", "langgraph", "pymilvus",
+    "clickhouse_connect", "sqlalchemy", "networkx", "pyarrow",
+)
+
+
+def loaded_modules(statement: str) -> set[str]:
+    script = f"{statement}\nimport sys\nprint('\\n'.join(sys.modules))"
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+    return {name.split(".")[0] for name in result.stdout.split()}
+
+
+@pytest.mark.parametrize("statement", [
+    "import sheaia",
+    "import sheaia.cli",
+    "import sheaia.agents.base",
+    "from sheaia.api import app",
+])
+def test_no_heavy_imports(statement):
+    assert not loaded_modules(statement).intersection(HEAVY)
+
+
+def test_cli_does_not_import_server():
+    assert not loaded_modules("import sheaia.cli").intersection({"uvicorn", "fastapi", "pydantic"})
+
+
+@pytest.mark.parametrize("target", BUDGETS)
+def test_cold_start_budget(target):
+    args, budget = BUDGETS[target]
+    
+    best = float("inf")
+    for _ in range(3):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, *args], capture_output=True, check=True)
+        best = min(best, time.perf_counter() - started)
+    
+    assert best < budget, f"{target} cold start took {best:.2f}s (budget {budget}s)"
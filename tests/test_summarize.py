@@ -0,0 +1,210 @@
+"""Tests for long-document summarization."""
+
+import asyncio
+
+import pytest
+
+from sheaia.agents.document import DocumentAgent
+from sheaia.i18n import Language
+from sheaia.knowledge.summarize import Summarizer, SummaryCache, split_document
+from tests.fakes import FakeLLM
+
+
+def words(text: str) -> int:
+    return len(text.split())
+
+
+def section(number: int, length: int = 60, word: str = "term") -> str:
+    body = " ".join(f"{word}{number}_{i}." for i in range(length))
+    return f"## Section {number}\n\n{body}"
+
+
+def contract(sections: int = 8, **edits: str) -> str:
+    return "\n\n".join(edits.get(f"s{n}", section(n)) for n in range(1, sections + 1))
+
+
+class NumberingLLM(FakeLLM):
+    """FakeLLM whose every reply is different, like real partial summaries."""
+    
+    async def generate(self, prompt, config=None):
+        self.default = (self.default[0], f"summary {len(self.calls) + 1}")
+        return await super().generate(prompt, config)
+
+
+class CountingLLM(FakeLLM):
+    """FakeLLM that tracks how many generations overlap."""
+    
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.active = 0
+        self.peak = 0
+    
+    async def generate(self, prompt, config=None):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            return await super().generate(prompt, config)
+        finally:
+            self.active -= 1
+
+
+class TestSplitDocument:
+    """Structural chunking."""
+    
+    def test_splits_on_headings(self):
+        chunks = split_document(contract(3), max_tokens=100, count_tokens=words)
+        assert len(chunks) == 3
+        assert [c.text.splitlines()[0] for c in chunks] == ["## Section 1", "## Section 2", "## Section 3"]
+        assert all(c.tokens <= 100 for c in chunks)
+    
+    def test_long_section_keeps_its_heading(self):
+        chunks = split_document(section(1, length=300), max_tokens=100, count_tokens=words)
+        assert len(chunks) > 2
+        assert all(c.tokens <= 100 for c in chunks)
+        assert chunks[0].heading == ""
+        assert all(c.heading == "## Section 1" for c in chunks[1:])
+    
+    def test_cjk_and_thai_headings(self):
+        text = "第一条 定义\n" + "甲方。" * 40 + "\n第二条 付款\n" + "乙方。" * 40 + "\nหมวด 3 การส่งมอบ\n" + "ส่งของ " * 20
+        chunks = split_document(text, max_tokens=200)
+        assert [c.text.splitlines()[0] for c in chunks] == ["第一条 定义", "第二条 付款", "หมวด 3 การส่งมอบ"]
+    
+    def test_edit_only_changes_nearby_chunks(self):
+        before = split_document(contract(), max_tokens=100, count_tokens=words)
+        after = split_document(contract(s5=section(5, length=40, word="changed")), max_tokens=100, count_tokens=words)
+        changed = {c.key for c in after} - {c.key for c in before}
+        assert len(changed) == 1
+    
+    def test_insert_and_delete_keep_other_chunks(self):
+        paragraphs = [" ".join(f"p{i}w{j}" for j in range(8 + i * 7 % 15)) + "." for i in range(40)]
+        before = {c.key for c in split_document("\n\n".join(paragraphs), max_tokens=100, count_tokens=words)}
+        inserted = split_document("\n\n".join(["A new opening paragraph.", *paragraphs]), max_tokens=100, count_tokens=words)
+        deleted = split_document("\n\n".join(paragraphs[:20] + paragraphs[21:]), max_tokens=100, count_tokens=words)
+        
+        # Cut points follow content, so only the chunk holding the change differs.
+        assert len(before) > 10
+        assert len({c.key for c in inserted} - before) == 1
+        assert len({c.key for c in deleted} - before) == 1
+    
+    def test_empty(self):
+        assert split_document("  \n\n ") == []
+
+
+class TestSummarizer:
+    """Map, reduce and the partial-summary cache."""
+    
+    async def test_hierarchical_reduce(self):
+        llm = NumberingLLM()
+        summarizer = Summarizer(llm, chunk_tokens=100, summary_words=40, fan_in=2, token_counter=words)
+        
+        result = await summarizer.summarize(contract(), Language.EN)
+        
+        assert result.summary == "summary 15"
+        assert result.chunks == 8
+        assert result.levels >= 4
+        # Pairwise merges: one fewer than the chunks, however they are grouped.
+        assert result.llm_calls == 8 + 7
+        assert result.llm_calls == len(llm.calls)
+        assert sum(1 for prompt in llm.calls if "Merge them" in prompt) == 7
+    
+    async def test_repeated_text_summarized_once(self):
+        llm = FakeLLM(default="same")
+        summarizer = Summarizer(llm, chunk_tokens=100, summary_words=40, fan_in=2, token_counter=words)
+        
+        result = await summarizer.summarize(contract(2) + "\n\n" + contract(2), Language.EN)
+        
+        # Two distinct chunks; every merge after that has the same input.
+        assert result.chunks == 4
+        assert result.levels == 3
+        assert result.llm_calls == len(llm.calls) == 2 + 1
+    
+    async def test_chunks_run_concurrently_up_to_the_limit(self):
+        llm = CountingLLM(latency=0.01)
+        summarizer = Summarizer(llm, chunk_tokens=100, summary_words=40, max_concurrency=3, token_counter=words)
+        
+        await summarizer.summarize(contract(), Language.EN)
+        
+        assert llm.peak == 3
+    
+    async def test_reports_prompt_tokens(self):
+        llm = FakeLLM(default="two words")
+        summarizer = Summarizer(llm, chunk_tokens=100, summary_words=40, token_counter=words)
+        
+        result = await summarizer.summarize(contract(), Language.EN)
+        
+        assert result.prompt_tokens == sum(len(prompt.split()) for prompt in llm.calls)
+        assert result.prompt_tokens > words(contract())
+        assert result.completion_tokens == 2 * result.llm_calls
+    
+    async def test_edit_recomputes_changed_branch_only(self):
+        llm = NumberingLLM()
+        summarizer = Summarizer(llm, chunk_tokens=100, summary_words=40, fan_in=2, token_counter=words)
+        await summarizer.summarize(contract(), Language.EN)
+        llm.calls.clear()
+        
+        result = await summarizer.summarize(contract(s5=section(5, word="changed")), Language.EN)
+        
+        # The edited chunk plus one merge per level above it.
+        assert result.llm_calls == result.levels
+        assert result.cached == 8 + 7 - result.llm_calls
+        assert "changed5_0." in llm.calls[0]
+        assert result.summary == f"summary {result.llm_calls}"
+    
+    async def test_insert_and_delete_recompute_nearby_only(self):
+        llm = NumberingLLM()
+        summarizer = Summarizer(llm, chunk_tokens=100, summary_words=40, fan_in=2, token_counter=words)
+        full = await summarizer.summarize(contract(), Language.EN)
+        
+        inserted = await summarizer.summarize(section(0) + "\n\n" + contract(), Language.EN)
+        deleted = await summarizer.summarize("\n\n".join(section(n) for n in range(1, 9) if n != 4), Language.EN)
+        
+        # Merge groups follow content too, so the rest of the tree is reused.
+        assert inserted.llm_calls < full.llm_calls / 2
+        assert deleted.llm_calls < full.llm_calls / 2
+        assert deleted.cached > 0
+    
+    async def test_cache_is_per_language_and_focus(self, tmp_path):
+        llm = FakeLLM()
+        cache = SummaryCache(tmp_path / "summaries.db")
+        summarizer = Summarizer(llm, cache=cache, chunk_tokens=100, summary_words=40, token_counter=words)
+        
+        await summarizer.summarize(contract(2), Language.EN)
+        await summarizer.summarize(contract(2), Language.TH)
+        await summarizer.summarize(contract(2), Language.EN, focus="payment terms")
+        calls = len(llm.calls)
+        again = await summarizer.summarize(contract(2), Language.TH)
+        summarizer.close()
+        
+        assert calls == 9
+        assert again.llm_calls == 0
+        assert "Focus on: payment terms" in llm.calls[-1]
+    
+    async def test_short_document_is_one_call(self):
+        llm = FakeLLM(default="brief")
+        result = await Summarizer(llm).summarize("A one-paragraph memo.", Language.EN)
+        assert (result.summary, result.chunks, result.levels, result.llm_calls) == ("brief", 1, 1, 1)
+    
+    def test_fan_in_must_merge(self):
+        with pytest.raises(ValueError):
+            Summarizer(FakeLLM(), fan_in=1)
+    
+    def test_chunk_must_hold_two_summaries(self):
+        with pytest.raises(ValueError):
+            Summarizer(FakeLLM(), chunk_tokens=256, summary_words=150)
+    
+    async def test_oversized_summaries_still_converge(self):
+        # Every partial summary is over half the budget, so no two fit a merge prompt.
+        llm = FakeLLM(default=" ".join(["long"] * 60))
+        summarizer = Summarizer(llm, chunk_tokens=100, summary_words=40, fan_in=2, token_counter=words)
+        
+        result = await asyncio.wait_for(summarizer.summarize(contract(), Language.EN), timeout=5)
+        
+        assert result.chunks == 8
+        assert result.levels == 4
+    
+    async def test_document_agent(self):
+        llm = FakeLLM(default="agent summary")
+        agent = DocumentAgent(llm=llm, summarizer=Summarizer(llm, chunk_tokens=100, summary_words=40, token_counter=words))
+        result = await agent.summarize(contract(3), Language.EN)
+        assert result.content == "agent summary"
+        assert result.agent == "document"
@@ -0,0 +1,349 @@
+"""Tests for the background task queue."""
+
+import asyncio
+import time
+
+import pytest
+
+from sheaia.core.tasks import (
+    RedisTaskBackend,
+    SQLiteTaskBackend,
+    TaskBackend,
+    TaskContext,
+    TaskQueue,
+    TaskType,
+    TaskWorker,
+)
+
+
+def make_queue(backend, **handlers) -> TaskQueue:
+    types = {}
+    for name, (handler, options) in handlers.items():
+        types[name] = TaskType(name=name, handler=handler, **options)
+    if not isinstance(backend, TaskBackend):
+        backend = SQLiteTaskBackend(backend)
+    return TaskQueue(backend, types)
+
+
+async def run_until(worker: TaskWorker, done, timeout: float = 3.0) -> None:
+    runner = asyncio.create_task(worker.run())
+    deadline = time.monotonic() + timeout
+    while not await done():
+        assert time.monotonic() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+    worker.stop()
+    await runner
+
+
+async def status(queue: TaskQueue, task_id: str, expected: str) -> bool:
+    return (await queue.get(task_id)).status == expected
+
+
+@pytest.fixture
+def db(tmp_path):
+    return tmp_path / "tasks.db"
+
+
+@pytest.fixture
+def redis_backend(monkeypatch):
+    """Builds Redis backends sharing one in-process fake server."""
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    import redis.asyncio
+    
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(redis.asyncio, "from_url", lambda url, **kwargs: fakeredis.FakeAsyncRedis(server=server, **kwargs))
+    return lambda **kwargs: RedisTaskBackend("redis://fake", **kwargs)
+
+
+class TestTaskQueue:
+    """Tests for enqueueing, dedup and claiming."""
+    
+    async def test_run_with_progress(self, db):
+        async def index(ctx: TaskContext) -> dict:
+            await ctx.report(0.5, "half way")
+            return {"chunks": ctx.payload["n"] * 2}
+        
+        queue = make_queue(db, index=(index, {}))
+        task = await queue.enqueue("index", {"n": 21})
+        worker = TaskWorker(queue, poll_interval_s=0.01)
+        
+        await run_until(worker, lambda: status(queue, task.id, "done"))
+        
+        done = await queue.get(task.id)
+        assert done.result == {"chunks": 42}
+        assert done.progress == 1.0 and done.message == "half way"
+        assert done.attempts == 1
+        await queue.close()
+    
+    async def test_dedup_by_key(self, db):
+        queue = make_queue(db)
+        first = await queue.enqueue("sync", {"source": "erp"}, key="sync:erp")
+        second = await queue.enqueue("sync", {"source": "erp"}, key="sync:erp")
+        other = await queue.enqueue("sync", {"source": "crm"}, key="sync:crm")
+        
+        assert second.id == first.id
+        assert other.id != first.id
+        assert len(await queue.list()) == 2
+        
+        # Once finished, the key is free again.
+        await queue.cancel(first.id)
+        third = await queue.enqueue("sync", {"source": "erp"}, key="sync:erp")
+        assert third.id != first.id
+        await queue.close()
+    
+    async def test_priority_order(self, db):
+        queue = make_queue(db)
+        backend = queue.backend
+        low = await queue.enqueue("job", priority=0)
+        high = await queue.enqueue("job", priority=10)
+        later = await queue.enqueue("job", priority=20, delay_s=60)
+        
+        first = await backend.claim({"job": -1}, "w", 30)
+        second = await backend.claim({"job": -1}, "w", 30)
+        
+        assert [first.id, second.id] == [high.id, low.id]
+        assert await backend.claim({"job": -1}, "w", 30) is None  # the delayed one is not due
+        assert (await queue.get(later.id)).status == "queued"
+        await queue.close()
+    
+    async def test_type_limit_across_workers(self, db):
+        active, peak = 0, 0
+        
+        async def index(ctx: TaskContext) -> None:
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.05)
+            active -= 1
+        
+        queue = make_queue(db, index=(index, {"concurrency": 2}))
+        for i in range(6):
+            await queue.enqueue("index", {"i": i})
+        
+        workers = [
+            TaskWorker(make_queue(db, index=(index, {"concurrency": 2})), poll_interval_s=0.01)
+            for _ in range(3)
+        ]
+        runners = [asyncio.create_task(w.run()) for w in workers]
+        while len(await queue.list(status="done")) < 6:
+            await asyncio.sleep(0.01)
+        for w in workers:
+            w.stop()
+        await asyncio.gather(*runners)
+        
+        assert peak == 2
+        for w in workers:
+            await w.queue.close()
+        await queue.close()
+
+
+class TestTaskWorker:
+    """Tests for retries, leases and cancellation."""
+    
+    async def test_retry_with_backoff(self, db):
+        calls = []
+        
+        async def flaky(ctx: TaskContext) -> str:
+            calls.append(time.monotonic())
+            if len(calls) < 3:
+                raise ConnectionError("ERP unreachable")
+            return "synced"
+        
+        queue = make_queue(db, sync=(flaky, {"max_attempts": 3, "backoff_s": 0.05}))
+        task = await queue.enqueue("sync")
+        
+        await run_until(TaskWorker(queue, poll_interval_s=0.01), lambda: status(queue, task.id, "done"))
+        
+        done = await queue.get(task.id)
+        assert done.attempts == 3 and done.result == "synced"
+        # Second gap is backed off further than the first (0.05 then 0.1, jittered down by up to half).
+        assert calls[1] - calls[0] >= 0.025 and calls[2] - calls[1] >= 0.05
+        await queue.close()
+    
+    async def test_gives_up_after_max_attempts(self, db):
+        async def broken(ctx: TaskContext) -> None:
+            raise ValueError("bad payload")
+        
+        queue = make_queue(db, index=(broken, {"max_attempts": 2, "backoff_s": 0.01}))
+        task = await queue.enqueue("index")
+        
+        await run_until(TaskWorker(queue, poll_interval_s=0.01), lambda: status(queue, task.id, "failed"))
+        
+        failed = await queue.get(task.id)
+        assert failed.attempts == 2 and failed.error == "bad payload"
+        await queue.close()
+    
+    async def test_expired_lease_is_retried(self, db):
+        queue = make_queue(db)
+        task = await queue.enqueue("index")
+        
+        crashed = await queue.backend.claim({"index": 1}, "dead-worker", lease_s=0.05)
+        assert crashed.id == task.id
+        assert await queue.backend.claim({"index": 1}, "live-worker", lease_s=30) is None
+        await asyncio.sleep(0.06)
+        
+        retried = await queue.backend.claim({"index": 1}, "live-worker", lease_s=30)
+        assert retried.id == task.id and retried.attempts == 2
+        # The dead worker can no longer finish it.
+        assert not await queue.backend.complete(task.id, "dead-worker", "stale")
+        await queue.close()
+    
+    async def test_cancel_running(self, db):
+        started = asyncio.Event()
+        
+        async def long_index(ctx: TaskContext) -> None:
+            started.set()
+            for i in range(100):
+                await asyncio.sleep(0.01)
+                await ctx.report(i / 100)
+        
+        queue = make_queue(db, index=(long_index, {}))
+        task = await queue.enqueue("index")
+        worker = TaskWorker(queue, poll_interval_s=0.01)
+        runner = asyncio.create_task(worker.run())
+        await started.wait()
+        
+        assert await queue.cancel(task.id)
+        await asyncio.sleep(0.05)
+        worker.stop()
+        await runner
+        
+        cancelled = await queue.get(task.id)
+        assert cancelled.status == "cancelled" and cancelled.progress < 1.0
+        await queue.close()
+    
+    async def test_stop_drains_running_tasks(self, db):
+        async def slow(ctx: TaskContext) -> str:
+            await asyncio.sleep(0.1)
+            return "ok"
+        
+        queue = make_queue(db, slow=(slow, {"concurrency": 2}))
+        tasks = [await queue.enqueue("slow") for _ in range(2)]
+        worker = TaskWorker(queue, poll_interval_s=0.01)
+        runner = asyncio.create_task(worker.run())
+        await asyncio.sleep(0.03)
+        
+        worker.stop()
+        await runner
+        
+        assert [(await queue.get(t.id)).status for t in tasks] == ["done", "done"]
+        await queue.close()
+    
+    async def test_prunes_finished_tasks(self, db):
+        async def index(ctx: TaskContext) -> None:
+            return None
+        
+        queue = make_queue(db, index=(index, {}))
+        finished = await queue.enqueue("index")
+        await run_until(TaskWorker(queue, poll_interval_s=0.01), lambda: status(queue, finished.id, "done"))
+        waiting = await queue.enqueue("index", delay_s=60)
+        
+        worker = TaskWorker(queue, poll_interval_s=0.01, retention_s=0.0)
+        runner = asyncio.create_task(worker.run())
+        await asyncio.sleep(0.05)
+        worker.stop()
+        await runner
+        
+        assert await queue.get(finished.id) is None
+        assert (await queue.get(waiting.id)).status == "queued"
+        await queue.close()
+
+
+class TestRedisTaskBackend:
+    """The Redis backend's Lua scripts, against an in-process fake Redis."""
+    
+    async def test_claim_in_priority_order(self, redis_backend):
+        queue = make_queue(redis_backend())
+        backend = queue.backend
+        low = await queue.enqueue("job", priority=0)
+        high = await queue.enqueue("job", priority=10)
+        later = await queue.enqueue("job", priority=20, delay_s=60)
+        
+        first = await backend.claim({"job": -1}, "w", 30)
+        second = await backend.claim({"job": -1}, "w", 30)
+        
+        assert [first.id, second.id] == [high.id, low.id]
+        assert first.status == "running" and first.worker == "w" and first.attempts == 1
+        assert await backend.claim({"job": -1}, "w", 30) is None
+        assert (await queue.get(later.id)).status == "queued"
+        await queue.close()
+    
+    async def test_type_limit(self, redis_backend):
+        queue = make_queue(redis_backend())
+        for _ in range(3):
+            await queue.enqueue("index")
+        
+        claimed = [await queue.backend.claim({"index": 2}, f"w{i}", 30) for i in range(3)]
+        
+        assert [task is not None for task in claimed] == [True, True, False]
+        await queue.close()
+    
+    async def test_dedup_by_key(self, redis_backend):
+        queue = make_queue(redis_backend())
+        first = await queue.enqueue("sync", {"source": "erp"}, key="sync:erp")
+        second = await queue.enqueue("sync", {"source": "erp"}, key="sync:erp")
+        other = await queue.enqueue("sync", {"source": "crm"}, key="sync:crm")
+        
+        assert second.id == first.id
+        assert other.id != first.id
+        assert len(await queue.list()) == 2
+        
+        await queue.cancel(first.id)
+        third = await queue.enqueue("sync", {"source": "erp"}, key="sync:erp")
+        assert third.id != first.id
+        await queue.close()
+    
+    async def test_expired_lease_is_retried(self, redis_backend):
+        queue = make_queue(redis_backend())
+        task = await queue.enqueue("index", max_attempts=2)
+        
+        crashed = await queue.backend.claim({"index": 1}, "dead-worker", lease_s=0.05)
+        assert crashed.id == task.id
+        assert await queue.backend.claim({"index": 1}, "live-worker", lease_s=30) is None
+        await asyncio.sleep(0.06)
+        
+        retried = await queue.backend.claim({"index": 1}, "live-worker", lease_s=0.05)
+        assert retried.id == task.id and retried.attempts == 2
+        assert not await queue.backend.complete(task.id, "dead-worker", "stale")
+        
+        # Out of attempts: the next expiry fails the task instead of requeueing it.
+        await asyncio.sleep(0.06)
+        assert await queue.backend.claim({"index": 1}, "live-worker", lease_s=30) is None
+        failed = await queue.get(task.id)
+        assert failed.status == "failed" and failed.error == "lease expired"
+        await queue.close()
+    
+    async def test_retry_with_backoff(self, redis_backend):
+        calls = []
+        
+        async def flaky(ctx: TaskContext) -> str:
+            calls.append(time.monotonic())
+            if len(calls) < 3:
+                raise ConnectionError("ERP unreachable")
+            return "synced"
+        
+        queue = make_queue(redis_backend(), sync=(flaky, {"max_attempts": 3, "backoff_s": 0.05}))
+        task = await queue.enqueue("sync", key="sync:erp")
+        
+        await run_until(TaskWorker(queue, poll_interval_s=0.01), lambda: status(queue, task.id, "done"))
+        
+        done = await queue.get(task.id)
+        assert done.attempts == 3 and done.result == "synced" and done.progress == 1.0
+        assert calls[1] - calls[0] >= 0.025 and calls[2] - calls[1] >= 0.05
+        # Finishing released the dedup key.
+        assert (await queue.enqueue("sync", key="sync:erp")).id != task.id
+        await queue.close()
+    
+    async def test_finished_tasks_expire(self, redis_backend):
+        queue = make_queue(redis_backend(retention_s=1))
+        task = await queue.enqueue("index")
+        claimed = await queue.backend.claim({"index": 1}, "w", 30)
+        assert await queue.backend.complete(claimed.id, "w", {"ok": True})
+        
+        assert (await queue.get(task.id)).result == {"ok": True}
+        await asyncio.sleep(1.1)
+        assert await queue.get(task.id) is None
+        assert await queue.backend.prune(0) == 1
+        assert await queue.list() == []
+        await queue.close()
@@ -0,0 +1,140 @@
+"""Tests for the embedding-indexed tool registry."""
+
+import asyncio
+import re
+import threading
+import zlib
+
+import numpy as np
+
+from sheaia.agents.tools import Tool, ToolRegistry
+from sheaia.connectors.base import Connector, ConnectorCaps
+
+
+class WordEmbedding:
+    """Hashed bag-of-words vectors; counts the texts it embeds."""
+    
+    dimension = 256
+    
+    def __init__(self):
+        self.documents = 0
+        self.queries = 0
+    
+    def vector(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        for word in re.findall(r"[a-z0-9]+", text.lower()):
+            vector[zlib.crc32(word.encode()) % self.dimension] += 1.0
+        return vector
+    
+    def embed_documents(self, texts):
+        self.documents += len(texts)
+        return np.stack([self.vector(text) for text in texts])
+    
+    def embed_query(self, text):
+        self.queries += 1
+        return self.vector(text)
+
+
+class StubConnector(Connector):
+    """A connector that only needs a name."""
+    
+    def __init__(self, name: str):
+        self.name = name
+    
+    async def test_connection(self):
+        return True
+    
+    async def discover_schema(self):
+        return []
+    
+    async def fetch_data(self, query):
+        return None
+    
+    async def sync_incremental(self, since=None):
+        return 0
+    
+    def get_capabilities(self):
+        return ConnectorCaps()
+
+
+def registry(**kwargs) -> tuple[ToolRegistry, WordEmbedding]:
+    embedding = WordEmbedding()
+    tools = ToolRegistry(embedding=embedding, **kwargs)
+    tools.add_connector("erp", StubConnector("kingdee"), "Purchase orders, suppliers and inventory")
+    tools.add_connector("mes", StubConnector("mes"), "Production lines, work orders and scrap")
+    tools.add_connector("hr", StubConnector("csv"), "Employees, shifts and attendance")
+    tools.add(Tool(name="calculator", description="Evaluate an arithmetic expression"))
+    return tools, embedding
+
+
+class TestToolRegistry:
+    """Selection, caching and re-indexing."""
+    
+    async def test_selects_relevant_connector(self):
+        tools, _ = registry()
+        selection = await tools.select("Which suppliers have open purchase orders?", k=3)
+        assert len(selection.tools) == 3
+        assert {tool.connector for tool in selection.tools} == {"erp"}
+        assert selection.scores == sorted(selection.scores, reverse=True)
+        assert selection.candidates == 10
+        assert len(selection.render()) < len(tools.render_all()) / 2
+    
+    async def test_descriptions_embedded_once(self):
+        tools, embedding = registry()
+        await tools.select("scrap by production line")
+        await tools.select("attendance by shift")
+        await tools.select("scrap by production line")
+        assert embedding.documents == 10
+        assert embedding.queries == 2
+    
+    async def test_reregistering_connector(self):
+        tools, embedding = registry()
+        await tools.select("shifts")
+        
+        tools.add_connector("mes", StubConnector("mes"), "Production lines, work orders and scrap")
+        await tools.select("shifts")
+        assert embedding.documents == 10
+        
+        tools.add_connector("mes", StubConnector("mes"), "Furnace temperatures and energy use")
+        selection = await tools.select("furnace energy use", k=1)
+        assert embedding.documents == 13
+        assert selection.tools[0].connector == "mes"
+        
+        tools.remove_connector("hr")
+        assert (await tools.select("shifts", k=20)).candidates == 7
+        assert embedding.documents == 13
+    
+    async def test_always_and_filters(self):
+        tools, _ = registry(always=["calculator"], top_k=2)
+        selection = await tools.select("employees on the night shift")
+        assert [tool.name for tool in selection.tools][0] == "calculator"
+        assert len(selection.tools) == 3
+        assert all(tool.connector == "hr" for tool in selection.tools[1:])
+        
+        selection = await tools.select("employees on the night shift", k=10, connectors=["erp"])
+        assert {tool.connector for tool in selection.tools[1:]} == {"erp"}
+        
+        selection = await tools.select("employees on the night shift", k=10, min_score=0.2)
+        assert {tool.connector for tool in selection.tools[1:]} == {"hr"}
+    
+    async def test_changes_during_build(self):
+        tools, embedding = registry()
+        started, release = threading.Event(), threading.Event()
+        embed_documents = embedding.embed_documents
+        
+        def slow_embed(texts):
+            started.set()
+            release.wait(1)
+            return embed_documents(texts)
+        
+        embedding.embed_documents = slow_embed
+        selection = asyncio.create_task(tools.select("furnace purchase orders", k=20))
+        await asyncio.to_thread(started.wait, 1)
+        tools.remove_connector("hr")
+        tools.add(Tool(name="furnace", description="Furnace temperatures"))
+        release.set()
+        
+        selected = (await selection).tools
+        assert "furnace" in [tool.name for tool in selected]
+        assert all(tool.connector != "hr" for tool in selected)
+        assert (await tools.select("shifts", k=20)).candidates == 8
@@ -0,0 +1,168 @@
+"""Tests for chart series downsampling and series summaries."""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pyarrow as pa
+from fastapi.testclient import TestClient
+
+from sheaia.agents.reports import format_rows
+from sheaia.api import app
+from sheaia.api.routes.results import result_store
+from sheaia.core.results import ResultStore
+from sheaia.core.visualization import (
+    SeriesCache,
+    SeriesLevels,
+    describe_rows,
+    downsample,
+    lttb_indices,
+    minmax_indices,
+    summarize_series,
+)
+
+
+def reference_lttb(x, y, n_out):
+    """Textbook LTTB, one point at a time."""
+    size = len(y)
+    every = (size - 2) / (n_out - 2)
+    picks, a = [0], 0
+    for i in range(n_out - 2):
+        lo, hi = int(i * every) + 1, int((i + 1) * every) + 1
+        nlo, nhi = hi, min(int((i + 2) * every) + 1, size)
+        if i == n_out - 3:
+            nx, ny = x[-1], y[-1]
+        else:
+            nx, ny = np.mean(x[nlo:nhi]), np.mean(y[nlo:nhi])
+        areas = [abs((x[a] - nx) * (y[j] - y[a]) - (x[a] - x[j]) * (ny - y[a])) for j in range(lo, hi)]
+        a = lo + int(np.argmax(areas))
+        picks.append(a)
+    return picks + [size - 1]
+
+
+def sensor(size: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    x = np.datetime64("2025-01-01T00:00:00") + np.arange(size) * np.timedelta64(1, "s")
+    y = np.sin(np.arange(size) / (size / 20)) + rng.normal(0, 0.05, size)
+    return x, y
+
+
+class TestDownsampling:
+    """LTTB and min-max selection."""
+    
+    def test_lttb_matches_reference(self):
+        x = np.arange(997, dtype=float)
+        y = np.random.default_rng(1).normal(size=997).cumsum()
+        assert lttb_indices(x, y, 50, preselect=False).tolist() == reference_lttb(x, y, 50)
+    
+    def test_spikes_survive(self):
+        x, y = sensor(200_000)
+        y[123_457] = 50.0
+        y[7] = -50.0
+        for method in ("lttb", "minmax"):
+            xs, ys = downsample(x, y, 500, method)
+            assert len(xs) <= 500
+            assert ys.max() == 50.0 and ys.min() == -50.0
+            assert xs[0] == x[0] and xs[-1] == x[-1]
+            assert (np.diff(xs.astype(np.int64)) > 0).all()
+    
+    def test_small_and_missing(self):
+        assert minmax_indices(np.arange(5.0), 10).tolist() == [0, 1, 2, 3, 4]
+        xs, ys = downsample(np.arange(6), np.array([1, np.nan, 3, 4, np.nan, 6.0]), 10)
+        assert xs.tolist() == [0, 2, 3, 5]
+
+
+class TestSeriesLevels:
+    """Zoom windows served from cached levels."""
+    
+    def test_zoom_reuses_levels(self):
+        x, y = sensor(1_000_000)
+        series = SeriesLevels(x, y)
+        xs, _ = series.window(1000)
+        assert len(xs) == 1000
+        levels = dict(series._levels)
+        assert levels
+        
+        xs, ys = series.window(1000, "2025-01-02", "2025-01-05")
+        assert xs[0] == np.datetime64("2025-01-02") and xs[-1] == np.datetime64("2025-01-05")
+        assert len(xs) == 1000
+        assert all(series._levels[k] is levels[k] for k in levels)
+        
+        lo, hi = series.bounds("2025-01-02", "2025-01-05")
+        assert ys.max() == y[lo:hi].max() and ys.min() == y[lo:hi].min()
+        assert series.window(1000, "2025-01-02", "2025-01-02T00:10")[0].tolist() == x[lo:lo + 601].tolist()
+    
+    def test_unsorted_input(self):
+        series = SeriesLevels(np.array([3.0, 1.0, 2.0]), np.array([30.0, 10.0, 20.0]))
+        assert series.y.tolist() == [10.0, 20.0, 30.0]
+        assert series.window(10, 1.5, 3)[1].tolist() == [20.0, 30.0]
+    
+    def test_cache_evicts_oldest(self):
+        cache = SeriesCache(max_bytes=50_000)
+        for key in "abc":
+            cache.put(key, SeriesLevels(np.arange(1000.0), np.arange(1000.0)))
+        assert cache.get("a") is None and cache.get("c") is not None
+
+
+class TestSummaries:
+    """What the LLM sees instead of raw rows."""
+    
+    def test_summary(self):
+        x, y = sensor(100_000)
+        y[5000] = 9.0
+        summary = summarize_series(x, y, "line1/speed", points=8)
+        text = summary.render()
+        assert summary.count == 100_000 and len(summary.shape) == 8
+        assert summary.max == 9.0 and summary.max_at == "2025-01-01 01:23"
+        assert text.startswith("line1/speed: 100,000 points, 2025-01-01 to 2025-01-02 03:46")
+        assert "max 9 at 2025-01-01 01:23" in text
+        assert len(text) < 600
+    
+    def test_rows_grouped_by_tag(self):
+        start = datetime(2025, 3, 1)
+        rows = [
+            {"ts": start + timedelta(minutes=i), "tag": f"line{i % 2}", "temp": float(i % 2 * 100 + i / 10)}
+            for i in range(2000)
+        ]
+        text = describe_rows(rows, points=6)
+        assert text.count("points") == 2
+        assert "tag=line1 temp: 1,000 points" in text
+        assert format_rows(rows).startswith("2000 rows, summarized as series:\ntag=line0 temp")
+        
+        assert describe_rows([{"name": "a", "city": "b"}] * 100) is None
+        assert format_rows([{"name": "a", "city": "b"}] * 60).endswith("... 10 more rows")
+    
+    def test_numeric_axis_must_be_sorted(self):
+        orders = [{"order_id": (i * 7919) % 1000, "qty": i % 13, "amount": i * 2.5} for i in range(1000)]
+        assert describe_rows(orders) is None
+        assert format_rows(orders).endswith("... 950 more rows")
+        
+        readings = [{"second": i, "tag": f"line{i % 2}", "temp": i / 10} for i in range(1000)]
+        assert describe_rows(readings).count("points") == 2
+
+
+class TestSeriesEndpoint:
+    """Tests for /api/v1/results/{id}/series."""
+    
+    def test_series(self, tmp_path):
+        store = ResultStore(tmp_path)
+        x, y = sensor(50_000)
+        info = store.write(pa.table({"ts": pa.array(x), "speed": y}))
+        app.dependency_overrides[result_store] = lambda: store
+        try:
+            client = TestClient(app)
+            url = f"/api/v1/results/{info.id}/series"
+            data = client.get(url, params={"x": "ts", "y": "speed", "points": 200}).json()
+            assert len(data["x"]) == len(data["y"]) == 200
+            assert data["x_type"] == "datetime" and data["x"][0] == 1735689600000
+            assert data["source_points"] == 50_000
+            assert data["summary"].startswith("speed: 50,000 points")
+            
+            zoomed = client.get(url, params={
+                "x": "ts", "y": "speed", "start": "2025-01-01T01:00", "end": "2025-01-01T01:00:09", "method": "minmax",
+            }).json()
+            assert zoomed["source_points"] == 10 and len(zoomed["x"]) == 10
+            
+            assert client.get(url, params={"x": "ts", "y": "nope"}).status_code == 400
+            assert client.get("/api/v1/results/missing/series", params={"x": "ts", "y": "speed"}).status_code == 404
+        finally:
+            app.dependency_overrides.clear()
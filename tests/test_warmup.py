@@ -0,0 +1,71 @@
+"""Tests for startup warm-up."""
+
+import asyncio
+import time
+
+from sheaia.core.health import HealthMonitor
+from sheaia.core.llm import LlamaCppLLM
+from sheaia.core.warmup import warm_up
+from sheaia.i18n import Language
+from tests.fakes import FakeEmbedding, FakeLlama, FakeLLM
+
+
+class TestWarmUp:
+    """Tests for preloading and readiness reporting."""
+    
+    async def test_loads_and_primes_each_language(self):
+        llm = FakeLLM()
+        monitor = HealthMonitor(required=["warmup"])
+        
+        await warm_up(llm, FakeEmbedding(), monitor, languages=[Language.EN, Language.TH])
+        
+        assert llm.loaded
+        assert len(llm.calls) == 2
+        assert llm.calls[0].startswith("You are SHEAIA")
+        assert llm.calls[1].startswith("คุณคือ SHEAIA")
+        assert monitor.ready
+    
+    async def test_not_ready_while_warming(self):
+        llm = FakeLLM(latency=0.2)
+        monitor = HealthMonitor(required=["warmup"])
+        
+        task = asyncio.create_task(warm_up(llm, FakeEmbedding(), monitor, languages=[Language.EN]))
+        await asyncio.sleep(0.05)
+        
+        assert monitor.ready_status_code == 503
+        assert "priming en" in monitor.snapshot()["checks"]["warmup"]["detail"]
+        await task
+        assert monitor.ready_status_code == 200
+    
+    async def test_priming_does_not_block_the_loop(self):
+        llm = LlamaCppLLM("model.gguf")
+        completion = {"choices": [{"text": "."}], "usage": {"prompt_tokens": 3, "completion_tokens": 1, "total_tokens": 4}}
+        llm._model = FakeLlama(lambda: completion, latency=0.2)
+        monitor = HealthMonitor(required=["warmup"])
+        
+        task = asyncio.create_task(warm_up(llm, FakeEmbedding(), monitor, languages=[Language.EN, Language.TH]))
+        longest = 0.0
+        while not task.done():
+            started = time.perf_counter()
+            await asyncio.sleep(0.01)
+            monitor.snapshot()
+            longest = max(longest, time.perf_counter() - started)
+        await task
+        
+        # Health checks keep answering while each 0.2 s priming call runs.
+        assert len(llm._model.prompts) == 2
+        assert longest < 0.1
+        assert monitor.ready
+    
+    async def test_failure_reported(self):
+        class BrokenLLM(FakeLLM):
+            def load_model(self) -> None:
+                raise FileNotFoundError("model.gguf")
+        
+        monitor = HealthMonitor(required=["warmup"])
+        
+        await warm_up(BrokenLLM(), FakeEmbedding(), monitor)
+        
+        result = monitor.snapshot()["checks"]["warmup"]
+        assert result["status"] == "down"
+        assert "model.gguf" in result["detail"]